@@ -0,0 +1,23 @@
+""" Comparative benchmarks of zatom, atom, __slots__, dataclasses and attrs
+
+Usage::
+
+    # Run everything and store a baseline
+    python -m benchmarks run -o baseline.json
+
+    # Run the notify cases on zatom and flag changes over 5%
+    python -m benchmarks run -k notify -t zatom -o current.json --baseline baseline.json
+
+    # Compare two stored results
+    python -m benchmarks compare baseline.json current.json --threshold 5
+
+Timings are the best per operation time in ns over the repeats. The
+tracemalloc peak of one batch and the bytes per instance of construction
+cases are recorded next to them.
+
+"""
+from .cases import CASES, select
+from .compare import compare, format_changes, regressions
+from .runner import load, run, save
+
+__all__ = ("CASES", "select", "run", "load", "save", "compare", "format_changes", "regressions")
@@ -0,0 +1,71 @@
+""" Command line interface of the benchmarks. See python -m benchmarks --help """
+import argparse
+import sys
+
+from .cases import select
+from .compare import DEFAULT_METRICS, METRICS, compare, format_changes, regressions
+from .runner import load, run, save
+from .targets import all_targets, get_targets
+
+
+def compare_command(args, baseline: dict, results: dict) -> int:
+    changes = compare(baseline, results, args.threshold, tuple(args.metric or DEFAULT_METRICS), args.target)
+    print(format_changes(changes, args.verbose))
+    return 1 if regressions(changes) else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_compare_options(p):
+        p.add_argument("--threshold", type=float, default=5.0, help="Percent increase flagged as a regression")
+        p.add_argument("--metric", action="append", choices=METRICS, help="Metrics to compare (default: ns and instance_bytes)")
+        p.add_argument("-v", "--verbose", action="store_true", help="Show every change, not only significant ones")
+
+    p = commands.add_parser("run", help="Run the benchmarks")
+    p.add_argument("-k", "--filter", help="Only run cases whose id contains this")
+    p.add_argument("-t", "--target", action="append", help="Only run on this target. Can be repeated")
+    p.add_argument("-r", "--repeat", type=int, default=5, help="Number of timing repeats")
+    p.add_argument("-s", "--scale", type=float, default=1.0, help="Scale the iterations of every case")
+    p.add_argument("-o", "--output", help="Write the results to this JSON file")
+    p.add_argument("--baseline", help="Compare the results with this JSON file")
+    add_compare_options(p)
+
+    p = commands.add_parser("compare", help="Compare stored results with a baseline")
+    p.add_argument("baseline")
+    p.add_argument("results")
+    p.add_argument("-t", "--target", action="append", help="Only compare this target. Can be repeated")
+    add_compare_options(p)
+
+    p = commands.add_parser("list", help="List the cases and available targets")
+    p.add_argument("-k", "--filter", help="Only list cases whose id contains this")
+
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        for case in select(args.filter):
+            print(case.id)
+        available = {t.name for t in get_targets()}
+        for target in all_targets():
+            print(f"target {target.name}: {'available' if target.name in available else 'not installed'}")
+        return 0
+    try:
+        baseline = load(args.baseline) if args.baseline else None
+        if args.command == "compare":
+            return compare_command(args, baseline, load(args.results))
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    try:
+        results = run(args.filter, args.target, args.repeat, args.scale, progress=print)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.output:
+        save(results, args.output)
+    if baseline is not None:
+        return compare_command(args, baseline, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
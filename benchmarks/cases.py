@@ -0,0 +1,342 @@
+""" Benchmark cases
+
+A case sets up the statement to time for a target. The setup returns a
+:class:`Bench` or None if the case does not apply to the target.
+
+"""
+import copy
+import gc
+import pickle
+from typing import Callable, Optional
+
+from .targets import VALUES, Target
+
+
+class Bench:
+    """ A statement timed with timeit in the given namespace """
+
+    def __init__(self, stmt: str, namespace: dict, factory: Optional[Callable] = None):
+        self.stmt = stmt
+        self.namespace = namespace
+        #: Creates one instance to measure the per instance memory
+        self.factory = factory
+
+
+class Case:
+    def __init__(self, group: str, name: str, setup: Callable, number: int, observable: bool):
+        self.group = group
+        self.name = name
+        self.setup = setup
+        #: Number of times the statement is executed per repeat
+        self.number = number
+        #: Only run on targets that support members and observers
+        self.observable = observable
+
+    @property
+    def id(self) -> str:
+        return f"{self.group}/{self.name}"
+
+    def supports(self, target: Target) -> bool:
+        return target.observable or not self.observable
+
+    def __repr__(self) -> str:
+        return f"<Case {self.id}>"
+
+
+CASES: list = []
+
+
+def case(group: str, name: str, number: int = 10_000, observable: bool = False):
+    """ Register a case setup function """
+
+    def decorator(setup: Callable) -> Callable:
+        CASES.append(Case(group, name, setup, number, observable))
+        return setup
+
+    return decorator
+
+
+def fields(kind: str, n: int, prefix: str = "f") -> dict:
+    return {f"{prefix}{i}": kind for i in range(n)}
+
+
+# Every kind of field once
+MIXED = {f"m_{kind}": kind for kind in VALUES}
+
+
+# --------------------------------------------------------------------------
+# Construction
+# --------------------------------------------------------------------------
+def add_construct_case(nkwargs: int):
+    @case("construct", f"kwargs-{nkwargs}")
+    def setup(target: Target) -> Bench:
+        cls = target.define("Construct", fields("int", 30))
+        kwargs = {f"f{i}": i for i in range(nkwargs)}
+        return Bench("cls(**kwargs)", {"cls": cls, "kwargs": kwargs}, lambda: cls(**kwargs))
+
+
+for nkwargs in (0, 1, 5, 10, 20, 30):
+    add_construct_case(nkwargs)
+
+
+def add_layout_case(name: str, layout: dict):
+    @case("memory", name)
+    def setup(target: Target) -> Bench:
+        cls = target.define(name.title(), layout)
+        kwargs = {f: VALUES[kind][0] for f, kind in layout.items()}
+        return Bench("cls(**kwargs)", {"cls": cls, "kwargs": kwargs}, lambda: cls(**kwargs))
+
+
+for name, layout in (
+    ("small", fields("int", 3)),
+    ("wide", fields("int", 30)),
+    ("flags", fields("bool", 8)),
+    ("mixed", MIXED),
+):
+    add_layout_case(name, layout)
+
+
+# --------------------------------------------------------------------------
+# Member access
+# --------------------------------------------------------------------------
+def add_access_cases(kind: str):
+    @case("get", kind)
+    def get(target: Target) -> Bench:
+        obj = target.define("Get", {"x": kind})()
+        obj.x = VALUES[kind][0]
+        return Bench("obj.x", {"obj": obj})
+
+    @case("get-default", kind)
+    def get_default(target: Target) -> Bench:
+        # Reads the default of an unset member on atoms
+        obj = target.define("GetDefault", {"x": kind})()
+        return Bench("obj.x", {"obj": obj})
+
+    @case("set", kind)
+    def set_value(target: Target) -> Bench:
+        obj = target.define("Set", {"x": kind})()
+        a, b = VALUES[kind]
+        return Bench("obj.x = a; obj.x = b", {"obj": obj, "a": a, "b": b})
+
+
+for kind in VALUES:
+    add_access_cases(kind)
+
+
+def add_storage_case(name: str, kind: str):
+    @case("storage", name)
+    def setup(target: Target) -> Bench:
+        # zatom packs bool members into one static slot and stores values as pointers
+        obj = target.define("Storage", fields(kind, 8))()
+        stmt = "; ".join(f"obj.f{i} = v" for i in range(8))
+        return Bench(f"{stmt}; obj.f0; obj.f7", {"obj": obj, "v": True})
+
+
+add_storage_case("static", "bool")
+add_storage_case("pointer", "value")
+
+
+# --------------------------------------------------------------------------
+# Notifications
+# --------------------------------------------------------------------------
+def observer(change):
+    pass
+
+
+@case("notify", "static", observable=True)
+def notify_static(target: Target) -> Bench:
+    api = target.api
+
+    class Obj(api.Atom):
+        x = api.Int()
+
+        @api.observe("x")
+        def on_change(self, change):
+            pass
+
+    return Bench("obj.x += 1", {"obj": Obj()})
+
+
+@case("notify", "method", observable=True)
+def notify_method(target: Target) -> Bench:
+    api = target.api
+
+    class Obj(api.Atom):
+        x = api.Int()
+
+        def _observe_x(self, change):
+            pass
+
+    return Bench("obj.x += 1", {"obj": Obj()})
+
+
+@case("notify", "dynamic", observable=True)
+def notify_dynamic(target: Target) -> Bench:
+    api = target.api
+
+    class Obj(api.Atom):
+        x = api.Int()
+
+    obj = Obj()
+    obj.observe("x", observer)
+    return Bench("obj.x += 1", {"obj": obj})
+
+
+@case("notify", "extended", observable=True)
+def notify_extended(target: Target) -> Bench:
+    api = target.api
+
+    class Point(api.Atom):
+        x = api.Int()
+
+    class Obj(api.Atom):
+        pos = api.Typed(Point, ())
+
+        @api.observe("pos.x")
+        def on_change(self, change):
+            pass
+
+    return Bench("obj.pos.x += 1", {"obj": Obj()})
+
+
+@case("notify", "event", observable=True)
+def notify_event(target: Target) -> Bench:
+    api = target.api
+
+    class Obj(api.Atom):
+        clicked = api.Event()
+
+    obj = Obj()
+    obj.clicked.bind(observer)
+    return Bench("obj.clicked(1)", {"obj": obj})
+
+
+@case("notify", "property", observable=True)
+def notify_property(target: Target) -> Bench:
+    api = target.api
+
+    def get_total(self):
+        return self.a * 2
+
+    namespace = {"a": api.Int()}
+    try:
+        namespace["total"] = api.Property(get_total, cached=True, depends_on=("a",))
+    except TypeError:
+        # atom has no property dependencies so reset it from an observer
+        def reset_total(self, change):
+            self.get_member("total").reset(self)
+
+        namespace["total"] = api.Property(get_total, cached=True)
+        namespace["reset_total"] = api.observe("a")(reset_total)
+    obj = type("Obj", (api.Atom,), namespace)()
+    obj.observe("total", observer)
+    return Bench("obj.a += 1; obj.total", {"obj": obj})
+
+
+@case("notify", "unobserved", observable=True)
+def notify_unobserved(target: Target) -> Bench:
+    # The cost of checking for observers when there are none
+    api = target.api
+
+    class Obj(api.Atom):
+        x = api.Int()
+
+    return Bench("obj.x += 1", {"obj": Obj()})
+
+
+# --------------------------------------------------------------------------
+# Containers
+# --------------------------------------------------------------------------
+@case("container", "list-append")
+def list_append(target: Target) -> Bench:
+    obj = target.define("Container", {"items": "list"})()
+    return Bench("obj.items.append(1)", {"obj": obj})
+
+
+@case("container", "list-extend", number=1000)
+def list_extend(target: Target) -> Bench:
+    obj = target.define("Container", {"items": "list"})()
+    return Bench("obj.items = []; obj.items.extend(values)", {"obj": obj, "values": list(range(100))})
+
+
+@case("container", "list-iterate", number=1000)
+def list_iterate(target: Target) -> Bench:
+    obj = target.define("Container", {"items": "list"})(items=list(range(100)))
+    return Bench("for i in obj.items: pass", {"obj": obj})
+
+
+@case("container", "dict-setitem")
+def dict_setitem(target: Target) -> Bench:
+    obj = target.define("Container", {"items": "dict"})()
+    return Bench("obj.items['a'] = 1", {"obj": obj})
+
+
+@case("container", "set-add")
+def set_add(target: Target) -> Bench:
+    obj = target.define("Container", {"items": "set"})()
+    return Bench("obj.items.add(1)", {"obj": obj})
+
+
+@case("container", "typed-list-append", observable=True)
+def typed_list_append(target: Target) -> Bench:
+    api = target.api
+
+    class Obj(api.Atom):
+        items = api.List(api.Int())
+
+    return Bench("obj.items.append(1)", {"obj": Obj()})
+
+
+# --------------------------------------------------------------------------
+# Classes and instances
+# --------------------------------------------------------------------------
+@case("class", "create", number=200)
+def class_create(target: Target) -> Bench:
+    return Bench("define('Create', layout)", {"define": target.define, "layout": MIXED})
+
+
+@case("class", "subclass", number=200)
+def class_subclass(target: Target) -> Bench:
+    if not target.observable:
+        return None
+    base = target.define("Base", fields("int", 20))
+    return Bench("type('Sub', (base,), {'x': member()})", {"base": base, "member": target.api.Int})
+
+
+def add_copy_case(name: str, stmt: str):
+    @case("copy", name, number=1000)
+    def setup(target: Target) -> Bench:
+        layout = {"a": "int", "b": "str", "c": "float", "d": "list", "e": "tuple"}
+        cls = target.define("Copy", layout)
+        obj = cls(**{f: VALUES[kind][0] for f, kind in layout.items()})
+        namespace = {"obj": obj, "copy": copy.copy, "deepcopy": copy.deepcopy, "dumps": pickle.dumps, "loads": pickle.loads}
+        # Make sure the round trip keeps the values
+        result = eval(stmt, namespace)
+        for f in layout:
+            if getattr(result, f) != getattr(obj, f):
+                raise AssertionError(f"{stmt} did not keep the value of {f}")
+        return Bench(stmt, namespace)
+
+
+add_copy_case("pickle", "loads(dumps(obj))")
+add_copy_case("copy", "copy(obj)")
+add_copy_case("deepcopy", "deepcopy(obj)")
+
+
+@case("gc", "collect", number=10)
+def gc_collect(target: Target) -> Bench:
+    # Instances with containers are tracked by the gc
+    cls = target.define("Tracked", {"a": "int", "items": "list", "data": "dict"})
+    objs = [cls() for i in range(10_000)]
+    return Bench("collect()", {"objs": objs, "collect": gc.collect})
+
+
+@case("gc", "create-destroy", number=100)
+def create_destroy(target: Target) -> Bench:
+    cls = target.define("Point", fields("int", 3))
+    return Bench("items = [cls() for i in r]; del items", {"cls": cls, "r": range(1000)})
+
+
+def select(pattern: Optional[str] = None) -> list:
+    """ Get the cases whose id contains the pattern """
+    return [c for c in CASES if not pattern or pattern in c.id]
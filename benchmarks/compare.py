@@ -0,0 +1,106 @@
+""" Compare benchmark results with a baseline """
+from typing import Optional
+
+# Metrics where a higher value is worse
+METRICS = ("ns", "median_ns", "peak_bytes", "instance_bytes")
+DEFAULT_METRICS = ("ns", "instance_bytes")
+
+
+class Change:
+    """ The change of one metric of a case on a target """
+
+    def __init__(self, case: str, target: str, metric: str, old: float, new: float, threshold: float):
+        self.case = case
+        self.target = target
+        self.metric = metric
+        self.old = old
+        self.new = new
+        if old:
+            self.percent = (new - old) / old * 100
+        else:
+            self.percent = 0.0 if new == old else float("inf")
+        self.regression = self.percent > threshold
+        self.improvement = self.percent < -threshold
+
+    def __repr__(self) -> str:
+        return f"<Change {self.case} {self.target} {self.metric} {self.percent:+.1f}%>"
+
+
+class ErrorChange:
+    """ A case that started or stopped failing on a target
+
+    A case that fails where the baseline did not is a regression. One that
+    no longer fails is an improvement. The metrics are not compared.
+
+    """
+
+    metric = "error"
+
+    def __init__(self, case: str, target: str, old: Optional[str], new: Optional[str]):
+        self.case = case
+        self.target = target
+        self.old = old
+        self.new = new
+        self.regression = new is not None
+        self.improvement = new is None
+
+    def __repr__(self) -> str:
+        state = "fails" if self.regression else "fixed"
+        return f"<ErrorChange {self.case} {self.target} {state}>"
+
+
+def compare(
+    baseline: dict,
+    results: dict,
+    threshold: float = 5.0,
+    metrics: tuple = DEFAULT_METRICS,
+    targets: Optional[list] = None,
+) -> list:
+    """ Compare the metrics of every case and target found in both results
+
+    A change is a regression when the metric increased by more than
+    threshold percent or when the case fails on a target where the
+    baseline did not.
+
+    """
+    changes = []
+    old_results = baseline["results"]
+    for case, entry in results["results"].items():
+        old_entry = old_results.get(case)
+        if old_entry is None:
+            continue
+        for target, result in entry.items():
+            if targets and target not in targets:
+                continue
+            old = old_entry.get(target)
+            if old is None:
+                continue
+            if "error" in old or "error" in result:
+                if old.get("error") is None or result.get("error") is None:
+                    changes.append(ErrorChange(case, target, old.get("error"), result.get("error")))
+                continue
+            for metric in metrics:
+                if metric in old and metric in result:
+                    changes.append(Change(case, target, metric, old[metric], result[metric], threshold))
+    return changes
+
+
+def regressions(changes: list) -> list:
+    return [c for c in changes if c.regression]
+
+
+def format_changes(changes: list, verbose: bool = False) -> str:
+    """ Format the changes as a table. Only significant changes are shown unless verbose. """
+    lines = []
+    for c in changes:
+        if not (verbose or c.regression or c.improvement):
+            continue
+        flag = "REGRESSION" if c.regression else ("improved" if c.improvement else "")
+        if isinstance(c, ErrorChange):
+            state = f"error: {c.new}" if c.regression else "no longer fails"
+            lines.append(f"{c.case:<28} {c.target:<10} {state} {flag}")
+            continue
+        lines.append(f"{c.case:<28} {c.target:<10} {c.metric:<15} {c.old:>12.1f} {c.new:>12.1f} {c.percent:>+8.1f}% {flag}")
+    n = len(regressions(changes))
+    lines.append(f"{len(changes)} compared, {n} regression{'' if n == 1 else 's'}")
+    return "\n".join(lines)
@@ -0,0 +1,146 @@
+""" Run the benchmark cases and collect the results """
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Callable, Optional
+
+from .cases import Case, select
+from .targets import Target, get_targets
+
+# Increased when the layout of the results changes
+FORMAT_VERSION = 1
+
+
+def traced_peak(timer: timeit.Timer, number: int) -> int:
+    """ Peak bytes allocated while running the statement number times """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        timer.timeit(number)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - start)
+
+
+def instance_bytes(factory: Callable, n: int = 1000) -> float:
+    """ Average bytes allocated per instance created by the factory """
+    factory()  # Populate any caches
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        objs = [factory() for i in range(n)]
+        # Only count what is still alive
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - start - sys.getsizeof(objs)
+    finally:
+        tracemalloc.stop()
+    del objs
+    return round(used / n, 1)
+
+
+def run_case(case: Case, target: Target, repeat: int = 5, scale: float = 1.0) -> Optional[dict]:
+    """ Time a case on a target. Returns None if it does not apply. """
+    bench = case.setup(target)
+    if bench is None:
+        return None
+    number = max(1, int(case.number * scale))
+    timer = timeit.Timer(bench.stmt, globals=bench.namespace)
+    per_op = sorted(t / number * 1e9 for t in timer.repeat(repeat=repeat, number=number))
+    result = {
+        "ns": round(per_op[0], 2),
+        "median_ns": round(statistics.median(per_op), 2),
+        "number": number,
+        "repeat": repeat,
+        "peak_bytes": traced_peak(timer, number),
+    }
+    if bench.factory is not None:
+        result["instance_bytes"] = instance_bytes(bench.factory)
+    return result
+
+
+def run(
+    pattern: Optional[str] = None,
+    targets: Optional[list] = None,
+    repeat: int = 5,
+    scale: float = 1.0,
+    progress: Optional[Callable] = None,
+) -> dict:
+    """ Run the cases matching the pattern on the given targets
+
+    Returns the results as {"meta": {...}, "results": {case: {target: result}}}.
+    A case that fails on a target records the error instead of a result.
+
+    """
+    available = get_targets(targets)
+    results = {}
+    for case in select(pattern):
+        entry = {}
+        for target in available:
+            if not case.supports(target):
+                continue
+            try:
+                result = run_case(case, target, repeat, scale)
+            except Exception as e:
+                result = {"error": f"{type(e).__name__}: {e}"}
+            if result is not None:
+                entry[target.name] = result
+        if entry:
+            results[case.id] = entry
+            if progress is not None:
+                progress(format_case(case.id, entry))
+    return {
+        "format": FORMAT_VERSION,
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "targets": {t.name: t.version() for t in available},
+            "repeat": repeat,
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+
+def format_case(case_id: str, entry: dict) -> str:
+    """ Format the results of a case with each target relative to the first """
+    parts = []
+    reference = None
+    for name, result in entry.items():
+        if "error" in result:
+            parts.append(f"{name}=error")
+            continue
+        text = f"{name}={result['ns']:.1f}ns"
+        if reference is None:
+            reference = result["ns"]
+        elif reference:
+            text += f" ({result['ns'] / reference:.2f}x)"
+        if "instance_bytes" in result:
+            text += f" {result['instance_bytes']:.0f}B"
+        parts.append(text)
+    return f"{case_id:<28} " + " ".join(parts)
+
+
+def save(results: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        results = json.load(f)
+    if results.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a benchmark results file of format {FORMAT_VERSION}")
+    return results
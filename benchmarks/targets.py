@@ -0,0 +1,219 @@
+""" Implementations compared by the benchmarks
+
+Each target defines classes from a mapping of field names to kinds. Targets
+whose package is not installed are reported as unavailable and skipped.
+
+"""
+import dataclasses
+import importlib
+import itertools
+import sys
+from importlib import metadata
+from typing import Optional
+
+
+class Marker:
+    """ Value of instance fields """
+
+
+# Two distinct values of each kind of field
+VALUES = {
+    "int": (1, 2),
+    "float": (1.5, 2.5),
+    "str": ("a", "b"),
+    "bytes": (b"a", b"b"),
+    "bool": (True, False),
+    "enum": ("b", "c"),
+    "range": (1, 2),
+    "tuple": ((1,), (2,)),
+    "list": ([1], [2]),
+    "dict": ({"a": 1}, {"b": 2}),
+    "set": ({1}, {2}),
+    "instance": (Marker(), Marker()),
+    "value": (None, 1),
+}
+
+# Defaults of immutable kinds. Containers get a new empty one per instance.
+DEFAULTS = {
+    "int": 0,
+    "float": 0.0,
+    "str": "",
+    "bytes": b"",
+    "bool": False,
+    "enum": "a",
+    "range": 0,
+    "tuple": (),
+    "instance": None,
+    "value": None,
+}
+FACTORIES = {"list": list, "dict": dict, "set": set}
+
+MEMBERS = {
+    "int": lambda api: api.Int(),
+    "float": lambda api: api.Float(),
+    "str": lambda api: api.Str(),
+    "bytes": lambda api: api.Bytes(),
+    "bool": lambda api: api.Bool(),
+    "enum": lambda api: api.Enum("a", "b", "c"),
+    "range": lambda api: api.Range(0, 100),
+    "tuple": lambda api: api.Tuple(),
+    "list": lambda api: api.List(),
+    "dict": lambda api: api.Dict(),
+    "set": lambda api: api.Set(),
+    "instance": lambda api: api.Instance(Marker),
+    "value": lambda api: api.Value(),
+}
+
+_counter = itertools.count()
+
+
+def register(cls: type) -> type:
+    """ Make a generated class importable from this module so it can be pickled """
+    name = f"{cls.__name__}_{next(_counter)}"
+    cls.__name__ = cls.__qualname__ = name
+    cls.__module__ = __name__
+    setattr(sys.modules[__name__], name, cls)
+    return cls
+
+
+def package_version(name: str) -> str:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class Target:
+    """ An implementation of plain classes with typed fields """
+
+    #: Name used in the results
+    name = ""
+
+    #: Whether instances support members and observers. Cases that test
+    #: notifications are only run on these targets.
+    observable = False
+
+    #: Member api module of observable targets
+    api = None
+
+    def available(self) -> bool:
+        return True
+
+    def version(self) -> str:
+        return sys.version.split()[0]
+
+    def define(self, name: str, fields: dict) -> type:
+        """ Create a class with the given {name: kind} fields """
+        raise NotImplementedError
+
+
+class AtomTarget(Target):
+    """ atom or zatom """
+
+    observable = True
+
+    def __init__(self, name: str):
+        self.name = name
+        try:
+            self.api = importlib.import_module(f"{name}.api")
+        except ImportError:
+            self.api = None
+
+    def available(self) -> bool:
+        return self.api is not None
+
+    def version(self) -> str:
+        return package_version(self.name)
+
+    def define(self, name: str, fields: dict) -> type:
+        members = {f: MEMBERS[kind](self.api) for f, kind in fields.items()}
+        return register(type(name, (self.api.Atom,), members))
+
+
+class SlotsTarget(Target):
+    """ A class with __slots__ and a generated __init__ """
+
+    name = "slots"
+
+    def define(self, name: str, fields: dict) -> type:
+        params = []
+        lines = []
+        for f, kind in fields.items():
+            if kind in FACTORIES:
+                params.append(f"{f}=None")
+                lines.append(f"    self.{f} = {FACTORIES[kind].__name__}() if {f} is None else {f}")
+            else:
+                params.append(f"{f}=_defaults[{kind!r}]")
+                lines.append(f"    self.{f} = {f}")
+        signature = ", ".join(["self", "*", *params] if params else ["self"])
+        source = f"def __init__({signature}):\n" + ("\n".join(lines) or "    pass")
+        namespace = {"_defaults": DEFAULTS}
+        exec(source, namespace)
+        cls = type(name, (), {"__slots__": tuple(fields), "__init__": namespace["__init__"]})
+        return register(cls)
+
+
+class DataclassTarget(Target):
+    """ dataclasses.dataclass(slots=True) """
+
+    name = "dataclass"
+
+    def define(self, name: str, fields: dict) -> type:
+        spec = []
+        for f, kind in fields.items():
+            if kind in FACTORIES:
+                default = dataclasses.field(default_factory=FACTORIES[kind])
+            else:
+                default = dataclasses.field(default=DEFAULTS[kind])
+            spec.append((f, object, default))
+        cls = dataclasses.make_dataclass(name, spec, slots=True, kw_only=True)
+        return register(cls)
+
+
+class AttrsTarget(Target):
+    """ attrs classes with slots """
+
+    name = "attrs"
+
+    def __init__(self):
+        try:
+            self.attr = importlib.import_module("attr")
+        except ImportError:
+            self.attr = None
+
+    def available(self) -> bool:
+        return self.attr is not None
+
+    def version(self) -> str:
+        return package_version("attrs")
+
+    def define(self, name: str, fields: dict) -> type:
+        attr = self.attr
+        spec = {}
+        for f, kind in fields.items():
+            if kind in FACTORIES:
+                spec[f] = attr.ib(factory=FACTORIES[kind], kw_only=True)
+            else:
+                spec[f] = attr.ib(default=DEFAULTS[kind], kw_only=True)
+        return register(attr.make_class(name, spec, slots=True))
+
+
+def all_targets() -> list:
+    return [
+        AtomTarget("zatom"),
+        AtomTarget("atom"),
+        SlotsTarget(),
+        DataclassTarget(),
+        AttrsTarget(),
+    ]
+
+
+def get_targets(names: Optional[list] = None) -> list:
+    """ Get the available targets, optionally only the ones with the given names """
+    targets = [t for t in all_targets() if t.available()]
+    if names:
+        unknown = set(names) - {t.name for t in all_targets()}
+        if unknown:
+            raise ValueError(f"Unknown targets: {', '.join(sorted(unknown))}")
+        targets = [t for t in targets if t.name in names]
+    return targets
@@ -24,5 +24,6 @@ setup(
     build_zig=True,
     ext_modules=ext_modules,
     setup_requires=['setuptools-zig'],
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'tests']),
+    package_data={'zatom': ['include/*.h']},
 )
@@ -13,7 +13,13 @@ const atom = @import("atom.zig");
 const observation = @import("observation.zig");
 const observer_pool = @import("observer_pool.zig");
 const modes = @import("modes.zig");
-const PropertyMember = @import("members/property.zig").PropertyMember;
+const method_wrapper = @import("method_wrapper.zig");
+const stats = @import("stats.zig");
+const tracer = @import("tracer.zig");
+const memory = @import("memory.zig");
+const capi = @import("capi.zig");
+const property = @import("members/property.zig");
+const PropertyMember = property.PropertyMember;
 
 pub const package_name = "zatom";
 
@@ -62,6 +68,10 @@ fn modexec(mod: *py.Module) !c_int {
     errdefer observer_pool.deinitModule(mod);
     try modes.initModule(mod);
     errdefer modes.deinitModule(mod);
+    try method_wrapper.initModule(mod);
+    errdefer method_wrapper.deinitModule(mod);
+    try capi.initModule(mod);
+    errdefer capi.deinitModule(mod);
 
     const builtins = try py.importModule("builtins");
     defer builtins.decref();
@@ -90,6 +100,26 @@ pub fn reset_property(_: *Module, args: [*]*Object, n: isize) ?*Object {
     return PropertyMember.Impl.reset(@ptrCast(args[0]), @ptrCast(args[1]));
 }
 
+pub fn set_property_cache_budget(_: *Module, args: *Tuple, kwargs: ?*Dict) ?*Object {
+    const kwlist = [_:null][*c]const u8{
+        "nbytes",
+        "sizeof",
+    };
+    var nbytes: ?*Object = null;
+    var sizeof: ?*Object = null;
+    py.parseTupleAndKeywords(args, kwargs, "O|O", @ptrCast(&kwlist), .{ &nbytes, &sizeof }) catch return null;
+    if (!py.Int.check(nbytes.?) or (py.notNone(sizeof) and !sizeof.?.isCallable())) {
+        return py.typeErrorObject(null, "Invalid arguments. Signature is set_property_cache_budget(nbytes: int, sizeof: Optional[Callable[[object], int]] = None)", .{});
+    }
+    const limit = py.Int.as(@ptrCast(nbytes.?), usize) catch return null;
+    property.setCacheBudget(limit, if (py.notNone(sizeof)) sizeof.? else null);
+    return py.returnNone();
+}
+
+pub fn property_cache_info(_: *Module, _: ?*Object) ?*Object {
+    return @ptrCast(property.cacheInfo() catch null);
+}
+
 pub fn observe(_: *Module, args: *Tuple, kwargs: ?*Dict) ?*Object {
     return observation.ObserveHandler.TypeObject.?.call(args, kwargs) catch return null;
 }
@@ -97,7 +127,19 @@ pub fn observe(_: *Module, args: *Tuple, kwargs: ?*Dict) ?*Object {
 var module_methods = [_]py.MethodDef{
     .{ .ml_name = "add_member", .ml_meth = @constCast(@ptrCast(&add_member)), .ml_flags = py.c.METH_FASTCALL, .ml_doc = "Add an atom member to a class" },
     .{ .ml_name = "reset_property", .ml_meth = @constCast(@ptrCast(&reset_property)), .ml_flags = py.c.METH_FASTCALL, .ml_doc = "Reset the cached value of a property and notify observers" },
+    .{ .ml_name = "set_property_cache_budget", .ml_meth = @constCast(@ptrCast(&set_property_cache_budget)), .ml_flags = py.c.METH_VARARGS | py.c.METH_KEYWORDS, .ml_doc = "Set the maximum number of bytes held by cached property values. Least recently used values are evicted when exceeded. Use 0 for no limit. Sizes are estimated with sys.getsizeof, which does not include the items of containers, unless a sizeof function is given." },
+    .{ .ml_name = "property_cache_info", .ml_meth = @constCast(@ptrCast(&property_cache_info)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Get the budget, size and number of cached property values tracked for eviction" },
     .{ .ml_name = "observe", .ml_meth = @constCast(@ptrCast(&observe)), .ml_flags = py.c.METH_VARARGS | py.c.METH_KEYWORDS, .ml_doc = "Add a static observer on a method" },
+    .{ .ml_name = "enable_stats", .ml_meth = @constCast(@ptrCast(&stats.enable_stats)), .ml_flags = py.c.METH_FASTCALL, .ml_doc = "Count the operations on the members of the given class and its subclasses or of all classes if None" },
+    .{ .ml_name = "disable_stats", .ml_meth = @constCast(@ptrCast(&stats.disable_stats)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Stop counting member operations and discard the counters" },
+    .{ .ml_name = "reset_stats", .ml_meth = @constCast(@ptrCast(&stats.reset_stats)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Reset the member operation counters to zero" },
+    .{ .ml_name = "stats_snapshot", .ml_meth = @constCast(@ptrCast(&stats.stats_snapshot)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Get the member operation counters as {cls: {member: {counter: value}}}" },
+    .{ .ml_name = "enable_tracer", .ml_meth = @constCast(@ptrCast(&tracer.enable_tracer)), .ml_flags = py.c.METH_VARARGS | py.c.METH_KEYWORDS, .ml_doc = "Record notification spans in a ring buffer of the given capacity, tracing 1 in sample root notifications" },
+    .{ .ml_name = "disable_tracer", .ml_meth = @constCast(@ptrCast(&tracer.disable_tracer)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Stop recording notification spans. Recorded spans are kept until cleared" },
+    .{ .ml_name = "clear_tracer", .ml_meth = @constCast(@ptrCast(&tracer.clear_tracer)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Discard the recorded spans and observer histograms" },
+    .{ .ml_name = "tracer_export", .ml_meth = @constCast(@ptrCast(&tracer.tracer_export)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Get the recorded spans as a Chrome trace event JSON string" },
+    .{ .ml_name = "tracer_histograms", .ml_meth = @constCast(@ptrCast(&tracer.tracer_histograms)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Get the observer call latencies as {observer: {'count': n, 'total_ns': t, 'buckets': [...]}} where bucket i counts calls under 2**i ns" },
+    .{ .ml_name = "memory_report", .ml_meth = @constCast(@ptrCast(&memory.memory_report)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Get the memory used by the live instances of every atom class as {cls: report}" },
     .{}, // sentinel
 };
 
@@ -11,6 +11,11 @@ const AtomMeta = @import("atom_meta.zig").AtomMeta;
 const MemberBase = @import("member.zig").MemberBase;
 const ObserverPool = @import("observer_pool.zig").ObserverPool;
 const ChangeType = @import("observer_pool.zig").ChangeType;
+const default_change_types = @import("observer_pool.zig").default_change_types;
+const method_wrapper = @import("method_wrapper.zig");
+const property = @import("members/property.zig");
+const tracer = @import("tracer.zig");
+const stats = @import("stats.zig");
 const package_name = @import("api.zig").package_name;
 
 // If slot count is over this it will use a data pointer
@@ -61,7 +66,18 @@ pub const Atom = extern struct {
             return py.typeErrorObject(null, "atom meta", .{});
         }
         const meta: *AtomMeta = @ptrCast(cls);
-        const self: *Self = @ptrCast(cls.genericNew(args, kwargs) catch return null);
+        const self: *Self = blk: {
+            if (meta.popFreeInstance()) |item| {
+                item.reuse(meta);
+                break :blk item;
+            }
+            const item: *Self = @ptrCast(cls.genericNew(args, kwargs) catch return null);
+            if (meta.info.gc_untracked) {
+                item.gcUntrack();
+            }
+            break :blk item;
+        };
+        meta.live_count += 1;
         self.info.slot_count = meta.info.slot_count;
         if (comptime slot_type == .pointer) {
             const byte_count = self.info.slot_count * @sizeOf(*Object);
@@ -95,6 +111,27 @@ pub const Atom = extern struct {
         return 0;
     }
 
+    // Reset an instance taken from the class free list to the state genericNew returns.
+    // PyObject_Init takes the type reference back and registers the new reference.
+    inline fn reuse(self: *Self, meta: *AtomMeta) void {
+        _ = py.c.PyObject_Init(@ptrCast(self), @ptrCast(meta));
+        self.info = .{};
+        const slots: [*]?*Object = @ptrCast(&self.slots);
+        @memset(slots[0..@max(meta.info.slot_count, 1)], null);
+        if (!meta.info.gc_untracked) {
+            py.c.PyObject_GC_Track(@ptrCast(self));
+        }
+    }
+
+    // Atoms of acyclic classes are not tracked by the gc. Subclasses of the
+    // scalar types may have a __dict__ that refers back to the atom so start
+    // tracking it once it holds one.
+    pub inline fn trackReferent(self: *Self, value: *Object) void {
+        if (py.c.PyObject_IS_GC(@ptrCast(value)) != 0 and py.c.PyObject_GC_IsTracked(@ptrCast(self)) == 0) {
+            py.c.PyObject_GC_Track(@ptrCast(self));
+        }
+    }
+
     // Get a pointer to slot address at the given index
     pub inline fn slotPtr(self: *Self, member: *MemberBase) py.Error!*?*Object {
         if (member.info.storage_mode != .none) {
@@ -111,6 +148,21 @@ pub const Atom = extern struct {
         unreachable;
     }
 
+    // The pool index is the atom's entry in the side table of the class's
+    // PoolManager. It is shared by the dynamic observer pool and the atomref
+    // and is held while the atom has either one.
+    pub inline fn hasPoolIndex(self: Self) bool {
+        return self.info.has_observers or self.info.has_atomref;
+    }
+
+    fn acquirePoolIndex(self: *Self) !void {
+        if (!self.hasPoolIndex()) {
+            const meta: *AtomMeta = @ptrCast(self.typeref());
+            std.debug.assert(meta.typeCheckSelf());
+            self.info.pool_index = try meta.pool_manager.?.acquire(py.allocator);
+        }
+    }
+
     // Get a pointer to the ObserverPool from the manager on the type.
     pub inline fn dynamicObserverPool(self: Self) ?*ObserverPool {
         if (self.info.has_observers) {
@@ -149,6 +201,14 @@ pub const Atom = extern struct {
         return false;
     }
 
+    // Get a borrowed reference to the dynamic observer with the given hash
+    pub fn getDynamicObserver(self: *Self, topic: *Str, observer_hash: isize) !?*Object {
+        if (self.dynamicObserverPool()) |pool| {
+            return try pool.getObserver(topic, observer_hash);
+        }
+        return null;
+    }
+
     pub fn hasStaticObservers(self: *Self, topic: *Str, change_types: u8) !bool {
         if (self.staticObserverPool()) |pool| {
             return try pool.hasAnyObserver(topic, change_types);
@@ -163,10 +223,12 @@ pub const Atom = extern struct {
     // Assumes caller has checked observer is callable or str
     pub fn addDynamicObserver(self: *Self, topic: *Str, observer: *Object, change_types: u8) py.Error!void {
         if (!self.info.has_observers) {
-            const meta: *AtomMeta = @ptrCast(self.typeref());
-            std.debug.assert(meta.typeCheckSelf());
-            self.info.pool_index = try meta.pool_manager.?.acquire(py.allocator);
+            try self.acquirePoolIndex();
             self.info.has_observers = true;
+            // Observers may reference the atom so the gc must be able to see it
+            if (py.c.PyObject_GC_IsTracked(@ptrCast(self)) == 0) {
+                py.c.PyObject_GC_Track(@ptrCast(self));
+            }
         }
         const pool = self.dynamicObserverPool().?;
         try pool.addObserver(py.allocator, topic, observer, change_types);
@@ -178,6 +240,12 @@ pub const Atom = extern struct {
         }
     }
 
+    pub fn removeDynamicObserverFromAllTopics(self: *Self, observer: *Object) !void {
+        if (self.dynamicObserverPool()) |pool| {
+            try pool.removeObserverFromAllTopics(py.allocator, observer);
+        }
+    }
+
     pub fn removeTopic(self: *Self, topic: *Str) !void {
         if (self.dynamicObserverPool()) |pool| {
             try pool.removeTopic(py.allocator, topic);
@@ -191,11 +259,19 @@ pub const Atom = extern struct {
     }
 
     pub fn notifyInternal(self: *Self, topic: *Str, args: anytype, change_types: u8) !void {
+        const span = tracer.beginNotify();
+        defer tracer.endNotify(span, self, topic, change_types);
+        try self.notifyObservers(topic, args, change_types, null);
+    }
+
+    // Call the observers in the static pool followed by the dynamic pool.
+    // Each call is counted in calls if given.
+    pub fn notifyObservers(self: *Self, topic: *Str, args: anytype, change_types: u8, calls: stats.CallCounter) !void {
         if (self.staticObserverPool()) |pool| {
-            try pool.notify(py.allocator, topic, args, change_types);
+            try pool.notify(py.allocator, topic, args, change_types, calls);
         }
         if (self.dynamicObserverPool()) |pool| {
-            try pool.notify(py.allocator, topic, args, change_types);
+            try pool.notify(py.allocator, topic, args, change_types, calls);
         }
     }
 
@@ -222,23 +298,39 @@ pub const Atom = extern struct {
         return py.returnBool(self.hasDynamicObserver(@ptrCast(args[0]), args[1], @intFromEnum(ChangeType.ANY)) catch return null);
     }
 
-    pub fn observe(self: *Self, args: [*]*Object, n: isize) ?*Object {
-        const msg = "Invalid arguments. Signature is observe(topics: str | Iterable[str], observer: Callable, change_types: int=0xff)";
-        if (n < 2 or n > 3 or !args[1].isCallable()) {
+    pub fn observe(self: *Self, args: *Tuple, kwargs: ?*Dict) ?*Object {
+        const msg = "Invalid arguments. Signature is observe(topics: str | Iterable[str], observer: Callable, change_types: int=0xdf, *, weak: Optional[bool]=None)";
+        const kwlist = [_:null][*c]const u8{ "topics", "observer", "change_types", "weak" };
+        var topic: *Object = undefined;
+        var observer: *Object = undefined;
+        var change_types_obj: ?*Object = null;
+        var weak_obj: ?*Object = null;
+        py.parseTupleAndKeywords(args, kwargs, "OO|O$O", @ptrCast(&kwlist), .{ &topic, &observer, &change_types_obj, &weak_obj }) catch return null;
+        if (!observer.isCallable()) {
             return py.typeErrorObject(null, msg, .{});
         }
-        const topic = args[0];
-        const callback = args[1];
         const change_types: u8 = blk: {
-            if (n == 3) {
-                const v = args[2];
+            if (change_types_obj) |v| {
                 if (!Int.check(v)) {
                     return py.typeErrorObject(null, msg, .{});
                 }
                 break :blk Int.as(@ptrCast(v), u8) catch return null;
             }
-            break :blk @intFromEnum(ChangeType.ANY);
+            break :blk default_change_types;
+        };
+
+        // Bound methods of atoms are held weakly unless requested otherwise
+        const weak = blk: {
+            if (weak_obj) |v| {
+                if (!v.isNone()) {
+                    break :blk v.evalsTrue() catch return null;
+                }
+            }
+            break :blk method_wrapper.isAtomMethod(observer);
         };
+        const callback = if (weak) method_wrapper.newWeakMethod(observer) catch return null else observer.newref();
+        defer callback.decref();
+
         if (Str.check(topic)) {
             self.addDynamicObserver(@ptrCast(topic), callback, change_types) catch return null;
         } else {
@@ -279,7 +371,14 @@ pub const Atom = extern struct {
             return py.typeErrorObject(null, "Invalid arguments. Signature is notify(topic: str, change = None)", .{});
         }
         const topic: *Str = @ptrCast(args[0]);
-        if (n == 2) {
+        const meta: *AtomMeta = @ptrCast(self.typeref());
+        if (meta.findMember(topic)) |member| {
+            if (n == 2) {
+                member.notifyAll(self, .{args[1]}, @intFromEnum(ChangeType.ANY)) catch return null;
+            } else {
+                member.notifyAll(self, .{}, @intFromEnum(ChangeType.ANY)) catch return null;
+            }
+        } else if (n == 2) {
             self.notifyInternal(topic, .{args[1]}, @intFromEnum(ChangeType.ANY)) catch return null;
         } else {
             self.notifyInternal(topic, .{}, @intFromEnum(ChangeType.ANY)) catch return null;
@@ -317,18 +416,67 @@ pub const Atom = extern struct {
         return @ptrCast(Int.newUnchecked(size));
     }
 
+    // Installed on classes using slot reads. Their members are shadowed by
+    // read only slot descriptors so writes to those are sent to the member
+    // to be validated.
+    pub fn setattro(self: *Self, name: *Object, value: ?*Object) c_int {
+        const meta: *AtomMeta = @ptrCast(self.typeref());
+        if (Str.check(name)) {
+            if (py.c._PyType_Lookup(@ptrCast(meta), @ptrCast(name))) |descr| {
+                if (meta.slotReadMember(@ptrCast(descr))) |member| {
+                    const set = member.typeref().impl.tp_descr_set.?;
+                    return set(@ptrCast(member), @ptrCast(self), @ptrCast(value));
+                }
+            }
+        }
+        return py.c.PyObject_GenericSetAttr(@ptrCast(self), @ptrCast(name), @ptrCast(value));
+    }
+
+    // The __getattr__ of classes using slot reads. Python only calls it when
+    // the normal lookup fails, which for a slot descriptor means the slot is
+    // empty, so the member creates the default.
+    pub fn getattr(self: *Self, name: *Object) ?*Object {
+        if (!Str.check(name)) {
+            return py.typeErrorObject(null, "attribute name must be a string", .{});
+        }
+        const meta: *AtomMeta = @ptrCast(self.typeref());
+        if (py.c._PyType_Lookup(@ptrCast(meta), @ptrCast(name))) |descr| {
+            if (meta.slotReadMember(@ptrCast(descr))) |member| {
+                const get = member.typeref().impl.tp_descr_get.?;
+                return @ptrCast(get(@ptrCast(member), @ptrCast(self), @ptrCast(meta)));
+            }
+        }
+        const attr: *Str = @ptrCast(name);
+        return py.attributeErrorObject(null, "'{s}' object has no attribute '{s}'", .{ self.typeName(), attr.data() });
+    }
+
+    var getattr_def = py.MethodDef{ .ml_name = "__getattr__", .ml_meth = @constCast(@ptrCast(&getattr)), .ml_flags = py.c.METH_O, .ml_doc = "Create the default of a member whose slot is empty" };
+
+    // Method descriptor for getattr added to the dict of classes using slot reads
+    pub var getattr_descr: ?*Object = null;
+
     // --------------------------------------------------------------------------
     // Type def
     // --------------------------------------------------------------------------
     pub fn dealloc(self: *Self) void {
+        const has_pool_index = self.hasPoolIndex();
         if (self.info.has_atomref) {
             AtomRef.release(self);
         }
         self.gcUntrack();
         _ = self.clear();
-        if (self.dynamicObserverPool() != null) {
-            const meta: *AtomMeta = @ptrCast(self.typeref());
-            meta.pool_manager.?.release(py.allocator, self.info.pool_index) catch {};
+        const meta: *AtomMeta = @ptrCast(self.typeref());
+        meta.live_count -|= 1;
+        if (has_pool_index) {
+            if (meta.pool_manager) |mgr| {
+                mgr.release(py.allocator, self.info.pool_index) catch {};
+            }
+        }
+        if (meta.pushFreeInstance(self)) {
+            // Memory is kept for the next instance of this class. The list
+            // does not keep the class alive, its memory is freed with it.
+            meta.decref();
+            return;
         }
         self.typeref().free(@ptrCast(self));
     }
@@ -345,11 +493,17 @@ pub const Atom = extern struct {
         // so only clear those that are pointers
         const meta: *AtomMeta = @ptrCast(self.typeref());
         std.debug.assert(meta.typeCheckSelf());
-        if (meta.atom_members) |members| {
-            for (members.items) |member| {
-                if (member.info.storage_mode == .pointer and member.info.index < self.info.slot_count) {
+        if (meta.pointer_slots) |slots| {
+            const release = property.hasTrackedValues();
+            for (slots.items) |i| {
+                if (i < self.info.slot_count) {
                     @setRuntimeSafety(false);
-                    py.clear(&self.slots[member.info.index]);
+                    if (release) {
+                        if (self.slots[i]) |value| {
+                            property.releaseSlotValue(value);
+                        }
+                    }
+                    py.clear(&self.slots[i]);
                 }
             }
         }
@@ -368,28 +522,13 @@ pub const Atom = extern struct {
         // so only visit those that are pointers
         const meta: *AtomMeta = @ptrCast(self.typeref());
         std.debug.assert(meta.typeCheckSelf());
-        if (meta.atom_members) |members| {
-            for (members.items) |member| {
-                if (member.info.storage_mode == .pointer and member.info.index < self.info.slot_count) {
+        if (meta.pointer_slots) |slots| {
+            for (slots.items) |i| {
+                if (i < self.info.slot_count) {
                     @setRuntimeSafety(false);
-                    const slot = self.slots[member.info.index];
+                    const slot = self.slots[i];
                     if (comptime @import("api.zig").debug_level.traverse) {
-                        if (@import("api.zig").debug_level.matches(member.name)) {
-                            py.print("Atom.traverse({s}, member=", .{self}) catch return -1;
-                            py.print("(name: {?s}, info: {}, owner: {?s}, meta: {?s}, default_context: {?s}, validate_context: {?s}, coercer_context: {?s})", .{
-                                member.name,
-                                member.info,
-                                member.owner,
-                                member.metadata,
-                                member.default_context,
-                                member.validate_context,
-                                member.coercer_context,
-                            }) catch return -1;
-                            py.print(", slot type: '{s}' slot type refs: {})\n", .{
-                                if (slot) |o| o.typeName() else "null",
-                                if (slot) |o| o.typeref().refcnt() else 0,
-                            }) catch return -1;
-                        }
+                        self.debugTraverse(meta, i, slot) catch return -1;
                     }
                     const r = py.visit(slot, visit, arg);
                     if (r != 0)
@@ -400,10 +539,35 @@ pub const Atom = extern struct {
         return 0;
     }
 
+    fn debugTraverse(self: *Self, meta: *AtomMeta, index: u16, slot: ?*Object) !void {
+        const members = meta.atom_members orelse return;
+        for (members.items) |member| {
+            if (member.info.storage_mode != .pointer or member.info.index != index) {
+                continue;
+            }
+            if (@import("api.zig").debug_level.matches(member.name)) {
+                try py.print("Atom.traverse({s}, member=", .{self});
+                try py.print("(name: {?s}, info: {}, owner: {?s}, meta: {?s}, default_context: {?s}, validate_context: {?s}, coercer_context: {?s})", .{
+                    member.name,
+                    member.info,
+                    member.owner,
+                    member.metadata,
+                    member.default_context,
+                    member.validate_context,
+                    member.coercer_context,
+                });
+                try py.print(", slot type: '{s}' slot type refs: {})\n", .{
+                    if (slot) |o| o.typeName() else "null",
+                    if (slot) |o| o.typeref().refcnt() else 0,
+                });
+            }
+        }
+    }
+
     const methods = [_]py.MethodDef{
         .{ .ml_name = "get_member", .ml_meth = @constCast(@ptrCast(&get_member)), .ml_flags = py.c.METH_CLASS | py.c.METH_O, .ml_doc = "Get the atom member with the given name" },
         .{ .ml_name = "members", .ml_meth = @constCast(@ptrCast(&get_members)), .ml_flags = py.c.METH_CLASS | py.c.METH_NOARGS, .ml_doc = "Get atom members" },
-        .{ .ml_name = "observe", .ml_meth = @constCast(@ptrCast(&observe)), .ml_flags = py.c.METH_FASTCALL, .ml_doc = "Register an observer callback to observe changes on the given topic(s)" },
+        .{ .ml_name = "observe", .ml_meth = @constCast(@ptrCast(&observe)), .ml_flags = py.c.METH_VARARGS | py.c.METH_KEYWORDS, .ml_doc = "Register an observer callback to observe changes on the given topic(s)" },
         .{ .ml_name = "unobserve", .ml_meth = @constCast(@ptrCast(&unobserve)), .ml_flags = py.c.METH_FASTCALL, .ml_doc = "Unregister an observer callback for the given topic(s)." },
         .{ .ml_name = "has_observers", .ml_meth = @constCast(@ptrCast(&has_observers)), .ml_flags = py.c.METH_FASTCALL, .ml_doc = "Get whether the atom has observers for a given topic." },
         .{ .ml_name = "has_observer", .ml_meth = @constCast(@ptrCast(&has_observer)), .ml_flags = py.c.METH_FASTCALL, .ml_doc = "Get whether the atom has the given observer for a given topic." },
@@ -437,9 +601,12 @@ pub const Atom = extern struct {
         AtomMeta.disableNew();
         defer AtomMeta.enableNew();
         TypeObject = try Type.fromMetaclass(AtomMeta.TypeObject, null, &TypeSpec, null);
+        errdefer py.clear(&TypeObject);
+        getattr_descr = @ptrCast(py.c.PyDescr_NewMethod(@ptrCast(TypeObject.?), &getattr_def) orelse return error.PyError);
     }
 
     pub fn deinitType() void {
+        py.clear(&getattr_descr);
         py.clear(&TypeObject);
     }
 };
@@ -455,8 +622,6 @@ pub const AtomRef = extern struct {
     const Self = @This();
     // Reference to the type. This is set in ready
     pub var TypeObject: ?*py.Type = null;
-    const AtomRefMap = std.AutoArrayHashMapUnmanaged(*Atom, *AtomRef);
-    var map: AtomRefMap = .{};
 
     base: Object,
     atom: ?*Atom, // This is not tracked
@@ -475,16 +640,16 @@ pub const AtomRef = extern struct {
     pub fn newOrError(cls: *Type, args: *Tuple, _: ?*Dict) !*Self {
         var atom: *Atom = undefined;
         try args.parseTyped(.{&atom});
-        if (map.get(atom)) |ref| {
-            return ref.newref();
+        const meta: *AtomMeta = @ptrCast(atom.typeref());
+        if (atom.info.has_atomref) {
+            return @ptrCast(meta.pool_manager.?.getRef(atom.info.pool_index).?.newref());
         }
         const ref: *Self = @ptrCast(try cls.genericNew(null, null));
         errdefer ref.decref();
+        try atom.acquirePoolIndex();
         ref.atom = atom; // Do not incref
+        meta.pool_manager.?.setRef(atom.info.pool_index, @ptrCast(ref));
         atom.info.has_atomref = true;
-        map.put(py.allocator, atom, ref) catch {
-            try py.memoryError();
-        };
         return ref;
     }
 
@@ -497,12 +662,18 @@ pub const AtomRef = extern struct {
         return py.returnNone();
     }
 
-    // Clear the atomref
+    // Clear the atomref of an atom that is being destroyed.
+    // The atom releases its pool index afterwards.
     pub fn release(atom: *Atom) void {
-        if (map.fetchSwapRemove(atom)) |entry| {
-            entry.value.atom = null;
-            atom.info.has_atomref = false;
+        const meta: *AtomMeta = @ptrCast(atom.typeref());
+        if (meta.pool_manager) |mgr| {
+            if (mgr.getRef(atom.info.pool_index)) |obj| {
+                const ref: *Self = @ptrCast(obj);
+                ref.atom = null;
+                mgr.setRef(atom.info.pool_index, null);
+            }
         }
+        atom.info.has_atomref = false;
     }
 
     pub fn __bool__(self: *Self) c_int {
@@ -512,7 +683,14 @@ pub const AtomRef = extern struct {
     pub fn dealloc(self: *Self) void {
         if (self.atom) |atom| {
             atom.info.has_atomref = false;
-            _ = map.swapRemove(atom);
+            const meta: *AtomMeta = @ptrCast(atom.typeref());
+            if (meta.pool_manager) |mgr| {
+                mgr.setRef(atom.info.pool_index, null);
+                // Give the index back unless the observer pool still uses it
+                if (!atom.hasPoolIndex()) {
+                    mgr.release(py.allocator, atom.info.pool_index) catch {};
+                }
+            }
         }
         self.typeref().free(@ptrCast(self));
     }
@@ -13,19 +13,24 @@ const Function = py.Function;
 const atom = @import("atom.zig");
 const Atom = atom.Atom;
 const MemberBase = @import("member.zig").MemberBase;
+const CompareMode = @import("member.zig").CompareMode;
+const PropertyMember = @import("members/property.zig").PropertyMember;
 const observer_pool = @import("observer_pool.zig");
 const PoolManager = observer_pool.PoolManager;
 const ObserverPool = observer_pool.ObserverPool;
+const StaticHandlers = observer_pool.StaticHandlers;
+const stats = @import("stats.zig");
+const memory = @import("memory.zig");
 const observation = @import("observation.zig");
 const ObserveHandler = observation.ObserveHandler;
 const ExtendedObserver = observation.ExtendedObserver;
-const StaticObserver = observation.StaticObserver;
 
 // This is set at startup
 var atom_members_str: ?*Str = null;
 var dict_str: ?*Str = null;
 var slots_str: ?*Str = null;
 var weakref_str: ?*Str = null;
+var getattr_str: ?*Str = null;
 const package_name = @import("api.zig").package_name;
 
 pub fn calculateTypeSize(info: MetaInfo, comptime include_pyslots: bool) usize {
@@ -125,6 +130,64 @@ fn checkObserveMethod(dict: *Dict, member: *MemberBase, observers: *List) !void
     }
 }
 
+// Check if the class dict defines any _default_ or _observe_ methods
+fn hasMemberMethods(dict: *Dict) !bool {
+    var pos: isize = 0;
+    while (dict.next(&pos)) |entry| {
+        if (Str.check(entry.key)) {
+            const key: *Str = @ptrCast(entry.key);
+            const data = key.data();
+            if (std.mem.startsWith(u8, data, "_default_") or std.mem.startsWith(u8, data, "_observe_")) {
+                return true;
+            }
+        }
+    }
+    return false;
+}
+
+// Check if the class dict has a _default_ or _observe_ method for the member
+fn overridesMember(dict: *Dict, member: *MemberBase) !bool {
+    inline for (.{ "_default_", "_observe_" }) |prefix| {
+        const key = try Str.new(prefix ++ "{s}", .{member.name.?.data()});
+        defer key.decref();
+        if (dict.get(@ptrCast(key))) |func| {
+            if (Function.check(func)) {
+                return true;
+            }
+        }
+    }
+    return false;
+}
+
+// Check if any observe handler of the class is a static handler of the member
+fn observesMember(observers: *List, member: *MemberBase) bool {
+    const name = member.name.?.data();
+    var pos: usize = 0;
+    while (observers.next(&pos)) |item| {
+        const observer: *ObserveHandler = @ptrCast(item);
+        const topics = observer.topics orelse continue;
+        var i: usize = 0;
+        while (topics.next(&i)) |topic| {
+            const t: *Str = @ptrCast(topic);
+            if (std.mem.eql(u8, t.data(), name)) {
+                return true;
+            }
+        }
+    }
+    return false;
+}
+
+// Check if the class compare policy would change the member's compare mode
+fn changesCompareMode(member: *MemberBase, policy: CompareMode) bool {
+    return policy != .default and member.info.compare == .default;
+}
+
+fn applyComparePolicy(member: *MemberBase, policy: CompareMode) void {
+    if (changesCompareMode(member, policy)) {
+        member.info.compare = policy;
+    }
+}
+
 /// Info needed to compute the memory layout
 pub const MetaInfo = packed struct {
     // Number of members
@@ -138,7 +201,11 @@ pub const MetaInfo = packed struct {
     py_slots: u16 = 0,
     has_weakref: bool = false,
     has_dict: bool = false,
-    reserved: u8 = 0,
+    // No slot can reference another object so instances are not tracked by the gc
+    gc_untracked: bool = false,
+    // Some members are read through slot descriptors
+    slot_reads: bool = false,
+    reserved: u6 = 0,
 };
 
 // A metaclass
@@ -146,13 +213,30 @@ pub const AtomMeta = extern struct {
     // Reference to the type. This is set in ready
     pub var TypeObject: ?*Type = null;
     const AtomMembers = std.ArrayListUnmanaged(*MemberBase);
+    const PointerSlots = std.ArrayListUnmanaged(u16);
+    const SlotRead = struct {
+        def: py.c.PyMemberDef,
+        // Borrowed, the member is held by atom_members
+        member: ?*MemberBase,
+    };
+    const SlotReadDefs = std.ArrayListUnmanaged(SlotRead);
     const Self = @This();
 
     base: Metaclass,
     atom_members: ?*AtomMembers = null,
+    // Indexes of the slots holding objects that must be visited and cleared
+    pointer_slots: ?*PointerSlots = null,
+    // Definitions backing the slot descriptors. These must outlive the class
+    slot_read_defs: ?*SlotReadDefs = null,
     pool_manager: ?*PoolManager = null,
     static_observers: ?*ObserverPool = null,
     original_type_size: usize = 0,
+    // Deallocated instances kept for reuse, linked through their first slot
+    free_list: ?*Atom = null,
+    free_count: u32 = 0,
+    free_limit: u32 = 0,
+    // Number of instances currently alive
+    live_count: usize = 0,
     info: MetaInfo,
 
     // Import the object protocol
@@ -174,12 +258,18 @@ pub const AtomMeta = extern struct {
             "bases",
             "dct",
             "enable_weakrefs",
+            "freelist",
+            "slot_reads",
+            "compare",
         };
         var name: *Str = undefined;
         var bases: *Tuple = undefined;
         var dict: *Dict = undefined;
         var enable_weakrefs: c_int = 0;
-        try py.parseTupleAndKeywords(args, kwargs, "UOO|$p", @ptrCast(&kwlist), .{ &name, &bases, &dict, &enable_weakrefs });
+        var freelist: c_uint = 0;
+        var slot_reads: c_int = 0;
+        var compare_arg: ?*Str = null;
+        try py.parseTupleAndKeywords(args, kwargs, "UOO|$pIpU", @ptrCast(&kwlist), .{ &name, &bases, &dict, &enable_weakrefs, &freelist, &slot_reads, &compare_arg });
         if (!name.typeCheckExactSelf()) {
             try py.typeError("AtomMeta's 1nd arg must be a str", .{});
         }
@@ -189,6 +279,8 @@ pub const AtomMeta = extern struct {
         if (!dict.typeCheckExactSelf()) {
             try py.typeError("AtomMeta's 3rd arg must be a dict", .{});
         }
+        // Compare policy for members that do not set their own
+        const compare: CompareMode = if (compare_arg) |arg| try CompareMode.fromStr(arg) else .default;
 
         if (comptime @import("api.zig").debug_level.creates) {
             try py.print("AtomMeta.new({s}, '{s}')\n", .{ meta.className(), name });
@@ -207,15 +299,21 @@ pub const AtomMeta = extern struct {
         const members = try Dict.new();
         defer members.decref();
 
-        var found_atom: bool = false;
+        var atom_base_count: usize = 0;
+        var primary_base: ?*AtomMeta = null;
         for (0..num_bases) |i| {
             const base = bases.getUnsafe(i).?;
             if (!Type.check(base)) {
                 try py.typeError("bases tuple must only contain types", .{});
             }
             if (AtomMeta.check(base)) {
-                found_atom = true;
+                atom_base_count += 1;
                 const atom_base: *AtomMeta = @ptrCast(base);
+                primary_base = atom_base;
+                // The base's slot descriptors only accept writes through its setattro
+                if (atom_base.info.slot_reads) {
+                    slot_reads = 1;
+                }
                 if (atom_base.atom_members) |array| {
                     inherited_members.appendSlice(py.allocator, array.items) catch {
                         try py.memoryError();
@@ -223,12 +321,25 @@ pub const AtomMeta = extern struct {
                 }
             }
         }
-        if (!found_atom) {
+        if (atom_base_count == 0) {
             try py.typeError("AtomMeta must contain Atom or a subclass", .{});
         }
+        // With a single atom base the inherited members keep their layout so
+        // any that are not overridden can be shared with the base instead of
+        // cloned. New members are placed after the base's slots.
+        if (atom_base_count > 1) {
+            primary_base = null;
+        }
+        const share_members = primary_base != null and slot_reads == 0;
 
         // Gather members from the class
         var info = MetaInfo{};
+        if (primary_base) |base| {
+            info.slot_count = base.info.slot_count;
+            info.last_static_slot = base.info.last_static_slot;
+            info.has_static_slot = base.info.has_static_slot;
+            info.slot_offset = base.info.slot_offset;
+        }
 
         if (enable_weakrefs != 0) {
             info.has_weakref = true;
@@ -278,8 +389,16 @@ pub const AtomMeta = extern struct {
 
                 if (MemberBase.check(entry.value)) {
                     const member: *MemberBase = @ptrCast(entry.value);
-                    member.setName(attr);
-                    computeMemoryLayout(member, &info);
+                    try member.setName(attr);
+                    member.setOwner(null);
+                    applyComparePolicy(member, compare);
+                    const redefined = if (primary_base) |base| base.findMember(attr) else null;
+                    if (redefined != null and redefined.?.info.storage_mode == .pointer and member.info.storage_mode == .pointer) {
+                        // Reuse the slot of the member it replaces
+                        member.info.index = redefined.?.info.index;
+                    } else {
+                        computeMemoryLayout(member, &info);
+                    }
                     try checkDefaultMethod(dict, member);
                     try checkObserveMethod(dict, member, observers);
                     try members.set(@ptrCast(attr), @ptrCast(member));
@@ -300,8 +419,12 @@ pub const AtomMeta = extern struct {
                             found = true;
                             const new_member = try member.cloneOrError();
                             defer new_member.decref();
+                            new_member.setOwner(null);
                             new_member.setDefaultContext(.static, set_default.value.?.newref());
-                            computeMemoryLayout(new_member, &info);
+                            applyComparePolicy(new_member, compare);
+                            if (primary_base == null) {
+                                computeMemoryLayout(new_member, &info);
+                            }
                             try checkObserveMethod(dict, new_member, observers);
                             // It's safe to modify the value of dict while iterating since the key is unchanged
                             try dict.set(@ptrCast(attr), @ptrCast(new_member));
@@ -316,16 +439,30 @@ pub const AtomMeta = extern struct {
 
                 // TODO: Look for un
             }
-            // TODO: Unfortunately this adds them to the end
+            // Most classes define no _default_ or _observe_ methods so
+            // skip looking them up for every inherited member
+            const has_member_methods = try hasMemberMethods(dict);
             for (inherited_members.items) |member| {
                 if (dict.get(@ptrCast(member.name.?)) != null) {
                     continue; // Member redefined
                 }
+                if (share_members and !(has_member_methods and try overridesMember(dict, member)) and !observesMember(observers, member) and !changesCompareMode(member, compare)) {
+                    // Nothing about the member changed so share it with the base
+                    try dict.set(@ptrCast(member.name.?), @ptrCast(member));
+                    try members.set(@ptrCast(member.name.?), @ptrCast(member));
+                    continue;
+                }
                 const new_member = try member.cloneOrError();
                 defer new_member.decref();
-                computeMemoryLayout(new_member, &info);
-                try checkDefaultMethod(dict, new_member);
-                try checkObserveMethod(dict, new_member, observers);
+                new_member.setOwner(null);
+                applyComparePolicy(new_member, compare);
+                if (primary_base == null) {
+                    computeMemoryLayout(new_member, &info);
+                }
+                if (has_member_methods) {
+                    try checkDefaultMethod(dict, new_member);
+                    try checkObserveMethod(dict, new_member, observers);
+                }
                 try dict.set(@ptrCast(new_member.name.?), @ptrCast(new_member));
                 try members.set(@ptrCast(new_member.name.?), @ptrCast(new_member));
             }
@@ -352,12 +489,19 @@ pub const AtomMeta = extern struct {
         if (comptime Atom.slot_type == .inlined) {
             try cls.validateTypeSize();
         }
-        if (cls.set_atom_members(members, null) < 0) {
-            return error.PyError;
-        }
+        // Shared members stay owned by the base that defined them
+        try cls.assignMembers(members, false);
         //py.c.PyType_Modified(@ptrCast(cls));
         cls.pool_manager = try PoolManager.new(py.allocator);
         try cls.initStaticObservers(observers, members, bases);
+        try cls.initPropertyDependencies();
+        try stats.initClass(cls);
+        if (freelist > 0) {
+            try cls.setFreeListLimit(freelist);
+        }
+        if (slot_reads != 0) {
+            try cls.initSlotReads();
+        }
         return @ptrCast(cls);
     }
 
@@ -378,17 +522,25 @@ pub const AtomMeta = extern struct {
     }
 
     pub fn set_atom_members(self: *Self, members: *Dict, _: ?*anyopaque) c_int {
-        const n = self.validateMembers(members) catch return -1;
-        const members_array = py.allocator.create(AtomMembers) catch return py.memoryErrorObject(-1);
+        self.assignMembers(members, true) catch return -1;
+        return 0;
+    }
+
+    // Set the atom members. If claim_all is false only members without an owner are claimed.
+    fn assignMembers(self: *Self, members: *Dict, claim_all: bool) !void {
+        const n = try self.validateMembers(members);
+        const members_array = py.allocator.create(AtomMembers) catch return py.memoryError();
         members_array.* = AtomMembers.initCapacity(py.allocator, n) catch {
             py.allocator.destroy(members_array);
-            return py.memoryErrorObject(-1);
+            return py.memoryError();
         };
         var pos: isize = 0;
         while (members.next(&pos)) |entry| {
             // Assign the owner and copy into our array
             const member: *MemberBase = @ptrCast(entry.value);
-            member.setOwner(@ptrCast(self));
+            if (claim_all or member.owner == null) {
+                member.setOwner(@ptrCast(self));
+            }
             members_array.appendAssumeCapacity(member.newref());
         }
 
@@ -400,7 +552,7 @@ pub const AtomMeta = extern struct {
             old.deinit(py.allocator);
         }
         self.atom_members = members_array;
-        return 0;
+        try self.updatePointerSlots();
     }
 
     // Return a new reference to the member with the given name
@@ -415,6 +567,43 @@ pub const AtomMeta = extern struct {
         return Int.new(self.info.slot_count) catch return null;
     }
 
+    pub fn get_freelist(self: *Self) ?*Int {
+        return Int.new(self.free_limit) catch return null;
+    }
+
+    pub fn set_freelist(self: *Self, value: ?*Object, _: ?*anyopaque) c_int {
+        if (value == null or !Int.check(value.?)) {
+            return py.typeErrorObject(-1, "__freelist__ must be an int", .{});
+        }
+        const limit = Int.as(@ptrCast(value.?), u32) catch return -1;
+        self.setFreeListLimit(limit) catch return -1;
+        return 0;
+    }
+
+    // Free the memory of unused observer pools. Returns the number of bytes freed
+    pub fn compact_observer_pools(self: *Self) ?*Object {
+        var freed: usize = 0;
+        if (self.pool_manager) |mgr| {
+            const before = mgr.sizeof() + mgr.poolsSizeof();
+            mgr.compact(py.allocator);
+            freed = before -| (mgr.sizeof() + mgr.poolsSizeof());
+        }
+        return @ptrCast(Int.new(freed) catch null);
+    }
+
+    pub fn memory_report(self: *Self) ?*Object {
+        return @ptrCast(memory.classReport(self) catch null);
+    }
+
+    pub fn reserve(self: *Self, arg: *Object) ?*Object {
+        if (!Int.check(arg)) {
+            return py.typeErrorObject(null, "Invalid arguments: Signature is reserve(n: int)", .{});
+        }
+        const n = Int.as(@ptrCast(arg), u32) catch return null;
+        self.reserveOrError(n) catch return null;
+        return py.returnNone();
+    }
+
     pub fn add_member(self: *Self, args: [*]*Object, n: isize) ?*Object {
         if (n != 2 or !Str.check(args[0]) or !MemberBase.check(args[1])) {
             return py.typeErrorObject(null, "Invalid arguments: Signature is add_member(cls: AtomMeta, name: str, member: Member)", .{});
@@ -425,6 +614,11 @@ pub const AtomMeta = extern struct {
         if (member.owner != null) {
             return py.typeErrorObject(null, "Cannot add member owned by another object", .{});
         }
+        // Live instances of acyclic classes are not tracked by the gc so a
+        // cycle through the new member would never be collected.
+        if (self.info.gc_untracked and self.live_count > 0 and member.canFormCycles()) {
+            return py.typeErrorObject(null, "Cannot add a member that can form reference cycles to '{s}' while it has instances", .{Type.className(@ptrCast(self))});
+        }
         self.setAttr(name, @ptrCast(member)) catch return null;
 
         if (self.atom_members) |members| {
@@ -440,6 +634,8 @@ pub const AtomMeta = extern struct {
                 }
             }
             if (pos) |i| {
+                // The member replaced the old one's slot descriptor in the class dict
+                self.dropSlotRead(members.items[i]);
                 // Discard old
                 py.setref(@ptrCast(&members.items[i]), @ptrCast(member.newref()));
             } else {
@@ -447,12 +643,18 @@ pub const AtomMeta = extern struct {
                     return py.memoryErrorObject(null);
                 };
             }
-            member.setName(name);
+            member.setName(name) catch return null;
             member.setOwner(@ptrCast(self));
             const old_slot_count = self.info.slot_count;
             computeMemoryLayout(member, &self.info);
+            self.updatePointerSlots() catch return null;
+            if (PropertyMember.check(@ptrCast(member))) {
+                PropertyMember.Impl.bindDependencies(member, self) catch return null;
+            }
             if (comptime Atom.slot_type == .inlined) {
                 if (self.info.slot_count > old_slot_count) {
+                    // Instances in the free list have the old size
+                    self.clearFreeInstances();
                     self.updateTypeSize();
                     self.validateTypeSize() catch return null;
                 }
@@ -526,6 +728,7 @@ pub const AtomMeta = extern struct {
                         try pool.addAllFromPool(py.allocator, inherited_pool);
                     }
                 }
+                try self.inheritStaticHandlers(base);
             }
         }
 
@@ -535,53 +738,84 @@ pub const AtomMeta = extern struct {
             const observer: *ObserveHandler = @ptrCast(item);
             if (observer.topics == null or observer.func == null) continue;
             const func = observer.func.?;
-            const static_observer = try StaticObserver.create(func);
-            defer static_observer.decref();
 
             var i: usize = 0;
             while (observer.topics.?.next(&i)) |it| {
                 std.debug.assert(Str.check(it));
                 const topic: *Str = @ptrCast(it);
 
-                if (try self.staticObserverPool()) |pool| {
-                    const data = topic.data();
-                    if (std.mem.indexOf(u8, data, ".")) |j| {
-                        std.debug.assert(j > 1 and j + 1 < data.len);
-                        const new_topic = try Str.fromSlice(data[0..j]);
-                        defer new_topic.decref();
-                        const target = members.get(@ptrCast(new_topic));
-                        if (target == null) {
-                            return py.attributeError("extended observe target '{s}' is invalid. '{s}' has no member with that name", .{
-                                new_topic.data(),
-                                self.typeName(),
-                            });
-                        }
+                const data = topic.data();
+                if (std.mem.indexOf(u8, data, ".")) |j| {
+                    std.debug.assert(j > 0 and j + 1 < data.len);
+                    const new_topic = try Str.fromSlice(data[0..j]);
+                    defer new_topic.decref();
+                    const target = members.get(@ptrCast(new_topic));
+                    if (target == null) {
+                        return py.attributeError("extended observe target '{s}' is invalid. '{s}' has no member with that name", .{
+                            new_topic.data(),
+                            self.typeName(),
+                        });
+                    }
 
-                        // The extended attr to observe
-                        const attr = try Str.fromSlice(data[j + 1 ..]);
-                        defer attr.decref();
+                    // The extended path to observe
+                    const path = try Str.fromSlice(data[j + 1 ..]);
+                    defer path.decref();
+                    const extended_observer = try ExtendedObserver.create(@ptrCast(func), path, observer.change_types);
+                    defer extended_observer.decref();
+
+                    // Attempt to validate the first attr at runtime. Deeper
+                    // attributes depend on the values assigned later.
+                    const attr = extended_observer.attr(0);
+                    switch (try MemberBase.checkTopic(@ptrCast(target.?), attr)) {
+                        .no => {
+                            return py.attributeError("extended observe target '{s}' is invalid. Attribute '{s}' on member '{s}' of '{s}' is not a valid", .{ data, attr.data(), new_topic.data(), self.typeName() });
+                        },
+                        else => {}, // Can't tell
+                    }
 
-                        // Attempt to validate the attr at runtime
-                        switch (try MemberBase.checkTopic(@ptrCast(target.?), attr)) {
-                            .no => {
-                                return py.attributeError("extended observe target '{s}' is invalid. Attribute '{s}' on member '{s}' of '{s}' is not a valid", .{ data, attr.data(), new_topic.data(), self.typeName() });
-                            },
-                            else => {}, // Can't tell
-                        }
+                    const pool = (try self.staticObserverPool()).?;
+                    try pool.addObserver(py.allocator, new_topic, @ptrCast(extended_observer), observation.rebind_change_types);
+                } else {
+                    const target = members.get(@ptrCast(topic)) orelse {
+                        return py.attributeError("observe target '{s}' is invalid. '{s}' has no member with that name", .{
+                            data,
+                            self.typeName(),
+                        });
+                    };
+                    try addStaticHandler(@ptrCast(target), @ptrCast(func), observer.change_types);
+                }
+            }
+        }
+    }
 
-                        const extended_observer = try ExtendedObserver.create(func, attr);
-                        defer extended_observer.decref();
-                        try pool.addObserver(py.allocator, new_topic, @ptrCast(extended_observer), observer.change_types);
-                    } else {
-                        if (members.get(@ptrCast(topic)) == null) {
-                            return py.attributeError("observe target '{s}' is invalid. '{s}' has no member with that name", .{
-                                data,
-                                self.typeName(),
-                            });
-                        }
-                        try pool.addObserver(py.allocator, topic, @ptrCast(static_observer), observer.change_types);
-                    }
+    // Copy the handlers of the base class members with the same name
+    fn inheritStaticHandlers(self: *Self, base: *Self) !void {
+        const members = self.atom_members orelse return;
+        for (members.items) |member| {
+            const base_member = base.getMember(member.name.?) orelse continue;
+            if (base_member == member) continue;
+            if (base_member.static_handlers) |inherited| {
+                if (member.static_handlers == null) {
+                    member.static_handlers = try StaticHandlers.new(py.allocator);
                 }
+                try member.static_handlers.?.extend(py.allocator, inherited.*);
+            }
+        }
+    }
+
+    fn addStaticHandler(member: *MemberBase, func: *Object, change_types: u8) !void {
+        if (member.static_handlers == null) {
+            member.static_handlers = try StaticHandlers.new(py.allocator);
+        }
+        try member.static_handlers.?.add(py.allocator, func, change_types);
+    }
+
+    // Add the static observers that reset cached properties when a dependency changes
+    pub fn initPropertyDependencies(self: *Self) !void {
+        const members = self.atom_members orelse return;
+        for (members.items) |member| {
+            if (PropertyMember.check(@ptrCast(member))) {
+                try PropertyMember.Impl.bindDependencies(member, self);
             }
         }
     }
@@ -605,6 +839,192 @@ pub const AtomMeta = extern struct {
         return @intCast(pos);
     }
 
+    // Collect the indexes of slots that hold objects so traverse and clear
+    // do not need to check every member. If none of them can form a cycle
+    // instances of the class do not need to be tracked by the gc.
+    fn updatePointerSlots(self: *Self) !void {
+        const slots = self.pointer_slots orelse blk: {
+            const new_slots = py.allocator.create(PointerSlots) catch return py.memoryError();
+            new_slots.* = .{};
+            self.pointer_slots = new_slots;
+            break :blk new_slots;
+        };
+        slots.clearRetainingCapacity();
+        var acyclic = self.info.py_slots == 0 and !self.info.has_dict;
+        if (self.atom_members) |members| {
+            for (members.items) |member| {
+                if (member.info.storage_mode == .pointer) {
+                    slots.append(py.allocator, member.info.index) catch return py.memoryError();
+                    if (member.canFormCycles()) {
+                        acyclic = false;
+                    }
+                }
+            }
+        }
+        self.info.gc_untracked = acyclic;
+    }
+
+    // Replace eligible members in the class dict with read only T_OBJECT_EX
+    // member descriptors at their slot offset. The interpreter can specialize
+    // attribute loads through these like it does for __slots__. Writes and
+    // deletes are routed back to the member by Atom.setattro. An empty slot
+    // makes the descriptor raise, which falls back to Atom.getattr so the
+    // member still creates defaults lazily.
+    fn initSlotReads(self: *Self) !void {
+        if (comptime Atom.slot_type != .inlined) {
+            return py.typeError("slot_reads requires inlined slots", .{});
+        }
+        const T_OBJECT_EX = 16; // From structmember.h
+        const READONLY = 1;
+        const members = self.atom_members orelse return;
+        for (members.items) |member| {
+            // Reads must go through the member so a tracked property sees them
+            if (PropertyMember.check(@ptrCast(member)) and PropertyMember.Impl.isTracked(member)) {
+                return;
+            }
+        }
+        if (py.c._PyType_Lookup(@ptrCast(self), @ptrCast(getattr_str.?))) |existing| {
+            if (existing != @as(*py.c.PyObject, @ptrCast(Atom.getattr_descr.?))) {
+                return py.typeError("slot_reads classes cannot define __getattr__", .{});
+            }
+        }
+        const defs = py.allocator.create(SlotReadDefs) catch return py.memoryError();
+        defs.* = .{};
+        self.slot_read_defs = defs;
+
+        // The descriptors point into the array so it must not be resized later
+        defs.ensureTotalCapacity(py.allocator, members.items.len) catch return py.memoryError();
+        for (members.items) |member| {
+            if (!member.canReadFromSlot()) {
+                continue;
+            }
+            defs.appendAssumeCapacity(.{
+                .def = .{
+                    .name = member.name.?.data(),
+                    .type = T_OBJECT_EX,
+                    .offset = @intCast(@offsetOf(Atom, "slots") + @as(usize, member.info.index) * @sizeOf(*Object)),
+                    .flags = READONLY,
+                    .doc = null,
+                },
+                .member = member,
+            });
+            const def = &defs.items[defs.items.len - 1].def;
+            const descr: *Object = @ptrCast(py.c.PyDescr_NewMember(@ptrCast(self), def) orelse return error.PyError);
+            defer descr.decref();
+            try self.setAttr(member.name.?, descr);
+        }
+        if (defs.items.len > 0) {
+            self.info.slot_reads = true;
+            // Setting __getattr__ updates tp_getattro of the class
+            try self.setAttr(getattr_str.?, Atom.getattr_descr.?);
+            // Set directly so only classes using slot reads pay for the lookup
+            self.base.impl.ht_type.tp_setattro = @ptrCast(&Atom.setattro);
+            py.c.PyType_Modified(@ptrCast(self));
+        }
+    }
+
+    // Get the member whose reads are served by the given slot descriptor of this class.
+    // Returns borrowed reference or null if descr is not one of them
+    pub fn slotReadMember(self: *Self, descr: *Object) ?*MemberBase {
+        const defs = self.slot_read_defs orelse return null;
+        if (descr.typeref() != @as(*Type, @ptrCast(&py.c.PyMemberDescr_Type))) {
+            return null;
+        }
+        // Python __slots__ use member descriptors too so check that the
+        // definition is in this class's array
+        const def = @as(*py.c.PyMemberDescrObject, @ptrCast(descr)).d_member;
+        const start = @intFromPtr(defs.items.ptr);
+        const addr = @intFromPtr(def);
+        if (addr < start or addr >= start + defs.items.len * @sizeOf(SlotRead)) {
+            return null;
+        }
+        const entry: *SlotRead = @fieldParentPtr("def", @as(*py.c.PyMemberDef, @ptrCast(def)));
+        return entry.member;
+    }
+
+    // Stop serving reads of a member from its slot descriptor
+    fn dropSlotRead(self: *Self, member: *MemberBase) void {
+        const defs = self.slot_read_defs orelse return;
+        for (defs.items) |*entry| {
+            if (entry.member == member) {
+                entry.member = null;
+            }
+        }
+    }
+
+    // Free lists reuse the whole instance so they can only be used when every
+    // slot is owned by a member.
+    pub fn supportsFreeList(self: *Self) bool {
+        return (Atom.slot_type == .inlined and self.info.py_slots == 0 and !self.info.has_dict and !self.info.has_weakref);
+    }
+
+    pub fn setFreeListLimit(self: *Self, limit: u32) !void {
+        if (limit > 0 and !self.supportsFreeList()) {
+            return py.typeError("'{s}' cannot use a freelist because it defines __slots__, __dict__ or weakrefs", .{Type.className(@ptrCast(self))});
+        }
+        self.free_limit = limit;
+        while (self.free_count > limit) {
+            self.freeInstance(self.popFreeInstance().?);
+        }
+    }
+
+    // Preallocate instances and observer pools for n new instances.
+    // The free list must already allow n instances.
+    pub fn reserveOrError(self: *Self, n: u32) !void {
+        if (n > 0 and !self.supportsFreeList()) {
+            return py.typeError("'{s}' cannot use a freelist because it defines __slots__, __dict__ or weakrefs", .{Type.className(@ptrCast(self))});
+        }
+        if (n > self.free_limit) {
+            return py.valueError("Cannot reserve {} instances of '{s}' with a __freelist__ of {}", .{ n, Type.className(@ptrCast(self)), self.free_limit });
+        }
+        if (self.pool_manager) |mgr| {
+            try mgr.reserve(py.allocator, n);
+        }
+        const cls: *Type = @ptrCast(self);
+        while (self.free_count < n) {
+            const item: *Atom = @ptrCast(try cls.genericNew(null, null));
+            item.gcUntrack();
+            _ = self.pushFreeInstance(item);
+            // Instances in the free list do not hold a reference to the class
+            self.decref();
+        }
+    }
+
+    // Take an instance off the free list. The caller must reinitialize it
+    // which takes a new reference to the class.
+    pub inline fn popFreeInstance(self: *Self) ?*Atom {
+        if (self.free_list) |item| {
+            self.free_list = @ptrCast(item.slots[0]);
+            self.free_count -= 1;
+            return item;
+        }
+        return null;
+    }
+
+    // Keep a deallocated instance for reuse. Returns false if the free list is full.
+    pub inline fn pushFreeInstance(self: *Self, item: *Atom) bool {
+        if (self.free_count < self.free_limit) {
+            item.slots[0] = @ptrCast(self.free_list);
+            self.free_list = item;
+            self.free_count += 1;
+            return true;
+        }
+        return false;
+    }
+
+    // Free the memory of an instance in the free list. It has no reference
+    // to the class so it is not released.
+    fn freeInstance(self: *Self, item: *Atom) void {
+        self.base.impl.ht_type.tp_free.?(@ptrCast(item));
+    }
+
+    // Release all memory held by the free list
+    pub fn clearFreeInstances(self: *Self) void {
+        while (self.popFreeInstance()) |item| {
+            self.freeInstance(item);
+        }
+    }
+
     // Create a pool if one does not exist
     pub fn staticObserverPool(self: *Self) !?*ObserverPool {
         if (self.static_observers) |pool| {
@@ -633,6 +1053,44 @@ pub const AtomMeta = extern struct {
         return null;
     }
 
+    // Call func with this class and every subclass that shares the member.
+    // Inherited members that are not changed by a subclass are shared with
+    // the base that owns them.
+    pub fn forEachMemberClass(self: *Self, member: *MemberBase, context: anytype, comptime func: fn (@TypeOf(context), *Self) py.Error!void) py.Error!void {
+        try func(context, self);
+        const method = try Object.getAttrString(@ptrCast(self), "__subclasses__");
+        defer method.decref();
+        const subclasses: *List = @ptrCast(try method.callArgs(.{}));
+        defer subclasses.decref();
+        var pos: usize = 0;
+        while (subclasses.next(&pos)) |item| {
+            if (AtomMeta.check(item)) {
+                const cls: *Self = @ptrCast(item);
+                // A subclass with its own copy also gives that to its subclasses
+                if (cls.getMember(member.name.?) == member) {
+                    try cls.forEachMemberClass(member, context, func);
+                }
+            }
+        }
+    }
+
+    // Get borrowed reference to the member with the given name.
+    // Unlike getMember the name does not need to be interned.
+    pub fn findMember(self: *Self, name: *Str) ?*MemberBase {
+        if (self.getMember(name)) |member| {
+            return member;
+        }
+        if (self.atom_members) |members| {
+            const data = name.data();
+            for (members.items) |member| {
+                if (std.mem.eql(u8, data, member.name.?.data())) {
+                    return member;
+                }
+            }
+        }
+        return null;
+    }
+
     // --------------------------------------------------------------------------
     // Type definition
     // --------------------------------------------------------------------------
@@ -641,6 +1099,9 @@ pub const AtomMeta = extern struct {
             py.print("AtomMeta.clear({s})\n", .{Type.className(@ptrCast(self))}) catch return -1;
         }
 
+        self.free_limit = 0;
+        self.clearFreeInstances();
+
         // The pool owns the static_observers so we don't need to release it
         if (self.pool_manager) |mgr| {
             self.pool_manager = null;
@@ -653,9 +1114,39 @@ pub const AtomMeta = extern struct {
             }
             members.deinit(py.allocator);
         }
+        if (self.pointer_slots) |slots| {
+            self.pointer_slots = null;
+            slots.deinit(py.allocator);
+            py.allocator.destroy(slots);
+        }
         return 0;
     }
 
+    // Class attribute access returns the member instead of the slot
+    // descriptor that shadows it in the class dict
+    pub fn getattro(self: *Self, name: *Object) ?*Object {
+        const attr: *Object = @ptrCast(py.c.PyType_Type.tp_getattro.?(@ptrCast(self), @ptrCast(name)) orelse return null);
+        if (self.info.slot_reads) {
+            if (self.slotReadMember(attr)) |member| {
+                attr.decref();
+                return @ptrCast(member.newref());
+            }
+        }
+        return attr;
+    }
+
+    pub fn dealloc(self: *Self) void {
+        self.gcUntrack();
+        _ = self.clear();
+        // The slot descriptors may be visited until the type is gone
+        if (self.slot_read_defs) |defs| {
+            self.slot_read_defs = null;
+            defs.deinit(py.allocator);
+            py.allocator.destroy(defs);
+        }
+        self.typeref().free(@ptrCast(self));
+    }
+
     pub fn traverse(self: *Self, visit: py.visitproc, arg: ?*anyopaque) c_int {
         if (self.atom_members) |members| {
             for (members.items) |member| {
@@ -672,15 +1163,10 @@ pub const AtomMeta = extern struct {
         return 0;
     }
 
-    pub fn dealloc(self: *Self) void {
-        self.gcUntrack();
-        _ = self.clear();
-        self.typeref().free(@ptrCast(self));
-    }
-
     const getset = [_]py.GetSetDef{
         .{ .name = "__atom_members__", .get = @ptrCast(&get_atom_members), .set = @ptrCast(&set_atom_members), .doc = "Get and set the atom members" },
         .{ .name = "__slot_count__", .get = @ptrCast(&get_slot_count), .set = null, .doc = "Get the slot count" },
+        .{ .name = "__freelist__", .get = @ptrCast(&get_freelist), .set = @ptrCast(&set_freelist), .doc = "Get and set the maximum number of deallocated instances kept for reuse" },
         .{}, // sentinel
     };
 
@@ -688,6 +1174,9 @@ pub const AtomMeta = extern struct {
         .{ .ml_name = "get_member", .ml_meth = @constCast(@ptrCast(&get_member)), .ml_flags = py.c.METH_O, .ml_doc = "Get the atom member with the given name" },
         .{ .ml_name = "members", .ml_meth = @constCast(@ptrCast(&get_atom_members)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Get atom members" },
         .{ .ml_name = "add_member", .ml_meth = @constCast(@ptrCast(&add_member)), .ml_flags = py.c.METH_FASTCALL, .ml_doc = "Add an atom member" },
+        .{ .ml_name = "reserve", .ml_meth = @constCast(@ptrCast(&reserve)), .ml_flags = py.c.METH_O, .ml_doc = "Preallocate memory for n instances" },
+        .{ .ml_name = "compact_observer_pools", .ml_meth = @constCast(@ptrCast(&compact_observer_pools)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Free the memory held by unused observer pools and shrink the pool tables. Returns the number of bytes freed" },
+        .{ .ml_name = "memory_report", .ml_meth = @constCast(@ptrCast(&memory_report)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Get the memory used by the live instances of this class" },
         .{}, // sentinel
     };
 
@@ -696,6 +1185,7 @@ pub const AtomMeta = extern struct {
         .{ .slot = py.c.Py_tp_dealloc, .pfunc = @constCast(@ptrCast(&dealloc)) },
         .{ .slot = py.c.Py_tp_traverse, .pfunc = @constCast(@ptrCast(&traverse)) },
         .{ .slot = py.c.Py_tp_clear, .pfunc = @constCast(@ptrCast(&clear)) },
+        .{ .slot = py.c.Py_tp_getattro, .pfunc = @constCast(@ptrCast(&getattro)) },
         .{ .slot = py.c.Py_tp_methods, .pfunc = @constCast(@ptrCast(&methods)) },
         //.{ .slot = py.c.Py_tp_members, .pfunc = @constCast(@ptrCast(&tp_members)) },
         .{ .slot = py.c.Py_tp_getset, .pfunc = @constCast(@ptrCast(&getset)) },
@@ -805,6 +1295,8 @@ pub fn initModule(mod: *py.Module) !void {
     errdefer py.clear(&weakref_str);
     dict_str = try Str.internFromString("__dict__");
     errdefer py.clear(&dict_str);
+    getattr_str = try Str.internFromString("__getattr__");
+    errdefer py.clear(&getattr_str);
 
     try DefaultSetter.initType();
     errdefer DefaultSetter.deinitType();
@@ -820,6 +1312,7 @@ pub fn deinitModule(mod: *py.Module) void {
     py.clear(&weakref_str);
     py.clear(&slots_str);
     py.clear(&dict_str);
+    py.clear(&getattr_str);
     AtomMeta.deinitType();
     _ = mod; // TODO: Remove dead type
 }
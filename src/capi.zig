@@ -0,0 +1,171 @@
+const py = @import("py");
+const std = @import("std");
+const Object = py.Object;
+const Str = py.Str;
+
+const Atom = @import("atom.zig").Atom;
+const AtomMeta = @import("atom_meta.zig").AtomMeta;
+const MemberBase = @import("member.zig").MemberBase;
+const ChangeType = @import("observer_pool.zig").ChangeType;
+const package_name = @import("api.zig").package_name;
+
+// The version is increased whenever a function changes. New functions are
+// only ever added to the end so extensions built for an older version keep
+// working and can check the size before using newer entries.
+// This must match zatom/include/zatom.h
+pub const version = 1;
+pub const capsule_name = package_name ++ ".api._C_API";
+
+// Functions exported to other native extensions through a PyCapsule.
+// All of them must be called with the GIL held. Unless stated otherwise
+// they return -1 or NULL with an exception set on error.
+pub const CApi = extern struct {
+    version: u32,
+    size: u32,
+
+    // Get a borrowed reference to the member of an atom class with the
+    // given name. Interned names are compared by pointer.
+    member_lookup: *const fn (cls: *Object, name: *Object) callconv(.c) ?*MemberBase,
+
+    // Get, set and delete the value of a member. These skip the attribute
+    // lookup on the atom but still validate and notify.
+    member_get: *const fn (member: *MemberBase, atom: *Atom) callconv(.c) ?*Object,
+    member_set: *const fn (member: *MemberBase, atom: *Atom, value: *Object) callconv(.c) c_int,
+    member_del: *const fn (member: *MemberBase, atom: *Atom) callconv(.c) c_int,
+
+    // Read the raw data of a member with static storage. Returns 1 and
+    // writes the data if the slot is set or 0 if it is not.
+    slot_read: *const fn (member: *MemberBase, atom: *Atom, data: *u64) callconv(.c) c_int,
+    // Write the raw data of a member with static storage. This does not
+    // validate or notify.
+    slot_write: *const fn (member: *MemberBase, atom: *Atom, data: u64) callconv(.c) c_int,
+
+    // Add or remove a dynamic observer of a topic on the atom
+    observe: *const fn (atom: *Atom, topic: *Object, observer: *Object, change_types: u8) callconv(.c) c_int,
+    unobserve: *const fn (atom: *Atom, topic: *Object, observer: *Object) callconv(.c) c_int,
+
+    // Notify the observers of n topics. The change of each topic may be
+    // NULL to call the observers without arguments.
+    notify: *const fn (atom: *Atom, topics: [*]const *Object, changes: [*]const ?*Object, n: isize) callconv(.c) c_int,
+};
+
+fn memberLookup(cls: *Object, name: *Object) callconv(.c) ?*MemberBase {
+    if (!AtomMeta.check(cls) or !Str.check(name)) {
+        return py.typeErrorObject(null, "Invalid arguments. Signature is member_lookup(cls: AtomMeta, name: str)", .{});
+    }
+    const meta: *AtomMeta = @ptrCast(cls);
+    const topic: *Str = @ptrCast(name);
+    return meta.findMember(topic) orelse py.attributeErrorObject(null, "'{s}' has no member '{s}'", .{ py.Type.className(@ptrCast(meta)), topic.data() });
+}
+
+fn memberGet(member: *MemberBase, atom: *Atom) callconv(.c) ?*Object {
+    const get = member.typeref().impl.tp_descr_get.?;
+    return @ptrCast(get(@ptrCast(member), @ptrCast(atom), null));
+}
+
+fn memberSet(member: *MemberBase, atom: *Atom, value: *Object) callconv(.c) c_int {
+    const set = member.typeref().impl.tp_descr_set.?;
+    return set(@ptrCast(member), @ptrCast(atom), @ptrCast(value));
+}
+
+fn memberDel(member: *MemberBase, atom: *Atom) callconv(.c) c_int {
+    const set = member.typeref().impl.tp_descr_set.?;
+    return set(@ptrCast(member), @ptrCast(atom), null);
+}
+
+inline fn staticSlot(member: *MemberBase, atom: *Atom) !*usize {
+    if (member.info.storage_mode != .static) {
+        try py.typeError("Member '{s}' does not use static storage", .{member.name.?.data()});
+    }
+    return @ptrCast(try atom.slotPtr(member));
+}
+
+fn slotRead(member: *MemberBase, atom: *Atom, data: *u64) callconv(.c) c_int {
+    const ptr = staticSlot(member, atom) catch return -1;
+    const value = ptr.*;
+    if (value & member.slotSetMask() == 0) {
+        return 0;
+    }
+    data.* = (value & member.slotDataMask()) >> member.info.offset;
+    return 1;
+}
+
+fn slotWrite(member: *MemberBase, atom: *Atom, data: u64) callconv(.c) c_int {
+    writeStaticSlot(member, atom, data) catch return -1;
+    return 0;
+}
+
+fn writeStaticSlot(member: *MemberBase, atom: *Atom, data: u64) !void {
+    const ptr = try staticSlot(member, atom);
+    if (atom.info.is_frozen) {
+        try py.attributeError("Can't set attribute of frozen Atom", .{});
+    }
+    const data_mask = member.slotDataMask();
+    if (data > data_mask >> member.info.offset) {
+        try py.valueError("Data {} does not fit in member '{s}'", .{ data, member.name.?.data() });
+    }
+    ptr.* = (ptr.* & ~(data_mask | member.slotSetMask())) | (data << member.info.offset) | member.slotSetMask();
+}
+
+fn observe(atom: *Atom, topic: *Object, observer: *Object, change_types: u8) callconv(.c) c_int {
+    if (!Str.check(topic) or !observer.isCallable()) {
+        return py.typeErrorObject(-1, "Invalid arguments. Signature is observe(atom: Atom, topic: str, observer: Callable, change_types: int)", .{});
+    }
+    atom.addDynamicObserver(@ptrCast(topic), observer, change_types) catch return -1;
+    return 0;
+}
+
+fn unobserve(atom: *Atom, topic: *Object, observer: *Object) callconv(.c) c_int {
+    if (!Str.check(topic)) {
+        return py.typeErrorObject(-1, "Invalid arguments. Signature is unobserve(atom: Atom, topic: str, observer: Callable)", .{});
+    }
+    atom.removeDynamicObserver(@ptrCast(topic), observer) catch return -1;
+    return 0;
+}
+
+fn notify(atom: *Atom, topics: [*]const *Object, changes: [*]const ?*Object, n: isize) callconv(.c) c_int {
+    const meta: *AtomMeta = @ptrCast(atom.typeref());
+    const count: usize = @intCast(@max(n, 0));
+    for (topics[0..count], changes[0..count]) |item, change| {
+        if (!Str.check(item)) {
+            return py.typeErrorObject(-1, "Notify topics must be str", .{});
+        }
+        const topic: *Str = @ptrCast(item);
+        const change_types = @intFromEnum(ChangeType.ANY);
+        if (meta.findMember(topic)) |member| {
+            if (change) |arg| {
+                member.notifyAll(atom, .{arg}, change_types) catch return -1;
+            } else {
+                member.notifyAll(atom, .{}, change_types) catch return -1;
+            }
+        } else if (change) |arg| {
+            atom.notifyInternal(topic, .{arg}, change_types) catch return -1;
+        } else {
+            atom.notifyInternal(topic, .{}, change_types) catch return -1;
+        }
+    }
+    return 0;
+}
+
+const c_api = CApi{
+    .version = version,
+    .size = @sizeOf(CApi),
+    .member_lookup = &memberLookup,
+    .member_get = &memberGet,
+    .member_set = &memberSet,
+    .member_del = &memberDel,
+    .slot_read = &slotRead,
+    .slot_write = &slotWrite,
+    .observe = &observe,
+    .unobserve = &unobserve,
+    .notify = &notify,
+};
+
+pub fn initModule(mod: *py.Module) !void {
+    const capsule: *Object = @ptrCast(py.c.PyCapsule_New(@constCast(@ptrCast(&c_api)), capsule_name, null) orelse return error.PyError);
+    try mod.addObject("_C_API", capsule);
+    const value = try py.Int.new(version);
+    try mod.addObject("C_API_VERSION", @ptrCast(value));
+}
+
+pub fn deinitModule(_: *py.Module) void {}
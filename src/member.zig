@@ -21,14 +21,25 @@ pub var value_str: ?*Str = null;
 pub var oldvalue_str: ?*Str = null;
 pub var item_str: ?*Str = null;
 pub var property_str: ?*Str = null;
+pub var container_str: ?*Str = null;
+pub var operation_str: ?*Str = null;
+pub var index_str: ?*Str = null;
+pub var items_str: ?*Str = null;
+pub var compare_str: ?*Str = null;
 
 const Atom = @import("atom.zig").Atom;
 const AtomMeta = @import("atom_meta.zig").AtomMeta;
 const ObserverPool = @import("observer_pool.zig").ObserverPool;
 const ChangeType = @import("observer_pool.zig").ChangeType;
+const default_change_types = @import("observer_pool.zig").default_change_types;
+const StaticHandlers = @import("observer_pool.zig").StaticHandlers;
+const stats = @import("stats.zig");
+const tracer = @import("tracer.zig");
+const MemberStats = stats.MemberStats;
 const package_name = @import("api.zig").package_name;
 const modes = @import("modes.zig");
 const ValueMember = @import("members/scalars.zig").ValueMember;
+const property = @import("members/property.zig");
 
 const MAX_BITSIZE = @bitSizeOf(usize);
 const MAX_OFFSET = @bitSizeOf(usize) - 1;
@@ -43,8 +54,238 @@ pub const Ownership = enum(u1) { stolen = 0, borrowed = 1 };
 pub const DefaultMode = enum(u2) { static = 0, func = 1, method = 2, method_name = 3 };
 pub const ValidateMode = enum(u2) { default = 0, call_old_new = 1, call_name_old_new = 2, call_object_old_new = 3 };
 pub const CoerceMode = enum(u1) { no = 0, yes = 1 };
+
+// How a write is compared with the current value to decide if it changed.
+// Unchanged writes are not stored and do not notify.
+pub const CompareMode = enum(u2) {
+    // Not set on the member. Uses the class policy or identity
+    default = 0,
+    identity = 1,
+    // Exact builtin scalars and tuples of them are compared by value, anything else by identity
+    eq = 2,
+    // Like eq but other types are compared with __eq__
+    eq_method = 3,
+
+    pub fn fromStr(value: *Str) !CompareMode {
+        const data = value.data();
+        if (std.mem.eql(u8, data, "identity")) {
+            return .identity;
+        } else if (std.mem.eql(u8, data, "eq")) {
+            return .eq;
+        } else if (std.mem.eql(u8, data, "__eq__")) {
+            return .eq_method;
+        }
+        try py.valueError("compare must be 'identity', 'eq' or '__eq__', got '{s}'", .{data});
+        unreachable;
+    }
+};
+
+// Types that compare natively without calling back into python
+fn isNativeScalarType(t: *Type) bool {
+    inline for (.{ &py.c.PyUnicode_Type, &py.c.PyLong_Type, &py.c.PyFloat_Type, &py.c.PyBool_Type, &py.c.PyBytes_Type, &py.c.PyComplex_Type }) |native| {
+        if (t == @as(*Type, @ptrCast(native))) {
+            return true;
+        }
+    }
+    return false;
+}
+
+// Compare two values according to an eq compare mode
+fn valuesEqual(a: *Object, b: *Object, use_eq_method: bool) !bool {
+    if (a == b) {
+        return true;
+    }
+    const t = a.typeref();
+    if (t == b.typeref()) {
+        if (isNativeScalarType(t)) {
+            return richEqual(a, b);
+        }
+        if (Tuple.checkExact(a)) {
+            const x: *Tuple = @ptrCast(a);
+            const y: *Tuple = @ptrCast(b);
+            const n = x.sizeUnchecked();
+            if (n != y.sizeUnchecked()) {
+                return false;
+            }
+            for (0..n) |i| {
+                if (!try valuesEqual(x.getUnsafe(i).?, y.getUnsafe(i).?, use_eq_method)) {
+                    return false;
+                }
+            }
+            return true;
+        }
+    }
+    return use_eq_method and try richEqual(a, b);
+}
+
+inline fn richEqual(a: *Object, b: *Object) !bool {
+    const r = py.c.PyObject_RichCompareBool(@ptrCast(a), @ptrCast(b), py.c.Py_EQ);
+    if (r < 0) {
+        return error.PyError;
+    }
+    return r == 1;
+}
 pub const Observable = enum(u2) { no = 0, yes = 1, maybe = 2 };
 
+// The member and atom that store a TypedList, TypedDict or TypedSet.
+// This is only created when in place changes of the container are observed.
+pub const ContainerOwner = struct {
+    member: *MemberBase,
+    atom: *Atom,
+
+    // Get the owner of a container validated by item_member if an observer
+    // of the owner subscribed to container changes. Containers nested in
+    // another member's validator do not notify.
+    pub inline fn observed(item_member: *MemberBase, atom: *Atom) ?ContainerOwner {
+        if (atom.info.notifications_disabled) {
+            return null;
+        }
+        const owner = item_member.owner orelse return null;
+        if (!MemberBase.check(owner)) {
+            return null;
+        }
+        var m: *MemberBase = @ptrCast(owner);
+        // Validators are shared with clones so the member that owns the
+        // validator may belong to a base class. Use the one of the atom's class
+        // so observers added by a subclass are notified.
+        const cls: *Object = @ptrCast(atom.typeref());
+        if (m.owner != cls and m.staticAtomMeta() != null) {
+            const meta: *AtomMeta = @ptrCast(cls);
+            m = meta.getMember(m.name.?) orelse m;
+        }
+        if (m.staticAtomMeta() == null or !m.shouldNotify(atom, .CONTAINER)) {
+            return null;
+        }
+        return ContainerOwner{ .member = m, .atom = atom };
+    }
+
+    // Notify observers of an in place change to the container.
+    // The index and items keys are omitted when null.
+    pub fn notify(self: ContainerOwner, container: *Object, op: *Str, index: ?*Object, items: ?*Object) !void {
+        var change: *Dict = try Dict.new();
+        defer change.decref();
+        try change.set(@ptrCast(type_str.?), @ptrCast(container_str.?));
+        try change.set(@ptrCast(object_str.?), @ptrCast(self.atom));
+        try change.set(@ptrCast(name_str.?), @ptrCast(self.member.name.?));
+        try change.set(@ptrCast(value_str.?), container);
+        try change.set(@ptrCast(operation_str.?), @ptrCast(op));
+        if (index) |v| {
+            try change.set(@ptrCast(index_str.?), v);
+        }
+        if (items) |v| {
+            try change.set(@ptrCast(items_str.?), v);
+        }
+        try self.member.notifyChange(self.atom, change, .CONTAINER);
+    }
+};
+
+// The member and atom of a copy-on-write default view. Reading an unwritten
+// container member stores a view copied from the member's shared default in
+// the slot. The view only counts as written once it is first mutated, which
+// emits the create notification. Both references are released at that point.
+pub const DefaultViewOwner = extern struct {
+    member: ?*MemberBase = null,
+    atom: ?*Atom = null,
+
+    pub inline fn isView(self: *const DefaultViewOwner) bool {
+        return self.member != null;
+    }
+
+    // Called after the first mutation of the view succeeded. The create is
+    // not notified if the slot no longer holds the view.
+    pub inline fn materialize(self: *DefaultViewOwner, view: *Object) !void {
+        const m = self.member orelse return;
+        const atom = self.atom.?;
+        self.member = null;
+        self.atom = null;
+        defer m.decref();
+        defer atom.decref();
+        const ptr = try atom.slotPtr(m);
+        if (ptr.* == view) {
+            try m.notifyCreate(atom, view);
+        }
+    }
+
+    pub fn set(self: *DefaultViewOwner, m: *MemberBase, atom: *Atom) void {
+        py.xsetref(@ptrCast(&self.member), @ptrCast(m.newref()));
+        py.xsetref(@ptrCast(&self.atom), @ptrCast(atom.newref()));
+    }
+
+    pub fn clear(self: *DefaultViewOwner) void {
+        py.clearAll(.{ &self.member, &self.atom });
+    }
+
+    pub fn traverse(self: *DefaultViewOwner, visit: py.visitproc, arg: ?*anyopaque) c_int {
+        return py.visitAll(.{ self.member, self.atom }, visit, arg);
+    }
+};
+
+// Call a method descriptor of a builtin container type with self prepended
+// to the vectorcall arguments. The descriptor calls its C function directly.
+// Returns new reference
+pub fn callBaseMethod(method: *Object, self: *Object, args: [*]const *Object, n: isize, kwnames: ?*Tuple) ?*Object {
+    const nargs: usize = @intCast(n);
+    const nkw: usize = if (kwnames) |names| @intCast(names.sizeUnchecked()) else 0;
+    const total = nargs + nkw + 1;
+    var small: [8]*Object = undefined;
+    const argv: []*Object = if (total <= small.len) small[0..total] else py.allocator.alloc(*Object, total) catch return py.memoryErrorObject(null);
+    defer if (total > small.len) py.allocator.free(argv);
+    argv[0] = self;
+    @memcpy(argv[1..], args[0 .. total - 1]);
+    return @ptrCast(py.c.PyObject_Vectorcall(@ptrCast(method), @ptrCast(argv.ptr), nargs + 1, @ptrCast(kwnames)));
+}
+
+// Interned operation names used in container change notifications
+pub fn ContainerOps(comptime names: anytype) type {
+    return struct {
+        var strs = [_]?*Str{null} ** names.len;
+
+        pub inline fn get(comptime name: []const u8) *Str {
+            const i = comptime blk: {
+                for (names, 0..) |n, i| {
+                    if (std.mem.eql(u8, n, name)) {
+                        break :blk i;
+                    }
+                }
+                @compileError("Unknown container operation " ++ name);
+            };
+            return strs[i].?;
+        }
+
+        pub fn init() !void {
+            inline for (names, 0..) |name, i| {
+                strs[i] = try Str.internFromString(name);
+            }
+        }
+
+        pub fn deinit() void {
+            for (&strs) |*str| {
+                py.clear(str);
+            }
+        }
+    };
+}
+
+// Records the members of an atom that are read while a tracked Property
+// getter runs so the property is reset when any of them change.
+pub const DependencyTracker = struct {
+    atom: *Atom,
+    observer: *Object,
+    failed: bool = false,
+
+    pub fn record(self: *DependencyTracker, atom: *Atom, member: *MemberBase) void {
+        if (atom != self.atom or self.failed) {
+            return;
+        }
+        atom.addDynamicObserver(member.name.?, self.observer, @intFromEnum(ChangeType.ANY)) catch {
+            self.failed = true;
+        };
+    }
+};
+
+// Set while a tracked Property getter is running
+pub var dependency_tracker: ?*DependencyTracker = null;
+
 pub fn countAllMembers() usize {
     comptime {
         var n: usize = 0;
@@ -91,10 +332,107 @@ pub const MemberInfo = packed struct {
     optional: bool = false,
     coerce: bool = false,
     resolved: bool = false,
+    // Unwritten container defaults are returned as views that are only
+    // written into the slot when first mutated
+    copy_on_write: bool = false,
     typeid: u5 = 0,
-    padding: u22 = 0,
+    compare: CompareMode = .default,
+    padding: u19 = 0,
 };
 
+// Remembers a few concrete types that passed a type check so repeated writes
+// of the same type skip isinstance. Entries hold borrowed type pointers with
+// the type's version tag. Python assigns a new tag whenever a type (or one of
+// its bases) is modified and tags are never reused so an entry can only match
+// the same unmodified type.
+pub const TypeCache = extern struct {
+    pub const size = 4;
+    types: [size]?*Type = .{null} ** size,
+    tags: [size]c_uint = .{0} ** size,
+    next: u8 = 0,
+
+    pub inline fn contains(self: *const TypeCache, cls: *Type) bool {
+        if (cls.impl.tp_flags & py.c.Py_TPFLAGS_VALID_VERSION_TAG == 0) {
+            return false;
+        }
+        const tag = cls.impl.tp_version_tag;
+        inline for (0..size) |i| {
+            if (self.types[i] == cls and self.tags[i] == tag) {
+                return true;
+            }
+        }
+        return false;
+    }
+
+    pub fn add(self: *TypeCache, cls: *Type) void {
+        if (cls.impl.tp_flags & py.c.Py_TPFLAGS_VALID_VERSION_TAG == 0) {
+            return;
+        }
+        self.types[self.next] = cls;
+        self.tags[self.next] = cls.impl.tp_version_tag;
+        self.next = (self.next + 1) % size;
+    }
+
+    // Check whether the result of isinstance(value, kind) only depends on
+    // the type of the value. This is true when the value does not override
+    // __class__ and the metaclass of each kind uses the __instancecheck__
+    // of type or ABCMeta.
+    pub fn isCacheable(cls: *Type, kind: *Object) bool {
+        // This also assigns a version tag if the type does not have one
+        if (py.c._PyType_Lookup(@ptrCast(cls), @ptrCast(class_str.?)) != @as(?*py.c.PyObject, @ptrCast(default_class_descr))) {
+            return false;
+        }
+        if (Tuple.check(kind)) {
+            const kinds: *Tuple = @ptrCast(kind);
+            for (0..kinds.sizeUnchecked()) |i| {
+                if (!hasDefaultInstanceCheck(kinds.getUnsafe(i).?)) {
+                    return false;
+                }
+            }
+            return true;
+        }
+        return hasDefaultInstanceCheck(kind);
+    }
+
+    fn hasDefaultInstanceCheck(kind: *Object) bool {
+        if (!Type.check(kind)) {
+            return false;
+        }
+        const check = py.c._PyType_Lookup(@ptrCast(kind.typeref()), @ptrCast(instancecheck_str.?));
+        for (default_instancechecks) |f| {
+            if (check == @as(?*py.c.PyObject, @ptrCast(f))) {
+                return true;
+            }
+        }
+        return false;
+    }
+};
+
+var class_str: ?*Str = null;
+var instancecheck_str: ?*Str = null;
+var default_class_descr: ?*Object = null;
+// type.__instancecheck__ and ABCMeta.__instancecheck__
+var default_instancechecks: [2]?*Object = .{ null, null };
+
+fn initTypeCache() !void {
+    class_str = try Str.internFromString("__class__");
+    instancecheck_str = try Str.internFromString("__instancecheck__");
+    const object_type: *Type = @ptrCast(&py.c.PyBaseObject_Type);
+    const type_type: *Type = @ptrCast(&py.c.PyType_Type);
+    const abc = try py.importModule("abc");
+    defer abc.decref();
+    const abc_meta: *Type = @ptrCast(try abc.getAttrString("ABCMeta"));
+    defer abc_meta.decref();
+    default_class_descr = py.returnOptional(@ptrCast(py.c._PyType_Lookup(@ptrCast(object_type), @ptrCast(class_str.?))));
+    inline for (.{ type_type, abc_meta }, 0..) |cls, i| {
+        default_instancechecks[i] = py.returnOptional(@ptrCast(py.c._PyType_Lookup(@ptrCast(cls), @ptrCast(instancecheck_str.?))));
+    }
+}
+
+fn deinitTypeCache() void {
+    py.clearAll(.{ &default_instancechecks[0], &default_instancechecks[1], &default_class_descr, &instancecheck_str, &class_str });
+}
+
 // Base Member class
 pub const MemberBase = extern struct {
     // Reference to the type. This is set in Fready
@@ -107,10 +445,17 @@ pub const MemberBase = extern struct {
     default_context: ?*Object = null,
     validate_context: ?*Object = null,
     coercer_context: ?*Object = null,
+    // Validated static default that copy-on-write views are copied from
+    shared_default: ?*Object = null,
     name: ?*Str = null,
     // The class or parent member which owns this member
     owner: ?*Object = null,
+    // Observers added by the owner class when it was created
+    static_handlers: ?*StaticHandlers = null,
+    // Operation counters. Only set while stats are enabled
+    stats: ?*MemberStats = null,
     info: MemberInfo,
+    type_cache: TypeCache = .{},
 
     // Import the object protocol
     pub usingnamespace py.ObjectProtocol(@This());
@@ -138,7 +483,7 @@ pub const MemberBase = extern struct {
         if (!Str.checkExact(value)) {
             return py.typeErrorObject(-1, "Member name must be a str", .{});
         }
-        self.setName(@ptrCast(value));
+        self.setName(@ptrCast(value)) catch return -1;
         return 0;
     }
 
@@ -227,7 +572,10 @@ pub const MemberBase = extern struct {
 
         const ptr = atom.slotPtr(self) catch return null;
         switch (self.info.storage_mode) {
-            .pointer => return py.returnOptional(ptr.*),
+            .pointer => {
+                const value = ptr.* orelse return py.returnNone();
+                return property.slotValue(value).newref();
+            },
             .static => {
                 const data_ptr: *usize = @ptrCast(ptr);
                 if (data_ptr.* & self.slotSetMask() != 0) {
@@ -249,6 +597,10 @@ pub const MemberBase = extern struct {
         const ptr = atom.slotPtr(self) catch return null;
         switch (self.info.storage_mode) {
             .pointer => {
+                atom.trackReferent(value);
+                if (ptr.*) |old| {
+                    property.releaseSlotValue(old);
+                }
                 py.xsetref(ptr, value.newref());
             },
             .static => {
@@ -278,6 +630,9 @@ pub const MemberBase = extern struct {
         const ptr = atom.slotPtr(self) catch return null;
         switch (self.info.storage_mode) {
             .pointer => {
+                if (ptr.*) |old| {
+                    property.releaseSlotValue(old);
+                }
                 py.clear(ptr);
             },
             .static => {
@@ -398,6 +753,11 @@ pub const MemberBase = extern struct {
     }
 
     pub fn has_observers(self: *Self) ?*Object {
+        if (self.static_handlers) |handlers| {
+            if (handlers.change_types != 0) {
+                return py.returnBool(true);
+            }
+        }
         if (self.staticObservers()) |pool| {
             return py.returnBool(pool.hasTopic(self.name.?) catch return null);
         }
@@ -416,6 +776,11 @@ pub const MemberBase = extern struct {
             }
             change_types = Int.as(@ptrCast(args[1]), u8) catch return null;
         }
+        if (self.static_handlers) |handlers| {
+            if (handlers.contains(args[0], change_types)) {
+                return py.returnBool(true);
+            }
+        }
         if (self.staticObservers()) |pool| {
             return py.returnBool(pool.hasObserver(self.name.?, args[0], change_types) catch return null);
         }
@@ -423,7 +788,7 @@ pub const MemberBase = extern struct {
     }
 
     pub fn add_static_observer(self: *Self, args: [*]*Object, n: isize) ?*Object {
-        const msg = "Invalid arguments. Signature is add_static_observer(observer: str | Callable, change_types: int = 0xff)";
+        const msg = "Invalid arguments. Signature is add_static_observer(observer: str | Callable, change_types: int = 0xdf)";
         if (n < 1 or n > 2) {
             return py.typeErrorObject(null, msg, .{});
         }
@@ -439,13 +804,12 @@ pub const MemberBase = extern struct {
                 }
                 break :blk Int.as(@ptrCast(v), u8) catch return null;
             }
-            break :blk @intFromEnum(ChangeType.ANY);
+            break :blk default_change_types;
         };
 
         if (self.staticAtomMeta()) |meta| {
-            if (meta.staticObserverPool() catch return null) |pool| {
-                pool.addObserver(py.allocator, self.name.?, observer, change_types) catch return null;
-            }
+            const context = StaticObserver{ .member = self, .observer = observer, .change_types = change_types };
+            meta.forEachMemberClass(self, context, StaticObserver.add) catch return null;
         } else {
             return py.typeErrorObject(null, "Cannot add a static observer on a nested member", .{});
         }
@@ -453,12 +817,38 @@ pub const MemberBase = extern struct {
     }
 
     pub fn remove_static_observer(self: *Self, observer: *Object) ?*Object {
-        if (self.staticObservers()) |pool| {
-            pool.removeObserver(py.allocator, self.name.?, observer) catch return null;
+        // Observers from @observe are called directly by the member
+        if (self.static_handlers) |handlers| {
+            _ = handlers.remove(py.allocator, observer);
+        }
+        if (self.staticAtomMeta()) |meta| {
+            const context = StaticObserver{ .member = self, .observer = observer, .change_types = 0 };
+            meta.forEachMemberClass(self, context, StaticObserver.remove) catch return null;
         }
         return py.returnNone();
     }
 
+    // Static observers are kept in the pool of each class. Subclasses that
+    // inherit the member unchanged share it with the owner so the observer
+    // is added to or removed from their pools as well.
+    const StaticObserver = struct {
+        member: *Self,
+        observer: *Object,
+        change_types: u8,
+
+        fn add(self: StaticObserver, cls: *AtomMeta) py.Error!void {
+            if (try cls.staticObserverPool()) |pool| {
+                try pool.addObserver(py.allocator, self.member.name.?, self.observer, self.change_types);
+            }
+        }
+
+        fn remove(self: StaticObserver, cls: *AtomMeta) py.Error!void {
+            if (cls.static_observers) |pool| {
+                try pool.removeObserver(py.allocator, self.member.name.?, self.observer);
+            }
+        }
+    };
+
     pub fn clone(self: *Self) ?*Object {
         return @ptrCast(self.cloneOrError() catch null);
     }
@@ -469,9 +859,9 @@ pub const MemberBase = extern struct {
         }
         const atom: *Atom = @ptrCast(args[0]);
         if (n == 2) {
-            atom.notifyInternal(self.name.?, .{args[1]}, @intFromEnum(ChangeType.ANY)) catch return null;
+            self.notifyAll(atom, .{args[1]}, @intFromEnum(ChangeType.ANY)) catch return null;
         } else {
-            atom.notifyInternal(self.name.?, .{}, @intFromEnum(ChangeType.ANY)) catch return null;
+            self.notifyAll(atom, .{}, @intFromEnum(ChangeType.ANY)) catch return null;
         }
         return py.returnNone();
     }
@@ -481,6 +871,12 @@ pub const MemberBase = extern struct {
             return py.typeErrorObject(null, "tag() takes no positional arguments", .{});
         }
         if (kwargs) |kw| {
+            if (kw.get(@ptrCast(compare_str.?))) |value| {
+                if (!Str.check(value)) {
+                    return py.typeErrorObject(null, "compare must be a str", .{});
+                }
+                self.info.compare = CompareMode.fromStr(@ptrCast(value)) catch return null;
+            }
             if (self.metadata) |metadata| {
                 metadata.update(@ptrCast(kw)) catch return null;
             } else {
@@ -505,9 +901,51 @@ pub const MemberBase = extern struct {
     // Internal api
     // --------------------------------------------------------------------------
     // Borrows reference to name
-    pub fn setName(self: *Self, name: *Str) void {
+    pub fn setName(self: *Self, name: *Str) !void {
         py.xsetref(@ptrCast(&self.name), @ptrCast(name.newref()));
         Str.internInPlace(@ptrCast(&self.name.?));
+        try self.bindName();
+    }
+
+    // Let the member resolve anything derived from its name. This is called
+    // whenever the name is set and when a member is cloned so each copy has its own state.
+    pub fn bindName(self: *Self) !void {
+        @setEvalBranchQuota(10000);
+        inline for (comptime allMembers()) |M| {
+            if (comptime @hasDecl(M.Impl, "bindName")) {
+                if (self.info.typeid == M.typeid) {
+                    return M.Impl.bindName(self);
+                }
+            }
+        }
+    }
+
+    // Returns a type whose exact instances always pass validation unchanged
+    // or null if the member has none. Containers use it to skip validate
+    // calls for the common case.
+    pub fn exactType(self: *Self) ?*Type {
+        @setEvalBranchQuota(10000);
+        inline for (comptime allMembers()) |M| {
+            if (comptime @hasDecl(M.Impl, "exactType")) {
+                if (self.info.typeid == M.typeid) {
+                    return M.Impl.exactType(self);
+                }
+            }
+        }
+        return null;
+    }
+
+    // Check if values that passed validation by other also pass this member
+    pub fn hasSameValidator(self: *const Self, other: *const Self) bool {
+        if (self == other) {
+            return true;
+        }
+        return (self.info.typeid != 0 and
+            self.info.typeid == other.info.typeid and
+            self.info.optional == other.info.optional and
+            self.info.coerce == other.info.coerce and
+            self.validate_context == other.validate_context and
+            self.coercer_context == other.coercer_context);
     }
 
     // Borrows reference to pwmer
@@ -523,12 +961,25 @@ pub const MemberBase = extern struct {
     pub fn setDefaultContext(self: *Self, mode: DefaultMode, context: *Object) void {
         self.info.default_mode = mode;
         py.xsetref(&self.default_context, context);
+        py.clear(&self.shared_default);
     }
 
     // Steals reference to context
     pub fn setValidateContext(self: *Self, mode: ValidateMode, context: *Object) void {
         self.info.validate_mode = mode;
         py.xsetref(&self.validate_context, context);
+        py.clear(&self.shared_default);
+    }
+
+    // Get the validated static default that copy-on-write views are copied
+    // from. It is created by the member's impl on the first read.
+    // Returns borrowed reference
+    pub inline fn sharedDefault(self: *Self, atom: *Atom, comptime create: fn (*Self, *Atom) py.Error!*Object) py.Error!*Object {
+        if (self.shared_default) |value| {
+            return value;
+        }
+        self.shared_default = try create(self, atom);
+        return self.shared_default.?;
     }
 
     // Steals reference to context
@@ -537,6 +988,36 @@ pub const MemberBase = extern struct {
         py.xsetref(&self.coercer_context, context);
     }
 
+    // Same as isinstance(value, kind) but remembers the types that passed
+    pub inline fn isInstanceCached(self: *Self, value: *Object, kind: *Object) py.Error!bool {
+        const cls = value.typeref();
+        if (self.type_cache.contains(cls)) {
+            return true;
+        }
+        if (!try value.isInstance(kind)) {
+            return false;
+        }
+        if (TypeCache.isCacheable(cls, kind)) {
+            self.type_cache.add(cls);
+        }
+        return true;
+    }
+
+    // Same as value.typeCheck(kind) but remembers subtypes that passed
+    pub inline fn typeCheckCached(self: *Self, value: *Object, kind: *Type) bool {
+        const cls = value.typeref();
+        if (cls == kind or self.type_cache.contains(cls)) {
+            return true;
+        }
+        if (!value.typeCheck(kind)) {
+            return false;
+        }
+        // Assign a version tag so the entry can be used
+        _ = py.c._PyType_Lookup(@ptrCast(cls), @ptrCast(class_str.?));
+        self.type_cache.add(cls);
+        return true;
+    }
+
     pub inline fn validate(self: *Self, atom: *Atom, oldvalue: *Object, newvalue: *Object) py.Error!*Object {
         // Zig is able to inline validation of everything except the custom
         // containers that require coercion.
@@ -553,6 +1034,32 @@ pub const MemberBase = extern struct {
         unreachable;
     }
 
+    // Check if the value stored in the slot may reference other objects
+    pub fn canFormCycles(self: *const Self) bool {
+        if (self.info.storage_mode != .pointer) {
+            return false;
+        }
+        inline for (comptime allMembers()) |M| {
+            if (self.info.typeid == M.typeid) {
+                return !M.acyclic;
+            }
+        }
+        return true;
+    }
+
+    // Check if reads can go directly to the slot once it holds a value
+    pub fn canReadFromSlot(self: *const Self) bool {
+        if (self.info.default_mode != .static or self.info.storage_mode != .pointer) {
+            return false;
+        }
+        inline for (comptime allMembers()) |M| {
+            if (self.info.typeid == M.typeid) {
+                return M.slot_readable;
+            }
+        }
+        return false;
+    }
+
     // Check if this member can observe the given topic
     // May return null if it cannot be known
     pub fn checkTopic(self: *Self, topic: *Str) py.Error!Observable {
@@ -607,7 +1114,7 @@ pub const MemberBase = extern struct {
         if (item_member.owner != null) {
             return py.typeError("Cannot reuse a member bound to another member", .{});
         }
-        item_member.setName(name);
+        try item_member.setName(name);
         item_member.setOwner(@ptrCast(self));
     }
 
@@ -640,12 +1147,40 @@ pub const MemberBase = extern struct {
         return null;
     }
 
+    pub inline fn countValidationFailure(self: *Self) void {
+        if (self.stats) |s| {
+            s.validation_failures += 1;
+        }
+    }
+
+    pub inline fn hasStaticHandlers(self: *Self, change_type: ChangeType) bool {
+        if (self.static_handlers) |handlers| {
+            return handlers.enabled(@intFromEnum(change_type));
+        }
+        return false;
+    }
+
     pub fn shouldNotify(self: *Self, atom: *Atom, change_type: ChangeType) bool {
-        return (!atom.info.notifications_disabled and atom.hasAnyObservers(self.name.?, change_type) catch unreachable);
+        return (!atom.info.notifications_disabled and (self.hasStaticHandlers(change_type) or atom.hasAnyObservers(self.name.?, change_type) catch unreachable));
+    }
+
+    // Call the static handlers followed by the observers in the atom's pools
+    pub fn notifyAll(self: *Self, atom: *Atom, args: anytype, change_types: u8) !void {
+        var calls: stats.CallCounter = null;
+        if (self.stats) |s| {
+            s.notifications += 1;
+            calls = &self.stats;
+        }
+        const span = tracer.beginNotify();
+        defer tracer.endNotify(span, atom, self.name.?, change_types);
+        if (self.static_handlers) |handlers| {
+            try handlers.notify(atom, args, change_types, calls);
+        }
+        try atom.notifyObservers(self.name.?, args, change_types, calls);
     }
 
     pub fn notifyChange(self: *Self, atom: *Atom, change: *Dict, change_type: ChangeType) !void {
-        try atom.notifyInternal(self.name.?, .{change}, @intFromEnum(change_type));
+        try self.notifyAll(atom, .{change}, @intFromEnum(change_type));
     }
 
     pub fn notifyCreate(self: *Self, atom: *Atom, newvalue: *Object) !void {
@@ -660,6 +1195,16 @@ pub const MemberBase = extern struct {
         }
     }
 
+    // Check if writing newvalue over old leaves the value unchanged. This is
+    // only true for members that compare by value.
+    pub inline fn isUnchanged(self: Self, old: *Object, newvalue: *Object) !bool {
+        return switch (self.info.compare) {
+            .default, .identity => false,
+            .eq => valuesEqual(old, newvalue, false),
+            .eq_method => valuesEqual(old, newvalue, true),
+        };
+    }
+
     pub fn notifyUpdate(self: *Self, atom: *Atom, oldvalue: *Object, newvalue: *Object) !void {
         if (oldvalue != newvalue and self.shouldNotify(atom, .UPDATE)) {
             var change: *Dict = try Dict.new();
@@ -711,6 +1256,7 @@ pub const MemberBase = extern struct {
                 @field(result, field_name) = context.newref();
             }
         }
+        try result.bindName();
         return result;
     }
 
@@ -785,6 +1331,11 @@ pub const MemberBase = extern struct {
         if (comptime @import("api.zig").debug_level.clears) {
             py.print("Member.clear(name: {?s}, owner: {?s})\n", .{ self.name, self.owner }) catch return -1;
         }
+        if (self.static_handlers) |handlers| {
+            self.static_handlers = null;
+            handlers.deinit(py.allocator);
+        }
+        stats.release(self);
         py.clearAll(.{
             &self.name,
             &self.owner,
@@ -792,6 +1343,7 @@ pub const MemberBase = extern struct {
             &self.default_context,
             &self.validate_context,
             &self.coercer_context,
+            &self.shared_default,
         });
         return 0;
     }
@@ -810,6 +1362,11 @@ pub const MemberBase = extern struct {
                 }) catch return -1;
             }
         }
+        if (self.static_handlers) |handlers| {
+            const r = handlers.traverse(visit, arg);
+            if (r != 0)
+                return r;
+        }
         return py.visitAll(.{
             self.name,
             self.owner,
@@ -817,6 +1374,7 @@ pub const MemberBase = extern struct {
             self.default_context,
             self.validate_context,
             self.coercer_context,
+            self.shared_default,
         }, visit, arg);
     }
 
@@ -881,6 +1439,11 @@ pub fn Member(comptime type_name: [:0]const u8, comptime id: u5, comptime impl:
         pub const TypeName = type_name;
         pub const Impl = impl;
         pub const storage_mode: StorageMode = if (@hasDecl(impl, "storage_mode")) impl.storage_mode else .pointer;
+        // Members that only store immutable scalars set this so atoms using them can skip the gc.
+        // Validators accept subclasses so writes still check the value with trackReferent.
+        pub const acyclic: bool = @hasDecl(impl, "acyclic") and impl.acyclic;
+        // Whether the slot holds exactly what getattr returns once it is written
+        pub const slot_readable: bool = storage_mode == .pointer and !@hasDecl(impl, "getattr") and !@hasDecl(impl, "defaultStatic") and !@hasDecl(impl, "defaultView");
         pub const typeid = id;
         const Self = @This();
 
@@ -935,8 +1498,18 @@ pub fn Member(comptime type_name: [:0]const u8, comptime id: u5, comptime impl:
                     .none => unreachable,
                 };
             }
+            if (comptime @hasDecl(impl, "defaultView")) {
+                // Copy-on-write members store a view that counts as written once it is mutated
+                if (try impl.defaultView(@ptrCast(self), atom)) |view| {
+                    ptr.* = view.newref();
+                    return view;
+                }
+            }
             const default_value = try self.default(atom);
             defer default_value.decref();
+            if (self.base.stats) |s| {
+                s.defaults += 1;
+            }
 
             // We must track whether the write took ownership of the default value
             // becuse it is needed in notify create. If the writeSlot says it took ownership
@@ -998,26 +1571,47 @@ pub fn Member(comptime type_name: [:0]const u8, comptime id: u5, comptime impl:
             // If writeSlot does not take Ownership of the value then
             // we need to decref the validated/coerced result
             var value_ownership: Ownership = .borrowed;
-            if (try readSlot(@ptrCast(self), atom, ptr)) |old| {
-                defer if (storage_mode == .static) {
-                    old.decref(); // Always decref if static
-                };
-                const value = try self.validate(atom, old, newvalue);
-                defer if (value_ownership == .borrowed) value.decref();
-                value_ownership = try writeSlot(@ptrCast(self), atom, ptr, value);
-                defer if (storage_mode == .pointer) {
-                    old.decref(); // Only decref after write completes
-                };
-                try self.base.notifyUpdate(atom, old, value);
-            } else {
-                const value = try self.validate(atom, py.None(), newvalue);
-                defer if (value_ownership == .borrowed) value.decref();
-                value_ownership = try writeSlot(@ptrCast(self), atom, ptr, value);
-                try self.base.notifyCreate(atom, value);
+            const current = try readSlot(@ptrCast(self), atom, ptr);
+            if (current) |old| {
+                if (!isDefaultView(old)) {
+                    defer if (storage_mode == .static) {
+                        old.decref(); // Always decref if static
+                    };
+                    const value = try self.validate(atom, old, newvalue);
+                    defer if (value_ownership == .borrowed) value.decref();
+                    if (try self.base.isUnchanged(old, value)) {
+                        return; // Keep the current value
+                    }
+                    value_ownership = try writeSlot(@ptrCast(self), atom, ptr, value);
+                    defer if (storage_mode == .pointer) {
+                        old.decref(); // Only decref after write completes
+                    };
+                    try self.base.notifyUpdate(atom, old, value);
+                    return;
+                }
+            }
+            // The slot is empty or holds an unmodified copy-on-write default view
+            const value = try self.validate(atom, py.None(), newvalue);
+            defer if (value_ownership == .borrowed) value.decref();
+            value_ownership = try writeSlot(@ptrCast(self), atom, ptr, value);
+            if (comptime @hasDecl(impl, "detachDefaultView")) {
+                if (current) |view| {
+                    defer view.decref();
+                    try impl.detachDefaultView(view);
+                }
             }
+            try self.base.notifyCreate(atom, value);
             return; // Ok
         }
 
+        // Whether the value is a copy-on-write default view that was not mutated yet
+        inline fn isDefaultView(value: *Object) bool {
+            if (comptime @hasDecl(impl, "isDefaultView")) {
+                return impl.isDefaultView(value);
+            }
+            return false;
+        }
+
         // Default write slot implementation. It does not need to worry about discarding the old value but must
         // return whether it stole a reference to value or borrowed it so the caller can know how to handle it.
         pub inline fn writeSlot(self: *Self, atom: *Atom, slot: *?*Object, value: *Object) py.Error!Ownership {
@@ -1031,6 +1625,9 @@ pub fn Member(comptime type_name: [:0]const u8, comptime id: u5, comptime impl:
                     if (comptime @hasDecl(impl, "writeSlotPointer")) {
                         return impl.writeSlotPointer(@ptrCast(self), atom, slot);
                     }
+                    if (comptime acyclic) {
+                        atom.trackReferent(value);
+                    }
                     slot.* = value;
                     return .stolen;
                 },
@@ -1067,6 +1664,12 @@ pub fn Member(comptime type_name: [:0]const u8, comptime id: u5, comptime impl:
             if (try self.readSlot(atom, ptr)) |old| {
                 defer old.decref();
                 deleteSlot(@ptrCast(self), atom, ptr);
+                if (comptime @hasDecl(impl, "detachDefaultView")) {
+                    if (isDefaultView(old)) {
+                        // The view was never written so there is nothing to notify
+                        return impl.detachDefaultView(old);
+                    }
+                }
                 try self.base.notifyDelete(atom, old);
             }
         }
@@ -1101,9 +1704,15 @@ pub fn Member(comptime type_name: [:0]const u8, comptime id: u5, comptime impl:
             if (comptime @hasDecl(impl, "coerce") and @hasDecl(impl, "validate")) {
                 @compileError("impl cannot have both coerce and validate");
             } else if (comptime @hasDecl(impl, "coerce")) {
-                return impl.coerce(@ptrCast(self), atom, oldvalue, newvalue);
+                return impl.coerce(@ptrCast(self), atom, oldvalue, newvalue) catch |err| {
+                    self.base.countValidationFailure();
+                    return err;
+                };
             } else if (comptime @hasDecl(impl, "validate")) {
-                return impl.validate(@ptrCast(self), atom, oldvalue, newvalue);
+                return impl.validate(@ptrCast(self), atom, oldvalue, newvalue) catch |err| {
+                    self.base.countValidationFailure();
+                    return err;
+                };
             } else {
                 return newvalue.newref();
             }
@@ -1169,7 +1778,15 @@ pub fn Member(comptime type_name: [:0]const u8, comptime id: u5, comptime impl:
                 if (!atom.typeCheckSelf()) {
                     return py.typeErrorObject(null, "Members can only be used on Atom objects", .{});
                 }
+                if (self.base.stats) |s| {
+                    s.reads += 1;
+                }
                 const value = self.getattr(atom) catch null;
+                if (dependency_tracker) |tracker| {
+                    if (value != null) {
+                        tracker.record(atom, @ptrCast(self));
+                    }
+                }
                 if (comptime @import("api.zig").debug_level.gets) {
                     if (@import("api.zig").debug_level.matches(self.base.name)) {
                         py.print("{s}.get(name: {?s}, index: {}, storage_mode: {s}, default_mode: {s}, atom: {}, result={?s})\n", .{ type_name, self.base.name, self.base.info.index, @tagName(storage_mode), @tagName(self.base.info.default_mode), atom, value }) catch return null;
@@ -1189,6 +1806,9 @@ pub fn Member(comptime type_name: [:0]const u8, comptime id: u5, comptime impl:
                     py.print("{s}.set(name: {?s}, index: {}, storage_mode: {s}, default_mode: {s}, atom: {}, value={?s})\n", .{ type_name, self.base.name, self.base.info.index, @tagName(storage_mode), @tagName(self.base.info.default_mode), atom, value }) catch return -1;
                 }
             }
+            if (self.base.stats) |s| {
+                s.writes += 1;
+            }
             if (value) |v| {
                 self.setattr(atom, v) catch return -1;
             } else {
@@ -1237,7 +1857,7 @@ const all_modules = .{
     @import("members/typed.zig"),
 };
 
-const all_strings = .{ "undefined", "type", "object", "name", "value", "oldvalue", "key", "create", "update", "delete", "item", "property" };
+const all_strings = .{ "undefined", "type", "object", "name", "value", "oldvalue", "key", "create", "update", "delete", "item", "property", "container", "operation", "index", "items", "compare" };
 //
 //
 
@@ -1247,6 +1867,8 @@ pub fn initModule(mod: *py.Module) !void {
         @field(@This(), str ++ "_str") = try Str.internFromString(str);
         errdefer py.clear(@field(@This(), str ++ "_str"));
     }
+    try initTypeCache();
+    errdefer deinitTypeCache();
     try MemberBase.initType();
     errdefer MemberBase.deinitType();
     try mod.addObjectRef("Member", @ptrCast(MemberBase.TypeObject.?));
@@ -1262,6 +1884,7 @@ pub fn deinitModule(mod: *py.Module) void {
     inline for (all_modules) |module| {
         module.deinitModule(mod);
     }
+    deinitTypeCache();
     inline for (all_strings) |str| {
         py.clear(&@field(@This(), str ++ "_str"));
     }
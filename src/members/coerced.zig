@@ -97,7 +97,7 @@ pub const CoercedMember = Member("Coerced", 18, struct {
 
     pub inline fn coerce(self: *MemberBase, atom: *Atom, _: *Object, new: *Object) py.Error!*Object {
         if (self.validate_context) |kind| {
-            if (!try new.isInstance(kind)) {
+            if (!try self.isInstanceCached(new, kind)) {
                 // Try to coerce
                 if (self.coercer_context) |coercer| {
                     const coerced = try coercer.callArgs(.{new});
@@ -8,10 +8,20 @@ const Atom = @import("../atom.zig").Atom;
 const member = @import("../member.zig");
 const MemberBase = member.MemberBase;
 const Member = member.Member;
+const ContainerOwner = member.ContainerOwner;
 const InstanceMember = @import("instance.zig").InstanceMember;
 
 const package_name = @import("../api.zig").package_name;
 
+// Mutating dict methods wrapped to materialize copy-on-write defaults and notify container changes
+const forwarded_methods = .{ "pop", "popitem", "clear" };
+var dict_methods = [_]?*Object{null} ** forwarded_methods.len;
+
+// Operations sent in container change notifications
+const ops = member.ContainerOps(.{ "__setitem__", "__delitem__", "update", "__ior__" } ++ forwarded_methods);
+
+var keys_str: ?*py.Str = null;
+
 pub const TypedDict = extern struct {
     const Self = @This();
     // Reference to the type. This is set in ready
@@ -19,6 +29,7 @@ pub const TypedDict = extern struct {
 
     base: Dict,
     validate_context: ?*Tuple = null, // tuple[Optional[MemberBase], Optional[MemberBase], Atom]
+    view_owner: member.DefaultViewOwner = .{}, // Set until a copy-on-write default view is first mutated
 
     pub usingnamespace py.ObjectProtocol(Self);
 
@@ -46,24 +57,102 @@ pub const TypedDict = extern struct {
     }
 
     pub fn update(self: *Self, args: *Tuple, kwargs: ?*Dict) ?*Object {
-        _ = self;
-        _ = args;
-        _ = kwargs;
-
-        // args.unpack("update", .{&item});
-        // TODO: Implement
+        const n = args.size() catch return null;
+        if (n > 1) {
+            return py.typeErrorObject(null, "update expected at most 1 argument, got {}", .{n});
+        }
+        // Validate everything into one dict before modifying this one
+        const new = Dict.new() catch return null;
+        defer new.decref();
+        if (n == 1) {
+            self.validateInto(new, args.getUnsafe(0).?) catch return null;
+        }
+        if (kwargs) |kw| {
+            self.validateInto(new, @ptrCast(kw)) catch return null;
+        }
+        if (py.c.PyDict_Update(@ptrCast(self), @ptrCast(new)) < 0) {
+            return null;
+        }
+        self.materialize() catch return null;
+        if (self.observedOwner()) |owner| {
+            owner.notify(@ptrCast(self), ops.get("update"), null, @ptrCast(new)) catch return null;
+        }
         return py.returnNone();
     }
 
     pub fn assign_subscript(self: *Self, key: *Object, value: ?*Object) c_int {
         if (value) |item| {
-            const newkey = self.validateKey(item) catch return -1;
+            const newkey = self.validateKey(key) catch return -1;
             defer newkey.decref();
             const newvalue = self.validateValue(item) catch return -1;
             defer newvalue.decref();
-            return py.c.PyDict_Type.tp_as_mapping.*.mp_ass_subscript.?(@ptrCast(self), @ptrCast(newkey), @ptrCast(newvalue));
+            if (py.c.PyDict_Type.tp_as_mapping.*.mp_ass_subscript.?(@ptrCast(self), @ptrCast(newkey), @ptrCast(newvalue)) < 0) {
+                return -1;
+            }
+            self.materialize() catch return -1;
+            if (self.observedOwner()) |owner| {
+                const items = Tuple.packNewrefs(.{newvalue}) catch return -1;
+                defer items.decref();
+                owner.notify(@ptrCast(self), ops.get("__setitem__"), newkey, @ptrCast(items)) catch return -1;
+            }
+            return 0;
+        }
+        if (py.c.PyDict_Type.tp_as_mapping.*.mp_ass_subscript.?(@ptrCast(self), @ptrCast(key), @ptrCast(value)) < 0) {
+            return -1;
+        }
+        self.materialize() catch return -1;
+        if (self.observedOwner()) |owner| {
+            owner.notify(@ptrCast(self), ops.get("__delitem__"), key, null) catch return -1;
         }
-        return py.c.PyDict_Type.tp_as_mapping.*.mp_ass_subscript.?(@ptrCast(self), @ptrCast(key), @ptrCast(value));
+        return 0;
+    }
+
+    pub fn inplace_or(self: *Self, other: *Object) ?*Object {
+        const new = Dict.new() catch return null;
+        defer new.decref();
+        self.validateInto(new, other) catch return null;
+        if (py.c.PyDict_Update(@ptrCast(self), @ptrCast(new)) < 0) {
+            return null;
+        }
+        self.materialize() catch return null;
+        if (self.observedOwner()) |owner| {
+            owner.notify(@ptrCast(self), ops.get("__ior__"), null, @ptrCast(new)) catch return null;
+        }
+        return @ptrCast(self.newref());
+    }
+
+    // Call a dict method and materialize a copy-on-write default view if it succeeds
+    fn Forward(comptime i: usize) type {
+        return struct {
+            const name = forwarded_methods[i];
+
+            pub fn call(self: *Self, args: [*]const *Object, n: isize, kwnames: ?*Tuple) ?*Object {
+                const result = member.callBaseMethod(dict_methods[i].?, @ptrCast(self), args, n, kwnames) orelse return null;
+                self.materialize() catch {
+                    result.decref();
+                    return null;
+                };
+                if (self.observedOwner()) |owner| {
+                    notifyForwarded(owner, self, args, n, result) catch {
+                        result.decref();
+                        return null;
+                    };
+                }
+                return result;
+            }
+
+            // Pop includes the key and removed value, popitem the removed pair
+            fn notifyForwarded(owner: ContainerOwner, self: *Self, args: [*]const *Object, n: isize, result: *Object) !void {
+                const op = ops.get(name);
+                if (comptime std.mem.eql(u8, name, "clear")) {
+                    return owner.notify(@ptrCast(self), op, null, null);
+                }
+                const items = try Tuple.packNewrefs(.{result});
+                defer items.decref();
+                const index = if (n > 0) args[0] else null;
+                return owner.notify(@ptrCast(self), op, index, @ptrCast(items));
+            }
+        };
     }
 
     // --------------------------------------------------------------------------
@@ -89,34 +178,146 @@ pub const TypedDict = extern struct {
         const self: *Self = @ptrCast(try TypeObject.?.callArgs(.{}));
         errdefer self.decref();
         self.validate_context = try Tuple.packNewrefs(.{ key_member, value_member, atom });
+        if (TypedDict.check(items) and @as(*TypedDict, @ptrCast(items)).hasSameValidators(key_member, value_member)) {
+            // Already validated so they can be merged directly
+            if (py.c.PyDict_Update(@ptrCast(self), @ptrCast(items)) < 0) {
+                return error.PyError;
+            }
+        } else {
+            try validateEntries(&self.base, @ptrCast(items), key_member, value_member, atom);
+        }
+        return @ptrCast(self);
+    }
 
+    // Validate the entries of src into dst. Keys and values whose type is
+    // exactly the one the member accepts are only a pointer compare.
+    pub fn validateEntries(dst: *Dict, src: *Dict, key_member: *MemberBase, value_member: *MemberBase, atom: *Atom) !void {
+        const key_kind = if (key_member.isNone()) null else key_member.exactType();
+        const value_kind = if (value_member.isNone()) null else value_member.exactType();
         var pos: isize = 0;
-        var dict: *Dict = @ptrCast(items);
-        if (!key_member.isNone() and !value_member.isNone()) {
-            while (dict.next(&pos)) |entry| {
-                const key = try key_member.validate(atom, py.None(), entry.key);
-                defer key.decref();
-                const value = try value_member.validate(atom, py.None(), entry.value);
-                defer value.decref();
-                try self.base.set(key, value);
+        while (src.next(&pos)) |entry| {
+            const key = try validateEntry(key_member, key_kind, atom, entry.key);
+            defer key.decref();
+            const value = try validateEntry(value_member, value_kind, atom, entry.value);
+            defer value.decref();
+            try dst.set(key, value);
+        }
+    }
+
+    inline fn validateEntry(validator: *MemberBase, kind: ?*Type, atom: *Atom, obj: *Object) !*Object {
+        if (kind) |k| {
+            if (obj.typeref() == k) {
+                return obj.newref();
             }
-        } else if (!key_member.isNone()) {
-            while (dict.next(&pos)) |entry| {
-                const key = try key_member.validate(atom, py.None(), entry.key);
-                defer key.decref();
-                try self.base.set(key, entry.value);
+        }
+        if (validator.isNone()) {
+            return obj.newref();
+        }
+        return try validator.validate(atom, py.None(), obj);
+    }
+
+    // Validate a mapping or iterable of key value pairs and merge it into dst
+    pub fn validateInto(self: *Self, dst: *Dict, other: *Object) py.Error!void {
+        const v = self.activeValidator() orelse return mergeAny(dst, other);
+        const key_member = v.key_member;
+        const value_member = v.value_member;
+        const atom = v.atom;
+        if (TypedDict.check(other) and @as(*TypedDict, @ptrCast(other)).hasSameValidators(key_member, value_member)) {
+            return mergeAny(dst, other);
+        }
+        if (Dict.check(other)) {
+            return validateEntries(dst, @ptrCast(other), key_member, value_member, atom);
+        }
+        const tmp = try Dict.new();
+        defer tmp.decref();
+        try mergeAny(tmp, other);
+        try validateEntries(dst, tmp, key_member, value_member, atom);
+    }
+
+    // Merge a mapping or iterable of key value pairs the same way dict.update does
+    fn mergeAny(dst: *Dict, other: *Object) py.Error!void {
+        const r = blk: {
+            if (Dict.check(other)) {
+                break :blk py.c.PyDict_Update(@ptrCast(dst), @ptrCast(other));
             }
-        } else if (!value_member.isNone()) {
-            while (dict.next(&pos)) |entry| {
-                const value = try value_member.validate(atom, py.None(), entry.value);
-                defer value.decref();
-                try self.base.set(entry.key, value);
+            if (py.c.PyObject_HasAttr(@ptrCast(other), @ptrCast(keys_str.?)) != 0) {
+                break :blk py.c.PyDict_Merge(@ptrCast(dst), @ptrCast(other), 1);
             }
-        } else {
-            unreachable;
+            break :blk py.c.PyDict_MergeFromSeq2(@ptrCast(dst), @ptrCast(other), 1);
+        };
+        if (r < 0) {
+            return error.PyError;
         }
+    }
 
-        return @ptrCast(self);
+    // Create a view of the default for a copy-on-write member. It is stored
+    // in the atom's slot but is not a write until it is first modified.
+    // The entries were already validated by the owner.
+    pub fn newDefaultView(items: *Dict, owner: *MemberBase, atom: *Atom) !*TypedDict {
+        const self: *Self = @ptrCast(try TypeObject.?.callArgs(.{}));
+        errdefer self.decref();
+        if (py.c.PyDict_Update(@ptrCast(self), @ptrCast(items)) < 0) {
+            return error.PyError;
+        }
+        self.view_owner.set(owner, atom);
+        return self;
+    }
+
+    pub inline fn isView(self: *Self) bool {
+        return self.view_owner.isView();
+    }
+
+    // Keep the validators of the owner once this is no longer a view
+    fn takeValidator(self: *Self) py.Error!void {
+        if (self.activeValidator()) |v| {
+            self.validate_context = try Tuple.packNewrefs(.{ v.key_member, v.value_member, v.atom });
+        }
+    }
+
+    // If this is a copy-on-write default view it was modified so it now
+    // holds the value of the owner's slot.
+    pub inline fn materialize(self: *Self) py.Error!void {
+        if (self.view_owner.isView()) {
+            try self.takeValidator();
+            try self.view_owner.materialize(@ptrCast(self));
+        }
+    }
+
+    // Called when the owner's slot no longer holds this view
+    pub fn detach(self: *Self) py.Error!void {
+        if (self.view_owner.isView()) {
+            defer self.view_owner.clear();
+            try self.takeValidator();
+        }
+    }
+
+    const Validator = struct {
+        key_member: *MemberBase,
+        value_member: *MemberBase,
+        atom: *Atom,
+    };
+
+    // Get the key and value members (or None) and the atom that validate new
+    // entries. A default view uses the members of its owner until it is stored.
+    inline fn activeValidator(self: *Self) ?Validator {
+        if (self.validate_context) |tuple| {
+            return .{
+                .key_member = @ptrCast(tuple.getUnsafe(0).?),
+                .value_member = @ptrCast(tuple.getUnsafe(1).?),
+                .atom = @ptrCast(tuple.getUnsafe(2).?),
+            };
+        }
+        if (self.view_owner.member) |owner| {
+            if (owner.validate_context) |context| {
+                const tuple: *Tuple = @ptrCast(context);
+                return .{
+                    .key_member = @ptrCast(tuple.getUnsafe(0).?),
+                    .value_member = @ptrCast(tuple.getUnsafe(1).?),
+                    .atom = self.view_owner.atom.?,
+                };
+            }
+        }
+        return null;
     }
 
     pub fn hasSameContext(self: *Self, key_member: *Object, value_member: *Object, atom: *Atom) bool {
@@ -126,44 +327,69 @@ pub const TypedDict = extern struct {
         return false;
     }
 
-    pub inline fn validateKey(self: *Self, key: *Object) py.Error!*Object {
+    // Check if the entries were validated by members equivalent to the given ones
+    pub fn hasSameValidators(self: *Self, key_member: *MemberBase, value_member: *MemberBase) bool {
         if (self.validate_context) |tuple| {
-            const key_member: *MemberBase = @ptrCast(tuple.getUnsafe(0).?);
-            if (!key_member.isNone()) {
-                const atom: *Atom = @ptrCast(tuple.getUnsafe(2).?);
-                return try key_member.validate(atom, py.None(), key);
+            return (sameValidator(@ptrCast(tuple.getUnsafe(0).?), key_member) and
+                sameValidator(@ptrCast(tuple.getUnsafe(1).?), value_member));
+        }
+        return false;
+    }
+
+    inline fn sameValidator(a: *MemberBase, b: *MemberBase) bool {
+        if (a.isNone() or b.isNone()) {
+            return a.isNone() and b.isNone();
+        }
+        return a.hasSameValidator(b);
+    }
+
+    pub inline fn validateKey(self: *Self, key: *Object) py.Error!*Object {
+        if (self.activeValidator()) |v| {
+            if (!v.key_member.isNone()) {
+                return try v.key_member.validate(v.atom, py.None(), key);
             }
         }
         return key.newref();
     }
 
     pub inline fn validateValue(self: *Self, value: *Object) py.Error!*Object {
-        if (self.validate_context) |tuple| {
-            const value_member: *MemberBase = @ptrCast(tuple.getUnsafe(1).?);
-            if (!value_member.isNone()) {
-                const atom: *Atom = @ptrCast(tuple.getUnsafe(2).?);
-                return try value_member.validate(atom, py.None(), value);
+        if (self.activeValidator()) |v| {
+            if (!v.value_member.isNone()) {
+                return try v.value_member.validate(v.atom, py.None(), value);
             }
         }
         return value.newref();
     }
 
+    // Returns the owner to notify if container changes of this dict are observed
+    pub inline fn observedOwner(self: *Self) ?ContainerOwner {
+        const tuple = self.validate_context orelse return null;
+        const key_member = tuple.getUnsafe(0).?;
+        const validator: *MemberBase = @ptrCast(if (key_member.isNone()) tuple.getUnsafe(1).? else key_member);
+        return ContainerOwner.observed(validator, @ptrCast(tuple.getUnsafe(2).?));
+    }
+
     // --------------------------------------------------------------------------
     // Type definition
     // --------------------------------------------------------------------------
     pub fn dealloc(self: *Self) void {
         self.gcUntrack();
-        py.clear(&self.validate_context);
+        py.clearAll(.{&self.validate_context});
+        self.view_owner.clear();
         py.c.PyDict_Type.tp_dealloc.?(@ptrCast(self));
     }
 
     pub fn clear(self: *Self) c_int {
-        py.clear(&self.validate_context);
+        py.clearAll(.{&self.validate_context});
+        self.view_owner.clear();
         return py.c.PyDict_Type.tp_clear.?(@ptrCast(self));
     }
 
     pub fn traverse(self: *Self, visit: py.visitproc, arg: ?*anyopaque) c_int {
-        const r = py.visit(self.validate_context, visit, arg);
+        var r = py.visitAll(.{self.validate_context}, visit, arg);
+        if (r != 0)
+            return r;
+        r = self.view_owner.traverse(visit, arg);
         if (r != 0)
             return r;
         return py.c.PyDict_Type.tp_traverse.?(@ptrCast(self), visit, arg);
@@ -172,6 +398,9 @@ pub const TypedDict = extern struct {
     const methods = [_]py.MethodDef{
         .{ .ml_name = "setdefault", .ml_meth = @constCast(@ptrCast(&setdefault)), .ml_flags = py.c.METH_FASTCALL, .ml_doc = "If key is in the dictionary, return its value. If not, insert key with a value of default and return default. default defaults to None." },
         .{ .ml_name = "update", .ml_meth = @constCast(@ptrCast(&update)), .ml_flags = py.c.METH_VARARGS | py.c.METH_KEYWORDS, .ml_doc = "Update the dictionary with the key/value pairs from other, overwriting existing keys. Return None." },
+        .{ .ml_name = "pop", .ml_meth = @constCast(@ptrCast(&Forward(0).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Remove specified key and return the corresponding value." },
+        .{ .ml_name = "popitem", .ml_meth = @constCast(@ptrCast(&Forward(1).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Remove and return a (key, value) pair as a 2-tuple." },
+        .{ .ml_name = "clear", .ml_meth = @constCast(@ptrCast(&Forward(2).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Remove all items from the dict." },
         .{}, // sentinel
     };
 
@@ -180,6 +409,7 @@ pub const TypedDict = extern struct {
         .{ .slot = py.c.Py_tp_traverse, .pfunc = @constCast(@ptrCast(&traverse)) },
         .{ .slot = py.c.Py_tp_clear, .pfunc = @constCast(@ptrCast(&clear)) },
         .{ .slot = py.c.Py_mp_ass_subscript, .pfunc = @constCast(@ptrCast(&assign_subscript)) },
+        .{ .slot = py.c.Py_nb_inplace_or, .pfunc = @constCast(@ptrCast(&inplace_or)) },
         .{ .slot = py.c.Py_tp_methods, .pfunc = @constCast(@ptrCast(&methods)) },
         .{}, // sentinel
     };
@@ -210,12 +440,15 @@ pub const DictMember = Member("Dict", 1, struct {
             "value",
             "default",
             "factory",
+            "copy_on_write",
         };
         var key_kind: ?*Object = null;
         var value_kind: ?*Object = null;
         var default_value: ?*Object = null;
         var default_factory: ?*Object = null;
-        try py.parseTupleAndKeywords(args, kwargs, "|OOOO", @ptrCast(&kwlist), .{ &key_kind, &value_kind, &default_value, &default_factory });
+        var copy_on_write: c_int = 0;
+        try py.parseTupleAndKeywords(args, kwargs, "|OOOOp", @ptrCast(&kwlist), .{ &key_kind, &value_kind, &default_value, &default_factory, &copy_on_write });
+        self.info.copy_on_write = copy_on_write != 0;
 
         if (py.notNone(default_value) and py.notNone(default_factory)) {
             return py.typeError("Cannot use both a default and a factory function", .{});
@@ -283,6 +516,46 @@ pub const DictMember = Member("Dict", 1, struct {
         unreachable;
     }
 
+    // Returns a view of the static default that is only written when mutated
+    pub fn defaultView(self: *MemberBase, atom: *Atom) !?*Object {
+        if (!self.info.copy_on_write or self.info.default_mode != .static) {
+            return null;
+        }
+        const items = try self.sharedDefault(atom, newSharedDefault);
+        if (!Dict.check(items)) {
+            return null;
+        }
+        return @ptrCast(try TypedDict.newDefaultView(@ptrCast(items), self, atom));
+    }
+
+    pub fn isDefaultView(value: *Object) bool {
+        return TypedDict.check(value) and @as(*TypedDict, @ptrCast(value)).isView();
+    }
+
+    pub fn detachDefaultView(value: *Object) py.Error!void {
+        return @as(*TypedDict, @ptrCast(value)).detach();
+    }
+
+    // Validate the static default once for the views of all atoms
+    // Returns new reference
+    fn newSharedDefault(self: *MemberBase, atom: *Atom) py.Error!*Object {
+        const default_value = self.default_context orelse py.None();
+        if (self.validate_context) |context| {
+            const tuple: *Tuple = @ptrCast(context);
+            const k: *MemberBase = @ptrCast(tuple.getUnsafe(0).?);
+            const v: *MemberBase = @ptrCast(tuple.getUnsafe(1).?);
+            if (!Dict.check(default_value)) {
+                try (if (k.isNone()) v else k).validateFail(atom, default_value, "dict");
+                unreachable;
+            }
+            const copy = try Dict.new();
+            errdefer copy.decref();
+            try TypedDict.validateEntries(copy, @ptrCast(default_value), k, v, atom);
+            return @ptrCast(copy);
+        }
+        return default_value.newref();
+    }
+
     // This cannot be inlined
     pub fn coerce(self: *const MemberBase, atom: *Atom, _: *Object, value: *Object) py.Error!*Object {
         if (self.validate_context) |context| {
@@ -297,6 +570,10 @@ pub const DictMember = Member("Dict", 1, struct {
             }
             return @ptrCast(try TypedDict.newWithContext(value, @ptrCast(k), @ptrCast(v), atom));
         } else if (Dict.check(value)) {
+            if (TypedDict.check(value) and @as(*TypedDict, @ptrCast(value)).isView()) {
+                // A default view belongs to the atom it was read from
+                return @ptrCast(try Dict.copy(@ptrCast(value)));
+            }
             return value.newref(); // untyped dicts do not need coereced
         }
         try self.validateFail(atom, value, "dict");
@@ -309,6 +586,16 @@ pub const all_members = .{
 };
 
 pub fn initModule(mod: *py.Module) !void {
+    inline for (forwarded_methods, 0..) |name, i| {
+        dict_methods[i] = try Object.getAttrString(@ptrCast(&py.c.PyDict_Type), name);
+        errdefer py.clear(&dict_methods[i]);
+    }
+
+    try ops.init();
+    errdefer ops.deinit();
+    keys_str = try py.Str.internFromString("keys");
+    errdefer py.clear(&keys_str);
+
     try TypedDict.initType();
     errdefer TypedDict.deinitType();
     try mod.addObjectRef("TypedDict", @ptrCast(TypedDict.TypeObject.?));
@@ -326,4 +613,9 @@ pub fn deinitModule(mod: *py.Module) void {
     inline for (all_members) |T| {
         T.deinitType();
     }
+    ops.deinit();
+    py.clear(&keys_str);
+    for (&dict_methods) |*method| {
+        py.clear(method);
+    }
 }
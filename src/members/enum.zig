@@ -4,6 +4,7 @@ const Object = py.Object;
 const Tuple = py.Tuple;
 const Dict = py.Dict;
 const Str = py.Str;
+const Int = py.Int;
 const Atom = @import("../atom.zig").Atom;
 const member = @import("../member.zig");
 const MemberBase = member.MemberBase;
@@ -42,6 +43,49 @@ pub const EnumMember = Member("Enum", 2, struct {
         self.info.width = @intCast(bitsize -| 1);
         self.setDefaultContext(.static, default_value.newref());
         self.setValidateContext(.default, @ptrCast(args.newref()));
+        if (try buildIndex(args)) |index| {
+            self.setCoercerContext(.no, @ptrCast(index));
+        }
+    }
+
+    // Build a dict of item to position so values can be found without a
+    // linear scan. Dict lookups compare by identity before equality.
+    // Returns null if any item is not hashable.
+    fn buildIndex(items: *Tuple) !?*Dict {
+        const index = try Dict.new();
+        errdefer index.decref();
+        for (0..items.sizeUnchecked()) |i| {
+            const pos = try Int.new(i);
+            defer pos.decref();
+            // Keep the first position of equal items like tuple.index
+            if (py.c.PyDict_SetDefault(@ptrCast(index), @ptrCast(items.getUnsafe(i).?), @ptrCast(pos)) == null) {
+                if (py.c.PyErr_ExceptionMatches(py.c.PyExc_TypeError) == 0) {
+                    return error.PyError;
+                }
+                py.c.PyErr_Clear();
+                index.decref();
+                return null;
+            }
+        }
+        return index;
+    }
+
+    // Find the position of the value in the items or null if it is not one of them
+    inline fn find(self: *MemberBase, items: *Tuple, value: *Object) py.Error!?usize {
+        if (self.coercer_context) |index| {
+            if (py.c.PyDict_GetItemWithError(@ptrCast(index), @ptrCast(value))) |pos| {
+                return try Int.as(@ptrCast(pos), usize);
+            }
+            if (py.c.PyErr_Occurred() == null) {
+                return null;
+            }
+            // Unhashable value, use a scan to get the same result as the tuple
+            py.c.PyErr_Clear();
+        }
+        if (try items.contains(value)) {
+            return try items.index(value);
+        }
+        return null;
     }
 
     pub inline fn writeSlotStatic(self: *MemberBase, _: *Atom, value: *Object) py.Error!usize {
@@ -49,7 +93,10 @@ pub const EnumMember = Member("Enum", 2, struct {
             try py.systemError("Invalid validation context", .{});
         }
         const items: *Tuple = @ptrCast(self.validate_context.?);
-        return try items.index(value);
+        if (try find(self, items, value)) |pos| {
+            return pos;
+        }
+        return try items.index(value); // Raises the error
     }
 
     pub inline fn readSlotStatic(self: *MemberBase, _: *Atom, data: usize) py.Error!?*Object {
@@ -64,7 +111,7 @@ pub const EnumMember = Member("Enum", 2, struct {
     pub inline fn validate(self: *MemberBase, atom: *Atom, _: *Object, new: *Object) py.Error!*Object {
         if (self.validate_context) |context| {
             const items: *Tuple = @ptrCast(context);
-            if (!try items.contains(new)) {
+            if (try find(self, items, new) == null) {
                 try py.valueError("invalid enum value for '{s}' of '{s}'. Got '{s}'", .{
                     self.name.?.data(),
                     atom.typeName(),
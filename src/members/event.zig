@@ -21,6 +21,18 @@ var name_str: ?*Str = null;
 var object_str: ?*Str = null;
 var value_str: ?*Str = null;
 
+// A change dict that no observer kept a reference to so it can be reused
+var spare_change: ?*Dict = null;
+
+// A binder is created on every read so deallocated binders are kept for reuse
+const max_free_binders = 64;
+var free_binders: [max_free_binders]*EventBinder = undefined;
+var free_binder_count: usize = 0;
+
+// From structmember.h
+const T_PYSSIZET = 19;
+const READONLY = 1;
+
 pub const EventBinder = extern struct {
     const Self = @This();
     // Reference to the type. This is set in ready
@@ -28,6 +40,7 @@ pub const EventBinder = extern struct {
     base: Object,
     atom: ?*Atom,
     member: ?*EventMember,
+    vectorcall_func: py.c.vectorcallfunc = null,
 
     pub usingnamespace py.ObjectProtocol(Self);
 
@@ -36,13 +49,29 @@ pub const EventBinder = extern struct {
         return obj.typeCheck(TypeObject.?);
     }
 
-    pub fn new(cls: *Type, args: *Tuple, _: ?*Dict) ?*Self {
+    pub fn new(_: *Type, args: *Tuple, _: ?*Dict) ?*Self {
         var _member: *EventMember = undefined;
         var _atom: *Atom = undefined;
         args.parseTyped(.{ &_member, &_atom }) catch return null;
-        const self: *Self = @ptrCast(cls.genericNew(null, null) catch return null);
-        self.member = _member.newref();
-        self.atom = _atom.newref();
+        return create(_member, _atom) catch null;
+    }
+
+    // Create a binder without going through a type call
+    pub fn create(event: *EventMember, atom: *Atom) !*Self {
+        const self: *Self = blk: {
+            if (free_binder_count > 0) {
+                free_binder_count -= 1;
+                const binder = free_binders[free_binder_count];
+                // Takes the type reference back and registers the new reference
+                _ = py.c.PyObject_Init(@ptrCast(binder), @ptrCast(TypeObject.?));
+                py.c.PyObject_GC_Track(@ptrCast(binder));
+                break :blk binder;
+            }
+            break :blk @ptrCast(try TypeObject.?.genericNew(null, null));
+        };
+        self.member = event.newref();
+        self.atom = atom.newref();
+        self.vectorcall_func = @ptrCast(&vectorcall);
         return self;
     }
 
@@ -59,6 +88,19 @@ pub const EventBinder = extern struct {
         return py.returnNone();
     }
 
+    pub fn vectorcall(self: *Self, args: [*]*Object, nargsf: usize, kwnames: ?*Tuple) ?*Object {
+        if (kwnames != null and kwnames.?.sizeUnchecked() > 0) {
+            return py.typeErrorObject(null, "An event cannot be triggered with keyword arguments", .{});
+        }
+        const n = nargsf & ~@as(usize, py.c.PY_VECTORCALL_ARGUMENTS_OFFSET);
+        if (n > 1) {
+            return py.typeErrorObject(null, "An event can be triggered with at most 1 argument", .{});
+        }
+        const value = if (n == 0) py.None() else args[0];
+        self.member.?.setattr(self.atom.?, value) catch return null;
+        return py.returnNone();
+    }
+
     // --------------------------------------------------------------------------
     // Methods
     // --------------------------------------------------------------------------
@@ -93,6 +135,13 @@ pub const EventBinder = extern struct {
     pub fn dealloc(self: *Self) void {
         self.gcUntrack();
         _ = self.clear();
+        if (free_binder_count < max_free_binders) {
+            free_binders[free_binder_count] = self;
+            free_binder_count += 1;
+            // Binders in the free list do not hold a reference to the type
+            self.typeref().decref();
+            return;
+        }
         self.typeref().free(@ptrCast(self));
     }
 
@@ -111,6 +160,11 @@ pub const EventBinder = extern struct {
         .{}, // sentinel
     };
 
+    const members = [_]py.c.PyMemberDef{
+        .{ .name = "__vectorcalloffset__", .type = T_PYSSIZET, .offset = @offsetOf(Self, "vectorcall_func"), .flags = READONLY, .doc = null },
+        .{}, // sentinel
+    };
+
     const type_slots = [_]py.TypeSlot{
         .{ .slot = py.c.Py_tp_new, .pfunc = @constCast(@ptrCast(&new)) },
         .{ .slot = py.c.Py_tp_dealloc, .pfunc = @constCast(@ptrCast(&dealloc)) },
@@ -119,13 +173,14 @@ pub const EventBinder = extern struct {
         .{ .slot = py.c.Py_tp_call, .pfunc = @constCast(@ptrCast(&call)) },
         .{ .slot = py.c.Py_tp_richcompare, .pfunc = @constCast(@ptrCast(&richcompare)) },
         .{ .slot = py.c.Py_tp_methods, .pfunc = @constCast(@ptrCast(&methods)) },
+        .{ .slot = py.c.Py_tp_members, .pfunc = @constCast(@ptrCast(&members)) },
         .{}, // sentinel
     };
 
     pub var TypeSpec = py.TypeSpec{
         .name = package_name ++ ".EventBinder",
         .basicsize = @sizeOf(Self),
-        .flags = (py.c.Py_TPFLAGS_DEFAULT | py.c.Py_TPFLAGS_HAVE_GC),
+        .flags = (py.c.Py_TPFLAGS_DEFAULT | py.c.Py_TPFLAGS_HAVE_GC | py.c.Py_TPFLAGS_HAVE_VECTORCALL),
         .slots = @constCast(@ptrCast(&type_slots)),
     };
 
@@ -135,10 +190,44 @@ pub const EventBinder = extern struct {
     }
 
     pub fn deinitType() void {
+        while (free_binder_count > 0) {
+            free_binder_count -= 1;
+            const binder = free_binders[free_binder_count];
+            TypeObject.?.impl.tp_free.?(@ptrCast(binder));
+        }
         py.clear(&TypeObject);
     }
 };
 
+// Take the spare change dict or create a new one
+fn acquireChange() !*Dict {
+    if (spare_change) |change| {
+        spare_change = null;
+        return change;
+    }
+    const change = try Dict.new();
+    errdefer change.decref();
+    try change.set(@ptrCast(type_str.?), @ptrCast(event_str.?));
+    return change;
+}
+
+// Keep the change dict for the next event if no observer held on to it
+fn releaseChange(change: *Dict) void {
+    if (spare_change == null and change.refcnt() == 1 and change.sizeUnchecked() == 4) {
+        // Drop the references to the atom and value
+        const ok = blk: {
+            change.set(@ptrCast(object_str.?), py.None()) catch break :blk false;
+            change.set(@ptrCast(value_str.?), py.None()) catch break :blk false;
+            break :blk true;
+        };
+        if (ok) {
+            spare_change = change;
+            return;
+        }
+    }
+    change.decref();
+}
+
 // The Event member takes no storage
 pub const EventMember = Member("Event", 3, struct {
     // Event takes no storage slot
@@ -157,7 +246,7 @@ pub const EventMember = Member("Event", 3, struct {
     }
 
     pub fn getattr(self: *MemberBase, atom: *Atom) !*Object {
-        return @ptrCast(try EventBinder.TypeObject.?.callArgs(.{ self, atom }));
+        return @ptrCast(try EventBinder.create(@ptrCast(self), atom));
     }
 
     pub fn validate(self: *MemberBase, atom: *Atom, oldvalue: *Object, value: *Object) py.Error!*Object {
@@ -174,8 +263,9 @@ pub const EventMember = Member("Event", 3, struct {
             const value = try validate(self, atom, py.None(), newvalue);
             defer value.decref();
 
-            var change = try Dict.new();
-            defer change.decref();
+            // The change dict is reused when observers do not keep it
+            const change = try acquireChange();
+            defer releaseChange(change);
             try change.set(@ptrCast(type_str.?), @ptrCast(event_str.?));
             try change.set(@ptrCast(object_str.?), @ptrCast(atom));
             try change.set(@ptrCast(name_str.?), @ptrCast(self.name));
@@ -187,6 +277,25 @@ pub const EventMember = Member("Event", 3, struct {
     pub fn delattr(_: *MemberBase, _: *Atom) !void {
         return py.typeError("cannot delete the value of an event", .{});
     }
+
+    // Emit the event without creating a binder
+    pub fn emit(self: *MemberBase, args: [*]*Object, n: isize) ?*Object {
+        if (n < 1 or n > 2 or !Atom.check(args[0])) {
+            return py.typeErrorObject(null, "Invalid arguments. Signature is emit(atom: Atom, value: object = None)", .{});
+        }
+        const value = if (n == 2) args[1] else py.None();
+        setattr(self, @ptrCast(args[0]), value) catch return null;
+        return py.returnNone();
+    }
+
+    const methods = [_]py.MethodDef{
+        .{ .ml_name = "emit", .ml_meth = @constCast(@ptrCast(&emit)), .ml_flags = py.c.METH_FASTCALL, .ml_doc = "Emit the event on the given atom." },
+        .{}, // sentinel
+    };
+
+    pub const type_slots = [_]py.TypeSlot{
+        .{ .slot = py.c.Py_tp_methods, .pfunc = @constCast(@ptrCast(&methods)) },
+    };
 });
 
 pub const all_members = .{
@@ -212,5 +321,5 @@ pub fn deinitModule(mod: *py.Module) void {
     _ = mod;
     EventBinder.deinitType();
     EventMember.deinitType();
-    py.clearAll(.{ &event_str, &type_str, &name_str, &object_str, &value_str });
+    py.clearAll(.{ &spare_change, &event_str, &type_str, &name_str, &object_str, &value_str });
 }
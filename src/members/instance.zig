@@ -93,12 +93,21 @@ pub const InstanceMember = Member("Instance", 4, struct {
         return .maybe; // Might be but IDK
     }
 
+    pub inline fn exactType(self: *MemberBase) ?*Type {
+        if (self.validate_context) |context| {
+            if (Type.check(context)) {
+                return @ptrCast(context);
+            }
+        }
+        return null;
+    }
+
     pub inline fn validate(self: *MemberBase, atom: *Atom, _: *Object, new: *Object) py.Error!*Object {
         if (new.isNone() and self.info.optional) {
             return new.newref(); // Ok
         }
         if (self.validate_context) |context| {
-            if (!try new.isInstance(context)) {
+            if (!try self.isInstanceCached(new, context)) {
                 if (py.Tuple.check(context)) {
                     const types_str = try context.str();
                     defer types_str.decref();
@@ -228,7 +237,7 @@ pub const ForwardInstanceMember = Member("ForwardInstance", 5, struct {
             try resolve(self, atom);
         }
         if (self.validate_context) |context| {
-            if (!try new.isInstance(context)) {
+            if (!try self.isInstanceCached(new, context)) {
                 if (py.Tuple.check(context)) {
                     const types_str = try context.str();
                     defer types_str.decref();
@@ -12,12 +12,38 @@ const Atom = @import("../atom.zig").Atom;
 const member = @import("../member.zig");
 const MemberBase = member.MemberBase;
 const Member = member.Member;
+const ContainerOwner = member.ContainerOwner;
 const InstanceMember = @import("instance.zig").InstanceMember;
 const IntMember = @import("scalars.zig").IntMember;
 const package_name = @import("../api.zig").package_name;
 
 var context_str: ?*Str = null;
 
+// Native buffer item formats that can be converted to int or float
+const buffer_formats = .{
+    .{ 'b', i8 },
+    .{ 'B', u8 },
+    .{ 'h', c_short },
+    .{ 'H', c_ushort },
+    .{ 'i', c_int },
+    .{ 'I', c_uint },
+    .{ 'l', c_long },
+    .{ 'L', c_ulong },
+    .{ 'q', c_longlong },
+    .{ 'Q', c_ulonglong },
+    .{ 'n', isize },
+    .{ 'N', usize },
+    .{ 'f', f32 },
+    .{ 'd', f64 },
+};
+
+// Mutating list methods wrapped to materialize copy-on-write defaults and notify container changes
+const forwarded_methods = .{ "pop", "remove", "clear", "sort", "reverse" };
+var list_methods = [_]?*Object{null} ** forwarded_methods.len;
+
+// Operations sent in container change notifications
+const ops = member.ContainerOps(.{ "append", "insert", "extend", "__setitem__", "__delitem__", "__iadd__", "__imul__" } ++ forwarded_methods);
+
 pub const TypedList = extern struct {
     const Self = @This();
     // Reference to the type. This is set in ready
@@ -25,6 +51,7 @@ pub const TypedList = extern struct {
 
     base: List,
     validate_context: ?*Tuple = null, // tuple[MemberBase, Atom]
+    view_owner: member.DefaultViewOwner = .{}, // Set until a copy-on-write default view is first mutated
 
     pub usingnamespace py.ObjectProtocol(Self);
 
@@ -40,6 +67,11 @@ pub const TypedList = extern struct {
         const new = self.validateOne(item) catch return null;
         defer new.decref();
         self.base.append(new) catch return null;
+        self.materialize() catch return null;
+        if (self.observedOwner()) |owner| {
+            const n = self.base.size() catch return null;
+            self.notifyOne(owner, ops.get("append"), n - 1, new) catch return null;
+        }
         return py.returnNone();
     }
 
@@ -51,13 +83,24 @@ pub const TypedList = extern struct {
         const new = self.validateOne(args[1]) catch return null;
         defer new.decref();
         self.base.insert(pos, new) catch return null;
+        self.materialize() catch return null;
+        if (self.observedOwner()) |owner| {
+            const items = Tuple.packNewrefs(.{new}) catch return null;
+            defer items.decref();
+            owner.notify(@ptrCast(self), ops.get("insert"), args[0], @ptrCast(items)) catch return null;
+        }
         return py.returnNone();
     }
 
     pub fn extend(self: *Self, items: *Object) ?*Object {
         const copy = self.validateMany(items) catch return null;
         defer copy.decref();
+        const start = self.base.size() catch return null;
         self.base.extend(copy) catch return null;
+        self.materialize() catch return null;
+        if (self.observedOwner()) |owner| {
+            self.notifyMany(owner, ops.get("extend"), start, copy) catch return null;
+        }
         return py.returnNone();
     }
 
@@ -65,30 +108,127 @@ pub const TypedList = extern struct {
         if (value) |item| {
             const new = self.validateOne(item) catch return -1;
             defer new.decref();
-            return py.c.PyList_Type.tp_as_sequence.*.sq_ass_item.?(@ptrCast(self), index, @ptrCast(new));
+            if (py.c.PyList_Type.tp_as_sequence.*.sq_ass_item.?(@ptrCast(self), index, @ptrCast(new)) < 0) {
+                return -1;
+            }
+            self.materialize() catch return -1;
+            if (self.observedOwner()) |owner| {
+                self.notifyOne(owner, ops.get("__setitem__"), index, new) catch return -1;
+            }
+            return 0;
+        }
+        if (py.c.PyList_Type.tp_as_sequence.*.sq_ass_item.?(@ptrCast(self), index, @ptrCast(value)) < 0) {
+            return -1;
         }
-        return py.c.PyList_Type.tp_as_sequence.*.sq_ass_item.?(@ptrCast(self), index, @ptrCast(value));
+        self.materialize() catch return -1;
+        if (self.observedOwner()) |owner| {
+            const i = Int.new(index) catch return -1;
+            defer i.decref();
+            owner.notify(@ptrCast(self), ops.get("__delitem__"), @ptrCast(i), null) catch return -1;
+        }
+        return 0;
     }
 
     pub fn assign_subscript(self: *Self, key: *Object, value: ?*Object) c_int {
-        if (value) |item| {
-            if (Int.checkIndex(key)) {
-                const new = self.validateOne(item) catch return -1;
-                defer new.decref();
-                return py.c.PyList_Type.tp_as_mapping.*.mp_ass_subscript.?(@ptrCast(self), @ptrCast(key), @ptrCast(new));
-            } else if (Slice.check(key)) {
-                const copy = self.validateMany(item) catch return -1;
-                defer copy.decref();
-                return py.c.PyList_Type.tp_as_mapping.*.mp_ass_subscript.?(@ptrCast(self), @ptrCast(key), @ptrCast(copy));
+        // The new item or items if value is being validated
+        const new = blk: {
+            if (value) |item| {
+                if (Int.checkIndex(key)) {
+                    break :blk self.validateOne(item) catch return -1;
+                } else if (Slice.check(key)) {
+                    break :blk self.validateMany(item) catch return -1;
+                }
+            }
+            break :blk null;
+        };
+        defer if (new) |v| v.decref();
+        if (py.c.PyList_Type.tp_as_mapping.*.mp_ass_subscript.?(@ptrCast(self), @ptrCast(key), @ptrCast(new orelse value)) < 0) {
+            return -1;
+        }
+        self.materialize() catch return -1;
+        if (self.observedOwner()) |owner| {
+            if (value == null) {
+                owner.notify(@ptrCast(self), ops.get("__delitem__"), key, null) catch return -1;
+            } else if (new != null and Int.checkIndex(key)) {
+                const items = Tuple.packNewrefs(.{new.?}) catch return -1;
+                defer items.decref();
+                owner.notify(@ptrCast(self), ops.get("__setitem__"), key, @ptrCast(items)) catch return -1;
+            } else {
+                owner.notify(@ptrCast(self), ops.get("__setitem__"), key, new orelse value) catch return -1;
             }
         }
-        return py.c.PyList_Type.tp_as_mapping.*.mp_ass_subscript.?(@ptrCast(self), @ptrCast(key), @ptrCast(value));
+        return 0;
     }
 
-    pub fn inplace_concat(self: *Self, item: *Object) ?*Object {
-        const new = self.validateOne(item) catch return null;
-        defer new.decref();
-        return @ptrCast(py.c.PyList_Type.tp_as_sequence.*.sq_inplace_concat.?(@ptrCast(self), @ptrCast(new)));
+    pub fn inplace_concat(self: *Self, items: *Object) ?*Object {
+        const copy = self.validateMany(items) catch return null;
+        defer copy.decref();
+        const start = self.base.size() catch return null;
+        const result: *Object = @ptrCast(py.c.PyList_Type.tp_as_sequence.*.sq_inplace_concat.?(@ptrCast(self), @ptrCast(copy)) orelse return null);
+        self.materialize() catch {
+            result.decref();
+            return null;
+        };
+        if (self.observedOwner()) |owner| {
+            self.notifyMany(owner, ops.get("__iadd__"), start, copy) catch {
+                result.decref();
+                return null;
+            };
+        }
+        return result;
+    }
+
+    pub fn inplace_repeat(self: *Self, count: isize) ?*Object {
+        const result: *Object = @ptrCast(py.c.PyList_Type.tp_as_sequence.*.sq_inplace_repeat.?(@ptrCast(self), count) orelse return null);
+        self.materialize() catch {
+            result.decref();
+            return null;
+        };
+        if (self.observedOwner()) |owner| {
+            owner.notify(@ptrCast(self), ops.get("__imul__"), null, null) catch {
+                result.decref();
+                return null;
+            };
+        }
+        return result;
+    }
+
+    // Call a list method and materialize a copy-on-write default view if it succeeds
+    fn Forward(comptime i: usize) type {
+        return struct {
+            const name = forwarded_methods[i];
+
+            pub fn call(self: *Self, args: [*]const *Object, n: isize, kwnames: ?*Tuple) ?*Object {
+                const result = member.callBaseMethod(list_methods[i].?, @ptrCast(self), args, n, kwnames) orelse return null;
+                self.materialize() catch {
+                    result.decref();
+                    return null;
+                };
+                if (self.observedOwner()) |owner| {
+                    notifyForwarded(owner, self, args, n, result) catch {
+                        result.decref();
+                        return null;
+                    };
+                }
+                return result;
+            }
+
+            // Pop includes the index and removed item, remove the removed item
+            fn notifyForwarded(owner: ContainerOwner, self: *Self, args: [*]const *Object, n: isize, result: *Object) !void {
+                const op = ops.get(name);
+                if (comptime std.mem.eql(u8, name, "pop")) {
+                    const items = try Tuple.packNewrefs(.{result});
+                    defer items.decref();
+                    const index = if (n > 0) args[0] else null;
+                    return owner.notify(@ptrCast(self), op, index, @ptrCast(items));
+                } else if (comptime std.mem.eql(u8, name, "remove")) {
+                    const items = try Tuple.packNewrefs(.{args[0]});
+                    defer items.decref();
+                    return owner.notify(@ptrCast(self), op, null, @ptrCast(items));
+                }
+                return owner.notify(@ptrCast(self), op, null, null);
+            }
+        };
     }
 
     // --------------------------------------------------------------------------
@@ -98,17 +238,10 @@ pub const TypedList = extern struct {
         return @ptrCast(try TypeObject.?.callArgs(.{items}));
     }
 
-    pub fn newWithContext(items: *Object, validate_member: *MemberBase, atom: *Atom) !*TypedList {
-        if (!List.check(items)) {
-            try validate_member.validateFail(atom, items, "list");
-            unreachable;
-        }
-        const list: *List = @ptrCast(items);
-        const n = try list.size();
+    // Allocate a list of n empty items. See PyList_New...
+    fn newEmpty(n: usize) !*TypedList {
         const self: *TypedList = @ptrCast(try TypeObject.?.genericNew(null, null));
         errdefer self.decref();
-
-        // See PyList_New...
         const byte_count = n * @sizeOf(*Object);
         if (py.allocator.rawAlloc(byte_count, @alignOf(*Object), 0)) |ptr| {
             @memset(ptr[0..byte_count], 0);
@@ -118,15 +251,115 @@ pub const TypedList = extern struct {
         } else {
             try py.memoryError();
         }
+        return self;
+    }
+
+    pub fn newWithContext(items: *Object, validate_member: *MemberBase, atom: *Atom) !*TypedList {
+        const self = blk: {
+            if (List.check(items)) {
+                const list: *List = @ptrCast(items);
+                const n = try list.size();
+                const copy = try newEmpty(n);
+                errdefer copy.decref();
+                try validateInto(&copy.base, list, n, validate_member, atom);
+                break :blk copy;
+            }
+            if (try newFromBuffer(TypedList, items, validate_member)) |copy| {
+                break :blk copy;
+            }
+            try validate_member.validateFail(atom, items, "list");
+            unreachable;
+        };
+        errdefer self.decref();
+        self.validate_context = try Tuple.packNewrefs(.{ validate_member, atom });
+        return self;
+    }
 
+    // Copy the items of a list that already passed an equivalent validator
+    pub fn newValidated(items: *List, validate_member: *MemberBase, atom: *Atom) !*TypedList {
+        const n = try items.size();
+        const self = try newEmpty(n);
+        errdefer self.decref();
         for (0..n) |i| {
-            const item = list.getUnsafe(i).?;
-            const value = try validate_member.validate(atom, py.None(), item);
-            self.base.setUnsafe(i, value);
+            self.base.setUnsafe(i, items.getUnsafe(i).?.newref());
         }
         self.validate_context = try Tuple.packNewrefs(.{ validate_member, atom });
+        return self;
+    }
+
+    // Validate the n items of src into the empty items of dst. Items whose type
+    // is exactly the one the member accepts are only a pointer compare.
+    pub fn validateInto(dst: *List, src: *List, n: usize, validate_member: *MemberBase, atom: *Atom) !void {
+        if (validate_member.exactType()) |kind| {
+            for (0..n) |i| {
+                const item = src.getUnsafe(i).?;
+                const value = if (item.typeref() == kind) item.newref() else try validate_member.validate(atom, py.None(), item);
+                dst.setUnsafe(i, value);
+            }
+        } else {
+            for (0..n) |i| {
+                const value = try validate_member.validate(atom, py.None(), src.getUnsafe(i).?);
+                dst.setUnsafe(i, value);
+            }
+        }
+    }
 
-        return @ptrCast(self);
+    // Create a list (or TypedList without context) from a 1-D buffer such as
+    // an array.array or numpy array when the member accepts exactly int or
+    // float and the buffer has a native int or float format. The new items
+    // are created directly so they do not need validated.
+    // Returns null if the object cannot be converted this way.
+    fn newFromBuffer(comptime T: type, obj: *Object, validate_member: *MemberBase) !?*T {
+        const kind = validate_member.exactType() orelse return null;
+        const want_float = kind == @as(*Type, @ptrCast(&py.c.PyFloat_Type));
+        if (!want_float and kind != @as(*Type, @ptrCast(&py.c.PyLong_Type))) {
+            return null;
+        }
+        // Do not turn bytes into a list of ints
+        if (py.Bytes.check(obj) or obj.typeCheck(@ptrCast(&py.c.PyByteArray_Type)) or py.c.PyObject_CheckBuffer(@ptrCast(obj)) == 0) {
+            return null;
+        }
+        var view: py.c.Py_buffer = undefined;
+        if (py.c.PyObject_GetBuffer(@ptrCast(obj), &view, py.c.PyBUF_FORMAT | py.c.PyBUF_STRIDES) < 0) {
+            py.c.PyErr_Clear();
+            return null;
+        }
+        defer py.c.PyBuffer_Release(&view);
+        if (view.ndim != 1 or view.suboffsets != null or view.format == null) {
+            return null;
+        }
+        var format: [*c]const u8 = view.format;
+        if (format[0] == '@') {
+            format += 1;
+        }
+        if (format[0] == 0 or format[1] != 0) {
+            return null; // Only native single item formats
+        }
+        const n: usize = @intCast(view.shape[0]);
+        const stride: isize = view.strides[0];
+        const start: isize = @bitCast(@intFromPtr(view.buf));
+        inline for (buffer_formats) |entry| {
+            const C = entry[1];
+            const is_float = comptime (C == f32 or C == f64);
+            if (format[0] == entry[0] and view.itemsize == @sizeOf(C) and want_float == is_float) {
+                const self = if (comptime T == TypedList) try newEmpty(n) else try List.new(n);
+                errdefer self.decref();
+                const list: *List = if (comptime T == TypedList) &self.base else self;
+                for (0..n) |i| {
+                    const addr = start + @as(isize, @intCast(i)) * stride;
+                    const ptr: *align(1) const C = @ptrFromInt(@as(usize, @bitCast(addr)));
+                    const value: ?*Object = if (comptime is_float)
+                        @ptrCast(py.c.PyFloat_FromDouble(ptr.*))
+                    else if (comptime @typeInfo(C).int.signedness == .signed)
+                        @ptrCast(py.c.PyLong_FromLongLong(ptr.*))
+                    else
+                        @ptrCast(py.c.PyLong_FromUnsignedLongLong(ptr.*));
+                    list.setUnsafe(i, value orelse return error.PyError);
+                }
+                return self;
+            }
+        }
+        return null;
     }
 
     pub fn hasSameContext(self: *Self, validate_member: ?*Object, atom: *Atom) bool {
@@ -136,30 +369,120 @@ pub const TypedList = extern struct {
         return validate_member == null;
     }
 
+    // Check if the items were validated by a member equivalent to the given one
+    pub fn hasSameValidator(self: *Self, validate_member: *MemberBase) bool {
+        if (self.validate_context) |tuple| {
+            return validate_member.hasSameValidator(@ptrCast(tuple.getUnsafe(0).?));
+        }
+        return false;
+    }
+
+    const Validator = struct {
+        member: *MemberBase,
+        atom: *Atom,
+    };
+
+    // Get the item member and atom that validate new items. A default view
+    // uses the item member of its owner until it is stored.
+    inline fn activeValidator(self: *Self) ?Validator {
+        if (self.validate_context) |tuple| {
+            return .{ .member = @ptrCast(tuple.getUnsafe(0).?), .atom = @ptrCast(tuple.getUnsafe(1).?) };
+        }
+        if (self.view_owner.member) |owner| {
+            if (owner.validate_context) |item_member| {
+                return .{ .member = @ptrCast(item_member), .atom = self.view_owner.atom.? };
+            }
+        }
+        return null;
+    }
+
     pub inline fn validateOne(self: *Self, item: *Object) py.Error!*Object {
-        const tuple = self.validate_context orelse return item.newref();
-        const mem: *MemberBase = @ptrCast(tuple.getUnsafe(0).?);
-        const atom: *Atom = @ptrCast(tuple.getUnsafe(1).?);
-        return try mem.validate(atom, py.None(), item);
+        const v = self.activeValidator() orelse return item.newref();
+        return try v.member.validate(v.atom, py.None(), item);
     }
 
     pub inline fn validateMany(self: *Self, items: *Object) py.Error!*Object {
-        const tuple = self.validate_context orelse return items.newref();
-        const mem: *MemberBase = @ptrCast(tuple.getUnsafe(0).?);
-        const atom: *Atom = @ptrCast(tuple.getUnsafe(1).?);
+        const v = self.activeValidator() orelse return items.newref();
+        const mem = v.member;
+        const atom = v.atom;
         if (!List.check(items)) {
+            if (try newFromBuffer(List, items, mem)) |copy| {
+                return @ptrCast(copy);
+            }
             try mem.validateFail(atom, items, "list");
             unreachable;
         }
+        if (TypedList.check(items) and @as(*TypedList, @ptrCast(items)).hasSameValidator(mem)) {
+            return items.newref();
+        }
         const list: *List = @ptrCast(items);
         const n = try list.size();
         const copy = try List.new(n);
         errdefer copy.decref();
+        try validateInto(copy, list, n, mem, atom);
+        return @ptrCast(copy);
+    }
+
+    // Create a view of the default for a copy-on-write member. It is stored
+    // in the atom's slot but is not a write until it is first modified.
+    // The items were already validated by the owner.
+    pub fn newDefaultView(items: *List, owner: *MemberBase, atom: *Atom) !*TypedList {
+        const n = try items.size();
+        const self = try newEmpty(n);
+        errdefer self.decref();
         for (0..n) |i| {
-            const value = try mem.validate(atom, py.None(), list.getUnsafe(i).?);
-            copy.setUnsafe(i, value);
+            self.base.setUnsafe(i, items.getUnsafe(i).?.newref());
         }
-        return @ptrCast(copy);
+        self.view_owner.set(owner, atom);
+        return self;
+    }
+
+    pub inline fn isView(self: *Self) bool {
+        return self.view_owner.isView();
+    }
+
+    // Keep the validator of the owner once this is no longer a view
+    fn takeValidator(self: *Self) py.Error!void {
+        if (self.activeValidator()) |v| {
+            self.validate_context = try Tuple.packNewrefs(.{ v.member, v.atom });
+        }
+    }
+
+    // If this is a copy-on-write default view it was modified so it now
+    // holds the value of the owner's slot.
+    pub inline fn materialize(self: *Self) py.Error!void {
+        if (self.view_owner.isView()) {
+            try self.takeValidator();
+            try self.view_owner.materialize(@ptrCast(self));
+        }
+    }
+
+    // Called when the owner's slot no longer holds this view
+    pub fn detach(self: *Self) py.Error!void {
+        if (self.view_owner.isView()) {
+            defer self.view_owner.clear();
+            try self.takeValidator();
+        }
+    }
+
+    // Returns the owner to notify if container changes of this list are observed
+    pub inline fn observedOwner(self: *Self) ?ContainerOwner {
+        const tuple = self.validate_context orelse return null;
+        return ContainerOwner.observed(@ptrCast(tuple.getUnsafe(0).?), @ptrCast(tuple.getUnsafe(1).?));
+    }
+
+    fn notifyOne(self: *Self, owner: ContainerOwner, op: *Str, index: anytype, item: *Object) !void {
+        const i = try Int.new(index);
+        defer i.decref();
+        const items = try Tuple.packNewrefs(.{item});
+        defer items.decref();
+        try owner.notify(@ptrCast(self), op, @ptrCast(i), @ptrCast(items));
+    }
+
+    fn notifyMany(self: *Self, owner: ContainerOwner, op: *Str, start: usize, items: *Object) !void {
+        const i = try Int.new(start);
+        defer i.decref();
+        try owner.notify(@ptrCast(self), op, @ptrCast(i), items);
     }
 
     // --------------------------------------------------------------------------
@@ -167,17 +490,22 @@ pub const TypedList = extern struct {
     // --------------------------------------------------------------------------
     pub fn dealloc(self: *Self) void {
         self.gcUntrack();
-        py.clear(&self.validate_context);
+        py.clearAll(.{&self.validate_context});
+        self.view_owner.clear();
         py.c.PyList_Type.tp_dealloc.?(@ptrCast(self));
     }
 
     pub fn clear(self: *Self) c_int {
-        py.clear(&self.validate_context);
+        py.clearAll(.{&self.validate_context});
+        self.view_owner.clear();
         return py.c.PyList_Type.tp_clear.?(@ptrCast(self));
     }
 
     pub fn traverse(self: *Self, visit: py.visitproc, arg: ?*anyopaque) c_int {
-        const r = py.visit(self.validate_context, visit, arg);
+        var r = py.visitAll(.{self.validate_context}, visit, arg);
+        if (r != 0)
+            return r;
+        r = self.view_owner.traverse(visit, arg);
         if (r != 0)
             return r;
         return py.c.PyList_Type.tp_traverse.?(@ptrCast(self), visit, arg);
@@ -187,6 +515,11 @@ pub const TypedList = extern struct {
         .{ .ml_name = "append", .ml_meth = @constCast(@ptrCast(&append)), .ml_flags = py.c.METH_O, .ml_doc = "Append an item to the list." },
         .{ .ml_name = "insert", .ml_meth = @constCast(@ptrCast(&insert)), .ml_flags = py.c.METH_FASTCALL, .ml_doc = "Insert an item into the list." },
         .{ .ml_name = "extend", .ml_meth = @constCast(@ptrCast(&extend)), .ml_flags = py.c.METH_O, .ml_doc = "Extend the list with items from an iterable." },
+        .{ .ml_name = "pop", .ml_meth = @constCast(@ptrCast(&Forward(0).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Remove and return item at index (default last)." },
+        .{ .ml_name = "remove", .ml_meth = @constCast(@ptrCast(&Forward(1).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Remove first occurrence of value." },
+        .{ .ml_name = "clear", .ml_meth = @constCast(@ptrCast(&Forward(2).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Remove all items from list." },
+        .{ .ml_name = "sort", .ml_meth = @constCast(@ptrCast(&Forward(3).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Sort the list in ascending order and return None." },
+        .{ .ml_name = "reverse", .ml_meth = @constCast(@ptrCast(&Forward(4).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Reverse *IN PLACE*." },
         .{}, // sentinel
     };
 
@@ -198,6 +531,7 @@ pub const TypedList = extern struct {
         .{ .slot = py.c.Py_sq_ass_item, .pfunc = @constCast(@ptrCast(&assign_item)) },
         .{ .slot = py.c.Py_mp_ass_subscript, .pfunc = @constCast(@ptrCast(&assign_subscript)) },
         .{ .slot = py.c.Py_sq_inplace_concat, .pfunc = @constCast(@ptrCast(&inplace_concat)) },
+        .{ .slot = py.c.Py_sq_inplace_repeat, .pfunc = @constCast(@ptrCast(&inplace_repeat)) },
         .{ .slot = py.c.Py_tp_methods, .pfunc = @constCast(@ptrCast(&methods)) },
         .{}, // sentinel
     };
@@ -227,11 +561,14 @@ pub const ListMember = Member("List", 6, struct {
             "item",
             "default",
             "factory",
+            "copy_on_write",
         };
         var item: ?*Object = null;
         var default_value: ?*Object = null;
         var default_factory: ?*Object = null;
-        try py.parseTupleAndKeywords(args, kwargs, "|OOO", @ptrCast(&kwlist), .{ &item, &default_value, &default_factory });
+        var copy_on_write: c_int = 0;
+        try py.parseTupleAndKeywords(args, kwargs, "|OOOp", @ptrCast(&kwlist), .{ &item, &default_value, &default_factory, &copy_on_write });
+        self.info.copy_on_write = copy_on_write != 0;
 
         if (py.notNone(default_value) and py.notNone(default_factory)) {
             return py.typeError("Cannot use both a default and a factory function", .{});
@@ -274,6 +611,45 @@ pub const ListMember = Member("List", 6, struct {
         unreachable;
     }
 
+    // Returns a view of the static default that is only written when mutated
+    pub fn defaultView(self: *MemberBase, atom: *Atom) !?*Object {
+        if (!self.info.copy_on_write or self.info.default_mode != .static) {
+            return null;
+        }
+        const items = try self.sharedDefault(atom, newSharedDefault);
+        if (!List.check(items)) {
+            return null;
+        }
+        return @ptrCast(try TypedList.newDefaultView(@ptrCast(items), self, atom));
+    }
+
+    pub fn isDefaultView(value: *Object) bool {
+        return TypedList.check(value) and @as(*TypedList, @ptrCast(value)).isView();
+    }
+
+    pub fn detachDefaultView(value: *Object) py.Error!void {
+        return @as(*TypedList, @ptrCast(value)).detach();
+    }
+
+    // Validate the static default once for the views of all atoms
+    // Returns new reference
+    fn newSharedDefault(self: *MemberBase, atom: *Atom) py.Error!*Object {
+        const default_value = self.default_context orelse py.None();
+        if (self.validate_context) |validate_member| {
+            if (!List.check(default_value)) {
+                try self.validateFail(atom, default_value, "list");
+                unreachable;
+            }
+            const items: *List = @ptrCast(default_value);
+            const n = try items.size();
+            const copy = try List.new(n);
+            errdefer copy.decref();
+            try TypedList.validateInto(copy, items, n, @ptrCast(validate_member), atom);
+            return @ptrCast(copy);
+        }
+        return default_value.newref();
+    }
+
     // This cannot be inlined
     pub fn coerce(self: *MemberBase, atom: *Atom, _: *Object, value: *Object) py.Error!*Object {
         if (self.validate_context) |validate_member| {
@@ -282,9 +658,17 @@ pub const ListMember = Member("List", 6, struct {
                 if (typed_list.hasSameContext(self.validate_context, atom)) {
                     return value.newref();
                 }
+                // Items from an equivalent validator do not need validated again
+                if (typed_list.hasSameValidator(@ptrCast(validate_member))) {
+                    return @ptrCast(try TypedList.newValidated(@ptrCast(value), @ptrCast(validate_member), atom));
+                }
             }
             return @ptrCast(try TypedList.newWithContext(value, @ptrCast(validate_member), atom));
         } else if (List.check(value)) {
+            if (TypedList.check(value) and @as(*TypedList, @ptrCast(value)).isView()) {
+                // A default view belongs to the atom it was read from
+                return @ptrCast(try List.copy(@ptrCast(value)));
+            }
             return value.newref(); // untyped lists do not need coereced
         }
         try self.validateFail(atom, value, "list");
@@ -305,6 +689,14 @@ pub fn initModule(mod: *py.Module) !void {
         errdefer T.deinitType();
         try mod.addObjectRef(T.TypeName, @ptrCast(T.TypeObject.?));
     }
+    inline for (forwarded_methods, 0..) |name, i| {
+        list_methods[i] = try Object.getAttrString(@ptrCast(&py.c.PyList_Type), name);
+        errdefer py.clear(&list_methods[i]);
+    }
+
+    try ops.init();
+    errdefer ops.deinit();
+
     try TypedList.initType();
     errdefer TypedList.deinitType();
     try mod.addObjectRef("TypedList", @ptrCast(TypedList.TypeObject.?));
@@ -317,5 +709,10 @@ pub fn deinitModule(mod: *py.Module) void {
     inline for (all_members) |T| {
         T.deinitType();
     }
+    TypedList.deinitType();
+    ops.deinit();
+    for (&list_methods) |*method| {
+        py.clear(method);
+    }
     py.clear(&context_str);
 }
@@ -4,11 +4,136 @@ const Object = py.Object;
 const Tuple = py.Tuple;
 const Dict = py.Dict;
 const Str = py.Str;
+const Int = py.Int;
+const Type = py.Type;
 const Atom = @import("../atom.zig").Atom;
+const AtomMeta = @import("../atom_meta.zig").AtomMeta;
 const member = @import("../member.zig");
 const MemberBase = member.MemberBase;
 const StorageMode = member.StorageMode;
 const Member = member.Member;
+const ChangeType = @import("../observer_pool.zig").ChangeType;
+const ExtendedObserver = @import("../observation.zig").ExtendedObserver;
+const package_name = @import("../api.zig").package_name;
+
+// Per member state of a property. This holds the `_get_`, `_set_` and `_del_`
+// method names of a property, the functions they last resolved to on the
+// atom's class and the cache statistics. The functions are borrowed from the
+// class so an entry is only used while the class's version tag is unchanged.
+// Python bumps the tag whenever the class or any of its bases is modified
+// which invalidates the entry. Tags are never reused so the tag alone
+// identifies the class. A few classes are kept per op so a base and its
+// subclasses using the same member do not evict each other.
+const PropertyState = struct {
+    const Op = enum(u2) { get = 0, set = 1, del = 2 };
+    const ways = 4;
+    const Entry = struct {
+        version_tag: c_uint = 0,
+        func: ?*Object = null,
+    };
+    const Entries = struct {
+        items: [ways]Entry = .{Entry{}} ** ways,
+        next: u8 = 0,
+    };
+    const Stats = struct {
+        hits: usize = 0,
+        misses: usize = 0,
+        evictions: usize = 0,
+    };
+    const capsule_name = "zatom.Property.state";
+
+    names: [3]*Str,
+    entries: [3]Entries = .{ .{}, .{}, .{} },
+    stats: Stats = .{},
+
+    // Create a capsule holding the interned method names for the given property name
+    // Returns new reference
+    pub fn newCapsule(name: *Str) !*Object {
+        const self = try py.allocator.create(PropertyState);
+        errdefer py.allocator.destroy(self);
+        var n: usize = 0;
+        errdefer for (self.names[0..n]) |s| s.decref();
+        inline for (.{ "_get_", "_set_", "_del_" }) |prefix| {
+            self.names[n] = try Str.new(prefix ++ "{s}", .{name.data()});
+            Str.internInPlace(@ptrCast(&self.names[n]));
+            n += 1;
+        }
+        self.entries = .{ .{}, .{}, .{} };
+        self.stats = .{};
+        if (py.c.PyCapsule_New(@ptrCast(self), capsule_name, @ptrCast(&destroy))) |capsule| {
+            return @ptrCast(capsule);
+        }
+        return error.PyError;
+    }
+
+    pub fn destroy(capsule: *Object) callconv(.c) void {
+        const ptr = py.c.PyCapsule_GetPointer(@ptrCast(capsule), capsule_name);
+        if (ptr == null) {
+            return py.c.PyErr_Clear();
+        }
+        const self: *PropertyState = @alignCast(@ptrCast(ptr));
+        for (self.names) |name| {
+            name.decref();
+        }
+        py.allocator.destroy(self);
+    }
+
+    pub inline fn fromContext(context: ?*Object) ?*PropertyState {
+        if (context) |capsule| {
+            if (py.c.PyCapsule_IsValid(@ptrCast(capsule), capsule_name) != 0) {
+                return @alignCast(@ptrCast(py.c.PyCapsule_GetPointer(@ptrCast(capsule), capsule_name)));
+            }
+        }
+        return null;
+    }
+
+    // Look up the function on the atom's class. Returns null if the attribute
+    // should be looked up using the normal getattr (eg the atom has a __dict__
+    // or the attribute is not a plain function).
+    // Returns borrowed reference
+    fn resolve(self: *PropertyState, comptime op: Op, atom: *Atom) ?*Object {
+        const entries = &self.entries[@intFromEnum(op)];
+        const cls = atom.typeref();
+        if (cls.impl.tp_flags & py.c.Py_TPFLAGS_VALID_VERSION_TAG != 0) {
+            const tag = cls.impl.tp_version_tag;
+            inline for (0..ways) |i| {
+                if (entries.items[i].version_tag == tag) {
+                    return entries.items[i].func;
+                }
+            }
+        }
+        if (cls.impl.tp_dictoffset != 0) {
+            return null; // An instance attribute may shadow the method
+        }
+        const func: *Object = @ptrCast(py.c._PyType_Lookup(@ptrCast(cls), @ptrCast(self.names[@intFromEnum(op)])) orelse return null);
+        if (func.typeref().impl.tp_flags & py.c.Py_TPFLAGS_METHOD_DESCRIPTOR == 0) {
+            return null;
+        }
+        // The lookup assigns a version tag if the class does not have one yet
+        if (cls.impl.tp_flags & py.c.Py_TPFLAGS_VALID_VERSION_TAG != 0) {
+            entries.items[entries.next] = .{ .version_tag = cls.impl.tp_version_tag, .func = func };
+            entries.next = (entries.next + 1) % ways;
+        }
+        return func;
+    }
+
+    // Call the method for the given op with the atom as the first argument
+    // Returns new reference
+    pub fn call(self: *PropertyState, comptime op: Op, atom: *Atom, args: anytype) !*Object {
+        if (self.resolve(op, atom)) |func| {
+            var argv: [1 + args.len]*Object = undefined;
+            argv[0] = @ptrCast(atom);
+            inline for (args, 1..) |arg, i| {
+                argv[i] = arg;
+            }
+            if (py.c.PyObject_Vectorcall(@ptrCast(func), @ptrCast(&argv), argv.len, null)) |r| {
+                return @ptrCast(r);
+            }
+            return error.PyError;
+        }
+        return try atom.callMethod(self.names[@intFromEnum(op)], args);
+    }
+};
 
 pub const PropertyMember = Member("Property", 22, struct {
     pub inline fn init(self: *MemberBase, args: *Tuple, kwargs: ?*Dict) !void {
@@ -17,12 +142,16 @@ pub const PropertyMember = Member("Property", 22, struct {
             "fset",
             "fdel",
             "cached",
+            "depends_on",
+            "track",
         };
         var fget: ?*Object = null;
         var fset: ?*Object = null;
         var fdel: ?*Object = null;
         var cached: c_int = 0;
-        try py.parseTupleAndKeywords(args, kwargs, "|OOOp", @ptrCast(&kwlist), .{ &fget, &fset, &fdel, &cached });
+        var depends_on: ?*Object = null;
+        var track: c_int = 0;
+        try py.parseTupleAndKeywords(args, kwargs, "|OOOp$Op", @ptrCast(&kwlist), .{ &fget, &fset, &fdel, &cached, &depends_on, &track });
         if (py.notNone(fget) and !fget.?.isCallable()) {
             try py.typeError("fget must be callable or None", .{});
         }
@@ -35,10 +164,20 @@ pub const PropertyMember = Member("Property", 22, struct {
         if (cached != 0 and py.notNone(fset)) {
             try py.typeError("Cached properties are read-only, but a setter was specified", .{});
         }
+        if (cached == 0 and (py.notNone(depends_on) or track != 0)) {
+            try py.typeError("depends_on and track can only be used with cached properties", .{});
+        }
+        const dependencies: *Object = if (py.notNone(depends_on)) @ptrCast(try internDependencies(depends_on.?)) else py.returnNone();
+        defer dependencies.decref();
+        const tracked = py.returnBool(track != 0);
+        defer tracked.decref();
         self.setValidateContext(.default, @ptrCast(try Tuple.packNewrefs(.{
             fget orelse py.None(),
             fset orelse py.None(),
             fdel orelse py.None(),
+            dependencies,
+            tracked,
+            py.None(), // Set in bindName
         })));
         if (cached != 0) {
             self.info.storage_mode = .pointer;
@@ -47,14 +186,144 @@ pub const PropertyMember = Member("Property", 22, struct {
         }
     }
 
+    // Returns new reference to a tuple of interned member names
+    fn internDependencies(depends_on: *Object) !*Tuple {
+        const items: *Tuple = @ptrCast(py.c.PySequence_Tuple(@ptrCast(depends_on)) orelse return error.PyError);
+        defer items.decref();
+        const n = items.sizeUnchecked();
+        const result = try Tuple.new(n);
+        errdefer result.decref();
+        for (0..n) |i| {
+            const item = items.getUnsafe(i).?;
+            if (!Str.check(item)) {
+                try py.typeError("depends_on must be a sequence of member names", .{});
+            }
+            var name: *Str = @ptrCast(item.newref());
+            Str.internInPlace(@ptrCast(&name));
+            try result.set(i, @ptrCast(name));
+        }
+        return result;
+    }
+
+    // Intern the method names once instead of formatting them on every access
+    // and create the observer used to reset the property.
+    pub fn bindName(self: *MemberBase) !void {
+        py.xsetref(&self.coercer_context, try PropertyState.newCapsule(self.name.?));
+        const tuple: *Tuple = @ptrCast(self.validate_context orelse return);
+        if (tuple.sizeUnchecked() < 6) {
+            return;
+        }
+        const depends_on = tuple.getUnsafe(3).?;
+        const track = tuple.getUnsafe(4).?;
+        if (!depends_on.isNone() or track == py.True()) {
+            const observer = try DependencyObserver.create(self.name.?, track == py.True());
+            try tuple.set(5, @ptrCast(observer));
+        }
+    }
+
+    // Get the observer that resets the property if it has dependencies
+    // Returns borrowed reference
+    inline fn dependencyObserver(self: *MemberBase) ?*DependencyObserver {
+        const tuple: *Tuple = @ptrCast(self.validate_context orelse return null);
+        if (tuple.sizeUnchecked() < 6) {
+            return null;
+        }
+        const observer = tuple.getUnsafe(5).?;
+        if (observer.isNone()) {
+            return null;
+        }
+        return @ptrCast(observer);
+    }
+
+    // Wire the observers on the class that reset the property when a dependency changes
+    pub fn bindDependencies(self: *MemberBase, cls: *AtomMeta) !void {
+        const observer = dependencyObserver(self) orelse return;
+        const tuple: *Tuple = @ptrCast(self.validate_context.?);
+        const depends_on = try tuple.get(3);
+        if (depends_on.isNone()) {
+            return; // Only tracked
+        }
+        const pool = try cls.staticObserverPool() orelse return;
+        const items: *Tuple = @ptrCast(depends_on);
+        for (0..items.sizeUnchecked()) |i| {
+            const dep: *Str = @ptrCast(items.getUnsafe(i).?);
+            const data = dep.data();
+            const topic: *Str = blk: {
+                if (std.mem.indexOf(u8, data, ".")) |j| {
+                    if (j == 0 or j + 1 == data.len or std.mem.indexOf(u8, data[j + 1 ..], ".") != null) {
+                        try py.valueError("Property '{s}' dependency '{s}' is invalid. Use a member name or 'member.attr'", .{ self.name.?.data(), data });
+                    }
+                    var topic = try Str.fromSlice(data[0..j]);
+                    errdefer topic.decref();
+                    Str.internInPlace(@ptrCast(&topic));
+                    break :blk topic;
+                }
+                break :blk dep.newref();
+            };
+            defer topic.decref();
+            if (cls.getMember(topic) == null) {
+                try py.attributeError("Property '{s}' dependency '{s}' is invalid. '{s}' has no member with that name", .{
+                    self.name.?.data(),
+                    data,
+                    Type.className(@ptrCast(cls)),
+                });
+            }
+            if (topic != dep) {
+                // Reset when the attr changes on the atom held by the member
+                const attr = try Str.fromSlice(data[topic.data().len + 1 ..]);
+                defer attr.decref();
+                const extended_observer = try ExtendedObserver.create(@ptrCast(observer), attr, @intFromEnum(ChangeType.ANY));
+                defer extended_observer.decref();
+                try pool.addObserver(py.allocator, topic, @ptrCast(extended_observer), @intFromEnum(ChangeType.ANY));
+            }
+            try pool.addObserver(py.allocator, topic, @ptrCast(observer), @intFromEnum(ChangeType.ANY));
+        }
+    }
+
+    pub fn isTracked(self: *MemberBase) bool {
+        if (dependencyObserver(self)) |observer| {
+            return observer.track;
+        }
+        return false;
+    }
+
+    // Evaluate the getter and record the members it reads if tracked
+    // Returns new reference
+    fn compute(self: *MemberBase, atom: *Atom) py.Error!*Object {
+        if (dependencyObserver(self)) |observer| {
+            if (observer.track) {
+                // Drop the members read by the last evaluation
+                try atom.removeDynamicObserverFromAllTopics(@ptrCast(observer));
+                var tracker = member.DependencyTracker{ .atom = atom, .observer = @ptrCast(observer) };
+                const previous = member.dependency_tracker;
+                member.dependency_tracker = &tracker;
+                defer member.dependency_tracker = previous;
+                const value = try get(self, atom);
+                if (tracker.failed) {
+                    value.decref();
+                    return error.PyError;
+                }
+                return value;
+            }
+        }
+        return try get(self, atom);
+    }
+
+    inline fn propertyState(self: *MemberBase) !*PropertyState {
+        if (PropertyState.fromContext(self.coercer_context)) |cache| {
+            return cache;
+        }
+        try bindName(self);
+        return PropertyState.fromContext(self.coercer_context).?;
+    }
+
     // Returns new reference
     pub inline fn get(self: *MemberBase, atom: *Atom) py.Error!*Object {
         const tuple: *Tuple = @ptrCast(self.validate_context.?);
         const fget = try tuple.get(0);
         if (fget.isNone()) {
-            const attr = try Str.new("_get_{s}", .{self.name.?.data()});
-            defer attr.decref();
-            return try atom.callMethod(attr, .{});
+            const cache = try propertyState(self);
+            return try cache.call(.get, atom, .{});
         }
         return try fget.callArgs(.{atom});
     }
@@ -64,11 +333,28 @@ pub const PropertyMember = Member("Property", 22, struct {
             try py.systemError("Invalid validate context", .{});
         }
         if (self.info.storage_mode == .pointer) {
+            const state = try propertyState(self);
             const ptr = try atom.slotPtr(@ptrCast(self));
-            if (ptr.* == null) {
-                ptr.* = try get(self, atom);
+            if (ptr.*) |v| {
+                state.stats.hits += 1;
+                if (CachedValue.checkExact(v)) {
+                    const node: *CachedValue = @ptrCast(v);
+                    cache_budget.touch(node);
+                    return node.value.?.newref();
+                }
+                return v.newref();
             }
-            return ptr.*.?.newref();
+            state.stats.misses += 1;
+            const value = try compute(self, atom);
+            if (cache_budget.limit == 0) {
+                ptr.* = value;
+                return value.newref();
+            }
+            errdefer value.decref();
+            const node = try CachedValue.create(atom, self, value);
+            ptr.* = @ptrCast(node); // The slot owns the node
+            cache_budget.add(node);
+            return value;
         }
         return try get(self, atom);
     }
@@ -80,9 +366,8 @@ pub const PropertyMember = Member("Property", 22, struct {
         const tuple: *Tuple = @ptrCast(self.validate_context.?);
         const fset = try tuple.get(1);
         if (fset.isNone()) {
-            const attr = try Str.new("_set_{s}", .{self.name.?.data()});
-            defer attr.decref();
-            const r = try atom.callMethod(attr, .{value});
+            const cache = try propertyState(self);
+            const r = try cache.call(.set, atom, .{value});
             defer r.decref();
         } else {
             const r = try fset.callArgs(.{ atom, value });
@@ -97,9 +382,8 @@ pub const PropertyMember = Member("Property", 22, struct {
         const tuple: *Tuple = @ptrCast(self.validate_context.?);
         const fdel = try tuple.get(2);
         if (fdel.isNone()) {
-            const attr = try Str.new("_del_{s}", .{self.name.?.data()});
-            defer attr.decref();
-            const r = try atom.callMethod(attr, .{});
+            const cache = try propertyState(self);
+            const r = try cache.call(.del, atom, .{});
             defer r.decref();
         } else {
             const r = try fdel.callArgs(.{atom});
@@ -182,22 +466,34 @@ pub const PropertyMember = Member("Property", 22, struct {
         if (!atom.typeCheckSelf()) {
             try py.typeError("Invalid arguments. Signature is reset(atom: Atom)", .{});
         }
-        if (self.base.shouldNotify(atom, .PROPERTY)) {
-            const old = blk: {
-                if (self.base.info.storage_mode == .pointer) {
-                    const ptr = try atom.slotPtr(@ptrCast(self));
-                    // Steal and the old value clear
-                    if (ptr.*) |v| {
-                        defer ptr.* = null;
-                        break :blk v;
+        try invalidate(@ptrCast(self), atom);
+        return py.returnNone();
+    }
+
+    // Clear the cached value and notify any property observers
+    pub fn invalidate(self: *MemberBase, atom: *Atom) !void {
+        const old = blk: {
+            if (self.info.storage_mode == .pointer) {
+                const ptr = try atom.slotPtr(self);
+                // Steal and the old value clear
+                if (ptr.*) |v| {
+                    defer ptr.* = null;
+                    if (CachedValue.checkExact(v)) {
+                        const node: *CachedValue = @ptrCast(v);
+                        node.detach();
+                        defer node.decref();
+                        break :blk node.value.?.newref();
                     }
+                    break :blk v;
                 }
-                break :blk py.returnNone();
-            };
-            defer old.decref();
+            }
+            break :blk py.returnNone();
+        };
+        defer old.decref();
 
+        if (self.shouldNotify(atom, .PROPERTY)) {
             // Get new value
-            const new = try getattr(@ptrCast(self), atom);
+            const new = try getattr(self, atom);
             defer new.decref();
 
             if (old != new) {
@@ -206,21 +502,52 @@ pub const PropertyMember = Member("Property", 22, struct {
                 defer change.decref();
                 try change.set(@ptrCast(member.type_str.?), @ptrCast(member.property_str.?));
                 try change.set(@ptrCast(member.object_str.?), @ptrCast(atom));
-                try change.set(@ptrCast(member.name_str.?), @ptrCast(self.base.name.?));
+                try change.set(@ptrCast(member.name_str.?), @ptrCast(self.name.?));
                 try change.set(@ptrCast(member.oldvalue_str.?), old);
                 try change.set(@ptrCast(member.value_str.?), new);
 
-                try self.base.notifyChange(atom, change, .PROPERTY);
+                try self.notifyChange(atom, change, .PROPERTY);
             }
         }
+    }
+
+    pub fn get_depends_on(self: *PropertyMember) ?*Object {
+        if (self.base.validate_context) |context| {
+            const tuple: *Tuple = @ptrCast(context);
+            const f = tuple.get(3) catch return null;
+            return f.newref();
+        }
         return py.returnNone();
     }
 
+    pub fn get_cache_stats(self: *PropertyMember) ?*Object {
+        const state = propertyState(@ptrCast(self)) catch return null;
+        return @ptrCast(statsDict(state.stats) catch null);
+    }
+
+    pub fn reset_cache_stats(self: *PropertyMember) ?*Object {
+        const state = propertyState(@ptrCast(self)) catch return null;
+        state.stats = .{};
+        return py.returnNone();
+    }
+
+    pub fn get_track(self: *PropertyMember) ?*Object {
+        if (self.base.validate_context) |context| {
+            const tuple: *Tuple = @ptrCast(context);
+            const f = tuple.get(4) catch return null;
+            return f.newref();
+        }
+        return py.returnFalse();
+    }
+
     const getset = [_]py.GetSetDef{
         .{ .name = "fget", .get = @ptrCast(&get_fget), .set = null, .doc = "Get the getter function for the property." },
         .{ .name = "fset", .get = @ptrCast(&get_fset), .set = null, .doc = "Get the setter function for the property." },
         .{ .name = "fdel", .get = @ptrCast(&get_fdel), .set = null, .doc = "Get the deleter function for the property." },
         .{ .name = "cached", .get = @ptrCast(&get_cached), .set = null, .doc = "Test the whether or not the property is cached." },
+        .{ .name = "depends_on", .get = @ptrCast(&get_depends_on), .set = null, .doc = "Get the names of the members that reset the cached value when changed." },
+        .{ .name = "track", .get = @ptrCast(&get_track), .set = null, .doc = "Test whether the members read by the getter reset the cached value when changed." },
+        .{ .name = "cache_stats", .get = @ptrCast(&get_cache_stats), .set = null, .doc = "Get the number of cache hits, misses and evictions of a cached property." },
         .{}, // sentinel
     };
 
@@ -229,6 +556,7 @@ pub const PropertyMember = Member("Property", 22, struct {
         .{ .ml_name = "setter", .ml_meth = @constCast(@ptrCast(&set_setter)), .ml_flags = py.c.METH_O, .ml_doc = "Use the given function as the property setter." },
         .{ .ml_name = "deleter", .ml_meth = @constCast(@ptrCast(&set_deleter)), .ml_flags = py.c.METH_O, .ml_doc = "Use the given function as the property deleter." },
         .{ .ml_name = "reset", .ml_meth = @constCast(@ptrCast(&reset)), .ml_flags = py.c.METH_O, .ml_doc = "Reset the cached value of the property. If not cached this is a no-op." },
+        .{ .ml_name = "reset_cache_stats", .ml_meth = @constCast(@ptrCast(&reset_cache_stats)), .ml_flags = py.c.METH_NOARGS, .ml_doc = "Reset the cache hit, miss and eviction counts to zero." },
         .{}, // sentinel
     };
 
@@ -238,6 +566,374 @@ pub const PropertyMember = Member("Property", 22, struct {
     };
 });
 
+// Returns new reference to a dict with the fields of the given struct
+fn statsDict(stats: anytype) !*Dict {
+    const dict = try Dict.new();
+    errdefer dict.decref();
+    inline for (@typeInfo(@TypeOf(stats)).@"struct".fields) |field| {
+        const key = try Str.fromSlice(field.name);
+        defer key.decref();
+        const value = try Int.new(@field(stats, field.name));
+        defer value.decref();
+        try dict.set(@ptrCast(key), @ptrCast(value));
+    }
+    return dict;
+}
+
+// Least recently used list of the cached property values of all atoms.
+// Values are only added while a budget is set.
+const CacheBudget = struct {
+    // Maximum size in bytes or 0 for no limit
+    limit: usize = 0,
+    // Optional function returning the size of a value instead of sys.getsizeof
+    size_func: ?*Object = null,
+    size: usize = 0,
+    count: usize = 0,
+    // Most recently used
+    head: ?*CachedValue = null,
+    // Least recently used
+    tail: ?*CachedValue = null,
+
+    fn link(self: *CacheBudget, node: *CachedValue) void {
+        std.debug.assert(!node.linked);
+        node.prev = null;
+        node.next = self.head;
+        if (self.head) |head| {
+            head.prev = node;
+        } else {
+            self.tail = node;
+        }
+        self.head = node;
+        node.linked = true;
+        self.size += node.size;
+        self.count += 1;
+    }
+
+    fn unlink(self: *CacheBudget, node: *CachedValue) void {
+        if (!node.linked) {
+            return;
+        }
+        if (node.prev) |prev| {
+            prev.next = node.next;
+        } else {
+            self.head = node.next;
+        }
+        if (node.next) |next| {
+            next.prev = node.prev;
+        } else {
+            self.tail = node.prev;
+        }
+        node.prev = null;
+        node.next = null;
+        node.linked = false;
+        self.size -= node.size;
+        self.count -= 1;
+    }
+
+    // Mark the node as the most recently used
+    inline fn touch(self: *CacheBudget, node: *CachedValue) void {
+        if (node.linked and self.head != node) {
+            self.unlink(node);
+            self.link(node);
+        }
+    }
+
+    fn add(self: *CacheBudget, node: *CachedValue) void {
+        self.link(node);
+        self.evict(node);
+    }
+
+    // Evict the least recently used values until the size is within the limit
+    fn evict(self: *CacheBudget, keep: ?*CachedValue) void {
+        if (self.limit == 0) {
+            return;
+        }
+        while (self.size > self.limit) {
+            const node = self.tail orelse break;
+            if (node == keep) {
+                break;
+            }
+            node.evict();
+        }
+    }
+
+    // Estimate the size of a value. The default sys.getsizeof is shallow so
+    // the items of a container are not included.
+    fn sizeOf(self: *CacheBudget, value: *Object) !usize {
+        if (self.size_func) |func| {
+            const r = try func.callArgs(.{value});
+            defer r.decref();
+            if (!Int.check(r)) {
+                try py.typeError("cache budget sizeof function must return an int", .{});
+            }
+            return try Int.as(@ptrCast(r), usize);
+        }
+        const size = py.c._PySys_GetSizeOf(@ptrCast(value));
+        if (size == std.math.maxInt(usize)) {
+            return error.PyError;
+        }
+        return size;
+    }
+};
+
+var cache_budget: CacheBudget = .{};
+
+// Set the maximum number of bytes used by cached property values. Zero disables the limit.
+// The size of values is estimated with size_func if given, otherwise sys.getsizeof.
+pub fn setCacheBudget(limit: usize, size_func: ?*Object) void {
+    py.xsetref(&cache_budget.size_func, if (size_func) |func| func.newref() else null);
+    cache_budget.limit = limit;
+    cache_budget.evict(null);
+}
+
+// Check if any atom slot may hold a cached value that is tracked for eviction
+pub inline fn hasTrackedValues() bool {
+    return cache_budget.count != 0;
+}
+
+// Must be called when a value is removed from an atom's slot without going
+// through the property so a tracked cached value no longer refers to the atom.
+pub inline fn releaseSlotValue(value: *Object) void {
+    if (CachedValue.checkExact(value)) {
+        @as(*CachedValue, @ptrCast(value)).detach();
+    }
+}
+
+// Get the value held in an atom's slot without the cache node wrapping it
+// Returns borrowed reference
+pub inline fn slotValue(value: *Object) *Object {
+    if (CachedValue.checkExact(value)) {
+        return @as(*CachedValue, @ptrCast(value)).value orelse py.None();
+    }
+    return value;
+}
+
+// Returns new reference
+pub fn cacheInfo() !*Dict {
+    return statsDict(.{
+        .budget = cache_budget.limit,
+        .size = cache_budget.size,
+        .count = cache_budget.count,
+    });
+}
+
+pub const CacheUsage = struct {
+    count: usize = 0,
+    size: usize = 0,
+};
+
+// Get the number and size of the tracked cached values held by instances of the given class
+pub fn cacheUsage(cls: *Type) CacheUsage {
+    var usage: CacheUsage = .{};
+    var node = cache_budget.head;
+    while (node) |n| : (node = n.next) {
+        const atom = n.atom orelse continue;
+        if (atom.typeref() == cls) {
+            usage.count += 1;
+            usage.size += n.size;
+        }
+    }
+    return usage;
+}
+
+// Holds a cached property value in the atom's slot while a cache budget is
+// set so the value can be evicted. The size is estimated using sys.getsizeof
+// unless the budget was given a size function.
+pub const CachedValue = extern struct {
+    const Self = @This();
+    // Reference to the type. This is set in ready
+    pub var TypeObject: ?*Type = null;
+    base: Object,
+    value: ?*Object,
+    // Borrowed while the atom's slot owns the node. Both are reset by detach
+    // when the slot lets go of the node.
+    atom: ?*Atom,
+    member: ?*MemberBase,
+    prev: ?*Self,
+    next: ?*Self,
+    size: usize,
+    linked: bool,
+
+    pub usingnamespace py.ObjectProtocol(Self);
+
+    pub inline fn checkExact(obj: *const Object) bool {
+        return obj.typeref() == TypeObject.?;
+    }
+
+    // Borrows reference to value
+    pub fn create(atom: *Atom, prop: *MemberBase, value: *Object) !*Self {
+        const size = try cache_budget.sizeOf(value);
+        const self: *Self = @ptrCast(try TypeObject.?.genericNew(null, null));
+        self.value = value.newref();
+        self.atom = atom;
+        self.member = prop;
+        self.prev = null;
+        self.next = null;
+        self.size = size + @sizeOf(Self);
+        self.linked = false;
+        return self;
+    }
+
+    // Stop tracking the node once the atom's slot no longer owns it
+    pub fn detach(self: *Self) void {
+        cache_budget.unlink(self);
+        self.atom = null;
+        self.member = null;
+    }
+
+    // Clear the slot holding this node. The value is computed again on the next access.
+    fn evict(self: *Self) void {
+        const atom = self.atom orelse return self.detach();
+        const prop = self.member.?;
+        self.detach();
+        if (PropertyState.fromContext(prop.coercer_context)) |state| {
+            state.stats.evictions += 1;
+        }
+        const ptr = atom.slotPtr(prop) catch return py.c.PyErr_Clear();
+        if (ptr.* == @as(?*Object, @ptrCast(self))) {
+            ptr.* = null;
+            self.decref();
+        }
+    }
+
+    // --------------------------------------------------------------------------
+    // Type definition
+    // --------------------------------------------------------------------------
+    pub fn dealloc(self: *Self) void {
+        self.gcUntrack();
+        cache_budget.unlink(self);
+        _ = self.clear();
+        self.typeref().free(@ptrCast(self));
+    }
+
+    pub fn clear(self: *Self) c_int {
+        py.clearAll(.{&self.value});
+        return 0;
+    }
+
+    pub fn traverse(self: *Self, visit: py.visitproc, arg: ?*anyopaque) c_int {
+        return py.visitAll(.{self.value}, visit, arg);
+    }
+
+    const type_slots = [_]py.TypeSlot{
+        .{ .slot = py.c.Py_tp_dealloc, .pfunc = @constCast(@ptrCast(&dealloc)) },
+        .{ .slot = py.c.Py_tp_traverse, .pfunc = @constCast(@ptrCast(&traverse)) },
+        .{ .slot = py.c.Py_tp_clear, .pfunc = @constCast(@ptrCast(&clear)) },
+        .{}, // sentinel
+    };
+
+    pub var TypeSpec = py.TypeSpec{
+        .name = package_name ++ ".CachedValue",
+        .basicsize = @sizeOf(Self),
+        .flags = (py.c.Py_TPFLAGS_DEFAULT | py.c.Py_TPFLAGS_HAVE_GC),
+        .slots = @constCast(@ptrCast(&type_slots)),
+    };
+
+    pub fn initType() !void {
+        if (TypeObject != null) return;
+        TypeObject = try py.Type.fromSpec(&TypeSpec);
+    }
+
+    pub fn deinitType() void {
+        py.clear(&TypeObject);
+    }
+};
+
+// Observer that resets a cached property when one of its dependencies changes.
+// The property is looked up by name on the atom's class so the observer works
+// for subclasses that inherit the static observers.
+pub const DependencyObserver = extern struct {
+    const Self = @This();
+    // Reference to the type. This is set in ready
+    pub var TypeObject: ?*Type = null;
+    base: Object,
+    name: ?*Str,
+    track: bool,
+
+    pub usingnamespace py.ObjectProtocol(Self);
+
+    // Type check the given object. This assumes the module was initialized
+    pub fn check(obj: *const Object) bool {
+        return obj.typeCheck(TypeObject.?);
+    }
+
+    pub fn create(name: *Str, track: bool) !*Self {
+        const self: *Self = @ptrCast(try TypeObject.?.genericNew(null, null));
+        self.name = name.newref();
+        self.track = track;
+        return self;
+    }
+
+    // Called with (change) when observing the atom directly or with
+    // (atom, change) when bound to an atom by an ExtendedObserver.
+    pub fn call(self: *Self, args: *Tuple, _: ?*Dict) ?*Object {
+        self.callOrError(args) catch return null;
+        return py.returnNone();
+    }
+
+    pub fn callOrError(self: *Self, args: *Tuple) !void {
+        const n = args.sizeUnchecked();
+        if (n == 0 or n > 2 or !Dict.check(args.getUnsafe(n - 1).?)) {
+            return py.typeError("Invalid arguments. Signature is __call__([atom,] change: dict)", .{});
+        }
+        const change: *Dict = @ptrCast(args.getUnsafe(n - 1).?);
+        const owner = if (n == 2) args.getUnsafe(0).? else try change.getOrError(@ptrCast(member.object_str.?));
+        if (!Atom.check(owner)) {
+            return;
+        }
+        const atom: *Atom = @ptrCast(owner);
+        const meta: *AtomMeta = @ptrCast(atom.typeref());
+        const prop = meta.getMember(self.name.?) orelse return;
+        if (prop.info.typeid != PropertyMember.typeid or prop.info.storage_mode != .pointer) {
+            return;
+        }
+        const ptr = try atom.slotPtr(prop);
+        if (ptr.* == null) {
+            return; // Nothing cached (or the getter is running)
+        }
+        try PropertyMember.Impl.invalidate(prop, atom);
+    }
+
+    // Observers are keyed by hash so use the property name. This way a
+    // subclass re-adding the observer for an inherited property is a no-op.
+    pub fn hash(self: *Self) isize {
+        const h = self.name.?.hash() catch return -1;
+        const r = h ^ 0x2d2d;
+        return if (r == -1) -2 else r;
+    }
+
+    // --------------------------------------------------------------------------
+    // Type definition
+    // --------------------------------------------------------------------------
+    pub fn dealloc(self: *Self) void {
+        py.clear(&self.name);
+        self.typeref().free(@ptrCast(self));
+    }
+
+    const type_slots = [_]py.TypeSlot{
+        .{ .slot = py.c.Py_tp_call, .pfunc = @constCast(@ptrCast(&call)) },
+        .{ .slot = py.c.Py_tp_hash, .pfunc = @constCast(@ptrCast(&hash)) },
+        .{ .slot = py.c.Py_tp_dealloc, .pfunc = @constCast(@ptrCast(&dealloc)) },
+        .{}, // sentinel
+    };
+
+    pub var TypeSpec = py.TypeSpec{
+        .name = package_name ++ ".DependencyObserver",
+        .basicsize = @sizeOf(Self),
+        .flags = py.c.Py_TPFLAGS_DEFAULT,
+        .slots = @constCast(@ptrCast(&type_slots)),
+    };
+
+    pub fn initType() !void {
+        if (TypeObject != null) return;
+        TypeObject = try py.Type.fromSpec(&TypeSpec);
+    }
+
+    pub fn deinitType() void {
+        py.clear(&TypeObject);
+    }
+};
+
 pub const all_members = .{
     PropertyMember,
 };
@@ -248,10 +944,16 @@ pub fn initModule(mod: *py.Module) !void {
         errdefer T.deinitType();
         try mod.addObjectRef(T.TypeName, @ptrCast(T.TypeObject.?));
     }
+    try DependencyObserver.initType();
+    errdefer DependencyObserver.deinitType();
+    try CachedValue.initType();
 }
 
 pub fn deinitModule(mod: *py.Module) void {
     _ = mod;
+    py.clear(&cache_budget.size_func);
+    CachedValue.deinitType();
+    DependencyObserver.deinitType();
     inline for (all_members) |T| {
         T.deinitType();
     }
@@ -59,6 +59,10 @@ pub const BoolMember = Member("Bool", 9, struct {
         return py.returnBool(data != 0);
     }
 
+    pub inline fn exactType(_: *MemberBase) ?*py.Type {
+        return @ptrCast(&py.c.PyBool_Type);
+    }
+
     pub inline fn validate(self: *MemberBase, atom: *Atom, _: *Object, new: *Object) py.Error!*Object {
         if (!py.Bool.check(new)) {
             try self.validateFail(atom, new, "bool");
@@ -69,9 +73,14 @@ pub const BoolMember = Member("Bool", 9, struct {
 });
 
 pub const IntMember = Member("Int", 10, struct {
+    pub const acyclic = true;
     pub inline fn initDefault() !*Object {
         return @ptrCast(try py.Int.new(0));
     }
+    pub inline fn exactType(_: *MemberBase) ?*py.Type {
+        return @ptrCast(&py.c.PyLong_Type);
+    }
+
     pub inline fn validate(self: *MemberBase, atom: *Atom, _: *Object, new: *Object) py.Error!*Object {
         if (!py.Int.check(new)) {
             try self.validateFail(atom, new, "int");
@@ -82,9 +91,14 @@ pub const IntMember = Member("Int", 10, struct {
 });
 
 pub const FloatMember = Member("Float", 11, struct {
+    pub const acyclic = true;
     pub inline fn initDefault() !*Object {
         return @ptrCast(try py.Float.new(0.0));
     }
+    pub inline fn exactType(_: *MemberBase) ?*py.Type {
+        return @ptrCast(&py.c.PyFloat_Type);
+    }
+
     pub inline fn coerce(self: *MemberBase, atom: *Atom, _: *Object, new: *Object) py.Error!*Object {
         if (!py.Float.check(new)) {
             if (self.info.coerce and py.Int.check(new)) {
@@ -98,10 +112,15 @@ pub const FloatMember = Member("Float", 11, struct {
 });
 
 pub const StrMember = Member("Str", 12, struct {
+    pub const acyclic = true;
     pub inline fn initDefault() !*Object {
         return @ptrCast(empty_str.?.newref());
     }
 
+    pub inline fn exactType(_: *MemberBase) ?*py.Type {
+        return @ptrCast(&py.c.PyUnicode_Type);
+    }
+
     pub inline fn validate(self: *MemberBase, atom: *Atom, _: *Object, new: *Object) py.Error!*Object {
         if (!py.Str.check(new)) {
             try self.validateFail(atom, new, "str");
@@ -112,10 +131,15 @@ pub const StrMember = Member("Str", 12, struct {
 });
 
 pub const BytesMember = Member("Bytes", 13, struct {
+    pub const acyclic = true;
     pub inline fn initDefault() !*Object {
         return @ptrCast(empty_bytes.?.newref());
     }
 
+    pub inline fn exactType(_: *MemberBase) ?*py.Type {
+        return @ptrCast(&py.c.PyBytes_Type);
+    }
+
     pub inline fn validate(self: *MemberBase, atom: *Atom, _: *Object, new: *Object) py.Error!*Object {
         if (!py.Bytes.check(new)) {
             try self.validateFail(atom, new, "bytes");
@@ -184,6 +208,7 @@ pub const ConstantMember = Member("Constant", 19, struct {
 });
 
 pub const RangeMember = Member("Range", 20, struct {
+    pub const acyclic = true;
     pub fn init(self: *MemberBase, args: *py.Tuple, kwargs: ?*py.Dict) !void {
         const kwlist = [_:null][*c]const u8{
             "low",
@@ -259,6 +284,7 @@ pub const RangeMember = Member("Range", 20, struct {
 });
 
 pub const FloatRangeMember = Member("FloatRange", 21, struct {
+    pub const acyclic = true;
     pub fn init(self: *MemberBase, args: *py.Tuple, kwargs: ?*py.Dict) !void {
         const kwlist = [_:null][*c]const u8{
             "low",
@@ -9,12 +9,20 @@ const Atom = @import("../atom.zig").Atom;
 const member = @import("../member.zig");
 const MemberBase = member.MemberBase;
 const Member = member.Member;
+const ContainerOwner = member.ContainerOwner;
 const InstanceMember = @import("instance.zig").InstanceMember;
 const package_name = @import("../api.zig").package_name;
 
 // Set update function
 var set_update_method: ?*py.Method = null;
 
+// Mutating set methods wrapped to materialize copy-on-write defaults and notify container changes
+const forwarded_methods = .{ "discard", "remove", "pop", "clear", "difference_update", "intersection_update" };
+var set_methods = [_]?*Object{null} ** forwarded_methods.len;
+
+// Operations sent in container change notifications
+const ops = member.ContainerOps(.{ "add", "update", "symmetric_difference_update", "__iand__", "__isub__", "__ixor__", "__ior__" } ++ forwarded_methods);
+
 pub const TypedSet = extern struct {
     const Self = @This();
     // Reference to the type. This is set in ready
@@ -22,6 +30,7 @@ pub const TypedSet = extern struct {
 
     base: Set,
     validate_context: ?*Tuple = null, // tuple[MemberBase, Atom]
+    view_owner: member.DefaultViewOwner = .{}, // Set until a copy-on-write default view is first mutated
 
     pub usingnamespace py.ObjectProtocol(Self);
 
@@ -37,58 +46,143 @@ pub const TypedSet = extern struct {
         const new = self.validateItem(item) catch return null;
         defer new.decref();
         self.base.add(new) catch return null;
+        self.materialize() catch return null;
+        if (self.observedOwner()) |owner| {
+            const items = Tuple.packNewrefs(.{new}) catch return null;
+            defer items.decref();
+            owner.notify(@ptrCast(self), ops.get("add"), null, @ptrCast(items)) catch return null;
+        }
         return py.returnNone();
     }
 
     pub fn symmetric_difference_update(self: *Self, other: *Object) ?*Object {
-        const new = self.validateIterable(other) catch return null;
-        defer new.decref();
-        return @ptrCast(py.c.PySet_Type.tp_as_number.*.nb_inplace_subtract.?(@ptrCast(self), @ptrCast(new)));
+        return self.inplaceOp(other, "symmetric_difference_update", py.c.PySet_Type.tp_as_number.*.nb_inplace_xor.?);
     }
 
     pub fn update(self: *Self, args: *Tuple) ?*Object {
         const n = args.size() catch return null;
+        if (self.activeValidator() != null) {
+            // Validate everything into one set
+            const copy: *Object = blk: {
+                if (n == 1) {
+                    break :blk self.validateIterable(args.getUnsafe(0).?) catch return null;
+                }
+                const merged = Set.new(null) catch return null;
+                for (0..n) |i| {
+                    self.validateIterableInto(merged, args.getUnsafe(i).?) catch {
+                        merged.decref();
+                        return null;
+                    };
+                }
+                break :blk @ptrCast(merged);
+            };
+            defer copy.decref();
+            const update_args = Tuple.packNewrefs(.{ self, copy }) catch return null;
+            defer update_args.decref();
+            const result = set_update_method.?.call(update_args, null) catch return null;
+            self.materialize() catch {
+                result.decref();
+                return null;
+            };
+            if (self.observedOwner()) |owner| {
+                owner.notify(@ptrCast(self), ops.get("update"), null, @ptrCast(copy)) catch {
+                    result.decref();
+                    return null;
+                };
+            }
+            return result;
+        }
         const new_args = Tuple.new(n + 1) catch return null;
         defer new_args.decref();
         new_args.setUnsafe(0, @ptrCast(self.newref()));
         for (0..n) |i| {
-            const item = args.getUnsafe(i).?;
-            const value = self.validateIterable(item) catch return null;
-            new_args.setUnsafe(i + 1, value);
+            new_args.setUnsafe(i + 1, args.getUnsafe(i).?.newref());
         }
-        return set_update_method.?.call(new_args, null) catch null;
+        const result = set_update_method.?.call(new_args, null) catch return null;
+        self.materialize() catch {
+            result.decref();
+            return null;
+        };
+        return result;
     }
 
     pub fn iand(self: *Self, other: *Object) ?*Object {
         if (!Set.checkAny(other))
             return py.returnNotImplemented();
-        const new = self.validateIterable(other) catch return null;
-        defer new.decref();
-        return @ptrCast(py.c.PySet_Type.tp_as_number.*.nb_inplace_and.?(@ptrCast(self), @ptrCast(new)));
+        return self.inplaceOp(other, "__iand__", py.c.PySet_Type.tp_as_number.*.nb_inplace_and.?);
     }
 
     pub fn isub(self: *Self, other: *Object) ?*Object {
         if (!Set.checkAny(other))
             return py.returnNotImplemented();
-        const new = self.validateIterable(other) catch return null;
-        defer new.decref();
-        return @ptrCast(py.c.PySet_Type.tp_as_number.*.nb_inplace_subtract.?(@ptrCast(self), @ptrCast(new)));
+        return self.inplaceOp(other, "__isub__", py.c.PySet_Type.tp_as_number.*.nb_inplace_subtract.?);
     }
 
     pub fn ixor(self: *Self, other: *Object) ?*Object {
         if (!Set.checkAny(other))
             return py.returnNotImplemented();
-        const new = self.validateIterable(other) catch return null;
-        defer new.decref();
-        return @ptrCast(py.c.PySet_Type.tp_as_number.*.nb_inplace_xor.?(@ptrCast(self), @ptrCast(new)));
+        return self.inplaceOp(other, "__ixor__", py.c.PySet_Type.tp_as_number.*.nb_inplace_xor.?);
     }
 
     pub fn ior(self: *Self, other: *Object) ?*Object {
         if (!Set.checkAny(other))
             return py.returnNotImplemented();
+        return self.inplaceOp(other, "__ior__", py.c.PySet_Type.tp_as_number.*.nb_inplace_or.?);
+    }
+
+    // Validate other and apply the set's inplace number slot with it
+    inline fn inplaceOp(self: *Self, other: *Object, comptime op: [:0]const u8, func: anytype) ?*Object {
         const new = self.validateIterable(other) catch return null;
         defer new.decref();
-        return @ptrCast(py.c.PySet_Type.tp_as_number.*.nb_inplace_or.?(@ptrCast(self), @ptrCast(new)));
+        const result: *Object = @ptrCast(func(@ptrCast(self), @ptrCast(new)) orelse return null);
+        self.materialize() catch {
+            result.decref();
+            return null;
+        };
+        if (self.observedOwner()) |owner| {
+            owner.notify(@ptrCast(self), ops.get(op), null, new) catch {
+                result.decref();
+                return null;
+            };
+        }
+        return result;
+    }
+
+    // Call a set method and materialize a copy-on-write default view if it succeeds
+    fn Forward(comptime i: usize) type {
+        return struct {
+            const name = forwarded_methods[i];
+
+            pub fn call(self: *Self, args: [*]const *Object, n: isize, kwnames: ?*Tuple) ?*Object {
+                const result = member.callBaseMethod(set_methods[i].?, @ptrCast(self), args, n, kwnames) orelse return null;
+                self.materialize() catch {
+                    result.decref();
+                    return null;
+                };
+                if (self.observedOwner()) |owner| {
+                    notifyForwarded(owner, self, args, result) catch {
+                        result.decref();
+                        return null;
+                    };
+                }
+                return result;
+            }
+
+            // Pop includes the removed item, discard and remove the given item
+            fn notifyForwarded(owner: ContainerOwner, self: *Self, args: [*]const *Object, result: *Object) !void {
+                const op = ops.get(name);
+                if (comptime std.mem.eql(u8, name, "pop")) {
+                    const items = try Tuple.packNewrefs(.{result});
+                    defer items.decref();
+                    return owner.notify(@ptrCast(self), op, null, @ptrCast(items));
+                } else if (comptime std.mem.eql(u8, name, "discard") or std.mem.eql(u8, name, "remove")) {
+                    const items = try Tuple.packNewrefs(.{args[0]});
+                    defer items.decref();
+                    return owner.notify(@ptrCast(self), op, null, @ptrCast(items));
+                }
+                return owner.notify(@ptrCast(self), op, null, null);
+            }
+        };
     }
 
     // --------------------------------------------------------------------------
@@ -99,19 +193,92 @@ pub const TypedSet = extern struct {
     }
 
     pub fn newWithContext(items: *Object, validate_member: *MemberBase, atom: *Atom) !*TypedSet {
+        if (TypedSet.check(items) and @as(*TypedSet, @ptrCast(items)).hasSameValidator(validate_member)) {
+            // Already validated so the set can copy them directly
+            const self: *TypedSet = @ptrCast(try TypeObject.?.callArgs(.{items}));
+            errdefer self.decref();
+            self.validate_context = try Tuple.packNewrefs(.{ validate_member, atom });
+            return self;
+        }
         const self: *TypedSet = @ptrCast(try TypeObject.?.callArgs(.{}));
         errdefer self.decref();
         self.validate_context = try Tuple.packNewrefs(.{ validate_member, atom });
+        try validateItems(&self.base, items, validate_member, atom);
+        return @ptrCast(self);
+    }
 
+    // Validate the items of an iterable and add them to dst. Items whose type is
+    // exactly the one the member accepts are only a pointer compare.
+    pub fn validateItems(dst: *Set, items: *Object, validate_member: *MemberBase, atom: *Atom) !void {
+        const kind = validate_member.exactType();
         const iter = try items.iter();
         defer iter.decref();
         while (try iter.next()) |item| {
             defer item.decref();
-            const new = try validate_member.validate(atom, py.None(), item);
-            defer new.decref();
-            try self.base.add(new);
+            if (kind != null and item.typeref() == kind.?) {
+                try dst.add(item);
+            } else {
+                const new = try validate_member.validate(atom, py.None(), item);
+                defer new.decref();
+                try dst.add(new);
+            }
         }
-        return @ptrCast(self);
+    }
+
+    // Create a view of the default for a copy-on-write member. It is stored
+    // in the atom's slot but is not a write until it is first modified.
+    // The items were already validated by the owner.
+    pub fn newDefaultView(items: *Set, owner: *MemberBase, atom: *Atom) !*TypedSet {
+        const self = try newNoContext(@ptrCast(items));
+        self.view_owner.set(owner, atom);
+        return self;
+    }
+
+    pub inline fn isView(self: *Self) bool {
+        return self.view_owner.isView();
+    }
+
+    // Keep the validator of the owner once this is no longer a view
+    fn takeValidator(self: *Self) py.Error!void {
+        if (self.activeValidator()) |v| {
+            self.validate_context = try Tuple.packNewrefs(.{ v.member, v.atom });
+        }
+    }
+
+    // If this is a copy-on-write default view it was modified so it now
+    // holds the value of the owner's slot.
+    pub inline fn materialize(self: *Self) py.Error!void {
+        if (self.view_owner.isView()) {
+            try self.takeValidator();
+            try self.view_owner.materialize(@ptrCast(self));
+        }
+    }
+
+    // Called when the owner's slot no longer holds this view
+    pub fn detach(self: *Self) py.Error!void {
+        if (self.view_owner.isView()) {
+            defer self.view_owner.clear();
+            try self.takeValidator();
+        }
+    }
+
+    const Validator = struct {
+        member: *MemberBase,
+        atom: *Atom,
+    };
+
+    // Get the member and atom that validate new items. A default view uses
+    // the item member of its owner until it is stored.
+    inline fn activeValidator(self: *Self) ?Validator {
+        if (self.validate_context) |tuple| {
+            return .{ .member = @ptrCast(tuple.getUnsafe(0).?), .atom = @ptrCast(tuple.getUnsafe(1).?) };
+        }
+        if (self.view_owner.member) |owner| {
+            if (owner.validate_context) |validate_member| {
+                return .{ .member = @ptrCast(validate_member), .atom = self.view_owner.atom.? };
+            }
+        }
+        return null;
     }
 
     pub fn hasSameContext(self: *Self, validate_member: ?*Object, atom: *Atom) bool {
@@ -122,45 +289,71 @@ pub const TypedSet = extern struct {
     }
 
     pub fn validateItem(self: *Self, item: *Object) py.Error!*Object {
-        const tuple = self.validate_context orelse return item.newref();
-        const mem: *MemberBase = @ptrCast(tuple.getUnsafe(0).?);
-        const atom: *Atom = @ptrCast(tuple.getUnsafe(1).?);
-        return try mem.validate(atom, py.None(), item);
+        const v = self.activeValidator() orelse return item.newref();
+        return try v.member.validate(v.atom, py.None(), item);
+    }
+
+    // Check if the items were validated by a member equivalent to the given one
+    pub fn hasSameValidator(self: *Self, validate_member: *MemberBase) bool {
+        if (self.validate_context) |tuple| {
+            return validate_member.hasSameValidator(@ptrCast(tuple.getUnsafe(0).?));
+        }
+        return false;
     }
 
     pub fn validateIterable(self: *Self, items: *Object) py.Error!*Object {
-        const tuple = self.validate_context orelse return items.newref();
-        const mem: *MemberBase = @ptrCast(tuple.getUnsafe(0).?);
-        const atom: *Atom = @ptrCast(tuple.getUnsafe(1).?);
-        const iter = try items.iter();
-        defer iter.decref();
+        const v = self.activeValidator() orelse return items.newref();
+        if (TypedSet.check(items) and @as(*TypedSet, @ptrCast(items)).hasSameValidator(v.member)) {
+            return items.newref();
+        }
         const copy = try Set.new(null);
         errdefer copy.decref();
-        while (try iter.next()) |item| {
-            defer item.decref();
-            const new = try mem.validate(atom, py.None(), item);
-            defer new.decref();
-            try copy.add(new);
-        }
+        try self.validateIterableInto(copy, items);
         return @ptrCast(copy);
     }
 
+    // Validate the items and add them to the given set
+    pub fn validateIterableInto(self: *Self, copy: *Set, items: *Object) py.Error!void {
+        const v = self.activeValidator().?;
+        const mem = v.member;
+        const atom = v.atom;
+        if (TypedSet.check(items) and @as(*TypedSet, @ptrCast(items)).hasSameValidator(mem)) {
+            const args = try Tuple.packNewrefs(.{ copy, items });
+            defer args.decref();
+            const r = try set_update_method.?.call(args, null);
+            r.decref();
+            return;
+        }
+        try validateItems(copy, items, mem, atom);
+    }
+
+    // Returns the owner to notify if container changes of this set are observed
+    pub inline fn observedOwner(self: *Self) ?ContainerOwner {
+        const tuple = self.validate_context orelse return null;
+        return ContainerOwner.observed(@ptrCast(tuple.getUnsafe(0).?), @ptrCast(tuple.getUnsafe(1).?));
+    }
+
     // --------------------------------------------------------------------------
     // Type definition
     // --------------------------------------------------------------------------
     pub fn dealloc(self: *Self) void {
         self.gcUntrack();
-        py.clear(&self.validate_context);
+        py.clearAll(.{&self.validate_context});
+        self.view_owner.clear();
         py.c.PySet_Type.tp_dealloc.?(@ptrCast(self));
     }
 
     pub fn clear(self: *Self) c_int {
-        py.clear(&self.validate_context);
+        py.clearAll(.{&self.validate_context});
+        self.view_owner.clear();
         return py.c.PySet_Type.tp_clear.?(@ptrCast(self));
     }
 
     pub fn traverse(self: *Self, visit: py.visitproc, arg: ?*anyopaque) c_int {
-        const r = py.visit(self.validate_context, visit, arg);
+        var r = py.visitAll(.{self.validate_context}, visit, arg);
+        if (r != 0)
+            return r;
+        r = self.view_owner.traverse(visit, arg);
         if (r != 0)
             return r;
         return py.c.PySet_Type.tp_traverse.?(@ptrCast(self), visit, arg);
@@ -170,6 +363,12 @@ pub const TypedSet = extern struct {
         .{ .ml_name = "add", .ml_meth = @constCast(@ptrCast(&add)), .ml_flags = py.c.METH_O, .ml_doc = "Add an item to the set." },
         .{ .ml_name = "symmetric_difference_update", .ml_meth = @constCast(@ptrCast(&symmetric_difference_update)), .ml_flags = py.c.METH_O, .ml_doc = "Update the set, keeping only elements found in either set, but not in both." },
         .{ .ml_name = "update", .ml_meth = @constCast(@ptrCast(&update)), .ml_flags = py.c.METH_VARARGS, .ml_doc = "Update the set, adding elements from all others." },
+        .{ .ml_name = "discard", .ml_meth = @constCast(@ptrCast(&Forward(0).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Remove an element from a set if it is a member." },
+        .{ .ml_name = "remove", .ml_meth = @constCast(@ptrCast(&Forward(1).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Remove an element from a set; it must be a member." },
+        .{ .ml_name = "pop", .ml_meth = @constCast(@ptrCast(&Forward(2).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Remove and return an arbitrary set element." },
+        .{ .ml_name = "clear", .ml_meth = @constCast(@ptrCast(&Forward(3).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Remove all elements from this set." },
+        .{ .ml_name = "difference_update", .ml_meth = @constCast(@ptrCast(&Forward(4).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Remove all elements of another set from this set." },
+        .{ .ml_name = "intersection_update", .ml_meth = @constCast(@ptrCast(&Forward(5).call)), .ml_flags = py.c.METH_FASTCALL | py.c.METH_KEYWORDS, .ml_doc = "Update the set with the intersection of itself and another." },
         .{}, // sentinel
     };
 
@@ -211,11 +410,14 @@ pub const SetMember = Member("Set", 14, struct {
             "item",
             "default",
             "factory",
+            "copy_on_write",
         };
         var item: ?*Object = null;
         var default_value: ?*Object = null;
         var default_factory: ?*Object = null;
-        try py.parseTupleAndKeywords(args, kwargs, "|OOO", @ptrCast(&kwlist), .{ &item, &default_value, &default_factory });
+        var copy_on_write: c_int = 0;
+        try py.parseTupleAndKeywords(args, kwargs, "|OOOp", @ptrCast(&kwlist), .{ &item, &default_value, &default_factory, &copy_on_write });
+        self.info.copy_on_write = copy_on_write != 0;
 
         if (py.notNone(default_value) and py.notNone(default_factory)) {
             return py.typeError("Cannot use both a default and a factory function", .{});
@@ -259,6 +461,39 @@ pub const SetMember = Member("Set", 14, struct {
         unreachable;
     }
 
+    // Returns a view of the static default that is only written when mutated
+    pub fn defaultView(self: *MemberBase, atom: *Atom) !?*Object {
+        if (!self.info.copy_on_write or self.info.default_mode != .static) {
+            return null;
+        }
+        const items = try self.sharedDefault(atom, newSharedDefault);
+        if (!Set.check(items)) {
+            return null;
+        }
+        return @ptrCast(try TypedSet.newDefaultView(@ptrCast(items), self, atom));
+    }
+
+    pub fn isDefaultView(value: *Object) bool {
+        return TypedSet.check(value) and @as(*TypedSet, @ptrCast(value)).isView();
+    }
+
+    pub fn detachDefaultView(value: *Object) py.Error!void {
+        return @as(*TypedSet, @ptrCast(value)).detach();
+    }
+
+    // Validate the static default once for the views of all atoms
+    // Returns new reference
+    fn newSharedDefault(self: *MemberBase, atom: *Atom) py.Error!*Object {
+        const default_value = self.default_context orelse py.None();
+        if (self.validate_context) |validate_member| {
+            const copy = try Set.new(null);
+            errdefer copy.decref();
+            try TypedSet.validateItems(copy, default_value, @ptrCast(validate_member), atom);
+            return @ptrCast(copy);
+        }
+        return default_value.newref();
+    }
+
     pub fn coerce(self: *MemberBase, atom: *Atom, _: *Object, value: *Object) py.Error!*Object {
         if (self.validate_context) |validate_member| {
             if (TypedSet.check(value)) {
@@ -269,6 +504,10 @@ pub const SetMember = Member("Set", 14, struct {
             }
             return @ptrCast(try TypedSet.newWithContext(value, @ptrCast(validate_member), atom));
         } else if (Set.checkAny(value)) {
+            if (TypedSet.check(value) and @as(*TypedSet, @ptrCast(value)).isView()) {
+                // A default view belongs to the atom it was read from
+                return @ptrCast(try Set.copy(@ptrCast(value)));
+            }
             return value.newref(); // untyped sets do not need coereced
         }
         try self.validateFail(atom, value, "set");
@@ -283,6 +522,13 @@ pub const all_members = .{
 pub fn initModule(mod: *py.Module) !void {
     set_update_method = @ptrCast(try Object.getAttrString(@ptrCast(&py.c.PySet_Type), "update"));
     errdefer py.clear(&set_update_method);
+    inline for (forwarded_methods, 0..) |name, i| {
+        set_methods[i] = try Object.getAttrString(@ptrCast(&py.c.PySet_Type), name);
+        errdefer py.clear(&set_methods[i]);
+    }
+
+    try ops.init();
+    errdefer ops.deinit();
 
     try TypedSet.initType();
     errdefer TypedSet.deinitType();
@@ -301,5 +547,9 @@ pub fn deinitModule(mod: *py.Module) void {
         T.deinitType();
     }
     TypedSet.deinitType();
+    ops.deinit();
+    for (&set_methods) |*method| {
+        py.clear(method);
+    }
     py.clear(&set_update_method);
 }
@@ -93,13 +93,17 @@ pub const TypedMember = Member("Typed", 16, struct {
         return .no;
     }
 
+    pub inline fn exactType(self: *MemberBase) ?*Type {
+        return @ptrCast(self.validate_context);
+    }
+
     pub inline fn validate(self: *MemberBase, atom: *Atom, _: *Object, new: *Object) py.Error!*Object {
         if (self.info.optional and new.isNone()) {
             return new.newref(); // Ok
         }
         if (self.validate_context) |context| {
             const kind: *Type = @ptrCast(context);
-            if (!new.typeCheck(kind)) {
+            if (!self.typeCheckCached(new, kind)) {
                 try self.validateFail(atom, new, kind.className());
                 unreachable;
             }
@@ -222,7 +226,7 @@ pub const ForwardTypedMember = Member("ForwardTyped", 17, struct {
         }
         if (self.validate_context) |context| {
             const kind: *Type = @ptrCast(context);
-            if (!new.typeCheck(kind)) {
+            if (!self.typeCheckCached(new, kind)) {
                 try self.validateFail(atom, new, kind.className());
                 unreachable;
             }
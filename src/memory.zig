@@ -0,0 +1,118 @@
+const py = @import("py");
+const std = @import("std");
+const Object = py.Object;
+const Type = py.Type;
+const Str = py.Str;
+const Int = py.Int;
+const Dict = py.Dict;
+const List = py.List;
+
+const Atom = @import("atom.zig").Atom;
+const AtomMeta = @import("atom_meta.zig").AtomMeta;
+const property = @import("members/property.zig");
+
+// Memory used by an atom class and its live instances. Everything is read
+// from the class and its pool manager so no instances need to be visited.
+pub const ClassMemory = struct {
+    instances: usize = 0,
+    instance_bytes: usize = 0,
+    free_instances: usize = 0,
+    free_instance_bytes: usize = 0,
+    slot_count: usize = 0,
+    static_slots: usize = 0,
+    static_bits_used: usize = 0,
+    static_bits_allocated: usize = 0,
+    observer_pools: usize = 0,
+    observer_pool_bytes: usize = 0,
+    pool_manager_bytes: usize = 0,
+    pool_chunks: usize = 0,
+    pool_free_slots: usize = 0,
+    atomrefs: usize = 0,
+    cached_properties: usize = 0,
+    cached_property_bytes: usize = 0,
+
+    pub fn of(cls: *AtomMeta) !ClassMemory {
+        const basicsize: usize = @intCast(cls.base.impl.ht_type.tp_basicsize);
+        var self = ClassMemory{
+            .instances = cls.live_count,
+            .instance_bytes = cls.live_count * basicsize,
+            .free_instances = cls.free_count,
+            .free_instance_bytes = cls.free_count * basicsize,
+            .slot_count = cls.info.slot_count,
+        };
+        if (cls.atom_members) |members| {
+            var static_slots = std.DynamicBitSetUnmanaged.initEmpty(py.allocator, cls.info.slot_count) catch return py.memoryError();
+            defer static_slots.deinit(py.allocator);
+            for (members.items) |member| {
+                if (member.info.storage_mode == .static and member.info.index < cls.info.slot_count) {
+                    static_slots.set(member.info.index);
+                    // The value bits plus the bit used for null
+                    self.static_bits_used += @as(usize, member.info.width) + 2;
+                }
+            }
+            self.static_slots = static_slots.count();
+        }
+        self.static_bits_allocated = self.static_slots * @bitSizeOf(usize);
+        if (cls.pool_manager) |mgr| {
+            self.observer_pools = mgr.pools.items.len - mgr.free_slots.items.len;
+            self.observer_pool_bytes = mgr.poolsSizeof();
+            self.pool_manager_bytes = mgr.sizeof();
+            self.pool_chunks = mgr.chunkCount();
+            self.pool_free_slots = mgr.free_slots.items.len;
+            self.atomrefs = mgr.refCount();
+        }
+        const usage = property.cacheUsage(@ptrCast(cls));
+        self.cached_properties = usage.count;
+        self.cached_property_bytes = usage.size;
+        return self;
+    }
+};
+
+// Returns new reference to a dict of the memory used by the class
+pub fn classReport(cls: *AtomMeta) !*Dict {
+    const usage = try ClassMemory.of(cls);
+    const dict = try Dict.new();
+    errdefer dict.decref();
+    inline for (@typeInfo(ClassMemory).@"struct".fields) |field| {
+        const key = try Str.fromSlice(field.name);
+        defer key.decref();
+        const value = try Int.new(@field(usage, field.name));
+        defer value.decref();
+        try dict.set(@ptrCast(key), @ptrCast(value));
+    }
+    return dict;
+}
+
+// Add the report of the class and all of its subclasses
+fn addReports(result: *Dict, cls: *AtomMeta) !void {
+    if (result.get(@ptrCast(cls)) == null) {
+        const report = try classReport(cls);
+        defer report.decref();
+        try result.set(@ptrCast(cls), @ptrCast(report));
+    }
+    const method = try Object.getAttrString(@ptrCast(cls), "__subclasses__");
+    defer method.decref();
+    const subclasses: *List = @ptrCast(try method.callArgs(.{}));
+    defer subclasses.decref();
+    var pos: usize = 0;
+    while (subclasses.next(&pos)) |item| {
+        if (AtomMeta.check(item)) {
+            try addReports(result, @ptrCast(item));
+        }
+    }
+}
+
+// Returns new reference to a dict of {cls: report} for every atom class
+pub fn fullReport() !*Dict {
+    const result = try Dict.new();
+    errdefer result.decref();
+    try addReports(result, @ptrCast(Atom.TypeObject.?));
+    return result;
+}
+
+// --------------------------------------------------------------------------
+// Module functions
+// --------------------------------------------------------------------------
+pub fn memory_report(_: *py.Module, _: ?*Object) ?*Object {
+    return @ptrCast(fullReport() catch null);
+}
@@ -4,21 +4,26 @@ const Object = py.Object;
 const Type = py.Type;
 const Dict = py.Dict;
 const Tuple = py.Tuple;
-const Int = py.Int;
 const Method = py.Method;
-const Function = py.Function;
 const package_name = @import("api.zig").package_name;
-const Atom = @import("atom.zig").Atom;
-
+const atom_mod = @import("atom.zig");
+const Atom = atom_mod.Atom;
+const AtomRef = atom_mod.AtomRef;
+
+// A bound method that does not keep its owner alive. It holds the function
+// and a weak reference to the owner (an atomref for atoms or a weakref
+// for other objects). It evaluates false once the owner is gone so observer
+// pools drop it the next time they notify.
 pub fn MethodWrapper(comptime T: type) type {
+    const Ref = if (T == Atom) AtomRef else Object;
     return extern struct {
         const Self = @This();
         // Reference to the type. This is set in ready
         pub var TypeObject: ?*Type = null;
         base: Object,
-        ref: *T,
-        func: *Function,
-        hash: isize,
+        ref: ?*Ref = null,
+        func: ?*Object = null,
+        hash_value: isize = 0,
 
         pub usingnamespace py.ObjectProtocol(Self);
 
@@ -27,32 +32,56 @@ pub fn MethodWrapper(comptime T: type) type {
             return obj.typeCheck(TypeObject.?);
         }
 
-        pub fn new(cls: *Type, args: *Tuple, _: ?*Dict) ?*Self {
-            var method: *Method = undefined;
-            args.parseTyped(.{&method}) catch return null;
-            const self: *Self = @ptrCast(cls.genericNew(null, null) catch return null);
-            const owner = method.getSelf() catch return null;
-            if (!T.check(owner)) {
-                return py.typeErrorObject(null, "MethodWrapper owner is not the correct type", .{});
+        // Create a wrapper for a bound method of the given owner.
+        // The hash matches the bound method so the method can be used
+        // to find the wrapper in an observer pool.
+        pub fn fromMethod(method: *Object) !*Self {
+            const owner: *Object = @ptrCast(py.c.PyMethod_Self(@ptrCast(method)) orelse return error.PyError);
+            const func: *Object = @ptrCast(py.c.PyMethod_Function(@ptrCast(method)) orelse return error.PyError);
+            const self: *Self = @ptrCast(try TypeObject.?.genericNew(null, null));
+            errdefer self.decref();
+            self.hash_value = try method.hash();
+            self.func = func.newref();
+            if (comptime T == Atom) {
+                self.ref = @ptrCast(try AtomRef.TypeObject.?.callArgs(.{owner}));
+            } else {
+                self.ref = @ptrCast(py.c.PyWeakref_NewRef(@ptrCast(owner), null) orelse return error.PyError);
             }
             return self;
         }
 
-        // Resolve the reference
-        // should return a borrowed reference
-        pub fn resolve(self: *Self) !*Object {
-            switch (T) {
-                Atom => self.ref.data(),
-                Object => @ptrCast(py.c.PyWeakref_GET_OBJECT(self.ref)),
-                else => @compileError("MethodWrapper resolve not implemented for " ++ @typeName(T)),
+        // Resolve the owner. Returns a borrowed reference or null if it was destroyed
+        pub inline fn resolve(self: *Self) ?*Object {
+            const ref = self.ref orelse return null;
+            if (comptime T == Atom) {
+                return @ptrCast(ref.atom);
             }
+            const owner: *Object = @ptrCast(py.c.PyWeakref_GetObject(@ptrCast(ref)) orelse return null);
+            return if (owner.isNone()) null else owner;
+        }
+
+        // Call the function with the resolved owner as the first argument
+        // Returns new reference
+        pub inline fn callWithOwner(self: *Self, owner: *Object, args: anytype) !*Object {
+            // The owner is borrowed so keep it alive during the call
+            owner.incref();
+            defer owner.decref();
+            var argv: [1 + args.len]*Object = undefined;
+            argv[0] = owner;
+            inline for (args, 1..) |arg, i| {
+                argv[i] = @ptrCast(arg);
+            }
+            if (py.c.PyObject_Vectorcall(@ptrCast(self.func.?), @ptrCast(&argv), argv.len, null)) |r| {
+                return @ptrCast(r);
+            }
+            return error.PyError;
         }
 
         pub fn call(self: *Self, args: *Tuple, kwargs: ?*Dict) ?*Object {
             if (self.resolve()) |owner| {
-                const meth = Method.new(self.func, owner) catch return null;
-                defer meth.decref();
-                return meth.call(args, kwargs) catch null;
+                const new_args = Tuple.prepend(args, owner) catch return null;
+                defer new_args.decref();
+                return self.func.?.call(new_args, kwargs) catch null;
             }
             return py.returnNone();
         }
@@ -61,19 +90,29 @@ pub fn MethodWrapper(comptime T: type) type {
         // Methods
         // --------------------------------------------------------------------------
         pub fn __bool__(self: *Self) c_int {
-            return @intFromBool(self.resolve());
+            return @intFromBool(self.resolve() != null);
         }
 
         pub fn __hash__(self: *Self) isize {
-            return self.hash;
+            return self.hash_value;
         }
 
-        pub fn richcompare(self: *Self, other: *T, op: c_int) ?*Object {
-            if (op == py.c.Py_EQ) {
-                if (!other.typeCheckSelf()) {
-                    return py.returnFalse(); // Not the assumed type
-                }
-                return py.returnBool(self.ref == other.ref and self.func == other.func);
+        // Equal to another wrapper or bound method of the same function and owner
+        pub fn richcompare(self: *Self, other: *Object, op: c_int) ?*Object {
+            if (op == py.c.Py_EQ or op == py.c.Py_NE) {
+                const owner = self.resolve();
+                const same = blk: {
+                    if (Self.check(other)) {
+                        const wrapper: *Self = @ptrCast(other);
+                        break :blk owner != null and owner == wrapper.resolve() and self.func == wrapper.func;
+                    } else if (Method.check(other)) {
+                        const other_owner: ?*Object = @ptrCast(py.c.PyMethod_Self(@ptrCast(other)));
+                        const other_func: ?*Object = @ptrCast(py.c.PyMethod_Function(@ptrCast(other)));
+                        break :blk owner != null and owner == other_owner and self.func == other_func;
+                    }
+                    return py.returnNotImplemented();
+                };
+                return py.returnBool(same == (op == py.c.Py_EQ));
             }
             return py.returnNotImplemented();
         }
@@ -92,24 +131,24 @@ pub fn MethodWrapper(comptime T: type) type {
             return 0;
         }
 
+        // The ref is weak so only the function is visited
         pub fn traverse(self: *Self, visit: py.visitproc, arg: ?*anyopaque) c_int {
-            return py.visitAll(.{ self.ref, self.func }, visit, arg);
+            return py.visitAll(.{self.func}, visit, arg);
         }
 
         const type_slots = [_]py.TypeSlot{
-            .{ .slot = py.c.Py_tp_new, .pfunc = @constCast(@ptrCast(&new)) },
             .{ .slot = py.c.Py_tp_dealloc, .pfunc = @constCast(@ptrCast(&dealloc)) },
             .{ .slot = py.c.Py_tp_traverse, .pfunc = @constCast(@ptrCast(&traverse)) },
             .{ .slot = py.c.Py_tp_clear, .pfunc = @constCast(@ptrCast(&clear)) },
             .{ .slot = py.c.Py_tp_call, .pfunc = @constCast(@ptrCast(&call)) },
             .{ .slot = py.c.Py_tp_richcompare, .pfunc = @constCast(@ptrCast(&richcompare)) },
+            .{ .slot = py.c.Py_tp_hash, .pfunc = @constCast(@ptrCast(&__hash__)) },
             .{ .slot = py.c.Py_nb_bool, .pfunc = @constCast(@ptrCast(&__bool__)) },
-            .{ .slot = py.c.Py_nb_hash, .pfunc = @constCast(@ptrCast(&__hash__)) },
             .{}, // sentinel
         };
 
         pub var TypeSpec = py.TypeSpec{
-            .name = package_name ++ "." ++ @typeName(T) ++ "MethodWrapper",
+            .name = package_name ++ "." ++ (if (T == Atom) "Atom" else "") ++ "WeakMethod",
             .basicsize = @sizeOf(Self),
             .flags = (py.c.Py_TPFLAGS_DEFAULT | py.c.Py_TPFLAGS_HAVE_GC),
             .slots = @constCast(@ptrCast(&type_slots)),
@@ -126,7 +165,36 @@ pub fn MethodWrapper(comptime T: type) type {
     };
 }
 
-const all_types = .{ MethodWrapper(Object), MethodWrapper(Atom) };
+pub const AtomMethodWrapper = MethodWrapper(Atom);
+pub const ObjectMethodWrapper = MethodWrapper(Object);
+
+// Create a weak wrapper for a bound method. Atoms are referenced with an
+// atomref since they do not support weakrefs.
+// Returns new reference
+pub fn newWeakMethod(method: *Object) !*Object {
+    if (!Method.check(method)) {
+        try py.typeError("Only bound methods can be observed weakly", .{});
+        unreachable;
+    }
+    const owner: *Object = @ptrCast(py.c.PyMethod_Self(@ptrCast(method)) orelse return error.PyError);
+    if (Atom.check(owner)) {
+        return @ptrCast(try AtomMethodWrapper.fromMethod(method));
+    }
+    return @ptrCast(try ObjectMethodWrapper.fromMethod(method));
+}
+
+// Check if the observer is a bound method of an atom that is observed weakly by default
+pub fn isAtomMethod(observer: *Object) bool {
+    if (!Method.check(observer)) {
+        return false;
+    }
+    if (py.c.PyMethod_Self(@ptrCast(observer))) |owner| {
+        return Atom.check(@ptrCast(owner));
+    }
+    return false;
+}
+
+const all_types = .{ AtomMethodWrapper, ObjectMethodWrapper };
 
 pub fn initModule(_: *py.Module) !void {
     inline for (all_types) |T| {
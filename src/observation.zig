@@ -7,10 +7,12 @@ const Tuple = py.Tuple;
 const Int = py.Int;
 const Str = py.Str;
 const Function = py.Function;
-const Method = py.Method;
 const package_name = @import("api.zig").package_name;
 const Atom = @import("atom.zig").Atom;
+const AtomRef = @import("atom.zig").AtomRef;
+const AtomMeta = @import("atom_meta.zig").AtomMeta;
 const ChangeType = @import("observer_pool.zig").ChangeType;
+const default_change_types = @import("observer_pool.zig").default_change_types;
 
 var change_types_str: ?*Str = null;
 var change_str: ?*Str = null;
@@ -21,6 +23,7 @@ var delete_str: ?*Str = null;
 var value_str: ?*Str = null;
 var oldvalue_str: ?*Str = null;
 var object_str: ?*Str = null;
+var name_str: ?*Str = null;
 
 // Use for @observe("foo")
 pub const ObserveHandler = extern struct {
@@ -45,7 +48,7 @@ pub const ObserveHandler = extern struct {
         errdefer self.decref();
         self.topics = try Tuple.packNewrefs(.{topic});
         self.func = func.newref();
-        self.change_types = @intFromEnum(ChangeType.ANY);
+        self.change_types = default_change_types;
         return self;
     }
 
@@ -59,8 +62,11 @@ pub const ObserveHandler = extern struct {
 
             const data = name.data();
             if (std.mem.indexOf(u8, data, ".")) |j| {
-                if (j <= 1 or j + 1 >= data.len or std.mem.count(u8, data, ".") > 1) {
-                    return py.typeErrorObject(-1, "cannot observe '{s}', only a single extension with non-empty values is supported", .{data});
+                if (j == 0 or std.mem.indexOf(u8, data, "..") != null or data[data.len - 1] == '.') {
+                    return py.typeErrorObject(-1, "cannot observe '{s}', attribute names in the path must not be empty", .{data});
+                }
+                if (std.mem.count(u8, data, ".") > max_path_depth) {
+                    return py.typeErrorObject(-1, "cannot observe '{s}', paths are limited to {} attributes", .{ data, max_path_depth });
                 }
             }
         }
@@ -77,7 +83,7 @@ pub const ObserveHandler = extern struct {
                 return py.typeErrorObject(-1, "observe takes one kwarg 'change_types'", .{});
             }
         } else {
-            self.change_types = 0xff;
+            self.change_types = default_change_types;
         }
 
         return 0;
@@ -136,14 +142,47 @@ pub const ObserveHandler = extern struct {
     }
 };
 
-// A callable object which just forwards calls a function using the owner
-// as self
-pub const StaticObserver = extern struct {
+// Maximum number of attributes after the member in an extended observer path
+pub const max_path_depth = 8;
+
+// Changes that rebind an extended observer path
+pub const rebind_change_types: u8 = @intFromEnum(ChangeType.CREATE) | @intFromEnum(ChangeType.UPDATE) | @intFromEnum(ChangeType.DELETE);
+
+// Split the attributes of an extended path such as "b.c" into a tuple of interned names
+// Returns new reference
+fn splitPath(path: []const u8) !*Tuple {
+    const n = std.mem.count(u8, path, ".") + 1;
+    if (n > max_path_depth) {
+        try py.valueError("cannot observe '{s}', paths are limited to {} attributes", .{ path, max_path_depth });
+    }
+    const result = try Tuple.new(n);
+    errdefer result.decref();
+    var it = std.mem.splitScalar(u8, path, '.');
+    var i: usize = 0;
+    while (it.next()) |part| : (i += 1) {
+        if (part.len == 0) {
+            try py.valueError("cannot observe '{s}', path has an empty attribute", .{path});
+        }
+        var name = try Str.fromSlice(part);
+        Str.internInPlace(@ptrCast(&name));
+        try result.set(i, @ptrCast(name));
+    }
+    return result;
+}
+
+// Use for @observe("foo.bar") or @observe("foo.bar.baz")
+// This is added to the class for the first member in the path. When that
+// member changes it binds an ExtendedBinding for the owner to the new value.
+pub const ExtendedObserver = extern struct {
     const Self = @This();
     // Reference to the type. This is set in ready
     pub var TypeObject: ?*Type = null;
     base: Object,
-    func: ?*Function,
+    func: ?*Object,
+    // Interned names of the attributes after the member
+    path: ?*Tuple,
+    // Changes of the last attribute passed to func
+    change_types: u8,
 
     pub usingnamespace py.ObjectProtocol(Self);
 
@@ -152,21 +191,73 @@ pub const StaticObserver = extern struct {
         return obj.typeCheck(TypeObject.?);
     }
 
-    pub fn create(_func: *Function) !*StaticObserver {
+    pub fn new(_: *Type, args: *Tuple, _: ?*Dict) ?*Object {
+        var _func: *Object = undefined;
+        var _path: *Str = undefined;
+        args.parseTyped(.{ &_func, &_path }) catch return null;
+        return @ptrCast(create(_func, _path, default_change_types) catch null);
+    }
+
+    // Create an observer that calls func(owner, change) when the attribute
+    // at the end of the path changes.
+    pub fn create(_func: *Object, _path: *Str, _change_types: u8) !*ExtendedObserver {
+        const path = try splitPath(_path.data());
+        errdefer path.decref();
         const self: *Self = @ptrCast(try TypeObject.?.genericNew(null, null));
         self.func = _func.newref();
-        return @ptrCast(self);
+        self.path = path;
+        self.change_types = _change_types;
+        return self;
+    }
+
+    pub inline fn depth(self: *Self) usize {
+        return self.path.?.sizeUnchecked();
+    }
+
+    // Get the interned attribute name at the given depth
+    pub inline fn attr(self: *Self, i: usize) *Str {
+        return @ptrCast(self.path.?.getUnsafe(i).?);
     }
 
     pub fn call(self: *Self, args: *Tuple, _: ?*Dict) ?*Object {
         var change: *Dict = undefined;
         args.parseTyped(.{&change}) catch return null;
         const owner = change.getOrError(@ptrCast(object_str.?)) catch return null;
-        return self.func.?.callArgsUnchecked(.{ owner, change });
+        if (!Atom.check(owner)) {
+            return py.typeErrorObject(null, "extended observer expected an Atom but got '{s}'", .{owner.typeName()});
+        }
+        const values = (changedValues(change) catch return null) orelse return py.returnNone();
+        const key = ExtendedBinding.hashFor(@ptrCast(owner), self);
+
+        // Unbind the path from the old value. The binding is kept by the
+        // pools it was added to so find it there.
+        var binding: ?*ExtendedBinding = null;
+        defer if (binding) |b| b.decref();
+        if (Atom.check(values.old)) {
+            const atom: *Atom = @ptrCast(values.old);
+            if (atom.getDynamicObserver(self.attr(0), key) catch return null) |obj| {
+                if (ExtendedBinding.check(obj)) {
+                    binding = @ptrCast(obj.newref());
+                    binding.?.unbindFrom(0) catch return null;
+                }
+            }
+        }
+        if (Atom.check(values.new)) {
+            if (binding == null) {
+                binding = ExtendedBinding.create(@ptrCast(owner), self, key) catch return null;
+            }
+            binding.?.bindFrom(0, @ptrCast(values.new)) catch return null;
+        } else if (!values.new.isNone()) {
+            return py.typeErrorObject(null, "cannot attach observer '{s}' to non-Atom '{s}'", .{
+                self.attr(0).data(),
+                values.new.typeName(),
+            });
+        }
+        return py.returnNone();
     }
 
     pub fn __bool__(self: *Self) c_int {
-        return @intFromBool(self.func != null);
+        return @intFromBool(self.path != null and self.func != null);
     }
 
     // --------------------------------------------------------------------------
@@ -179,15 +270,16 @@ pub const StaticObserver = extern struct {
     }
 
     pub fn clear(self: *Self) c_int {
-        py.clearAll(.{&self.func});
+        py.clearAll(.{ &self.func, &self.path });
         return 0;
     }
 
     pub fn traverse(self: *Self, visit: py.visitproc, arg: ?*anyopaque) c_int {
-        return py.visitAll(.{self.func}, visit, arg);
+        return py.visitAll(.{ self.func, self.path }, visit, arg);
     }
 
     const type_slots = [_]py.TypeSlot{
+        .{ .slot = py.c.Py_tp_new, .pfunc = @constCast(@ptrCast(&new)) },
         .{ .slot = py.c.Py_tp_call, .pfunc = @constCast(@ptrCast(&call)) },
         .{ .slot = py.c.Py_tp_dealloc, .pfunc = @constCast(@ptrCast(&dealloc)) },
         .{ .slot = py.c.Py_tp_traverse, .pfunc = @constCast(@ptrCast(&traverse)) },
@@ -197,7 +289,7 @@ pub const StaticObserver = extern struct {
     };
 
     pub var TypeSpec = py.TypeSpec{
-        .name = package_name ++ ".StaticObserver",
+        .name = package_name ++ ".ExtendedObserver",
         .basicsize = @sizeOf(Self),
         .flags = (py.c.Py_TPFLAGS_DEFAULT | py.c.Py_TPFLAGS_HAVE_GC),
         .slots = @constCast(@ptrCast(&type_slots)),
@@ -213,15 +305,39 @@ pub const StaticObserver = extern struct {
     }
 };
 
-// Use for @observe("foo.bar")
-pub const ExtendedObserver = extern struct {
+const ChangedValues = struct {
+    old: *Object,
+    new: *Object,
+};
+
+// Get borrowed references to the old and new values of a change
+// or null if the change does not replace the value
+fn changedValues(change: *Dict) !?ChangedValues {
+    const change_type = try change.getOrError(@ptrCast(type_str.?));
+    if (change_type.is(create_str.?)) {
+        return .{ .old = py.None(), .new = try change.getOrError(@ptrCast(value_str.?)) };
+    } else if (change_type.is(update_str.?)) {
+        return .{ .old = try change.getOrError(@ptrCast(oldvalue_str.?)), .new = try change.getOrError(@ptrCast(value_str.?)) };
+    } else if (change_type.is(delete_str.?)) {
+        return .{ .old = try change.getOrError(@ptrCast(value_str.?)), .new = py.None() };
+    }
+    return null;
+}
+
+// The state of an extended observer path for one owner. The same binding is
+// added as a dynamic observer to every atom along the path and remembers
+// which atom it observes at each depth. When an attribute changes only the
+// part of the path after it is rebound.
+pub const ExtendedBinding = extern struct {
     const Self = @This();
     // Reference to the type. This is set in ready
     pub var TypeObject: ?*Type = null;
     base: Object,
-    func: ?*Function,
-    meth: ?*Method,
-    attr: ?*Str,
+    observer: ?*ExtendedObserver,
+    // The owner is not kept alive
+    ref: ?*AtomRef,
+    hash_value: isize,
+    targets: [max_path_depth]?*Atom,
 
     pub usingnamespace py.ObjectProtocol(Self);
 
@@ -230,69 +346,106 @@ pub const ExtendedObserver = extern struct {
         return obj.typeCheck(TypeObject.?);
     }
 
-    pub fn new(cls: *Type, args: *Tuple, _: ?*Dict) ?*Object {
-        var _func: *Function = undefined;
-        var _attr: *Str = undefined;
-        args.parseTyped(.{ &_func, &_attr }) catch return null;
-        const self: *Self = @ptrCast(cls.genericNew(null, null) catch return null);
-        self.func = _func.newref();
-        self.attr = _attr.newref();
-        return @ptrCast(self);
+    // Bindings are looked up by hash in the pools of the atoms they observe
+    pub fn hashFor(owner: *Atom, observer: *ExtendedObserver) isize {
+        const key = [2]usize{ @intFromPtr(owner), @intFromPtr(observer) };
+        const h: isize = @bitCast(@as(usize, @truncate(std.hash.Wyhash.hash(0, std.mem.asBytes(&key)))));
+        return if (h == -1) -2 else h;
     }
 
-    pub fn create(_func: *Function, _attr: *Str) !*ExtendedObserver {
+    pub fn create(owner: *Atom, observer: *ExtendedObserver, key: isize) !*Self {
         const self: *Self = @ptrCast(try TypeObject.?.genericNew(null, null));
-        self.func = _func.newref();
-        self.attr = _attr.newref();
-        return @ptrCast(self);
+        errdefer self.decref();
+        self.ref = @ptrCast(try AtomRef.TypeObject.?.callArgs(.{owner}));
+        self.observer = observer.newref();
+        self.hash_value = key;
+        return self;
     }
 
-    pub fn call(self: *Self, args: *Tuple, _: ?*Dict) ?*Object {
-        var change: *Dict = undefined;
-        args.parseTyped(.{&change}) catch return null;
+    // Observe the path starting at the given depth on value and continue
+    // with the attribute values that are already set.
+    pub fn bindFrom(self: *Self, start: usize, value: *Atom) !void {
+        const observer = self.observer.?;
+        const n = observer.depth();
+        var target = value;
+        var i = start;
+        while (true) : (i += 1) {
+            const topic = observer.attr(i);
+            const last = i + 1 == n;
+            py.xsetref(@ptrCast(&self.targets[i]), @ptrCast(target.newref()));
+            try target.addDynamicObserver(topic, @ptrCast(self), if (last) observer.change_types else rebind_change_types);
+            if (last) break;
+            // Read the slot directly so a default is not created
+            const meta: *AtomMeta = @ptrCast(target.typeref());
+            const member = meta.getMember(topic) orelse break;
+            if (member.info.storage_mode != .pointer) break;
+            const next = (try target.slotPtr(member)).* orelse break;
+            if (!Atom.check(next)) break;
+            target = @ptrCast(next);
+        }
+    }
 
-        const change_type = change.getOrError(@ptrCast(type_str.?)) catch return null;
-        const owner = change.getOrError(@ptrCast(object_str.?)) catch return null;
+    // Stop observing the path from the given depth
+    pub fn unbindFrom(self: *Self, start: usize) !void {
+        const observer = self.observer.?;
+        for (start..observer.depth()) |i| {
+            const target = self.targets[i] orelse break;
+            self.targets[i] = null;
+            defer target.decref();
+            try target.removeDynamicObserver(observer.attr(i), @ptrCast(self));
+        }
+    }
 
-        var oldowner: *Object = py.None();
-        var newowner: *Object = py.None();
-        //         var oldvalue: *Object = py.returnNone();
-        //         defer oldvalue.decref();
-        //         var newvalue: *Object = py.returnNone();
-        //         defer newvalue.decref();
-
-        if (change_type.is(create_str.?)) {
-            newowner = change.getOrError(@ptrCast(value_str.?)) catch return null;
-        } else if (change_type.is(update_str.?)) {
-            oldowner = change.getOrError(@ptrCast(oldvalue_str.?)) catch return null;
-            newowner = change.getOrError(@ptrCast(value_str.?)) catch return null;
-        } else if (change_type.is(delete_str.?)) {
-            oldowner = change.getOrError(@ptrCast(value_str.?)) catch return null;
-            //             if (Atom.check(owner)) {
-            //                 const atom: *Atom = @ptrCast(owner);
-            //             }
+    // Find the depth of the atom and attribute that changed
+    fn depthOf(self: *Self, change: *Dict) !?usize {
+        const obj = try change.getOrError(@ptrCast(object_str.?));
+        const name = try change.getOrError(@ptrCast(name_str.?));
+        const observer = self.observer.?;
+        for (0..observer.depth()) |i| {
+            if (self.targets[i] == @as(?*Atom, @ptrCast(obj)) and name.is(observer.attr(i))) {
+                return i;
+            }
         }
+        return null;
+    }
 
-        if (Atom.check(oldowner) and self.meth != null) {
-            const atom: *Atom = @ptrCast(oldowner);
-            atom.removeDynamicObserver(self.attr.?, @ptrCast(self.meth.?)) catch return null;
+    pub fn call(self: *Self, args: *Tuple, _: ?*Dict) ?*Object {
+        var change: *Dict = undefined;
+        args.parseTyped(.{&change}) catch return null;
+        const owner = (self.ref orelse return py.returnNone()).atom orelse return py.returnNone();
+        const observer = self.observer orelse return py.returnNone();
+        const i = (self.depthOf(change) catch return null) orelse return py.returnNone();
+        if (i + 1 == observer.depth()) {
+            var argv = [_]*Object{ @ptrCast(owner), @ptrCast(change) };
+            return @ptrCast(py.c.PyObject_Vectorcall(@ptrCast(observer.func.?), @ptrCast(&argv), argv.len, null));
         }
-        if (Atom.check(newowner)) {
-            const atom: *Atom = @ptrCast(newowner);
-            py.xsetref(@ptrCast(&self.meth), @ptrCast(Method.new(self.func.?, owner) catch return null));
-            atom.addDynamicObserver(self.attr.?, @ptrCast(self.meth.?), 0xff) catch return null;
-        } else if (!newowner.isNone()) {
-            return py.typeErrorObject(null, "cannot attach observer '{s}' to non-Atom '{s}", .{
-                self.attr.?.data(),
-                newowner.typeName(),
+
+        // Rebind the rest of the path. This may remove the last reference
+        // held by a pool so keep it alive until done.
+        self.incref();
+        defer self.decref();
+        const values = (changedValues(change) catch return null) orelse return py.returnNone();
+        self.unbindFrom(i + 1) catch return null;
+        if (Atom.check(values.new)) {
+            self.bindFrom(i + 1, @ptrCast(values.new)) catch return null;
+        } else if (!values.new.isNone()) {
+            return py.typeErrorObject(null, "cannot attach observer '{s}' to non-Atom '{s}'", .{
+                observer.attr(i + 1).data(),
+                values.new.typeName(),
             });
         }
-
         return py.returnNone();
     }
 
     pub fn __bool__(self: *Self) c_int {
-        return @intFromBool(self.attr != null and self.func != null);
+        if (self.ref) |ref| {
+            return @intFromBool(ref.atom != null);
+        }
+        return 0;
+    }
+
+    pub fn __hash__(self: *Self) isize {
+        return self.hash_value;
     }
 
     // --------------------------------------------------------------------------
@@ -305,17 +458,27 @@ pub const ExtendedObserver = extern struct {
     }
 
     pub fn clear(self: *Self) c_int {
-        py.clearAll(.{ &self.func, &self.meth, &self.attr });
+        py.clearAll(.{ &self.observer, &self.ref });
+        for (&self.targets) |*target| {
+            py.clear(target);
+        }
         return 0;
     }
 
     pub fn traverse(self: *Self, visit: py.visitproc, arg: ?*anyopaque) c_int {
-        return py.visitAll(.{ self.func, self.meth, self.attr }, visit, arg);
+        for (self.targets) |target| {
+            if (target) |t| {
+                const r = py.visit(t, visit, arg);
+                if (r != 0)
+                    return r;
+            }
+        }
+        return py.visitAll(.{self.observer}, visit, arg);
     }
 
     const type_slots = [_]py.TypeSlot{
-        .{ .slot = py.c.Py_tp_new, .pfunc = @constCast(@ptrCast(&new)) },
         .{ .slot = py.c.Py_tp_call, .pfunc = @constCast(@ptrCast(&call)) },
+        .{ .slot = py.c.Py_tp_hash, .pfunc = @constCast(@ptrCast(&__hash__)) },
         .{ .slot = py.c.Py_tp_dealloc, .pfunc = @constCast(@ptrCast(&dealloc)) },
         .{ .slot = py.c.Py_tp_traverse, .pfunc = @constCast(@ptrCast(&traverse)) },
         .{ .slot = py.c.Py_tp_clear, .pfunc = @constCast(@ptrCast(&clear)) },
@@ -324,7 +487,7 @@ pub const ExtendedObserver = extern struct {
     };
 
     pub var TypeSpec = py.TypeSpec{
-        .name = package_name ++ ".ExtendedObserver",
+        .name = package_name ++ ".ExtendedBinding",
         .basicsize = @sizeOf(Self),
         .flags = (py.c.Py_TPFLAGS_DEFAULT | py.c.Py_TPFLAGS_HAVE_GC),
         .slots = @constCast(@ptrCast(&type_slots)),
@@ -340,9 +503,9 @@ pub const ExtendedObserver = extern struct {
     }
 };
 
-const all_types = .{ ObserveHandler, StaticObserver, ExtendedObserver };
+const all_types = .{ ObserveHandler, ExtendedObserver, ExtendedBinding };
 
-const all_strings = .{ "change_types", "change", "create", "update", "delete", "oldvalue", "value", "object", "type" };
+const all_strings = .{ "change_types", "change", "create", "update", "delete", "oldvalue", "value", "object", "type", "name" };
 
 pub fn initModule(mod: *py.Module) !void {
     inline for (all_strings) |str| {
@@ -358,7 +521,6 @@ pub fn initModule(mod: *py.Module) !void {
     try mod.addObjectRef("observe", @ptrCast(ObserveHandler.TypeObject.?));
     try mod.addObjectRef("ObserveHandler", @ptrCast(ObserveHandler.TypeObject.?));
     try mod.addObjectRef("ExtendedObserver", @ptrCast(ExtendedObserver.TypeObject.?));
-    try mod.addObjectRef("StaticObserver", @ptrCast(StaticObserver.TypeObject.?));
 }
 
 pub fn deinitModule(_: *py.Module) void {
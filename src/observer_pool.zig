@@ -7,6 +7,10 @@ const Type = py.Type;
 const Object = py.Object;
 
 const Atom = @import("atom.zig").Atom;
+const method_wrapper = @import("method_wrapper.zig");
+const tracer = @import("tracer.zig");
+const stats = @import("stats.zig");
+const AtomMethodWrapper = method_wrapper.AtomMethodWrapper;
 
 //
 comptime {
@@ -23,6 +27,10 @@ pub const ChangeType = enum(u8) {
     ANY = 0xFF,
 };
 
+// Change types used when an observer is added without any. CONTAINER changes
+// are only sent to observers that explicitly subscribe to them.
+pub const default_change_types: u8 = @intFromEnum(ChangeType.ANY) & ~@intFromEnum(ChangeType.CONTAINER);
+
 pub const ObserverInfo = struct {
     observer: *Object,
     change_types: u8,
@@ -40,12 +48,171 @@ pub const ObserverInfo = struct {
     }
 };
 
+// A function called with (atom, change) when a member changes
+pub const StaticHandler = struct {
+    func: *Object,
+    change_types: u8,
+};
+
+// The observers of a member that are known when the class is created.
+// They are called directly without looking up the topic in a pool.
+pub const StaticHandlers = struct {
+    const Self = @This();
+    items: std.ArrayListUnmanaged(StaticHandler) = .{},
+    // Union of the change types of all the handlers
+    change_types: u8 = 0,
+    // Depth of the notifications in progress. While non-zero handlers that
+    // are removed are only disabled so the items being iterated do not move.
+    dispatching: u32 = 0,
+    // Whether disabled handlers are waiting to be removed
+    has_removed: bool = false,
+
+    pub fn new(allocator: std.mem.Allocator) !*Self {
+        const self = allocator.create(Self) catch return py.memoryError();
+        self.* = .{};
+        return self;
+    }
+
+    pub inline fn enabled(self: Self, change_types: u8) bool {
+        return self.change_types & change_types != 0;
+    }
+
+    pub fn contains(self: Self, func: *Object, change_types: u8) bool {
+        for (self.items.items) |item| {
+            if (item.func == func and item.change_types & change_types != 0) {
+                return true;
+            }
+        }
+        return false;
+    }
+
+    // Add a handler unless the function is already present
+    pub fn add(self: *Self, allocator: std.mem.Allocator, func: *Object, change_types: u8) !void {
+        for (self.items.items) |*item| {
+            if (item.func == func) {
+                item.change_types |= change_types;
+                self.change_types |= change_types;
+                return;
+            }
+        }
+        self.items.append(allocator, .{ .func = func.newref(), .change_types = change_types }) catch return py.memoryError();
+        self.change_types |= change_types;
+    }
+
+    // Remove the handler with the given function. Returns whether it was found.
+    pub fn remove(self: *Self, allocator: std.mem.Allocator, func: *Object) bool {
+        for (self.items.items, 0..) |*item, i| {
+            if (item.func != func or item.change_types == 0) {
+                continue;
+            }
+            if (self.dispatching > 0) {
+                // Removed once the notifications finish
+                item.change_types = 0;
+                self.has_removed = true;
+            } else {
+                const removed = self.items.orderedRemove(i);
+                removed.func.decref();
+                if (self.items.items.len == 0) {
+                    self.items.clearAndFree(allocator);
+                }
+            }
+            self.updateChangeTypes();
+            return true;
+        }
+        return false;
+    }
+
+    fn updateChangeTypes(self: *Self) void {
+        self.change_types = 0;
+        for (self.items.items) |item| {
+            self.change_types |= item.change_types;
+        }
+    }
+
+    // Drop the handlers disabled during a notification
+    fn purge(self: *Self) void {
+        var n: usize = 0;
+        for (self.items.items) |item| {
+            if (item.change_types == 0) {
+                item.func.decref();
+            } else {
+                self.items.items[n] = item;
+                n += 1;
+            }
+        }
+        self.items.shrinkRetainingCapacity(n);
+        self.has_removed = false;
+    }
+
+    // Append the handlers of another member
+    pub fn extend(self: *Self, allocator: std.mem.Allocator, other: Self) !void {
+        self.items.ensureUnusedCapacity(allocator, other.items.items.len) catch return py.memoryError();
+        for (other.items.items) |item| {
+            if (item.change_types != 0) {
+                try self.add(allocator, item.func, item.change_types);
+            }
+        }
+    }
+
+    // Call each enabled handler with the atom followed by the args.
+    // Each call is counted in calls if given. Handlers may add or remove
+    // handlers, the ones added are not called by this notification.
+    pub fn notify(self: *Self, atom: *Atom, args: anytype, change_types: u8, calls: stats.CallCounter) !void {
+        var argv: [1 + args.len]*Object = undefined;
+        argv[0] = @ptrCast(atom);
+        inline for (args, 1..) |arg, i| {
+            argv[i] = @ptrCast(arg);
+        }
+        self.dispatching += 1;
+        defer {
+            self.dispatching -= 1;
+            if (self.dispatching == 0 and self.has_removed) {
+                self.purge();
+            }
+        }
+        // Appending may reallocate the items so they are indexed on each step
+        const n = self.items.items.len;
+        for (0..n) |i| {
+            const item = self.items.items[i];
+            if (item.change_types & change_types != 0) {
+                stats.countCall(calls);
+                const span = tracer.beginObserver();
+                defer tracer.endObserver(span, item.func, change_types);
+                const result: *Object = @ptrCast(py.c.PyObject_Vectorcall(@ptrCast(item.func), @ptrCast(&argv), argv.len, null) orelse return error.PyError);
+                result.decref();
+            }
+        }
+    }
+
+    pub fn traverse(self: Self, func: py.visitproc, arg: ?*anyopaque) c_int {
+        for (self.items.items) |item| {
+            const r = py.visit(item.func, func, arg);
+            if (r != 0)
+                return r;
+        }
+        return 0;
+    }
+
+    pub fn sizeof(self: Self) usize {
+        return @sizeOf(Self) + @sizeOf(StaticHandler) * self.items.capacity;
+    }
+
+    pub fn deinit(self: *Self, allocator: std.mem.Allocator) void {
+        for (self.items.items) |item| {
+            item.func.decref();
+        }
+        self.items.deinit(allocator);
+        allocator.destroy(self);
+    }
+};
+
 pub const PoolGuard = struct {
     const Self = @This();
 
     pub const Mod = union(enum) {
         add_observer: struct { pool: *ObserverPool, topic: *Str, observer: *Object, change_types: u8 },
         remove_observer: struct { pool: *ObserverPool, topic: *Str, observer: *Object },
+        remove_observer_all: struct { pool: *ObserverPool, observer: *Object },
         remove_topic: struct { pool: *ObserverPool, topic: *Str },
         clear: *ObserverPool,
         deinit: *ObserverPool,
@@ -82,6 +249,10 @@ pub const PoolGuard = struct {
                     defer data.topic.decref();
                     try data.pool.addObserver(allocator, data.topic, data.observer, data.change_types);
                 },
+                .remove_observer_all => |data| {
+                    defer data.observer.decref();
+                    try data.pool.removeObserverFromAllTopics(allocator, data.observer);
+                },
                 .remove_topic => |data| {
                     defer data.topic.decref();
                     try data.pool.removeTopic(allocator, data.topic);
@@ -95,7 +266,7 @@ pub const PoolGuard = struct {
                     try pool.clear(allocator);
                 },
                 .release => |data| {
-                    try data.mgr.release(allocator, data.index);
+                    try data.mgr.releaseIndex(allocator, data.index);
                 },
                 .deinit => |pool| {
                     if (pool.guard) |guard| {
@@ -136,17 +307,14 @@ pub const ObserverPool = struct {
     // Mapping of member index to ObserverMap
     pub const TopicMap = std.HashMapUnmanaged(isize, ObserverMap, HashMapContext, 80);
 
+    // Topic capacity kept when a pool is cleared. Larger maps are freed.
+    pub const max_retained_capacity = 16;
+
     // Map of member index to observer
     // modifcation of the map invalidates
     map: TopicMap = .{},
     guard: ?*PoolGuard = null,
 
-    pub fn new(allocator: std.mem.Allocator) py.Error!*ObserverPool {
-        const pool = allocator.create(ObserverPool) catch return py.memoryError();
-        pool.* = .{};
-        return pool;
-    }
-
     pub fn hasTopic(self: ObserverPool, topic: *Str) py.Error!bool {
         return self.map.contains(try topic.hash());
     }
@@ -175,6 +343,16 @@ pub const ObserverPool = struct {
         return false;
     }
 
+    // Get a borrowed reference to the observer with the given hash
+    pub fn getObserver(self: ObserverPool, topic: *Str, observer_hash: isize) py.Error!?*Object {
+        if (self.map.getPtr(try topic.hash())) |observer_map| {
+            if (observer_map.getPtr(observer_hash)) |info| {
+                return info.observer;
+            }
+        }
+        return null;
+    }
+
     // Add all observers
     pub fn addAllFromPool(self: *ObserverPool, allocator: std.mem.Allocator, other: *ObserverPool) py.Error!void {
         if (self.guard != null or other.guard != null) {
@@ -238,6 +416,24 @@ pub const ObserverPool = struct {
         }
     }
 
+    // Remove an observer from every topic in the pool. Topics left empty are kept
+    // since this is used before the same observer is added again.
+    // If the pool is guarded by a modification guard this may require allocation.
+    pub fn removeObserverFromAllTopics(self: *ObserverPool, allocator: std.mem.Allocator, observer: *Object) py.Error!void {
+        if (self.guard) |guard| {
+            guard.mods.append(.{ .remove_observer_all = .{ .pool = self, .observer = observer.newref() } }) catch return py.memoryError();
+            return;
+        }
+        _ = allocator; // Nothing is freed
+        const observer_hash = try observer.hash();
+        var topics = self.map.valueIterator();
+        while (topics.next()) |observer_map| {
+            if (observer_map.fetchRemove(observer_hash)) |entry| {
+                entry.value.observer.decref();
+            }
+        }
+    }
+
     // Remove all observers for a given topic observer from the pool.
     // If the pool is guarded by a modification guard this may require allocation.
     pub fn removeTopic(self: *ObserverPool, allocator: std.mem.Allocator, topic: *Str) py.Error!void {
@@ -256,7 +452,8 @@ pub const ObserverPool = struct {
         }
     }
 
-    pub fn notify(self: *ObserverPool, allocator: std.mem.Allocator, topic: *Str, args: anytype, change_types: u8) py.Error!void {
+    // Call the live observers of the topic. Each call is counted in calls if given.
+    pub fn notify(self: *ObserverPool, allocator: std.mem.Allocator, topic: *Str, args: anytype, change_types: u8, calls: stats.CallCounter) py.Error!void {
         var ok: bool = true;
         if (self.map.getPtr(try topic.hash())) |observer_map| {
             var guard = PoolGuard.init(self, allocator);
@@ -268,18 +465,35 @@ pub const ObserverPool = struct {
 
             var items = observer_map.valueIterator();
             while (items.next()) |item| {
-                if (try item.observer.evalsTrue()) {
+                // Weak methods of atoms are called directly with the owner
+                if (AtomMethodWrapper.check(item.observer)) {
+                    const wrapper: *AtomMethodWrapper = @ptrCast(item.observer);
+                    if (wrapper.resolve()) |owner| {
+                        if (item.enabled(change_types)) {
+                            stats.countCall(calls);
+                            const span = tracer.beginObserver();
+                            defer tracer.endObserver(span, item.observer, change_types);
+                            const result = try wrapper.callWithOwner(owner, args);
+                            result.decref();
+                        }
+                        continue;
+                    }
+                } else if (try item.observer.evalsTrue()) {
                     if (item.enabled(change_types)) {
+                        stats.countCall(calls);
+                        const span = tracer.beginObserver();
+                        defer tracer.endObserver(span, item.observer, change_types);
                         const result = try item.observer.callArgs(args);
                         result.decref();
                     }
-                } else {
-                    guard.mods.append(.{ .remove_observer = .{
-                        .pool = self,
-                        .topic = topic,
-                        .observer = item.observer.newref(),
-                    } }) catch return py.memoryError();
+                    continue;
                 }
+                // The observer is dead
+                guard.mods.append(.{ .remove_observer = .{
+                    .pool = self,
+                    .topic = topic,
+                    .observer = item.observer.newref(),
+                } }) catch return py.memoryError();
             }
         }
         if (!ok) {
@@ -316,7 +530,11 @@ pub const ObserverPool = struct {
             }
             observer_map.deinit(allocator);
         }
-        self.map.clearRetainingCapacity();
+        if (self.map.capacity() > max_retained_capacity) {
+            self.map.clearAndFree(allocator);
+        } else {
+            self.map.clearRetainingCapacity();
+        }
     }
 
     pub fn traverse(self: ObserverPool, func: py.visitproc, arg: ?*anyopaque) c_int {
@@ -332,22 +550,43 @@ pub const ObserverPool = struct {
         return 0;
     }
 
-    // Clear the pool and free all memory
+    // Clear the pool and free all memory held by the map. The pool itself
+    // is owned by a chunk of its PoolManager.
     // Doing this with an active guard is considered a programming error
     pub fn deinit(self: *ObserverPool, allocator: std.mem.Allocator) void {
         std.debug.assert(self.guard == null);
         self.clear(allocator) catch unreachable; // There is no guard so it cannot fail
         self.map.deinit(allocator);
-        allocator.destroy(self);
-        self.* = undefined;
+        self.* = .{};
     }
 };
 
 pub const PoolManager = struct {
     const PoolList = std.ArrayListUnmanaged(?*ObserverPool);
+    const RefList = std.ArrayListUnmanaged(?*Object);
     const FreeList = std.ArrayListUnmanaged(u32);
+    // Number of free slots needed before releasing pools compacts automatically
+    pub const auto_compact_min = 256;
+
+    // Pools are stored in fixed size chunks. The pool of an index always
+    // lives in the same chunk and a chunk is freed when none of its
+    // indexes have a pool left.
+    pub const chunk_len = 64;
+    const Chunk = struct {
+        pools: [chunk_len]ObserverPool = undefined,
+        // Number of indexes in the chunk with a pool
+        live: u32 = 0,
+    };
+    const ChunkList = std.ArrayListUnmanaged(?*Chunk);
+
+    chunks: ChunkList = .{},
+    // The pool of each index or null if the index is unused and was compacted
     pools: PoolList = .{},
+    // The atomref of the atom using each index. These are not owned.
+    refs: RefList = .{},
+    // Unused indexes. Compacting sorts these so the lowest is reused first.
     free_slots: FreeList = .{},
+    next_compact: usize = auto_compact_min,
 
     // Create a new pool
     pub fn new(allocator: std.mem.Allocator) py.Error!*PoolManager {
@@ -362,48 +601,179 @@ pub const PoolManager = struct {
         return self.pools.items[index];
     }
 
+    // Get the atomref stored at the given index
+    pub inline fn getRef(self: PoolManager, index: u32) ?*Object {
+        return self.refs.items[index];
+    }
+
+    // Set the atomref stored at the given index. This does not take a reference.
+    pub inline fn setRef(self: PoolManager, index: u32, ref: ?*Object) void {
+        self.refs.items[index] = ref;
+    }
+
+    // Create the pool of an index in its chunk
+    fn newPool(self: *PoolManager, allocator: std.mem.Allocator, index: usize) py.Error!*ObserverPool {
+        const c = index / chunk_len;
+        if (c >= self.chunks.items.len) {
+            self.chunks.appendNTimes(allocator, null, c + 1 - self.chunks.items.len) catch return py.memoryError();
+        }
+        const chunk = self.chunks.items[c] orelse blk: {
+            const chunk = allocator.create(Chunk) catch return py.memoryError();
+            chunk.* = .{};
+            self.chunks.items[c] = chunk;
+            break :blk chunk;
+        };
+        chunk.live += 1;
+        const pool = &chunk.pools[index % chunk_len];
+        pool.* = .{};
+        return pool;
+    }
+
+    // Free the pool of an index and its chunk once it has no pools left
+    fn destroyPool(self: *PoolManager, allocator: std.mem.Allocator, index: usize) void {
+        const pool = self.pools.items[index] orelse return;
+        pool.deinit(allocator);
+        self.pools.items[index] = null;
+        const c = index / chunk_len;
+        const chunk = self.chunks.items[c].?;
+        chunk.live -= 1;
+        if (chunk.live == 0) {
+            allocator.destroy(chunk);
+            self.chunks.items[c] = null;
+        }
+    }
+
     // Get the index of the next available a pool.
     pub fn acquire(self: *PoolManager, allocator: std.mem.Allocator) py.Error!u32 {
         if (self.free_slots.items.len == 0) {
             if (self.pools.capacity >= std.math.maxInt(u32)) {
                 return error.PyError; // Limit reached
             }
-            const pool = ObserverPool.new(allocator) catch return py.memoryError();
-            errdefer pool.deinit(allocator);
-            self.pools.append(allocator, pool) catch return py.memoryError();
+            self.refs.ensureUnusedCapacity(allocator, 1) catch return py.memoryError();
+            self.pools.ensureUnusedCapacity(allocator, 1) catch return py.memoryError();
+            self.pools.appendAssumeCapacity(try self.newPool(allocator, self.pools.items.len));
+            self.refs.appendAssumeCapacity(null);
             return @intCast(self.pools.items.len - 1);
         }
-        return self.free_slots.pop();
+        const index = self.free_slots.items[self.free_slots.items.len - 1];
+        if (self.pools.items[index] == null) {
+            self.pools.items[index] = try self.newPool(allocator, index);
+        }
+        _ = self.free_slots.pop();
+        return index;
+    }
+
+    // Reserve capacity so the next n pools can be acquired without resizing
+    pub fn reserve(self: *PoolManager, allocator: std.mem.Allocator, n: usize) py.Error!void {
+        self.pools.ensureUnusedCapacity(allocator, n) catch return py.memoryError();
+        self.refs.ensureTotalCapacity(allocator, self.pools.capacity) catch return py.memoryError();
+        self.free_slots.ensureTotalCapacity(allocator, self.pools.capacity) catch return py.memoryError();
+        self.chunks.ensureTotalCapacity(allocator, (self.pools.capacity + chunk_len - 1) / chunk_len) catch return py.memoryError();
     }
 
     // Release a pool back
     pub fn release(self: *PoolManager, allocator: std.mem.Allocator, index: u32) py.Error!void {
+        self.setRef(index, null);
         if (self.get(index)) |pool| {
             if (pool.guard) |guard| {
                 guard.mods.append(.{ .release = .{ .mgr = self, .index = index } }) catch return py.memoryError();
                 return; // Will be release when guard is done
             }
+        }
+        try self.releaseIndex(allocator, index);
+        // Compact once most indexes are unused. The threshold grows with the
+        // number of free slots left so this is not repeated on every release.
+        const n = self.free_slots.items.len;
+        if (n >= self.next_compact and n * 2 > self.pools.items.len) {
+            self.compact(allocator);
+        }
+    }
+
+    // Free the pools of unused indexes, the chunks left empty and drop
+    // unused indexes from the end of the tables. Indexes in use are not
+    // moved so they remain valid.
+    pub fn compact(self: *PoolManager, allocator: std.mem.Allocator) void {
+        for (self.free_slots.items) |index| {
+            self.destroyPool(allocator, index);
+        }
+        // Only free indexes have no pool
+        var n = self.pools.items.len;
+        while (n > 0 and self.pools.items[n - 1] == null) {
+            n -= 1;
+        }
+        var i: usize = 0;
+        while (i < self.free_slots.items.len) {
+            if (self.free_slots.items[i] >= n) {
+                _ = self.free_slots.swapRemove(i);
+            } else {
+                i += 1;
+            }
+        }
+        std.mem.sort(u32, self.free_slots.items, {}, std.sort.desc(u32));
+        self.pools.shrinkAndFree(allocator, n);
+        self.refs.shrinkAndFree(allocator, n);
+        self.free_slots.shrinkAndFree(allocator, self.free_slots.items.len);
+        // Chunks past the last index in use are all empty
+        self.chunks.shrinkAndFree(allocator, (n + chunk_len - 1) / chunk_len);
+        self.next_compact = @max(auto_compact_min, self.free_slots.items.len * 2);
+    }
+
+    // Number of chunks currently allocated
+    pub fn chunkCount(self: PoolManager) usize {
+        var n: usize = 0;
+        for (self.chunks.items) |chunk| {
+            n += @intFromBool(chunk != null);
+        }
+        return n;
+    }
+
+    // Clear the pool and mark the index as unused. This does not compact
+    // since a guard may still have modifications queued for the pool.
+    pub fn releaseIndex(self: *PoolManager, allocator: std.mem.Allocator, index: u32) py.Error!void {
+        if (self.get(index)) |pool| {
             try pool.clear(allocator);
         }
         self.free_slots.append(allocator, index) catch return py.memoryError();
     }
 
+    // Number of atomrefs currently stored
+    pub fn refCount(self: PoolManager) usize {
+        var n: usize = 0;
+        for (self.refs.items) |ref| {
+            n += @intFromBool(ref != null);
+        }
+        return n;
+    }
+
+    // Size of all the pools owned by the manager including released ones
+    pub fn poolsSizeof(self: PoolManager) usize {
+        var size: usize = 0;
+        for (self.pools.items) |ptr| {
+            if (ptr) |pool| {
+                size += pool.sizeof();
+            }
+        }
+        return size;
+    }
+
     pub fn sizeof(self: PoolManager) usize {
-        var size: usize = @sizeOf(PoolManager);
+        var size: usize = @sizeOf(PoolManager) + @sizeOf(Chunk) * self.chunkCount();
+        size += @sizeOf(?*Chunk) * self.chunks.capacity;
         size += @sizeOf(?*ObserverPool) * self.pools.capacity;
+        size += @sizeOf(?*Object) * self.refs.capacity;
         size += @sizeOf(u32) * self.free_slots.capacity;
         return size;
     }
 
-    // Clear all the pools
+    // Clear all the pools and free their chunks
     pub fn clear(self: *PoolManager, allocator: std.mem.Allocator) void {
-        for (self.pools.items) |*ptr| {
-            if (ptr.*) |pool| {
-                pool.deinit(allocator);
-                ptr.* = null;
-            }
+        for (0..self.pools.items.len) |index| {
+            self.destroyPool(allocator, index);
         }
+        std.debug.assert(self.chunkCount() == 0);
+        self.chunks.clearRetainingCapacity();
         self.pools.clearRetainingCapacity();
+        self.refs.clearRetainingCapacity();
         self.free_slots.clearRetainingCapacity();
     }
 
@@ -422,9 +792,10 @@ pub const PoolManager = struct {
     pub fn deinit(self: *PoolManager, allocator: std.mem.Allocator) void {
         self.clear(allocator);
         self.pools.clearAndFree(allocator);
+        self.refs.clearAndFree(allocator);
         self.free_slots.clearAndFree(allocator);
+        self.chunks.clearAndFree(allocator);
         allocator.destroy(self);
-        self.* = undefined;
     }
 };
 
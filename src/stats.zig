@@ -0,0 +1,179 @@
+const py = @import("py");
+const std = @import("std");
+const Object = py.Object;
+const Str = py.Str;
+const Int = py.Int;
+const Dict = py.Dict;
+const List = py.List;
+
+const MemberBase = @import("member.zig").MemberBase;
+const AtomMeta = @import("atom_meta.zig").AtomMeta;
+
+// Counters of the operations on a member. These are only allocated while
+// stats are enabled for the member's class so the hot paths only check if
+// the member has them.
+pub const MemberStats = struct {
+    reads: u64 = 0,
+    writes: u64 = 0,
+    defaults: u64 = 0,
+    validation_failures: u64 = 0,
+    notifications: u64 = 0,
+    observer_calls: u64 = 0,
+};
+
+// Stats of the member being notified. Observers are counted through the
+// member's field since stats may be disabled by an observer.
+pub const CallCounter = ?*const ?*MemberStats;
+
+pub inline fn countCall(counter: CallCounter) void {
+    if (counter) |field| {
+        if (field.*) |s| {
+            s.observer_calls += 1;
+        }
+    }
+}
+
+// Whether new classes are created with stats enabled
+var enabled_globally: bool = false;
+
+// Members that currently have stats. These are borrowed references,
+// members remove themselves when they are cleared.
+var tracked: std.ArrayListUnmanaged(*MemberBase) = .{};
+
+// Enable stats on every member of the class. Members a subclass inherits
+// unchanged are shared with the base so they count the operations of both
+// and are reported under the class that defined them.
+pub fn enableClass(cls: *AtomMeta) !void {
+    const members = cls.atom_members orelse return;
+    for (members.items) |member| {
+        try enableMember(member);
+    }
+}
+
+pub fn enableMember(member: *MemberBase) !void {
+    if (member.stats == null) {
+        tracked.ensureUnusedCapacity(py.allocator, 1) catch return py.memoryError();
+        const s = py.allocator.create(MemberStats) catch return py.memoryError();
+        s.* = .{};
+        member.stats = s;
+        tracked.appendAssumeCapacity(member);
+    }
+}
+
+// Enable stats on a class and all of its subclasses
+fn enableTree(cls: *AtomMeta) !void {
+    try enableClass(cls);
+    const method = try Object.getAttrString(@ptrCast(cls), "__subclasses__");
+    defer method.decref();
+    const subclasses: *List = @ptrCast(try method.callArgs(.{}));
+    defer subclasses.decref();
+    var pos: usize = 0;
+    while (subclasses.next(&pos)) |item| {
+        if (AtomMeta.check(item)) {
+            try enableTree(@ptrCast(item));
+        }
+    }
+}
+
+// Called when a class is created
+pub inline fn initClass(cls: *AtomMeta) !void {
+    if (enabled_globally) {
+        try enableClass(cls);
+    }
+}
+
+// Remove the stats of a member that is being cleared
+pub fn release(member: *MemberBase) void {
+    if (member.stats) |s| {
+        member.stats = null;
+        py.allocator.destroy(s);
+        for (tracked.items, 0..) |item, i| {
+            if (item == member) {
+                _ = tracked.swapRemove(i);
+                break;
+            }
+        }
+    }
+}
+
+pub fn disableAll() void {
+    enabled_globally = false;
+    for (tracked.items) |member| {
+        if (member.stats) |s| {
+            member.stats = null;
+            py.allocator.destroy(s);
+        }
+    }
+    tracked.clearAndFree(py.allocator);
+}
+
+pub fn resetAll() void {
+    for (tracked.items) |member| {
+        member.stats.?.* = .{};
+    }
+}
+
+fn counterDict(stats: MemberStats) !*Dict {
+    const dict = try Dict.new();
+    errdefer dict.decref();
+    inline for (@typeInfo(MemberStats).@"struct".fields) |field| {
+        const key = try Str.fromSlice(field.name);
+        defer key.decref();
+        const value = try Int.new(@field(stats, field.name));
+        defer value.decref();
+        try dict.set(@ptrCast(key), @ptrCast(value));
+    }
+    return dict;
+}
+
+// Returns new reference to a dict of {cls: {member_name: {counter: value}}}
+pub fn snapshot() !*Dict {
+    const result = try Dict.new();
+    errdefer result.decref();
+    for (tracked.items) |member| {
+        const cls = member.owner orelse continue;
+        const members: *Dict = blk: {
+            if (result.get(cls)) |d| {
+                break :blk @ptrCast(d);
+            }
+            const d = try Dict.new();
+            defer d.decref();
+            try result.set(cls, @ptrCast(d));
+            break :blk d;
+        };
+        const counters = try counterDict(member.stats.?.*);
+        defer counters.decref();
+        try members.set(@ptrCast(member.name.?), @ptrCast(counters));
+    }
+    return result;
+}
+
+// --------------------------------------------------------------------------
+// Module functions
+// --------------------------------------------------------------------------
+pub fn enable_stats(_: *py.Module, args: [*]*Object, n: isize) ?*Object {
+    if (n > 1 or (n == 1 and !args[0].isNone() and !AtomMeta.check(args[0]))) {
+        return py.typeErrorObject(null, "Invalid arguments. Signature is enable_stats(cls: Optional[type[Atom]] = None)", .{});
+    }
+    if (n == 1 and !args[0].isNone()) {
+        enableTree(@ptrCast(args[0])) catch return null;
+    } else {
+        enabled_globally = true;
+        enableTree(@ptrCast(@import("atom.zig").Atom.TypeObject.?)) catch return null;
+    }
+    return py.returnNone();
+}
+
+pub fn disable_stats(_: *py.Module, _: ?*Object) ?*Object {
+    disableAll();
+    return py.returnNone();
+}
+
+pub fn reset_stats(_: *py.Module, _: ?*Object) ?*Object {
+    resetAll();
+    return py.returnNone();
+}
+
+pub fn stats_snapshot(_: *py.Module, _: ?*Object) ?*Object {
+    return @ptrCast(snapshot() catch null);
+}
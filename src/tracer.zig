@@ -0,0 +1,466 @@
+const py = @import("py");
+const std = @import("std");
+const Object = py.Object;
+const Type = py.Type;
+const Str = py.Str;
+const Int = py.Int;
+const Dict = py.Dict;
+const List = py.List;
+
+const Atom = @import("atom.zig").Atom;
+const ChangeType = @import("observer_pool.zig").ChangeType;
+const method_wrapper = @import("method_wrapper.zig");
+const ExtendedObserver = @import("observation.zig").ExtendedObserver;
+const ExtendedBinding = @import("observation.zig").ExtendedBinding;
+const EventBinder = @import("members/event.zig").EventBinder;
+
+// Records notification cascades as spans in a bounded ring buffer.
+// A span is either a notification (atom type, topic and change type) or a
+// call to one observer within it. Spans are stored when they end so a
+// parent is always stored after its children.
+
+pub const SpanKind = enum(u8) { notify, observer };
+
+pub const Span = struct {
+    id: u64,
+    parent: u64,
+    start: u64, // ns since the tracer was enabled
+    duration: u64, // ns
+    kind: SpanKind,
+    change_types: u8,
+    // Names released when the span is overwritten. Only strings are kept so
+    // recorded spans do not keep classes, atoms or observers alive.
+    type_name: ?*Str = null,
+    topic: ?*Str = null,
+    observer_name: ?*Str = null,
+
+    fn release(self: *Span) void {
+        py.clearAll(.{ &self.type_name, &self.topic, &self.observer_name });
+    }
+};
+
+// Returned when a span begins and passed back when it ends
+pub const SpanHandle = struct {
+    id: u64,
+    parent: u64,
+    start: u64,
+    sampled: bool,
+};
+
+// Number of power of two buckets in the observer latency histograms.
+// Bucket i counts calls that took less than 2^i ns.
+pub const histogram_buckets = 32;
+
+const Histogram = struct {
+    buckets: [histogram_buckets]u64 = [_]u64{0} ** histogram_buckets,
+    total: u64 = 0,
+    // Name used by the spans of the observer
+    name: ?*Str = null,
+};
+
+// Maximum number of observers with a histogram. Calls of observers seen
+// after the limit is reached are only recorded as spans.
+pub const max_histograms = 1024;
+
+// Get the object that identifies an observer in the histograms. Wrappers
+// and bindings are created per atom so they are keyed by the function or
+// member they call instead.
+// Returns borrowed reference
+fn observerKey(observer: *Object) *Object {
+    if (method_wrapper.AtomMethodWrapper.check(observer)) {
+        const wrapper: *method_wrapper.AtomMethodWrapper = @ptrCast(observer);
+        return wrapper.func orelse observer;
+    } else if (method_wrapper.ObjectMethodWrapper.check(observer)) {
+        const wrapper: *method_wrapper.ObjectMethodWrapper = @ptrCast(observer);
+        return wrapper.func orelse observer;
+    } else if (py.Method.check(observer)) {
+        return @ptrCast(py.c.PyMethod_Function(@ptrCast(observer)) orelse observer);
+    } else if (ExtendedBinding.check(observer)) {
+        const binding: *ExtendedBinding = @ptrCast(observer);
+        if (binding.observer) |extended| {
+            return extended.func orelse observer;
+        }
+    } else if (ExtendedObserver.check(observer)) {
+        const extended: *ExtendedObserver = @ptrCast(observer);
+        return extended.func orelse observer;
+    } else if (EventBinder.check(observer)) {
+        const binder: *EventBinder = @ptrCast(observer);
+        if (binder.member) |m| {
+            return @ptrCast(m);
+        }
+    }
+    return observer;
+}
+
+// Returns new reference to the name of a type. Types are not kept since the
+// spans outlive them.
+fn typeName(cls: *Type) ?*Str {
+    if (cls.impl.tp_flags & py.c.Py_TPFLAGS_HEAPTYPE != 0) {
+        const heap_type: *py.c.PyHeapTypeObject = @ptrCast(cls);
+        if (heap_type.ht_name != null) {
+            const name: *Object = @ptrCast(heap_type.ht_name);
+            return @ptrCast(name.newref());
+        }
+    }
+    return newName(Type.className(cls));
+}
+
+// Returns new reference to the qualified name of the function called by an
+// observer or the name of its type.
+fn observerName(observer: *Object) ?*Str {
+    var err = SavedError.fetch();
+    defer err.restore();
+    const target = observerKey(observer);
+    if (target.getAttrString("__qualname__")) |name| {
+        if (Str.check(name)) {
+            return @ptrCast(name);
+        }
+        name.decref();
+    } else |_| {
+        py.c.PyErr_Clear();
+    }
+    return newName(target.typeName());
+}
+
+// Spans end while the error of a failed observer may be set so it is
+// saved while names are looked up and restored after.
+const SavedError = struct {
+    exc_type: ?*py.c.PyObject = null,
+    value: ?*py.c.PyObject = null,
+    traceback: ?*py.c.PyObject = null,
+
+    fn fetch() SavedError {
+        var self = SavedError{};
+        py.c.PyErr_Fetch(&self.exc_type, &self.value, &self.traceback);
+        return self;
+    }
+
+    fn restore(self: *SavedError) void {
+        py.c.PyErr_Restore(self.exc_type, self.value, self.traceback);
+    }
+};
+
+// Returns new reference to the name or null if it cannot be created
+fn newName(name: []const u8) ?*Str {
+    var err = SavedError.fetch();
+    defer err.restore();
+    return Str.fromSlice(name) catch {
+        py.c.PyErr_Clear();
+        return null;
+    };
+}
+
+// Checked on every notification so keep it separate from the rest of the state
+pub var enabled: bool = false;
+
+const Tracer = struct {
+    epoch: std.time.Instant = undefined,
+    spans: std.ArrayListUnmanaged(Span) = .{},
+    capacity: usize = 0,
+    // Next slot to write once the buffer is full
+    head: usize = 0,
+    next_id: u64 = 1,
+    // Innermost open span or 0 at the root
+    current: u64 = 0,
+    depth: u32 = 0,
+    // Record 1 in sample_rate root notifications
+    sample_rate: u32 = 1,
+    roots: u64 = 0,
+    sampling: bool = false,
+    histograms: std.AutoHashMapUnmanaged(*Object, Histogram) = .{},
+
+    fn now(self: *Tracer) u64 {
+        const t = std.time.Instant.now() catch return 0;
+        return t.since(self.epoch);
+    }
+
+    fn push(self: *Tracer, span: Span) void {
+        if (self.spans.items.len < self.capacity) {
+            self.spans.appendAssumeCapacity(span);
+            return;
+        }
+        const slot = &self.spans.items[self.head];
+        slot.release();
+        slot.* = span;
+        self.head = (self.head + 1) % self.capacity;
+    }
+
+    // Add the call to the observer's histogram.
+    // Returns new reference to the observer's name.
+    fn record(self: *Tracer, observer: *Object, duration: u64) ?*Str {
+        const key = observerKey(observer);
+        const histogram = blk: {
+            if (self.histograms.count() < max_histograms) {
+                const item = self.histograms.getOrPut(py.allocator, key) catch return observerName(observer);
+                if (!item.found_existing) {
+                    item.value_ptr.* = .{ .name = observerName(observer) };
+                    key.incref();
+                }
+                break :blk item.value_ptr;
+            }
+            break :blk self.histograms.getPtr(key) orelse return observerName(observer);
+        };
+        const bucket: usize = if (duration == 0) 0 else @min(@as(usize, std.math.log2_int(u64, duration)) + 1, histogram_buckets - 1);
+        histogram.buckets[bucket] += 1;
+        histogram.total += duration;
+        if (histogram.name) |name| {
+            return name.newref();
+        }
+        return null;
+    }
+
+    fn clear(self: *Tracer) void {
+        for (self.spans.items) |*span| {
+            span.release();
+        }
+        self.spans.clearRetainingCapacity();
+        self.head = 0;
+        var it = self.histograms.iterator();
+        while (it.next()) |entry| {
+            entry.key_ptr.*.decref();
+            py.clearAll(.{&entry.value_ptr.name});
+        }
+        self.histograms.clearRetainingCapacity();
+    }
+
+    fn deinit(self: *Tracer) void {
+        self.clear();
+        self.spans.deinit(py.allocator);
+        self.histograms.deinit(py.allocator);
+        self.* = .{};
+    }
+};
+
+var tracer: Tracer = .{};
+
+fn begin(sampled: bool) SpanHandle {
+    const handle = SpanHandle{
+        .id = if (sampled) tracer.next_id else 0,
+        .parent = tracer.current,
+        .start = if (sampled) tracer.now() else 0,
+        .sampled = sampled,
+    };
+    if (sampled) {
+        tracer.next_id += 1;
+        tracer.current = handle.id;
+    }
+    tracer.depth += 1;
+    return handle;
+}
+
+fn end(handle: SpanHandle, span: Span) void {
+    tracer.depth -= 1;
+    if (tracer.depth == 0) {
+        tracer.sampling = false;
+    }
+    if (handle.sampled) {
+        tracer.current = handle.parent;
+        tracer.push(span);
+    }
+}
+
+// Start a notification span. Returns null when the tracer is disabled.
+pub inline fn beginNotify() ?SpanHandle {
+    if (!enabled) return null;
+    if (tracer.depth == 0) {
+        tracer.roots += 1;
+        tracer.sampling = tracer.roots % tracer.sample_rate == 0;
+    }
+    return begin(tracer.sampling);
+}
+
+pub inline fn endNotify(handle: ?SpanHandle, atom: *Atom, topic: *Str, change_types: u8) void {
+    if (handle) |h| {
+        endNotifySpan(h, atom, topic, change_types);
+    }
+}
+
+fn endNotifySpan(handle: SpanHandle, atom: *Atom, topic: *Str, change_types: u8) void {
+    end(handle, .{
+        .id = handle.id,
+        .parent = handle.parent,
+        .start = handle.start,
+        .duration = if (handle.sampled) tracer.now() -| handle.start else 0,
+        .kind = .notify,
+        .change_types = change_types,
+        .type_name = if (handle.sampled) typeName(atom.typeref()) else null,
+        .topic = if (handle.sampled) topic.newref() else null,
+    });
+}
+
+// Start an observer span. Returns null unless the current cascade is sampled.
+pub inline fn beginObserver() ?SpanHandle {
+    if (!enabled or !tracer.sampling) return null;
+    return begin(true);
+}
+
+pub inline fn endObserver(handle: ?SpanHandle, observer: *Object, change_types: u8) void {
+    if (handle) |h| {
+        endObserverSpan(h, observer, change_types);
+    }
+}
+
+fn endObserverSpan(handle: SpanHandle, observer: *Object, change_types: u8) void {
+    const duration = tracer.now() -| handle.start;
+    const name = tracer.record(observer, duration);
+    end(handle, .{
+        .id = handle.id,
+        .parent = handle.parent,
+        .start = handle.start,
+        .duration = duration,
+        .kind = .observer,
+        .change_types = change_types,
+        .observer_name = name,
+    });
+}
+
+// --------------------------------------------------------------------------
+// Export
+// --------------------------------------------------------------------------
+fn changeTypeName(change_types: u8) []const u8 {
+    inline for (@typeInfo(ChangeType).@"enum".fields) |field| {
+        if (change_types == field.value) {
+            return field.name;
+        }
+    }
+    return "MULTIPLE";
+}
+
+fn writeName(writer: anytype, name: ?*Str) !void {
+    try std.json.encodeJsonString(if (name) |str| str.data() else "?", .{}, writer);
+}
+
+fn writeSpan(writer: anytype, span: Span) !void {
+    try writer.writeAll("{\"name\":");
+    switch (span.kind) {
+        .notify => {
+            const type_name = if (span.type_name) |str| str.data() else "?";
+            const name = try std.fmt.allocPrint(py.allocator, "{s}.{s}", .{ type_name, span.topic.?.data() });
+            defer py.allocator.free(name);
+            try std.json.encodeJsonString(name, .{}, writer);
+        },
+        .observer => try writeName(writer, span.observer_name),
+    }
+    try writer.print(",\"cat\":\"{s}\",\"ph\":\"X\",\"pid\":0,\"tid\":0,\"ts\":{d}.{d:0>3},\"dur\":{d}.{d:0>3}", .{
+        @tagName(span.kind),
+        span.start / 1000,
+        span.start % 1000,
+        span.duration / 1000,
+        span.duration % 1000,
+    });
+    try writer.print(",\"args\":{{\"id\":{d},\"parent\":{d},\"change_type\":\"{s}\"}}}}", .{
+        span.id,
+        span.parent,
+        changeTypeName(span.change_types),
+    });
+}
+
+// Returns new reference to the spans in the Chrome trace event format
+pub fn exportTrace() !*Str {
+    var buffer: std.ArrayListUnmanaged(u8) = .{};
+    defer buffer.deinit(py.allocator);
+    const writer = buffer.writer(py.allocator);
+    writeTrace(writer) catch |err| switch (err) {
+        error.PyError => return error.PyError,
+        else => {
+            try py.memoryError();
+            unreachable;
+        },
+    };
+    return try Str.fromSlice(buffer.items);
+}
+
+fn writeTrace(writer: anytype) !void {
+    try writer.writeAll("{\"traceEvents\":[");
+    const n = tracer.spans.items.len;
+    for (0..n) |i| {
+        // Oldest first
+        const span = tracer.spans.items[(tracer.head + i) % n];
+        if (i > 0) try writer.writeAll(",");
+        try writeSpan(writer, span);
+    }
+    try writer.writeAll("],\"displayTimeUnit\":\"ns\"}");
+}
+
+// Returns new reference to a dict of {observer: {"count": n, "total_ns": t, "buckets": [...]}}
+pub fn histograms() !*Dict {
+    const result = try Dict.new();
+    errdefer result.decref();
+    var it = tracer.histograms.iterator();
+    while (it.next()) |entry| {
+        const histogram = entry.value_ptr.*;
+        const buckets = try List.new(0);
+        defer buckets.decref();
+        var count: u64 = 0;
+        for (histogram.buckets) |v| {
+            count += v;
+            const value = try Int.new(v);
+            defer value.decref();
+            try buckets.append(@ptrCast(value));
+        }
+        const item = try Dict.new();
+        defer item.decref();
+        inline for (.{ .{ "count", count }, .{ "total_ns", histogram.total } }) |kv| {
+            const key = try Str.fromSlice(kv[0]);
+            defer key.decref();
+            const value = try Int.new(kv[1]);
+            defer value.decref();
+            try item.set(@ptrCast(key), @ptrCast(value));
+        }
+        const key = try Str.fromSlice("buckets");
+        defer key.decref();
+        try item.set(@ptrCast(key), @ptrCast(buckets));
+        try result.set(entry.key_ptr.*, @ptrCast(item));
+    }
+    return result;
+}
+
+// --------------------------------------------------------------------------
+// Module functions
+// --------------------------------------------------------------------------
+pub fn enable_tracer(_: *py.Module, args: *py.Tuple, kwargs: ?*Dict) ?*Object {
+    const kwlist = [_:null][*c]const u8{ "capacity", "sample" };
+    var capacity: c_uint = 65536;
+    var sample: c_uint = 1;
+    py.parseTupleAndKeywords(args, kwargs, "|II", @ptrCast(&kwlist), .{ &capacity, &sample }) catch return null;
+    enable(capacity, sample) catch return null;
+    return py.returnNone();
+}
+
+fn enable(capacity: usize, sample: u32) !void {
+    if (capacity == 0 or sample == 0) {
+        try py.valueError("capacity and sample must be greater than 0", .{});
+    }
+    if (tracer.depth > 0) {
+        try py.systemError("Cannot change the tracer during a notification", .{});
+    }
+    tracer.deinit();
+    tracer.spans.ensureTotalCapacityPrecise(py.allocator, capacity) catch return py.memoryError();
+    tracer.capacity = capacity;
+    tracer.sample_rate = sample;
+    tracer.epoch = std.time.Instant.now() catch {
+        return py.systemError("No monotonic clock is available", .{});
+    };
+    enabled = true;
+}
+
+pub fn disable_tracer(_: *py.Module, _: ?*Object) ?*Object {
+    if (tracer.depth > 0) {
+        return py.systemErrorObject(null, "Cannot change the tracer during a notification", .{});
+    }
+    enabled = false;
+    return py.returnNone();
+}
+
+pub fn clear_tracer(_: *py.Module, _: ?*Object) ?*Object {
+    tracer.clear();
+    return py.returnNone();
+}
+
+pub fn tracer_export(_: *py.Module, _: ?*Object) ?*Object {
+    return @ptrCast(exportTrace() catch null);
+}
+
+pub fn tracer_histograms(_: *py.Module, _: ?*Object) ?*Object {
+    return @ptrCast(histograms() catch null);
+}
@@ -15,3 +15,47 @@ def test_atomref():
     gc.collect()
     assert not bool(ref)
     assert ref() is None
+
+
+def test_atomref_lifetime():
+    class Pt(Atom):
+        x = Int()
+
+    # The same ref is returned while it is alive
+    p = Pt()
+    ref = atomref(p)
+    assert atomref(p) is ref
+    del ref
+    gc.collect()
+    ref = atomref(p)
+    assert ref() is p
+
+    # Refs and observers share the atom's entry on the class
+    changes = []
+    p.observe("x", changes.append)
+    p.x = 1
+    assert len(changes) == 1
+    del ref
+    p.x = 2
+    assert len(changes) == 2
+    ref = atomref(p)
+    p.unobserve("x")
+    assert ref() is p
+
+    q = Pt()
+    q.observe("x", changes.append)
+    qref = atomref(q)
+    assert qref is not ref
+    del p
+    gc.collect()
+    assert ref() is None
+    assert qref() is q
+    q.x = 3
+    assert len(changes) == 3
+
+    # Many refs to short lived atoms
+    refs = [atomref(Pt()) for i in range(100)]
+    assert not any(refs)
+    objs = [Pt() for i in range(100)]
+    refs = [atomref(o) for o in objs]
+    assert all(r() is o for r, o in zip(refs, objs))
@@ -0,0 +1,56 @@
+import pytest
+
+from benchmarks import compare, format_changes, regressions, run
+from benchmarks.cases import select
+
+
+def test_benchmarks_run_and_compare():
+    results = run("memory/small", ["slots", "zatom"], repeat=1, scale=0.01)
+    entry = results["results"]["memory/small"]
+    assert set(entry) == {"slots", "zatom"}
+    for result in entry.values():
+        assert "error" not in result
+        assert result["ns"] > 0
+        assert result["instance_bytes"] > 0
+
+    # Identical results have no regressions
+    changes = compare(results, results, threshold=5)
+    assert len(changes) == 4
+    assert not regressions(changes)
+
+    # Slower beyond the threshold is flagged
+    slower = {"results": {"memory/small": {"zatom": dict(entry["zatom"], ns=entry["zatom"]["ns"] * 1.1)}}}
+    changes = compare(results, slower, threshold=5)
+    assert [(c.target, c.metric) for c in regressions(changes)] == [("zatom", "ns")]
+    assert "REGRESSION" in format_changes(changes)
+    assert not regressions(compare(results, slower, threshold=15))
+
+
+@pytest.mark.parametrize("case", select("notify"), ids=lambda c: c.id)
+def test_benchmarks_notify_cases(case):
+    from benchmarks.targets import AtomTarget
+
+    bench = case.setup(AtomTarget("zatom"))
+    exec(bench.stmt, bench.namespace)
+
+
+def test_benchmarks_compare_errors(tmp_path):
+    from benchmarks.__main__ import main
+
+    ok = {"ns": 10.0, "instance_bytes": 56}
+    failing = {"error": "TypeError: boom"}
+    baseline = {"results": {"a": {"zatom": ok}, "b": {"zatom": failing}}}
+    results = {"results": {"a": {"zatom": failing}, "b": {"zatom": ok}}}
+    changes = compare(baseline, results)
+    assert [(c.case, c.metric, c.regression) for c in changes] == [("a", "error", True), ("b", "error", False)]
+    assert "TypeError: boom" in format_changes(changes)
+    assert len(regressions(changes)) == 1
+
+    # Still failing is not reported again
+    assert not compare(baseline, {"results": {"b": {"zatom": failing}}})
+
+    path = tmp_path / "old.json"
+    path.write_text('{"format": 0, "results": {}}')
+    with pytest.raises(SystemExit) as e:
+        main(["compare", str(path), str(path)])
+    assert e.value.code == 2
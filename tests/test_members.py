@@ -1,3 +1,5 @@
+import os
+import sys
 import pytest
 
 from zatom.api import (
@@ -5,6 +7,7 @@ from zatom.api import (
     AtomMeta,
     Bool,
     Bytes,
+    ChangeType,
     Coerced,
     Constant,
     DefaultValue,
@@ -28,6 +31,13 @@ from zatom.api import (
     Typed,
     ForwardTyped,
     Value,
+    property_cache_info,
+    set_property_cache_budget,
+    observe,
+    enable_stats,
+    disable_stats,
+    reset_stats,
+    stats_snapshot,
 )
 
 
@@ -286,6 +296,71 @@ def test_coerced_subclass():
     assert b.size.y == 240
 
 
+def test_instance_type_cache():
+    import abc
+
+    class Base(abc.ABC):
+        pass
+
+    class Registered:
+        pass
+
+    Base.register(Registered)
+
+    class P:
+        pass
+
+    class Q:
+        pass
+
+    class R(P):
+        pass
+
+    class A(Atom):
+        base = Instance(Base)
+        either = Instance((int, Base))
+        p = Instance(P)
+        typed = Typed(P)
+        items = List(Instance(P))
+
+    a = A()
+    for i in range(3):
+        a.base = Registered()
+        a.either = Registered()
+        a.either = i
+        a.p = R()
+        a.typed = R()
+        a.items.append(R())
+    with pytest.raises(TypeError):
+        a.base = P()
+
+    # Changing the bases of a type invalidates the cached result
+    R.__bases__ = (Q,)
+    for _ in range(2):
+        with pytest.raises(TypeError):
+            a.p = R()
+        with pytest.raises(TypeError):
+            a.typed = R()
+        with pytest.raises(TypeError):
+            a.items.append(R())
+
+    # Checks that depend on the value are not cached
+    class EvenMeta(type):
+        def __instancecheck__(cls, obj):
+            return isinstance(obj, int) and obj % 2 == 0
+
+    class Even(metaclass=EvenMeta):
+        pass
+
+    class B(Atom):
+        x = Instance(Even)
+
+    b = B()
+    b.x = 2
+    with pytest.raises(TypeError):
+        b.x = 3
+
+
 def test_typed():
     class A(Atom):
         name = Typed(str)
@@ -364,6 +439,37 @@ def test_enum():
         A.alt("three")
 
 
+def test_enum_lookup():
+    codes = tuple(f"code-{i}" for i in range(100))
+
+    class A(Atom):
+        code = Enum(*codes)
+        mixed = Enum(None, 1, 1.0)
+        unhashable = Enum(None, [1])
+
+    a = A()
+    a.code = "code-99"
+    assert A.code.get_slot(a) == 99
+    # Equal but not identical
+    a.code = "".join(("code-", "50"))
+    assert A.code.get_slot(a) == 50
+    assert a.code == "code-50"
+    with pytest.raises(ValueError):
+        a.code = "code-100"
+
+    # Equal items use the first position like tuple.index
+    a.mixed = 1.0
+    assert A.mixed.get_slot(a) == 1
+    with pytest.raises(ValueError):
+        a.mixed = [1]
+
+    # Unhashable items are still found
+    a.unhashable = [1]
+    assert A.unhashable.get_slot(a) == 1
+    with pytest.raises(ValueError):
+        a.unhashable = [2]
+
+
 def test_event():
     class A(Atom):
         activated = Event()
@@ -407,6 +513,29 @@ def test_event():
     with pytest.raises(TypeError):
         a.clicked(1)
 
+    # Emit directly from the member
+    A.clicked.emit(a, "left")
+    assert len(changes) == 3
+    assert changes[-1]["value"] == "left"
+    with pytest.raises(TypeError):
+        A.clicked.emit(a, 1)
+
+    # Reused binders are new references to the binder type
+    binder_type = type(a.activated)
+    refs = sys.getrefcount(binder_type)
+    binders = [a.activated for i in range(10)]
+    assert sys.getrefcount(binder_type) == refs + 10
+    del binders
+    assert sys.getrefcount(binder_type) == refs
+    with pytest.raises(TypeError):
+        A.clicked.emit(None, "left")
+
+    # Observers that keep the change must not see it reused
+    a.clicked("middle")
+    assert changes[-2]["value"] == "left"
+    assert changes[-1]["value"] == "middle"
+    assert a.clicked == a.clicked
+
 
 def test_constant():
     class A(Atom):
@@ -506,6 +635,71 @@ def test_list():
         a.c.append(3)
 
 
+def test_list_bulk_validation():
+    import array
+
+    class P:
+        pass
+
+    class Q(P):
+        pass
+
+    class A(Atom):
+        ints = List(Int())
+        floats = List(float)
+        items = List(Instance(P))
+
+    class B(Atom):
+        ints = List(Int())
+
+    a = A()
+    # Exact types and subclasses
+    a.ints = [1, True, 3]
+    assert a.ints == [1, True, 3]
+    a.items = [P(), Q(), P()]
+    assert [type(it) for it in a.items] == [P, Q, P]
+    with pytest.raises(TypeError):
+        a.items = [P(), object()]
+    a.ints.extend([4, 5])
+    assert a.ints == [1, True, 3, 4, 5]
+    with pytest.raises(TypeError):
+        a.ints.extend([6, "7"])
+
+    # Buffers with a matching format are converted
+    a.ints = array.array("q", [1, 2, 3])
+    assert type(a.ints) is TypedList
+    assert a.ints == [1, 2, 3] and all(type(it) is int for it in a.ints)
+    a.ints.extend(array.array("B", [4, 5]))
+    assert a.ints == [1, 2, 3, 4, 5]
+    a.ints[1:3] = memoryview(array.array("i", [0, 1, 2, 3]))[::2]
+    assert a.ints == [1, 0, 2, 4, 5]
+    a.floats = array.array("d", [0.5, 1.5])
+    assert a.floats == [0.5, 1.5]
+    a.floats.extend(array.array("f", [2.5]))
+    assert a.floats == [0.5, 1.5, 2.5]
+    with pytest.raises(TypeError):
+        a.ints = array.array("d", [1.0])
+    with pytest.raises(TypeError):
+        a.floats = array.array("i", [1])
+    with pytest.raises(TypeError):
+        a.ints = b"abc"
+
+    # Reassigning from a list with an equivalent validator
+    a.ints = [1, 2, 3]
+    b = B()
+    b.ints = a.ints
+    assert b.ints == [1, 2, 3]
+    assert b.ints is not a.ints
+    b.ints.append(4)
+    assert a.ints == [1, 2, 3]
+    with pytest.raises(TypeError):
+        b.ints.append("5")
+    a.ints.extend(b.ints)
+    assert a.ints == [1, 2, 3, 1, 2, 3, 4]
+    with pytest.raises(TypeError):
+        a.ints = a.items
+
+
 def test_dict():
     class A(Atom):
         a = Dict(default={"a": "b"})
@@ -539,6 +733,178 @@ def test_dict():
         a.c = {1: 2}
 
 
+def test_dict_update():
+    class A(Atom):
+        a = Dict(str, Int())
+        b = Dict(value=str)
+
+    class B(Atom):
+        a = Dict(str, Int())
+
+    a = A()
+    a.a = {"x": 1}
+    a.a.update({"y": 2}, z=3)
+    assert a.a == {"x": 1, "y": 2, "z": 3}
+    a.a.update([("w", 4)])
+    assert a.a["w"] == 4
+    with pytest.raises(TypeError):
+        a.a.update({"v": "5"})
+    with pytest.raises(TypeError):
+        a.a.update({1: 5})
+    with pytest.raises(TypeError):
+        a.a.update({"v": 5}, {"u": 6})
+    # Nothing is applied if any entry fails
+    with pytest.raises(TypeError):
+        a.a.update({"v": 5, "u": "6"})
+    assert "v" not in a.a and "u" not in a.a
+
+    a.a |= {"v": 5}
+    assert a.a["v"] == 5
+    with pytest.raises(TypeError):
+        a.a |= {"u": "6"}
+    assert "u" not in a.a
+
+    a.b = {1: "1"}
+    a.b.update({2: "2"})
+    with pytest.raises(TypeError):
+        a.b.update({3: 3})
+    assert a.b == {1: "1", 2: "2"}
+
+    # Merging from a dict with equivalent validators
+    b = B()
+    b.a = a.a
+    assert b.a == a.a and b.a is not a.a
+    b.a.update(a.a)
+    b.a |= a.a
+    with pytest.raises(TypeError):
+        b.a = a.b
+
+
+def test_set_update():
+    class A(Atom):
+        a = Set(Int())
+        b = Set(str)
+
+    class B(Atom):
+        a = Set(Int())
+
+    a = A()
+    a.a = {1}
+    a.a.update([2], (3,), {4})
+    assert a.a == {1, 2, 3, 4}
+    with pytest.raises(TypeError):
+        a.a.update([5], ["6"])
+    assert a.a == {1, 2, 3, 4}
+    a.a |= {5}
+    a.a -= {1}
+    assert a.a == {2, 3, 4, 5}
+    with pytest.raises(TypeError):
+        a.a |= {"6"}
+
+    b = B()
+    b.a = a.a
+    assert b.a == a.a and b.a is not a.a
+    b.a |= a.a
+    b.a.update(a.a)
+    b.a -= a.a
+    assert b.a == set()
+    a.b = {"x"}
+    with pytest.raises(TypeError):
+        b.a = a.b
+
+
+def test_copy_on_write_defaults():
+    class A(Atom):
+        a = List(int, default=[1, 2], copy_on_write=True)
+        b = Dict(str, int, default={"a": 1}, copy_on_write=True)
+        c = Set(default={1}, copy_on_write=True)
+
+    changes = []
+    a = A()
+    b = A()
+    a.observe("a", changes.append)
+
+    # Reading stores one view of the default without writing it
+    assert a.a == [1, 2]
+    assert a.a is a.a
+    assert A.a.get_slot(a) is a.a
+    assert a.b == {"a": 1}
+    assert a.b is a.b
+    assert a.c == {1}
+    assert a.c is a.c
+    assert changes == []
+
+    # Failed operations do not write the default
+    with pytest.raises(TypeError):
+        a.a.append("3")
+    with pytest.raises(ValueError):
+        a.a.remove(3)
+    assert a.a == [1, 2]
+    assert changes == []
+
+    # The first mutation writes the view
+    items = a.a
+    items.append(3)
+    assert A.a.get_slot(a) is items
+    assert a.a is items
+    assert a.a == [1, 2, 3]
+    assert len(changes) == 1 and changes[0]["type"] == "create"
+    items.append(4)
+    assert len(changes) == 1
+
+    a.b["b"] = 2
+    assert a.b == {"a": 1, "b": 2}
+    with pytest.raises(TypeError):
+        a.b["c"] = "3"
+    a.c.discard(1)
+    assert a.c == set()
+
+    # Other instances are unaffected
+    assert b.a == [1, 2]
+    assert b.b == {"a": 1}
+    assert b.c == {1}
+
+    # Reset to the default after delete
+    del a.a
+    assert a.a == [1, 2]
+    assert changes[-1]["type"] == "delete"
+
+    # Popping an empty view does not write it
+    class B(Atom):
+        a = List(int, copy_on_write=True)
+
+    changes = []
+    c = B()
+    c.observe("a", changes.append)
+    with pytest.raises(IndexError):
+        c.a.pop()
+    assert changes == []
+
+    # Deleting a view that was not written is silent
+    view = c.a
+    del c.a
+    assert changes == []
+    assert c.a is not view
+
+    # Assigning over a view creates the value
+    view = c.a
+    c.a = [5]
+    assert len(changes) == 1 and changes[0]["type"] == "create"
+
+    # A view that was replaced no longer changes the atom
+    view.append(6)
+    assert c.a == [5]
+    with pytest.raises(TypeError):
+        view.append("7")
+
+    # Assigning a view to another atom stores a copy
+    view = A().b
+    b.b = view
+    assert b.b is not view
+    view["x"] = 1
+    assert "x" not in b.b
+
+
 def test_property():
     class A(Atom):
         __slots__ = ("_x", "_y")
@@ -573,6 +939,221 @@ def test_property():
     assert a.x == 1
 
 
+def test_property_method_cache():
+    class A(Atom):
+        __slots__ = ("_x",)
+
+        def _get_x(self):
+            return self._x
+
+        x = Property()
+
+    class B(A):
+        def _get_x(self):
+            return self._x * 2
+
+    a = A()
+    a._x = 1
+    b = B()
+    b._x = 1
+    assert a.x == 1
+    assert b.x == 2
+    assert a.x == 1
+
+    # Each class resolves its own function when accesses alternate
+    class C(B):
+        def _get_x(self):
+            return self._x * 3
+
+    c = C()
+    c._x = 1
+    for i in range(3):
+        assert (a.x, b.x, c.x) == (1, 2, 3)
+
+    # Modifying the class invalidates the resolved function
+    A._get_x = lambda self: self._x + 10
+    assert a.x == 11
+    assert b.x == 2
+    del B._get_x
+    assert b.x == 11
+
+    # Renaming the member uses the new method names
+    A.x.name = "y"
+    A._get_y = lambda self: "y"
+    assert A.x.__get__(a, A) == "y"
+
+    # Non function attributes go through the normal lookup
+    A._get_y = staticmethod(lambda: "static")
+    assert A.x.__get__(a, A) == "static"
+
+
+def test_property_depends_on():
+    class Point(Atom):
+        x = Int()
+        y = Int()
+
+    class A(Atom):
+        calls = Int()
+        a = Int(1)
+        b = Int(2)
+        p = Instance(Point)
+
+        total = Property(cached=True, depends_on=("a", "p.x"))
+
+        def _get_total(self):
+            self.calls += 1
+            return self.a + self.b + (self.p.x if self.p else 0)
+
+    assert A.total.depends_on == ("a", "p.x")
+    assert not A.total.track
+    a = A()
+    assert a.total == 3
+    assert a.total == 3
+    assert a.calls == 1
+
+    a.a = 2
+    assert a.calls == 1  # Lazy
+    assert a.total == 4
+    assert a.calls == 2
+
+    # Not a dependency
+    a.b = 3
+    assert a.total == 4
+
+    a.p = Point(x=1)
+    assert a.total == 6
+    a.p.x = 2
+    assert a.total == 7
+
+    changes = []
+    a.observe("total", changes.append)
+    a.a = 3
+    assert len(changes) == 1
+    assert changes[0]["type"] == "property"
+    assert changes[0]["oldvalue"] == 7
+    assert changes[0]["value"] == 8
+
+    # Inherited dependencies
+    class B(A):
+        pass
+
+    b = B()
+    assert b.total == 3
+    b.a = 5
+    assert b.total == 7
+
+    with pytest.raises(TypeError):
+        Property(depends_on=("a",))
+
+    with pytest.raises(AttributeError):
+
+        class C(Atom):
+            p = Property(cached=True, depends_on=("missing",))
+
+
+def test_property_track():
+    class A(Atom):
+        calls = Int()
+        use_a = Bool(True)
+        a = Int(1)
+        b = Int(2)
+
+        value = Property(cached=True, track=True)
+
+        def _get_value(self):
+            self.calls += 1
+            return self.a if self.use_a else self.b
+
+    assert A.value.track
+    a = A()
+    assert a.value == 1
+    assert a.calls == 1
+    a.b = 3  # Not read
+    assert a.value == 1
+    assert a.calls == 1
+    a.a = 2
+    assert a.value == 2
+    assert a.calls == 2
+
+    a.use_a = False
+    assert a.value == 3
+    assert a.calls == 3
+    a.a = 4  # No longer read
+    assert a.value == 3
+    assert a.calls == 3
+    a.b = 5
+    assert a.value == 5
+
+
+def test_property_cache_stats():
+    class A(Atom):
+        value = Property(cached=True)
+
+        def _get_value(self):
+            return 1
+
+    a = A()
+    assert a.value == 1
+    assert a.value == 1
+    assert A.value.cache_stats == {"hits": 1, "misses": 1, "evictions": 0}
+    A.value.reset(a)
+    assert a.value == 1
+    assert A.value.cache_stats["misses"] == 2
+    A.value.reset_cache_stats()
+    assert A.value.cache_stats == {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def test_property_cache_budget():
+    class A(Atom):
+        n = Int()
+        data = Property(cached=True)
+
+        def _get_data(self):
+            return "x" * 1000 + str(self.n)
+
+    try:
+        set_property_cache_budget(3000)
+        items = [A(n=i) for i in range(5)]
+        for a in items:
+            assert a.data.endswith(str(a.n))
+        info = property_cache_info()
+        assert info["budget"] == 3000
+        assert info["count"] == 2
+        assert info["size"] <= 3000
+        assert A.data.cache_stats == {"hits": 0, "misses": 5, "evictions": 3}
+        assert A.data.get_slot(items[0]) is None
+
+        # Most recently used is kept
+        assert items[4].data.endswith("4")
+        assert A.data.cache_stats["hits"] == 1
+
+        # Evicted values are computed again
+        assert items[0].data.endswith("0")
+        assert A.data.cache_stats["misses"] == 6
+
+        # Releasing the atom releases the value
+        del items, a
+        assert property_cache_info()["count"] == 0
+
+        # Reading the slot returns the value, not the cache node
+        a = A()
+        value = a.data
+        assert A.data.get_slot(a) is value
+        A.data.del_slot(a)
+        assert property_cache_info()["count"] == 0
+        A.data.reset(a)
+        assert property_cache_info()["count"] == 0
+
+        # A custom size function can account for the items of containers
+        set_property_cache_budget(100, sizeof=len)
+        assert a.data == value
+        assert property_cache_info()["size"] > len(value)
+        with pytest.raises(TypeError):
+            set_property_cache_budget(100, sizeof=1)
+    finally:
+        set_property_cache_budget(0)
+
+
 def test_range():
     class A(Atom):
         x = Range(low=1)
@@ -633,3 +1214,298 @@ def test_float_range():
 
     a.z = 12
     assert a.z == 12
+
+
+def test_member_stats():
+    class A(Atom):
+        x = Int()
+        y = Range(0, 10)
+
+        @observe("x")
+        def _on_x(self, change):
+            pass
+
+    a = A()
+    a.x = 1
+    assert stats_snapshot() == {}
+    try:
+        enable_stats(A)
+        a.x
+        a.x = 2
+        b = A()
+        b.y
+        with pytest.raises(TypeError):
+            b.y = "1"
+        with pytest.raises(ValueError):
+            b.y = 11
+
+        class B(A):
+            z = Int()
+
+        # Only enabled for existing classes. B shares x with A so it is
+        # counted for A.
+        B().z = 1
+        B().x = 1
+
+        snapshot = stats_snapshot()
+        assert B not in snapshot
+        assert snapshot[A]["x"] == {
+            "reads": 1,
+            "writes": 2,
+            "defaults": 0,
+            "validation_failures": 0,
+            "notifications": 2,
+            "observer_calls": 2,
+        }
+        assert snapshot[A]["y"] == {
+            "reads": 1,
+            "writes": 2,
+            "defaults": 1,
+            "validation_failures": 2,
+            "notifications": 0,
+            "observer_calls": 0,
+        }
+
+        reset_stats()
+        assert stats_snapshot()[A]["x"]["reads"] == 0
+
+        # Enable globally
+        enable_stats()
+
+        class C(A):
+            z = Int()
+
+        C().z = 1
+        snapshot = stats_snapshot()
+        assert snapshot[C]["z"]["writes"] == 1
+        assert snapshot[B]["z"]["writes"] == 0
+    finally:
+        disable_stats()
+    assert stats_snapshot() == {}
+
+
+def test_member_stats_observer_calls():
+    class A(Atom):
+        x = Int()
+
+    a = A(x=0)
+    calls = []
+
+    def observer(change):
+        calls.append(change)
+
+    a.observe("x", observer)
+    a.observe("x", lambda change: calls.append(None), ChangeType.CREATE)
+    try:
+        enable_stats(A)
+        a.x = 1
+        a.x = 2
+        # Only observers that were called are counted
+        assert len(calls) == 2
+        assert stats_snapshot()[A]["x"]["observer_calls"] == 2
+
+        # Observers may disable stats while being notified
+        a.observe("x", lambda change: disable_stats())
+        a.x = 3
+        assert stats_snapshot() == {}
+    finally:
+        disable_stats()
+
+
+def test_c_api():
+    import ctypes
+    from zatom import api, get_include
+
+    assert os.path.exists(os.path.join(get_include(), "zatom.h"))
+    assert api.C_API_VERSION == 1
+
+    obj = ctypes.py_object
+    ptr = ctypes.c_void_p
+
+    class CApi(ctypes.Structure):
+        _fields_ = [
+            ("version", ctypes.c_uint32),
+            ("size", ctypes.c_uint32),
+            ("member_lookup", ctypes.PYFUNCTYPE(ptr, obj, obj)),
+            ("member_get", ctypes.PYFUNCTYPE(obj, obj, obj)),
+            ("member_set", ctypes.PYFUNCTYPE(ctypes.c_int, obj, obj, obj)),
+            ("member_del", ctypes.PYFUNCTYPE(ctypes.c_int, obj, obj)),
+            ("slot_read", ctypes.PYFUNCTYPE(ctypes.c_int, obj, obj, ctypes.POINTER(ctypes.c_uint64))),
+            ("slot_write", ctypes.PYFUNCTYPE(ctypes.c_int, obj, obj, ctypes.c_uint64)),
+            ("observe", ctypes.PYFUNCTYPE(ctypes.c_int, obj, obj, obj, ctypes.c_uint8)),
+            ("unobserve", ctypes.PYFUNCTYPE(ctypes.c_int, obj, obj, obj)),
+            ("notify", ctypes.PYFUNCTYPE(ctypes.c_int, obj, ctypes.POINTER(obj), ctypes.POINTER(obj), ctypes.c_ssize_t)),
+        ]
+
+    get_pointer = ctypes.pythonapi.PyCapsule_GetPointer
+    get_pointer.restype = ptr
+    get_pointer.argtypes = [obj, ctypes.c_char_p]
+    capi = CApi.from_address(get_pointer(api._C_API, b"zatom.api._C_API"))
+    assert capi.version == api.C_API_VERSION
+    assert capi.size == ctypes.sizeof(CApi)
+
+    class A(Atom):
+        flag = Bool()
+        option = Enum("a", "b", "c")
+        name = Str()
+
+    a = A()
+
+    # Lookup returns a borrowed reference to the member
+    member = ctypes.cast(capi.member_lookup(A, "name"), obj).value
+    assert member is A.name
+    with pytest.raises(AttributeError):
+        capi.member_lookup(A, "missing")
+    with pytest.raises(TypeError):
+        capi.member_lookup(a, "name")
+
+    # Get and set still validate and notify
+    changes = []
+    a.observe("name", changes.append)
+    assert capi.member_get(A.name, a) == ""
+    assert capi.member_set(A.name, a, "x") == 0
+    assert a.name == "x"
+    assert changes[-1]["type"] == "update"
+    with pytest.raises(TypeError):
+        capi.member_set(A.name, a, 1)
+    assert capi.member_del(A.name, a) == 0
+    assert changes[-1]["type"] == "delete"
+
+    # Raw static slot access
+    data = ctypes.c_uint64()
+    assert capi.slot_read(A.flag, a, ctypes.byref(data)) == 0
+    a.flag = True
+    assert capi.slot_read(A.flag, a, ctypes.byref(data)) == 1
+    assert data.value == 1
+    assert capi.slot_write(A.option, a, 2) == 0
+    assert a.option == "c"
+    assert a.flag is True  # Neighbouring data is untouched
+    with pytest.raises(ValueError):
+        capi.slot_write(A.flag, a, 2)
+    with pytest.raises(TypeError):
+        capi.slot_read(A.name, a, ctypes.byref(data))
+
+    # Observers and batch notifications
+    events = []
+    assert capi.observe(a, "custom", events.append, 0xFF) == 0
+    topics = (obj * 3)("custom", "name", "custom")
+    args = (obj * 3)({"value": 1}, {"value": 2}, {"value": 3})
+    assert capi.notify(a, topics, args, 3) == 0
+    assert events == [{"value": 1}, {"value": 3}]
+    assert changes[-1] == {"value": 2}
+    assert capi.unobserve(a, "custom", events.append) == 0
+    assert capi.notify(a, topics, args, 1) == 0
+    assert len(events) == 2
+
+
+def test_compare_eq():
+    class Point:
+        def __init__(self, x):
+            self.x = x
+
+        def __eq__(self, other):
+            return isinstance(other, Point) and other.x == self.x
+
+    class A(Atom):
+        ident = Value()
+        name = Str().tag(compare="eq")
+        items = Tuple().tag(compare="eq")
+        value = Value().tag(compare="eq")
+        point = Value().tag(compare="__eq__")
+
+    assert A.name.metadata == {"compare": "eq"}
+    changes = []
+    a = A()
+    for name in ("ident", "name", "items", "value", "point"):
+        a.observe(name, changes.append)
+
+    # Equal but distinct objects
+    s = "".join(["ab", "c"])
+    a.name = "abc"
+    a.name = s
+    assert a.name is not s
+    assert len(changes) == 1
+    a.name = "abcd"
+    assert len(changes) == 2
+    assert changes[-1]["oldvalue"] == "abc"
+
+    a.items = (1, 2.5, ("x",))
+    a.items = (1, float("2.5"), tuple(["x"]))
+    assert len(changes) == 3
+    a.items = (1, 2.5, ("y",))
+    assert len(changes) == 4
+
+    # Only builtins are compared by value with eq
+    a.value = 1.5
+    a.value = float("1.5")
+    assert len(changes) == 5
+    a.value = Point(1)
+    a.value = Point(1)
+    assert len(changes) == 7
+    a.value = (Point(1),)
+    a.value = (Point(1),)
+    assert len(changes) == 9
+
+    # __eq__ is opt in
+    a.point = Point(1)
+    a.point = Point(1)
+    assert len(changes) == 10
+    a.point = Point(2)
+    assert len(changes) == 11
+
+    # Identity is the default
+    a.ident = (1, 2)
+    a.ident = tuple([1, 2])
+    assert len(changes) == 13
+
+    with pytest.raises(ValueError):
+        Str().tag(compare="approx")
+    with pytest.raises(TypeError):
+        Str().tag(compare=1)
+
+
+def test_compare_class_policy():
+    class Point:
+        def __eq__(self, other):
+            return isinstance(other, Point)
+
+    class A(Atom, compare="eq"):
+        x = Tuple()
+        y = Tuple().tag(compare="identity")
+
+    class B(A):
+        z = Tuple()
+
+    class C(A, compare="__eq__"):
+        pass
+
+    changes = []
+    for cls in (A, B):
+        obj = cls()
+        obj.observe("x", changes.append)
+        obj.observe("y", changes.append)
+        obj.x = (1, 2)
+        obj.x = tuple([1, 2])
+        obj.y = (1, 2)
+        obj.y = tuple([1, 2])
+        assert len(changes) == 3
+        changes.clear()
+
+    # Members without a compare mode get the subclass policy
+    b = B()
+    b.observe("z", changes.append)
+    b.z = (1,)
+    b.z = tuple([1])
+    assert len(changes) == 2
+
+    # Members that already have a compare mode keep it
+    c = C()
+    c.observe("x", changes.append)
+    c.x = (Point(1),)
+    c.x = (Point(1),)
+    assert len(changes) == 4
+
+    with pytest.raises(ValueError):
+
+        class D(Atom, compare="approx"):
+            pass
@@ -7,12 +7,14 @@ from zatom.api import (
     Str,
     Value,
     Int,
+    Float,
     Bool,
     Enum,
     List,
     add_member,
     DefaultValue,
     set_default,
+    observe,
 )
 
 
@@ -115,8 +117,9 @@ def test_atom_subclass():
     class B(A):
         name = Str()
 
-    assert B.id.index == 1
-    assert B.name.index == 0
+    # Inherited members keep their layout
+    assert B.id.index == 0
+    assert B.name.index == 1
 
     b = B(id=1)
     assert b.get_id() == 1
@@ -126,8 +129,10 @@ def test_atom_subclass():
     assert B.__slot_count__ == 2
 
     assert b.get_member("name") is B.name
-    # The member is cloned so is A.id won't work
-    assert isinstance(b.get_member("id"), Int)
+    # The member is not overridden so it is shared
+    assert b.get_member("id") is A.id
+    assert B.id is A.id
+    assert vars(B)["id"] is vars(A)["id"]
 
 
 def test_atom_subclass_redef():
@@ -166,6 +171,87 @@ def test_atom_subclass_packed():
     assert b.name == "default"
 
 
+def test_atom_subclass_shared_members():
+    from zatom.api import observe
+
+    class A(Atom):
+        a = Int(1)
+        b = Int(2)
+        c = Int(3)
+        d = Int(4)
+        e = Int(5)
+
+    class B(A):
+        b = set_default(20)
+
+        def _default_c(self):
+            return 30
+
+        def _observe_d(self, change):
+            pass
+
+        @observe("e")
+        def on_e(self, change):
+            pass
+
+    # Only overridden members are cloned
+    assert B.a is A.a
+    for name in "bcde":
+        assert getattr(B, name) is not getattr(A, name)
+        assert getattr(B, name).index == getattr(A, name).index
+
+    b = B()
+    assert (b.a, b.b, b.c) == (1, 20, 30)
+    a = A()
+    assert (a.a, a.b, a.c) == (1, 2, 3)
+
+    # A deep hierarchy shares the members of the root
+    cls = A
+    for i in range(50):
+        cls = type(f"A{i}", (cls,), {})
+    assert vars(cls)["a"] is vars(A)["a"]
+    assert cls.__slot_count__ == A.__slot_count__
+    obj = cls(a=10)
+    assert obj.a == 10 and obj.e == 5
+
+
+def test_atom_subclass_shared_member_runtime_changes():
+    calls = []
+
+    class A(Atom):
+        x = Int()
+
+    class B(A):
+        pass
+
+    class C(A):
+        x = set_default(2)
+
+    # Reading the member does not change the class
+    assert B.x is A.x
+    assert B.members()["x"] is A.x
+    assert B.get_member("x") is A.x
+    assert vars(B)["x"] is vars(A)["x"]
+
+    # The member is shared so changes apply to every class using it
+    B.x.add_static_observer(lambda change: calls.append(change["object"]))
+    assert B.x is A.x
+    assert A.x.has_observers()
+    assert not C.x.has_observers()
+
+    a = A()
+    b = B()
+    c = C()
+    a.x = 1
+    b.x = 1
+    c.x = 1
+    assert calls == [a, b]
+
+    B.x.tag(foo=True)
+    assert A.x.metadata == {"foo": True}
+    assert C.x.metadata is None
+
+
 def test_atom_subclass_increase_slots():
     class A(Atom):
         a = Str()
@@ -204,6 +290,161 @@ def test_atom_weakref_slots():
     assert ref() is None
 
 
+def test_atom_gc_untracked():
+    class A(Atom):
+        x = Int()
+        y = Float()
+        name = Str()
+        ok = Bool()
+
+    class B(Atom):
+        x = Int()
+        value = Value()
+
+    a = A()
+    assert not gc.is_tracked(a)
+    a.observe("x", print)
+    assert gc.is_tracked(a)
+    assert gc.is_tracked(B())
+
+    # Scalar subclasses with a __dict__ can refer back to the atom
+    class MyInt(int):
+        pass
+
+    a = A()
+    a.x = 1
+    assert not gc.is_tracked(a)
+    value = MyInt(2)
+    a.x = value
+    assert gc.is_tracked(a)
+    class Marker:
+        pass
+
+    value.owner = a
+    value.marker = Marker()
+    ref = weakref.ref(value.marker)
+    del a, value
+    gc.collect()
+    assert ref() is None
+
+
+def test_atom_freelist():
+    class A(Atom, freelist=2):
+        x = Int()
+        items = List()
+
+    assert A.__freelist__ == 2
+    a = A(x=1, items=[1])
+    addr = id(a)
+    del a
+    b = A()
+    assert id(b) == addr  # Memory was reused
+    assert b.x == 0
+    assert b.items == []
+    b.observe("x", print)
+    del b
+
+    # Reserve only fills the free list up to its limit
+    with pytest.raises(ValueError):
+        A.reserve(10)
+    assert A.__freelist__ == 2
+    A.__freelist__ = 10
+    A.reserve(10)
+    assert A.memory_report()["free_instances"] == 10
+    items = [A(x=i) for i in range(20)]
+    assert [a.x for a in items] == list(range(20))
+    del items
+    A.__freelist__ = 0
+
+    # Instances in the free list do not keep the class alive
+    class D(Atom, freelist=4):
+        x = Int()
+
+    D.reserve(2)
+    d = D()
+    del d
+    assert D.memory_report()["free_instances"] == 2
+    ref = weakref.ref(D)
+    del D
+    gc.collect()
+    assert ref() is None
+
+    with pytest.raises(TypeError):
+
+        class B(Atom, freelist=2):
+            __slots__ = ("y",)
+
+    class C(Atom, enable_weakrefs=True):
+        pass
+
+    with pytest.raises(TypeError):
+        C.reserve(1)
+
+
+def test_atom_slot_reads():
+    changes = []
+
+    class A(Atom, slot_reads=True):
+        x = Int(1)
+        name = Str()
+        value = Value()
+        items = List()
+
+        @observe("x")
+        def on_x(self, change):
+            changes.append(change["type"])
+
+    # Plain slots are read through member descriptors
+    assert type(A.__dict__["x"]).__name__ == "member_descriptor"
+    assert isinstance(A.__dict__["items"], List)
+    # The class still gives the member
+    assert A.x is A.get_member("x")
+    assert A.x.index == 0
+
+    a = A()
+    # Defaults are created on the first read
+    assert changes == []
+    assert a.x == 1
+    assert changes == ["create"]
+    assert a.name == ""
+    assert a.value is None
+    assert a.items == []
+
+    # Writes are still validated
+    with pytest.raises(TypeError):
+        a.x = "1"
+    a.x = 2
+    assert a.x == 2
+    assert changes == ["create", "update"]
+    a.name = "a"
+    assert a.name == "a"
+    del a.x
+    assert changes == ["create", "update", "delete"]
+    assert a.x == 1
+    with pytest.raises(AttributeError):
+        a.missing
+
+    # Subclasses read through their own descriptors
+    class B(A):
+        y = Int(3)
+
+    assert type(B.__dict__["y"]).__name__ == "member_descriptor"
+    assert B.y is B.get_member("y")
+    b = B(x=4)
+    assert b.x == 4
+    assert b.y == 3
+    with pytest.raises(TypeError):
+        b.y = "3"
+
+    with pytest.raises(TypeError):
+
+        class C(Atom, slot_reads=True):
+            x = Int()
+
+            def __getattr__(self, name):
+                return None
+
+
 def test_multiple_subclass():
     class Obj(Atom):
         id = Int()
@@ -256,6 +497,24 @@ def test_add_member_static_storage():
     assert a.b is False
 
 
+def test_add_member_acyclic_instances():
+    class A(Atom):
+        a = Int()
+
+    a = A()
+    assert not gc.is_tracked(a)
+    # Scalars cannot form cycles so live instances are fine
+    add_member(A, "b", Int())
+    with pytest.raises(TypeError):
+        add_member(A, "c", Value())
+    assert A.get_member("c") is None
+    del a
+
+    add_member(A, "c", Value())
+    a = A()
+    assert gc.is_tracked(a)
+
+
 def test_set_default():
 
     class A(Atom):  # type: ignore
@@ -1,5 +1,7 @@
+import gc
+import weakref
 import pytest
-from zatom.api import Atom, Int, Typed, Enum, ChangeType, observe
+from zatom.api import Atom, Int, Typed, Enum, List, Dict, Set, ChangeType, observe
 
 
 def test_dynamic_observe():
@@ -140,6 +142,64 @@ def test_observe_extended_decorator():
                 pass
 
 
+def test_observe_extended_path():
+    changes = []
+
+    class C(Atom):
+        z = Int()
+
+    class B(Atom):
+        c = Typed(C)
+
+    class A(Atom):
+        b = Typed(B)
+
+        @observe("b.c.z")
+        def on_change(self, change):
+            changes.append((self, change["object"], change["value"]))
+
+    a1 = A(b=B(c=C()))
+    a2 = A(b=B(c=C()))
+    a1.b.c.z = 1
+    a2.b.c.z = 2
+    assert changes == [(a1, a1.b.c, 1), (a2, a2.b.c, 2)]
+
+    # Replacing a link in the middle only rebinds the rest of the path
+    changes.clear()
+    old_c = a1.b.c
+    a1.b.c = C()
+    old_c.z = 3
+    assert changes == []
+    a1.b.c.z = 4
+    assert changes == [(a1, a1.b.c, 4)]
+    assert not old_c.has_observers("z")
+
+    # Replacing the first link
+    changes.clear()
+    old_b = a1.b
+    a1.b = B()
+    assert not old_b.has_observers("c")
+    a1.b.c = C()
+    a1.b.c.z = 5
+    assert changes == [(a1, a1.b.c, 5)]
+
+    # Shared models notify each owner
+    changes.clear()
+    shared = B(c=C())
+    a1.b = shared
+    a2.b = shared
+    shared.c.z = 6
+    assert sorted(o is a1 for o, _, _ in changes) == [False, True]
+
+    del a1.b
+    changes.clear()
+    shared.c.z = 7
+    assert changes == [(a2, shared.c, 7)]
+
+    with pytest.raises(TypeError):
+        observe("b..z")
+
+
 def test_observe_method():
     changes = []
 
@@ -174,6 +234,84 @@ def test_observe_method():
     assert changes[-1] == {"type": "create", "name": "y", "object": b, "value": 2}
 
 
+def test_observe_method_inheritance():
+    calls = []
+
+    class A(Atom):
+        x = Int()
+
+        @observe("x")
+        def on_x(self, change):
+            calls.append(("A", self, change["value"]))
+
+    class B(A):
+        @observe("x")
+        def on_x_b(self, change):
+            calls.append(("B", self, change["value"]))
+
+    class C(B):
+        x = Int(1)
+
+    assert A.x.has_observer(A.on_x)
+    assert not A.x.has_observer(B.on_x_b)
+    assert B.x.has_observer(A.on_x)
+    assert B.x.has_observer(B.on_x_b)
+    assert C.x.has_observer(A.on_x)
+    assert not A.x.has_observer(A.on_x, ChangeType.CONTAINER)
+
+    b = B()
+    b.x = 2
+    assert calls == [("A", b, 2), ("B", b, 2)]
+
+    calls.clear()
+    c = C()
+    c.x
+    assert calls == [("A", c, 1), ("B", c, 1)]
+
+    # Manual notifications go to the handlers with the atom as self
+    calls.clear()
+    b.notify("x", {"value": 3})
+    assert calls == [("A", b, 3), ("B", b, 3)]
+
+
+def test_remove_observe_handler():
+    calls = []
+
+    class A(Atom):
+        x = Int()
+
+        @observe("x")
+        def on_x(self, change):
+            calls.append("on_x")
+
+        @observe("x")
+        def on_x_once(self, change):
+            calls.append("once")
+            # Removing handlers while they are being called
+            A.x.remove_static_observer(A.on_x_once)
+            A.x.remove_static_observer(A.on_x_last)
+
+        @observe("x")
+        def on_x_last(self, change):
+            calls.append("last")
+
+    a = A()
+    a.x = 1
+    assert calls == ["on_x", "once"]
+    assert not A.x.has_observer(A.on_x_once)
+
+    calls.clear()
+    a.x = 2
+    assert calls == ["on_x"]
+
+    A.x.remove_static_observer(A.on_x)
+    assert not A.x.has_observer(A.on_x)
+    assert not A.x.has_observers()
+    calls.clear()
+    a.x = 3
+    assert calls == []
+
+
 def test_observe_enum():
     changes = []
 
@@ -259,3 +397,345 @@ def test_observe_change_type():
         "oldvalue": 0,
         "value": 1,
     }
+
+
+def test_observe_container_changes():
+    class A(Atom):
+        items = List(int)
+        mapping = Dict(str, int)
+        tags = Set(str)
+
+    changes = []
+    default_changes = []
+
+    def observer(change):
+        changes.append(change)
+
+    a = A()
+    a.items = [1]
+    a.mapping = {}
+    a.tags = set()
+    a.observe(("items", "mapping", "tags"), default_changes.append)
+
+    # Not sent unless subscribed to explicitly
+    a.items.append(2)
+    assert changes == [] and default_changes == []
+
+    a.observe(("items", "mapping", "tags"), observer, ChangeType.CONTAINER)
+    a.items.append(3)
+    assert changes[-1] == {
+        "type": "container",
+        "object": a,
+        "name": "items",
+        "value": [1, 2, 3],
+        "operation": "append",
+        "index": 2,
+        "items": (3,),
+    }
+    a.items.insert(0, 0)
+    assert changes[-1]["operation"] == "insert"
+    assert changes[-1]["index"] == 0 and changes[-1]["items"] == (0,)
+    a.items.extend([4, 5])
+    assert changes[-1]["operation"] == "extend"
+    assert changes[-1]["index"] == 4 and changes[-1]["items"] == [4, 5]
+    a.items[0] = 10
+    assert changes[-1]["operation"] == "__setitem__"
+    assert changes[-1]["index"] == 0 and changes[-1]["items"] == (10,)
+    a.items[1:3] = [6, 7]
+    assert changes[-1]["index"] == slice(1, 3) and changes[-1]["items"] == [6, 7]
+    del a.items[0]
+    assert changes[-1]["operation"] == "__delitem__" and changes[-1]["index"] == 0
+    assert "items" not in changes[-1]
+    a.items += [8]
+    assert changes[-1]["operation"] == "__iadd__" and changes[-1]["items"] == [8]
+    assert a.items.pop() == 8
+    assert changes[-1]["operation"] == "pop" and changes[-1]["items"] == (8,)
+    a.items.sort()
+    assert changes[-1]["operation"] == "sort" and a.items == [3, 4, 5, 6, 7]
+
+    # Invalid items are rejected before any notification
+    n = len(changes)
+    with pytest.raises(TypeError):
+        a.items.append("x")
+    assert len(changes) == n
+
+    a.mapping["a"] = 1
+    assert changes[-1]["name"] == "mapping"
+    assert changes[-1]["operation"] == "__setitem__"
+    assert changes[-1]["index"] == "a" and changes[-1]["items"] == (1,)
+    del a.mapping["a"]
+    assert changes[-1]["operation"] == "__delitem__" and changes[-1]["index"] == "a"
+
+    a.tags.add("x")
+    assert changes[-1]["name"] == "tags"
+    assert changes[-1]["operation"] == "add" and changes[-1]["items"] == ("x",)
+    a.tags.update(["y"], {"z"})
+    assert changes[-1]["operation"] == "update" and changes[-1]["items"] == {"y", "z"}
+    a.tags -= {"x"}
+    assert changes[-1]["operation"] == "__isub__" and a.tags == {"y", "z"}
+    a.tags.symmetric_difference_update({"z", "w"})
+    assert a.tags == {"y", "w"}
+
+    # The default observer only saw the assignments
+    assert default_changes == []
+
+    n = len(changes)
+    a.unobserve("items", observer)
+    a.items.append(10)
+    assert len(changes) == n
+
+
+def test_observe_container_changes_subclass():
+    class A(Atom):
+        items = List(int)
+
+    class B(A):
+        @observe("items", change_types=ChangeType.CONTAINER)
+        def on_items(self, change):
+            changes.append((change["operation"], change["items"]))
+
+    changes = []
+    a = A()
+    a.items.append(1)
+    assert changes == []
+
+    b = B()
+    b.items.append(1)
+    assert changes == [("append", (1,))]
+
+
+def test_observe_weak_method():
+    import gc
+    import weakref
+
+    class Model(Atom):
+        x = Int()
+
+    class View(Atom):
+        changes = List()
+
+        def on_change(self, change):
+            self.changes.append(change["value"])
+
+    class Handler:
+        def __init__(self):
+            self.changes = []
+
+        def on_change(self, change):
+            self.changes.append(change["value"])
+
+    m = Model()
+    v = View()
+    # Bound methods of atoms are weak by default
+    m.observe("x", v.on_change)
+    assert m.has_observer("x", v.on_change)
+    m.x = 1
+    assert v.changes == [1]
+
+    del v
+    gc.collect()
+    # The dead observer is removed on the next notify
+    assert m.has_observers("x")
+    m.x = 2
+    assert not m.has_observers("x")
+
+    # Unobserve with the bound method
+    v = View()
+    m.observe("x", v.on_change)
+    m.unobserve("x", v.on_change)
+    m.x = 3
+    assert v.changes == []
+
+    # Strong references keep the owner alive
+    m.observe("x", v.on_change, weak=False)
+    view_ref = v.changes
+    del v
+    gc.collect()
+    m.x = 4
+    assert view_ref == [4]
+    m.unobserve("x")
+
+    # Other objects need to be requested weak explicitly
+    h = Handler()
+    m.observe("x", h.on_change, weak=True)
+    m.x = 5
+    assert h.changes == [5]
+    r = weakref.ref(h)
+    del h
+    gc.collect()
+    assert r() is None
+    m.x = 6
+    assert not m.has_observers("x")
+
+    with pytest.raises(TypeError):
+        m.observe("x", lambda change: None, weak=True)
+
+
+def test_tracer(tmp_path):
+    import json
+    from zatom import tracer
+
+    class Model(Atom):
+        x = Int()
+        y = Int()
+
+    def on_x(change):
+        change["object"].y = change["value"] * 2
+
+    def on_y(change):
+        pass
+
+    m = Model(x=0, y=0)
+    m.observe("x", on_x)
+    m.observe("y", on_y)
+
+    tracer.enable(capacity=16)
+    try:
+        m.x = 1
+    finally:
+        tracer.disable()
+
+    events = json.loads(tracer.dumps())["traceEvents"]
+    assert [e["name"] for e in events] == [
+        "test_tracer.<locals>.on_y",
+        "Model.y",
+        "test_tracer.<locals>.on_x",
+        "Model.x",
+    ]
+    on_y_span, y_span, on_x_span, x_span = events
+    assert all(e["ph"] == "X" for e in events)
+    assert x_span["args"]["parent"] == 0
+    assert x_span["args"]["change_type"] == "UPDATE"
+    assert on_x_span["args"]["parent"] == x_span["args"]["id"]
+    assert y_span["args"]["parent"] == on_x_span["args"]["id"]
+    assert on_y_span["args"]["parent"] == y_span["args"]["id"]
+    assert x_span["ts"] <= on_x_span["ts"] <= y_span["ts"]
+    assert x_span["dur"] >= on_x_span["dur"] >= y_span["dur"]
+
+    histograms = tracer.histograms()
+    assert set(histograms) == {on_x, on_y}
+    assert histograms[on_x]["count"] == 1
+    assert sum(histograms[on_y]["buckets"]) == 1
+
+    # Nothing is recorded while disabled
+    m.x = 2
+    assert len(json.loads(tracer.dumps())["traceEvents"]) == 4
+
+    # Only 1 in 3 root notifications are recorded and the ring buffer
+    # keeps the most recent spans
+    tracer.enable(capacity=4, sample=3)
+    try:
+        for i in range(9):
+            m.x = 10 + i
+    finally:
+        tracer.disable()
+    events = json.loads(tracer.dumps())["traceEvents"]
+    assert [e["name"] for e in events][-1] == "Model.x"
+    assert len(events) == 4
+    assert tracer.histograms()[on_x]["count"] == 3
+
+    path = tmp_path / "trace.json"
+    tracer.export(str(path))
+    assert json.loads(path.read_text())["traceEvents"] == events
+
+    tracer.clear()
+    assert json.loads(tracer.dumps())["traceEvents"] == []
+    assert tracer.histograms() == {}
+
+    # Bound methods of different objects share the histogram of the function
+    class Handler:
+        def on_x(self, change):
+            pass
+
+    handlers = [Handler() for i in range(3)]
+    for h in handlers:
+        m.observe("x", h.on_x)
+    tracer.enable(capacity=16)
+    try:
+        m.x = 100
+    finally:
+        tracer.disable()
+    histograms = tracer.histograms()
+    assert histograms[Handler.on_x]["count"] == 3
+    tracer.clear()
+
+    # Spans only keep names so traced atoms and their observers can be freed
+    class Temp(Atom):
+        x = Int()
+
+    t = Temp()
+    handler = Handler()
+    t.observe("x", handler.on_x)
+    refs = [weakref.ref(t), weakref.ref(Temp)]
+    tracer.enable(capacity=16)
+    try:
+        t.x = 1
+    finally:
+        tracer.disable()
+    del t, Temp
+    gc.collect()
+    assert [ref() for ref in refs] == [None, None]
+    names = [e["name"] for e in json.loads(tracer.dumps())["traceEvents"]]
+    assert names == ["test_tracer.<locals>.Handler.on_x", "Temp.x"]
+    tracer.clear()
+
+    with pytest.raises(ValueError):
+        tracer.enable(capacity=0)
+
+
+def test_compact_observer_pools():
+    import gc
+
+    class Model(Atom):
+        x = Int()
+
+    changes = []
+
+    def observer(change):
+        changes.append(change["value"])
+
+    keep = Model()
+    keep.observe("x", observer)
+
+    items = [Model() for i in range(100)]
+    for item in items:
+        item.observe("x", observer)
+    del items
+    gc.collect()
+
+    report = Model.memory_report()
+    assert report["pool_free_slots"] == 100
+    assert report["pool_chunks"] == 2
+    assert Model.compact_observer_pools() > 0
+    report = Model.memory_report()
+    assert report["pool_free_slots"] == 0
+    assert report["observer_pools"] == 1
+    # The pools are freed along with the chunk that held the released ones
+    assert report["pool_chunks"] == 1
+    assert Model.compact_observer_pools() == 0
+
+    # The remaining pool index is still valid
+    keep.x = 1
+    assert changes == [1]
+    keep.unobserve("x", observer)
+    keep.x = 2
+    assert changes == [1]
+
+    # Indexes freed in the middle are reused
+    a, b, c = Model(), Model(), Model()
+    for item in (a, b, c):
+        item.observe("x", observer)
+    del b
+    Model.compact_observer_pools()
+    assert Model.memory_report()["pool_free_slots"] == 1
+    b = Model()
+    b.observe("x", observer)
+    assert Model.memory_report()["pool_free_slots"] == 0
+
+    # Releasing many pools compacts automatically
+    items = [Model() for i in range(1000)]
+    for item in items:
+        item.observe("x", observer)
+    del items
+    gc.collect()
+    assert Model.memory_report()["pool_free_slots"] < 1000
@@ -33,3 +33,49 @@ def test_sizeof():
 
     c = C()
     assert getsizeof(c) == 56
+
+
+def test_memory_report():
+    import gc
+    from zatom.api import atomref, memory_report
+
+    class A(Atom):
+        a = Bool()
+        b = Bool()
+        c = Bool()
+        x = Int()
+
+    report = A.memory_report()
+    assert report["instances"] == 0
+    assert report["instance_bytes"] == 0
+    assert report["slot_count"] == A.__slot_count__
+    assert report["static_slots"] == 1
+    assert report["static_bits_used"] == 6
+    assert report["static_bits_allocated"] == 64
+
+    items = [A() for i in range(10)]
+    report = A.memory_report()
+    assert report["instances"] == 10
+    assert report["instance_bytes"] == 10 * A.__basicsize__
+    assert report["atomrefs"] == 0
+
+    refs = [atomref(item) for item in items[:3]]
+    items[0].observe("x", lambda change: None)
+    report = A.memory_report()
+    assert report["atomrefs"] == 3
+    assert report["observer_pools"] >= 3
+    assert report["observer_pool_bytes"] > 0
+    assert report["pool_manager_bytes"] > 0
+
+    del refs
+    del items
+    gc.collect()
+    report = A.memory_report()
+    assert report["instances"] == 0
+    assert report["atomrefs"] == 0
+    assert report["pool_free_slots"] >= 3
+
+    # The module function reports every atom class
+    reports = memory_report()
+    assert reports[A] == report
+    assert Atom in reports
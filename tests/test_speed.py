@@ -1,3 +1,5 @@
+import gc
+import tracemalloc
 import pytest
 from atom import api as catom
 from zatom import api as zatom
@@ -24,6 +26,59 @@ def test_create_small_obj(benchmark, atom):
     benchmark.pedantic(Point, rounds=10000, iterations=100)
 
 
+@pytest.mark.parametrize("atom", (*atoms, "freelist"))
+@pytest.mark.benchmark(group="create-destroy")
+def test_create_destroy(benchmark, atom):
+    if atom == "freelist":
+
+        class Point(zatom.Atom, freelist=1000):
+            x = zatom.Int()
+            y = zatom.Int()
+            z = zatom.Int()
+
+        Point.reserve(1000)
+
+    else:
+
+        class Point(atom.Atom):
+            x = atom.Int()
+            y = atom.Int()
+            z = atom.Int()
+
+    def run():
+        items = [Point() for i in range(1000)]
+        del items
+
+    tracemalloc.start()
+    try:
+        benchmark.pedantic(run, rounds=100, iterations=10)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info["traced_memory_peak"] = peak
+
+
+@pytest.mark.parametrize("atom", (*atoms, "slots"))
+@pytest.mark.benchmark(group="gc-collect")
+def test_gc_collect(benchmark, atom):
+    if atom == "slots":
+
+        class Point:
+            __slots__ = ("x", "y", "name", "visible")
+
+    else:
+
+        class Point(atom.Atom):
+            x = atom.Int()
+            y = atom.Float()
+            name = atom.Str()
+            visible = atom.Bool()
+
+    items = [Point() for i in range(1_000_000)]
+    benchmark.pedantic(gc.collect, rounds=10, iterations=1)
+    del items
+
+
 @pytest.mark.parametrize("atom", (*atoms, "slots"))
 @pytest.mark.benchmark(group="getattr-int")
 def test_getattr_int(benchmark, atom):
@@ -43,6 +98,41 @@ def test_getattr_int(benchmark, atom):
     benchmark.pedantic(lambda: p.x, rounds=10000, iterations=100)
 
 
+@pytest.mark.benchmark(group="getattr-int")
+def test_getattr_int_slot_reads(benchmark):
+    class Point(zatom.Atom, slot_reads=True):
+        x = zatom.Int()
+
+    p = Point()
+    p.x = 1
+
+    benchmark.pedantic(lambda: p.x, rounds=10000, iterations=100)
+
+
+@pytest.mark.parametrize("atom", (*atoms, "slots", "slot_reads"))
+@pytest.mark.benchmark(group="getattr-str")
+def test_getattr_str(benchmark, atom):
+    if atom == "slots":
+
+        class Obj:
+            __slots__ = ("name",)
+
+    elif atom == "slot_reads":
+
+        class Obj(zatom.Atom, slot_reads=True):
+            name = zatom.Str()
+
+    else:
+
+        class Obj(atom.Atom):
+            name = atom.Str()
+
+    obj = Obj()
+    obj.name = "a"
+
+    benchmark.pedantic(lambda: obj.name, rounds=10000, iterations=100)
+
+
 @pytest.mark.parametrize("atom", (*atoms, "slots"))
 @pytest.mark.benchmark(group="getattr-bool")
 def test_getattr_bool(benchmark, atom):
@@ -82,6 +172,23 @@ def test_getattr_int_property(benchmark):
     benchmark.pedantic(lambda: p.x, rounds=10000, iterations=100)
 
 
+@pytest.mark.parametrize("atom", atoms)
+@pytest.mark.benchmark(group="getattr-int")
+def test_getattr_int_property_member(benchmark, atom):
+    class Point(atom.Atom):
+        __slots__ = ("_x",)
+
+        def _get_x(self):
+            return self._x
+
+        x = atom.Property()
+
+    p = Point()
+    p._x = 1
+
+    benchmark.pedantic(lambda: p.x, rounds=10000, iterations=100)
+
+
 @pytest.mark.parametrize("atom", (*atoms, "slots"))
 @pytest.mark.benchmark(group="setattr-int")
 def test_setattr_int(benchmark, atom):
@@ -104,6 +211,38 @@ def test_setattr_int(benchmark, atom):
     benchmark.pedantic(add, rounds=10000, iterations=100)
 
 
+@pytest.mark.benchmark(group="getattr-int")
+def test_getattr_int_stats(benchmark):
+    class Point(zatom.Atom):
+        x = zatom.Int()
+
+    p = Point()
+    p.x = 1
+    zatom.enable_stats(Point)
+    try:
+        benchmark.pedantic(lambda: p.x, rounds=10000, iterations=100)
+    finally:
+        zatom.disable_stats()
+
+
+@pytest.mark.benchmark(group="setattr-int")
+def test_setattr_int_stats(benchmark):
+    class Point(zatom.Atom):
+        x = zatom.Int()
+
+    p = Point()
+    p.x = 0
+    zatom.enable_stats(Point)
+
+    def add():
+        p.x += 1
+
+    try:
+        benchmark.pedantic(add, rounds=10000, iterations=100)
+    finally:
+        zatom.disable_stats()
+
+
 @pytest.mark.parametrize("atom", (*atoms, "slots"))
 @pytest.mark.benchmark(group="setattr-bool")
 def test_setattr_bool(benchmark, atom):
@@ -141,6 +280,28 @@ def test_setattr_coerced(benchmark, atom):
     benchmark.pedantic(run, rounds=10000, iterations=100)
 
 
+@pytest.mark.parametrize("atom", atoms)
+@pytest.mark.parametrize("n", (4, 64))
+@pytest.mark.benchmark(group="validate-enum")
+def test_validate_enum(benchmark, atom, n):
+    items = tuple(f"item-{i}" for i in range(n))
+
+    class Obj(atom.Atom):
+        item = atom.Enum(*items)
+
+    p = Obj()
+    i = 0
+
+    def run():
+        nonlocal i
+        i += 1
+        if i == n:
+            i = 0
+        p.item = items[i]
+
+    benchmark.pedantic(run, rounds=10000, iterations=100)
+
+
 @pytest.mark.parametrize("atom", atoms)
 @pytest.mark.benchmark(group="validate-range")
 def test_validate_range(benchmark, atom):
@@ -199,6 +360,46 @@ def test_validate_set_int(benchmark, atom):
     benchmark.pedantic(update, rounds=100, iterations=10)
 
 
+@pytest.mark.parametrize("atom", atoms)
+@pytest.mark.parametrize("n", (100, 10_000))
+@pytest.mark.benchmark(group="validate-dict")
+def test_validate_dict_str_int(benchmark, atom, n):
+    class Obj(atom.Atom):
+        items = atom.Dict(atom.Str(), atom.Int())
+
+    obj = Obj()
+    value = {f"{i}": i for i in range(n)}
+    with pytest.raises(TypeError):
+        obj.items = {"1": "1"}  # Make sure its actually working
+
+    def update():
+        obj.items = value
+        del obj.items
+
+    rounds = max(10, 10_000 // n)
+    benchmark.pedantic(update, rounds=rounds, iterations=10)
+
+
+@pytest.mark.parametrize("atom", atoms)
+@pytest.mark.parametrize("n", (100, 10_000))
+@pytest.mark.benchmark(group="dict-update")
+def test_dict_update_str_int(benchmark, atom, n):
+    class Obj(atom.Atom):
+        items = atom.Dict(atom.Str(), atom.Int())
+
+    obj = Obj()
+    obj.items = {}
+    value = {f"{i}": i for i in range(n)}
+    with pytest.raises(TypeError):
+        obj.items.update({"1": "1"})  # Make sure its actually working
+
+    def update():
+        obj.items.update(value)
+
+    rounds = max(10, 10_000 // n)
+    benchmark.pedantic(update, rounds=rounds, iterations=10)
+
+
 @pytest.mark.parametrize("atom", atoms)
 @pytest.mark.benchmark(group="validate-tuple")
 def test_validate_tuple_str(benchmark, atom):
@@ -218,13 +419,14 @@ def test_validate_tuple_str(benchmark, atom):
 
 
 @pytest.mark.parametrize("atom", atoms)
+@pytest.mark.parametrize("n", (100, 10_000, 100_000, 1_000_000))
 @pytest.mark.benchmark(group="validate-list")
-def test_validate_list_int(benchmark, atom):
+def test_validate_list_int(benchmark, atom, n):
     class Obj(atom.Atom):
         items = atom.List(atom.Int())
 
     obj = Obj()
-    value = [i for i in range(100)]
+    value = [i for i in range(n)]
     with pytest.raises(TypeError):
         obj.items = ["1"]  # Make sure its actually working
 
@@ -232,7 +434,8 @@ def test_validate_list_int(benchmark, atom):
         obj.items = value
         del obj.items
 
-    benchmark.pedantic(update, rounds=100, iterations=10)
+    rounds = max(10, 100_000 // n)
+    benchmark.pedantic(update, rounds=rounds, iterations=10)
 
 
 @pytest.mark.parametrize("atom", atoms)
@@ -265,8 +468,9 @@ def test_typed_list_append_int(benchmark, atom):
 
 
 @pytest.mark.parametrize("atom", (catom, zatom, "slots"))
+@pytest.mark.parametrize("n", (3, 10_000, 100_000, 1_000_000))
 @pytest.mark.benchmark(group="list-extend")
-def test_typed_list_extend_int(benchmark, atom):
+def test_typed_list_extend_int(benchmark, atom, n):
     if atom == "slots":
 
         class Obj:
@@ -284,10 +488,49 @@ def test_typed_list_extend_int(benchmark, atom):
         with pytest.raises(TypeError):
             obj.items.extend(["1"])  # Make sure its actually working
 
+    value = [i for i in range(n)]
+
+    def reset():
+        obj.items = [0]
+
     def update():
-        obj.items.extend([1, 2, 3])
+        obj.items.extend(value)
 
-    benchmark.pedantic(update, rounds=100, iterations=10)
+    rounds = max(10, 100_000 // n)
+    benchmark.pedantic(update, setup=reset, rounds=rounds)
+
+
+@pytest.mark.parametrize("atom", atoms)
+@pytest.mark.benchmark(group="event-emit")
+def test_event_emit(benchmark, atom):
+    class Obj(atom.Atom):
+        clicked = atom.Event()
+
+    def observer(change):
+        pass
+
+    obj = Obj()
+    obj.clicked.bind(observer)
+
+    def update():
+        obj.clicked(1)
+
+    benchmark.pedantic(update, rounds=1000, iterations=10)
+
+
+@pytest.mark.benchmark(group="event-emit")
+def test_event_emit_member(benchmark):
+    class Obj(zatom.Atom):
+        clicked = zatom.Event()
+
+    def observer(change):
+        pass
+
+    obj = Obj()
+    obj.clicked.bind(observer)
+    emit = Obj.clicked.emit
+
+    benchmark.pedantic(lambda: emit(obj, 1), rounds=1000, iterations=10)
 
 
 @pytest.mark.parametrize("atom", atoms)
@@ -331,6 +574,28 @@ def test_observer_decorated_notify(benchmark, atom):
     benchmark.pedantic(update, rounds=1000, iterations=10)
 
 
+@pytest.mark.parametrize("atom", atoms)
+@pytest.mark.benchmark(group="observer-method-notify")
+def test_observer_method_notify(benchmark, atom):
+    class Base(atom.Atom):
+        x = atom.Int()
+
+        @atom.observe("x")
+        def on_change(self, change):
+            pass
+
+    class Obj(Base):
+        def _observe_x(self, change):
+            pass
+
+    obj = Obj()
+
+    def update():
+        obj.x += 1
+
+    benchmark.pedantic(update, rounds=1000, iterations=10)
+
+
 @pytest.mark.parametrize("atom", atoms)
 @pytest.mark.benchmark(group="observer-static-notify")
 def test_observer_static_notify(benchmark, atom):
@@ -366,3 +631,102 @@ def test_observer_dynamic_notify(benchmark, atom):
         obj.x += 1
 
     benchmark.pedantic(update, rounds=1000, iterations=10)
+
+
+@pytest.mark.benchmark(group="observer-dynamic-notify")
+def test_observer_dynamic_notify_traced(benchmark):
+    from zatom import tracer
+
+    class Obj(zatom.Atom):
+        x = zatom.Int()
+
+    def observer(change):
+        pass
+
+    obj = Obj()
+    obj.observe("x", observer)
+
+    def update():
+        obj.x += 1
+
+    tracer.enable(sample=100)
+    try:
+        benchmark.pedantic(update, rounds=1000, iterations=10)
+    finally:
+        tracer.disable()
+        tracer.clear()
+
+
+@pytest.mark.parametrize("atom", atoms)
+@pytest.mark.benchmark(group="observer-unchanged-notify")
+def test_observer_unchanged_notify(benchmark, atom):
+    # catom ignores the compare tag and notifies every write
+    class Obj(atom.Atom):
+        x = atom.Str().tag(compare="eq")
+
+    def observer(change):
+        pass
+
+    obj = Obj(x="value")
+    obj.observe("x", observer)
+    parts = ["val", "ue"]
+
+    def update():
+        obj.x = "".join(parts)
+
+    benchmark.pedantic(update, rounds=1000, iterations=10)
+
+
+def make_base(atom, n=50):
+    return type("Base", (atom.Atom,), {f"m{i}": atom.Int() for i in range(n)})
+
+
+@pytest.mark.parametrize("atom", atoms)
+@pytest.mark.benchmark(group="class-create-deep")
+def test_class_create_deep(benchmark, atom):
+    base = make_base(atom)
+
+    def create():
+        cls = base
+        for i in range(1000):
+            cls = type(f"Sub{i}", (cls,), {})
+
+    benchmark.pedantic(create, rounds=10, iterations=1)
+
+
+@pytest.mark.parametrize("atom", atoms)
+@pytest.mark.benchmark(group="class-create-wide")
+def test_class_create_wide(benchmark, atom):
+    base = make_base(atom)
+
+    def create():
+        for i in range(1000):
+            type(f"Sub{i}", (base,), {"extra": atom.Str()})
+
+    benchmark.pedantic(create, rounds=10, iterations=1)
+
+
+@pytest.mark.parametrize("atom", atoms)
+@pytest.mark.benchmark(group="class-create-import")
+def test_class_create_import(benchmark, atom):
+    # Simulate importing a module of generated widget classes
+    lines = ["class Base(Atom):"]
+    lines.extend(f"    m{i} = Int()" for i in range(50))
+    for i in range(1000):
+        parent = "Base" if i % 10 == 0 else f"W{i - 1}"
+        lines.append(f"class W{i}({parent}):")
+        lines.append(f"    w{i} = Str()")
+        if i % 5 == 0:
+            lines.append("    m0 = set_default(1)")
+    code = compile("\n".join(lines), "<widgets>", "exec")
+
+    def load():
+        namespace = {
+            "Atom": atom.Atom,
+            "Int": atom.Int,
+            "Str": atom.Str,
+            "set_default": atom.set_default,
+        }
+        exec(code, namespace)
+
+    benchmark.pedantic(load, rounds=10, iterations=1)
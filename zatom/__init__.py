@@ -1,5 +1,11 @@
+import os
 import sys
 
 def install():
     """ Install zatom as a replacement for atom"""
     sys.modules['atom'] = sys.modules['zatom']
+
+
+def get_include():
+    """ Get the directory of the zatom.h header for the C API"""
+    return os.path.join(os.path.dirname(__file__), "include")
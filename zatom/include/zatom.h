@@ -0,0 +1,90 @@
+/*
+ * C API of zatom for native extensions.
+ *
+ * Usage:
+ *
+ *     #include <zatom.h>
+ *
+ *     static ZAtom_CAPI *zatom_api = NULL;
+ *
+ *     // In the module init
+ *     zatom_api = ZAtom_Import();
+ *     if (!zatom_api) return NULL;
+ *
+ *     PyObject *name = PyUnicode_InternFromString("x");
+ *     PyObject *member = zatom_api->member_lookup((PyObject *)Py_TYPE(atom), name);
+ *     uint64_t data;
+ *     if (zatom_api->slot_read(member, atom, &data) == 1) { ... }
+ *
+ * The header can be found with zatom.get_include(). All functions must be
+ * called with the GIL held. Unless stated otherwise they return -1 or NULL
+ * with an exception set on error.
+ */
+#ifndef ZATOM_H
+#define ZATOM_H
+
+#include <Python.h>
+#include <stdint.h>
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/* Functions are only ever added to the end of the struct. Check the size
+ * before using a function added after the version you were built against. */
+#define ZATOM_CAPI_VERSION 1
+#define ZATOM_CAPI_NAME "zatom.api._C_API"
+
+/* Change types accepted by observe */
+#define ZATOM_CHANGE_CREATE 0x01
+#define ZATOM_CHANGE_UPDATE 0x02
+#define ZATOM_CHANGE_DELETE 0x04
+#define ZATOM_CHANGE_EVENT 0x08
+#define ZATOM_CHANGE_PROPERTY 0x10
+#define ZATOM_CHANGE_CONTAINER 0x20
+#define ZATOM_CHANGE_ANY 0xFF
+
+typedef struct {
+    uint32_t version;
+    uint32_t size;
+
+    /* Borrowed reference to the member of an atom class with the given name */
+    PyObject *(*member_lookup)(PyObject *cls, PyObject *name);
+
+    /* Get, set and delete the value of a member. These validate and notify. */
+    PyObject *(*member_get)(PyObject *member, PyObject *atom);
+    int (*member_set)(PyObject *member, PyObject *atom, PyObject *value);
+    int (*member_del)(PyObject *member, PyObject *atom);
+
+    /* Raw data of a member with static storage. slot_read returns 1 and
+     * writes the data if the slot is set or 0 if it is not. slot_write
+     * does not validate or notify. */
+    int (*slot_read)(PyObject *member, PyObject *atom, uint64_t *data);
+    int (*slot_write)(PyObject *member, PyObject *atom, uint64_t data);
+
+    /* Add or remove a dynamic observer of a topic */
+    int (*observe)(PyObject *atom, PyObject *topic, PyObject *observer, uint8_t change_types);
+    int (*unobserve)(PyObject *atom, PyObject *topic, PyObject *observer);
+
+    /* Notify the observers of n topics. A NULL change calls the observers
+     * without arguments. */
+    int (*notify)(PyObject *atom, PyObject *const *topics, PyObject *const *changes, Py_ssize_t n);
+} ZAtom_CAPI;
+
+static inline ZAtom_CAPI *ZAtom_Import(void)
+{
+    ZAtom_CAPI *api = (ZAtom_CAPI *)PyCapsule_Import(ZATOM_CAPI_NAME, 0);
+    if (api && api->version != ZATOM_CAPI_VERSION) {
+        PyErr_Format(PyExc_ImportError,
+                     "zatom C API version %u does not match the version %d this module was built with",
+                     api->version, ZATOM_CAPI_VERSION);
+        return NULL;
+    }
+    return api;
+}
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif /* ZATOM_H */
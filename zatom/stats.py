@@ -0,0 +1,18 @@
+""" Per member operation counters
+
+Usage::
+
+    from zatom import stats
+    stats.enable(MyModel)
+    ...
+    print(stats.snapshot())
+
+"""
+from zatom.api import (
+    enable_stats as enable,
+    disable_stats as disable,
+    reset_stats as reset,
+    stats_snapshot as snapshot,
+)
+
+__all__ = ("enable", "disable", "reset", "snapshot")
@@ -0,0 +1,32 @@
+""" Notification cascade tracer
+
+Usage::
+
+    from zatom import tracer
+    tracer.enable(sample=10)
+    ...
+    tracer.export("trace.json")  # Open in chrome://tracing or Perfetto
+    print(tracer.histograms())
+
+Histograms are keyed by the function an observer calls so bound methods of
+different objects share one. At most 1024 observers get a histogram. Spans
+only keep the names of classes, members and observers so a running tracer
+does not keep traced atoms alive.
+
+"""
+from zatom.api import (
+    enable_tracer as enable,
+    disable_tracer as disable,
+    clear_tracer as clear,
+    tracer_export as dumps,
+    tracer_histograms as histograms,
+)
+
+
+def export(path: str) -> None:
+    """Write the recorded spans to a Chrome trace event file"""
+    with open(path, "w") as f:
+        f.write(dumps())
+
+
+__all__ = ("enable", "disable", "clear", "dumps", "export", "histograms")